@@ -1,9 +1,13 @@
+import asyncio
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from backend.app.core.database import get_supabase_client
 from backend.app.core.config import settings
+from backend.app.core.auth import jwt_verifier, user_profile_cache
+from types import SimpleNamespace
 from typing import Optional, Dict, Any
 from supabase.client import Client
+import jwt
 
 security = HTTPBearer()
 
@@ -12,21 +16,41 @@ async def get_current_user_token(credentials: HTTPAuthorizationCredentials = Dep
 
 async def get_current_user(token: str = Depends(get_current_user_token)) -> Dict[str, Any]:
     """
-    Validates the token with Supabase Auth and returns the User object.
+    Validates the token and returns the User object.
     Also ensures the user exists in 'public.users'.
+
+    The token is verified locally when possible (see app/core/auth.py) and the
+    profile is served from a TTL cache keyed by auth_id; Supabase Auth is only
+    called when the token cannot be checked locally.
     """
     supabase = get_supabase_client()
     
     try:
         # 1. Validate Token and Get Auth User
-        user_response = supabase.auth.get_user(token)
-        if not user_response or not user_response.user:
-             raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials",
-                headers={"WWW-Authenticate": "Bearer"},
+        # (in a worker thread: a JWKS refresh is a blocking HTTP request)
+        claims = await asyncio.to_thread(jwt_verifier.verify, token) if settings.AUTH_LOCAL_JWT_VERIFY else None
+        if claims:
+            auth_id = claims["sub"]
+            cached = user_profile_cache.get(auth_id)
+            if cached is not None:
+                return cached
+            auth_user = SimpleNamespace(
+                id=auth_id,
+                email=claims.get("email"),
+                user_metadata=claims.get("user_metadata")
             )
-        auth_user = user_response.user
+        else:
+            user_response = supabase.auth.get_user(token)
+            if not user_response or not user_response.user:
+                 raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid authentication credentials",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            auth_user = user_response.user
+            cached = user_profile_cache.get(auth_user.id)
+            if cached is not None:
+                return cached
         
         # 2. Sync with public.users
         # Check if user exists
@@ -50,12 +74,20 @@ async def get_current_user(token: str = Depends(get_current_user_token)) -> Dict
             # Insert and get Query Response
             insert_res = supabase.table("users").insert(new_user).execute()
             if insert_res.data:
+                user_profile_cache.set(auth_user.id, insert_res.data[0])
                 return insert_res.data[0]
             else:
                  raise HTTPException(status_code=500, detail="Failed to create user profile")
         
+        user_profile_cache.set(auth_user.id, res.data[0])
         return res.data[0]
         
+    except jwt.PyJWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authentication credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     except Exception as e:
         # If it's already an HTTPException, re-raise
         if isinstance(e, HTTPException):
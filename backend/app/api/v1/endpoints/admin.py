@@ -1,3 +1,4 @@
+import asyncio
 import shutil
 import os
 from datetime import datetime, timezone
@@ -6,6 +7,9 @@ from fastapi import APIRouter, File, UploadFile, HTTPException, BackgroundTasks,
 from backend.services.logger import get_logger
 from backend.services.sukl_api_client import SuklApiClient
 from backend.data_processing.loaders.guidelines_loader import GuidelinesLoader
+from backend.services.ingestion_queue import IngestionJobQueue
+from backend.services.uploads import UploadTooLargeError, save_upload
+from backend.app.core.config import settings
 
 router = APIRouter()
 logger = get_logger(__name__)
@@ -44,14 +48,71 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 # Maximum file size: 50MB in bytes
 MAX_FILE_SIZE = 50 * 1024 * 1024
 
+_ingestion_queues: Dict[str, IngestionJobQueue] = {}
+# Serializes queue draining; a second task waits and then picks up anything left
+_ingestion_lock = asyncio.Lock()
+
+
+def get_ingestion_queue() -> IngestionJobQueue:
+    """
+    Returns the durable ingestion job queue (stored next to the uploaded PDFs by default).
+    """
+    path = settings.INGESTION_QUEUE_PATH or os.path.join(UPLOAD_DIR, "ingestion_jobs.db")
+    if path not in _ingestion_queues:
+        _ingestion_queues[path] = IngestionJobQueue(path)
+    return _ingestion_queues[path]
+
+
+async def _heartbeat(queue: IngestionJobQueue, job_id: str):
+    # Keeps the job from being requeued by other workers while it is ingested
+    while True:
+        await asyncio.sleep(settings.INGESTION_HEARTBEAT_INTERVAL)
+        queue.heartbeat(job_id)
+
+
 async def run_ingestion_task():
     """
-    Background task to run the ingestion pipeline.
+    Background task that drains the ingestion job queue.
+    Each job ingests only its own uploaded document.
+    """
+    queue = get_ingestion_queue()
+    async with _ingestion_lock:
+        logger.info("Starting background ingestion task...", pending_jobs=queue.pending_count())
+        loader = None
+        while True:
+            job = queue.claim_next()
+            if job is None:
+                break
+            heartbeat = asyncio.create_task(_heartbeat(queue, job["id"]))
+            try:
+                if loader is None:
+                    loader = GuidelinesLoader(pdf_dir=UPLOAD_DIR)
+                stats = await loader.ingest_file(job["file_path"])
+                heartbeat.cancel()
+                queue.mark_completed(job["id"], stats)
+                logger.info("Ingestion job completed", job_id=job["id"], filename=job["filename"], **stats)
+            except Exception as e:
+                queue.mark_failed(job["id"], f"{type(e).__name__}: {e}")
+                logger.error("Ingestion job failed", error=e, job_id=job["id"], filename=job["filename"])
+            finally:
+                heartbeat.cancel()
+        logger.info("Background ingestion task finished.")
+
+
+async def run_ingestion_watchdog():
+    """
+    Requeues and ingests jobs whose worker stopped (stale heartbeat), for the lifetime of the app.
+    The first pass also resumes jobs left queued by the previous shutdown.
     """
-    logger.info("Starting background ingestion task...")
-    loader = GuidelinesLoader(pdf_dir=UPLOAD_DIR)
-    await loader.ingest_pdfs()
-    logger.info("Background ingestion task finished.")
+    queue = get_ingestion_queue()
+    first_pass = True
+    while True:
+        requeued = queue.requeue_interrupted(stale_after=settings.INGESTION_HEARTBEAT_TIMEOUT)
+        if requeued or (first_pass and queue.pending_count()):
+            logger.info("Resuming queued ingestion jobs", requeued=requeued, pending=queue.pending_count())
+            await run_ingestion_task()
+        first_pass = False
+        await asyncio.sleep(settings.INGESTION_HEARTBEAT_TIMEOUT)
 
 @router.post("/upload/guideline")
 async def upload_guideline(
@@ -83,17 +144,18 @@ async def upload_guideline(
             )
         )
 
-    # Read file content to check size
-    content = await file.read()
-    file_size = len(content)
+    file_path = os.path.join(UPLOAD_DIR, os.path.basename(file.filename))
 
-    if file_size > MAX_FILE_SIZE:
-        file_size_mb = file_size / (1024 * 1024)
+    try:
+        # Streamed to disk in chunks; aborts as soon as the size limit is crossed
+        stored = await save_upload(file, file_path, MAX_FILE_SIZE)
+    except UploadTooLargeError as e:
+        file_size_mb = e.size_bytes / (1024 * 1024)
         max_size_mb = MAX_FILE_SIZE / (1024 * 1024)
         logger.warning(
             "File size exceeds limit",
             filename=file.filename,
-            file_size_bytes=file_size,
+            file_size_bytes=e.size_bytes,
             file_size_mb=round(file_size_mb, 2),
             max_size_mb=max_size_mb,
             endpoint="/upload/guideline"
@@ -105,56 +167,100 @@ async def upload_guideline(
                 message=f"File size exceeds maximum allowed size of {max_size_mb:.0f}MB.",
                 context={
                     "filename": file.filename,
-                    "file_size_bytes": file_size,
+                    "file_size_bytes": e.size_bytes,
                     "file_size_mb": round(file_size_mb, 2),
                     "max_size_bytes": MAX_FILE_SIZE,
                     "max_size_mb": max_size_mb
                 }
             )
         )
-
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-
-    try:
-        with open(file_path, "wb") as buffer:
-            buffer.write(content)
-            
-        logger.info(
-            "File saved successfully",
+    except Exception as e:
+        logger.error(
+            "File upload failed",
+            error=e,
             filename=file.filename,
             file_path=file_path,
-            file_size_bytes=file_size,
             endpoint="/upload/guideline"
         )
-        
-        # Trigger ingestion in background
+        raise HTTPException(
+            status_code=500,
+            detail=create_error_detail(
+                code="UPLOAD_FAILED",
+                message="Failed to save the uploaded file.",
+                context={
+                    "filename": file.filename,
+                    "error_type": type(e).__name__,
+                    "error_message": str(e)
+                }
+            )
+        )
+
+    logger.info(
+        "File saved successfully",
+        filename=file.filename,
+        file_path=file_path,
+        file_size_bytes=stored.size_bytes,
+        endpoint="/upload/guideline"
+    )
+
+    try:
+        # Queue ingestion of this document only; a pending job for the same file is reused
+        job, coalesced = get_ingestion_queue().enqueue(file_path, file.filename, stored.sha256)
         background_tasks.add_task(run_ingestion_task)
         
         return {
             "filename": file.filename, 
             "status": "uploaded", 
-            "message": "File uploaded successfully. Indexing started in background."
+            "message": "File uploaded successfully. Indexing started in background.",
+            "job_id": job["id"],
+            "job_status": job["status"],
+            "coalesced": coalesced
         }
         
     except Exception as e:
         logger.error(
-            "File upload failed",
+            "Failed to queue ingestion job",
             error=e,
             filename=file.filename,
             file_path=file_path,
-            file_size_bytes=file_size,
             endpoint="/upload/guideline"
         )
         raise HTTPException(
             status_code=500,
             detail=create_error_detail(
                 code="UPLOAD_FAILED",
-                message="Failed to save the uploaded file.",
+                message="File was saved but could not be queued for indexing.",
                 context={
                     "filename": file.filename,
-                    "file_size_bytes": file_size,
+                    "file_size_bytes": stored.size_bytes,
                     "error_type": type(e).__name__,
                     "error_message": str(e)
                 }
             )
         )
+
+
+@router.get("/jobs/{job_id}")
+async def get_ingestion_job(job_id: str):
+    """
+    Returns the status of one guideline ingestion job.
+    """
+    job = get_ingestion_queue().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=create_error_detail(
+                code="JOB_NOT_FOUND",
+                message="Ingestion job not found.",
+                context={"job_id": job_id}
+            )
+        )
+    return job
+
+
+@router.get("/jobs")
+async def list_ingestion_jobs(limit: int = 50):
+    """
+    Lists the most recent guideline ingestion jobs.
+    """
+    return {"jobs": get_ingestion_queue().list_jobs(limit=limit)}
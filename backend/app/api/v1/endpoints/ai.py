@@ -4,13 +4,17 @@ from backend.services.logger import get_logger
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 import os
-import aiofiles
 from pathlib import Path
+from backend.services.uploads import UploadTooLargeError, save_upload, unique_temp_path
 
 router = APIRouter()
 logger = get_logger(__name__)
 limiter = Limiter(key_func=get_remote_address)
 
+TEMP_UPLOAD_DIR = "backend/data/temp_uploads"
+# Maximum audio size: 100MB in bytes
+MAX_AUDIO_FILE_SIZE = 100 * 1024 * 1024
+
 # Epicrisis
 class EpicrisisRequest(BaseModel):
     items: str
@@ -71,33 +75,37 @@ async def transcribe_endpoint(file: UploadFile = File(...)):
     Transcribes audio file using Google Gemini 1.5 Pro.
     """
     logger.info("Received transcription request", filename=file.filename)
+    # Unique name per request so concurrent uploads of the same filename never collide
+    temp_path = Path(unique_temp_path(TEMP_UPLOAD_DIR, file.filename))
     try:
         from backend.services.transcription import TranscriptionService
-        
-        # Save temp file
-        temp_dir = Path("backend/data/temp_uploads")
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        temp_path = temp_dir / file.filename
-        
-        async with aiofiles.open(temp_path, 'wb') as out_file:
-            content = await file.read()
-            await out_file.write(content)
-            
+
+        stored = await save_upload(file, str(temp_path), MAX_AUDIO_FILE_SIZE)
+        logger.info("Audio saved", filename=file.filename, file_size_bytes=stored.size_bytes, sha256=stored.sha256)
+
         # Process
         service = TranscriptionService()
         transcript = await service.transcribe_audio(temp_path)
-        
-        # Cleanup
-        try:
-            os.remove(temp_path)
-        except Exception as cleanup_err:
-             logger.warning(f"Failed to cleanup temp file: {temp_path}", error=cleanup_err)
-            
+
         logger.info("Transcription successful")
         return {
             "transcript": transcript,
             "source": "gemini-1.5-pro"
         }
+    except UploadTooLargeError as e:
+        logger.warning("Audio file exceeds size limit", filename=file.filename, file_size_bytes=e.size_bytes)
+        raise HTTPException(
+            status_code=413,
+            detail=f"Audio file exceeds maximum allowed size of {MAX_AUDIO_FILE_SIZE // (1024 * 1024)}MB."
+        )
     except Exception as e:
         logger.error("Error processing transcription", error=e)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Cleanup
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        except Exception as cleanup_err:
+            logger.warning(f"Failed to cleanup temp file: {temp_path}", error=cleanup_err)
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from backend.app.api.v1.deps import get_current_user
 from backend.app.services.search_service import search_service
+from backend.app.services.suggest_service import suggest_service
+from backend.app.schemas.drug import DrugDetail, DrugListItem
 from typing import List, Dict, Any
 from pydantic import BaseModel
 from backend.pipeline.retrievers.vzp_retriever import VzpRetriever
@@ -12,7 +14,7 @@ router = APIRouter()
 class VzpSearchRequest(BaseModel):
     query: str
 
-@router.get("/search", response_model=List[Dict[str, Any]])
+@router.get("/search", response_model=List[DrugListItem], response_model_exclude_none=True)
 async def search_drugs(
     q: str,
     current_user: Dict[str, Any] = Depends(get_current_user)
@@ -24,6 +26,22 @@ async def search_drugs(
          raise HTTPException(status_code=400, detail="Query too short")
     return await search_service.search_drugs(q)
 
+@router.get("/suggest", response_model=List[Dict[str, Any]])
+async def suggest_drugs(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    current_user: Dict[str, Any] = Depends(get_current_user)
+):
+    """
+    Autocomplete for drug names, active substances and SÚKL codes.
+
+    Served from an in-memory index (no embedding or database call per keystroke).
+    """
+    results = suggest_service.suggest(q, limit)
+    if results is None:
+        raise HTTPException(status_code=503, detail="Suggest index is not ready")
+    return results
+
 @router.post("/vzp-search")
 async def vzp_search_endpoint(
     body: VzpSearchRequest,
@@ -40,7 +58,7 @@ async def vzp_search_endpoint(
         logger.error("Error processing VZP search", error=e)
         return {"results": [], "error": str(e)}
 
-@router.get("/{sukl_code}")
+@router.get("/{sukl_code}", response_model=DrugDetail, response_model_exclude_none=True)
 async def get_drug_detail(
     sukl_code: str,
     current_user: Dict[str, Any] = Depends(get_current_user)
@@ -53,7 +71,7 @@ async def get_drug_detail(
     from app.core.database import get_supabase_client
     supabase = get_supabase_client()
     
-    res = supabase.table("drugs").select("*").eq("sukl_code", sukl_code).execute()
+    res = supabase.table("drugs").select(DrugDetail.columns()).eq("sukl_code", sukl_code).execute()
     if not res.data:
         raise HTTPException(status_code=404, detail="Drug not found")
         
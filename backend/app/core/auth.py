@@ -0,0 +1,136 @@
+"""
+Local Supabase JWT verification and a TTL cache of user profiles.
+
+get_current_user used to make two network round-trips per authenticated request:
+`supabase.auth.get_user(token)` and a `public.users` lookup. Access tokens are
+now verified locally (HS256 with SUPABASE_JWT_SECRET, or RS256/ES256 against the
+project's JWKS, which PyJWKClient caches for AUTH_JWKS_TTL seconds), and the
+resolved profile is cached per auth_id for AUTH_PROFILE_CACHE_TTL seconds.
+
+Code that changes a row in `public.users` must call `invalidate_user_profile`.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import jwt
+
+from backend.app.core.config import settings
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+JWT_AUDIENCE = "authenticated"
+
+
+class JWTVerifier:
+    """
+    Verifies Supabase access tokens without calling the Auth server.
+
+    `verify` returns the token claims, or None when the token cannot be checked
+    locally (no secret configured for HS256, JWKS unreachable) so the caller can
+    fall back to `supabase.auth.get_user`. Invalid or expired tokens raise
+    `jwt.InvalidTokenError`.
+    """
+    def __init__(self, supabase_url: str, jwt_secret: Optional[str] = None, jwks_ttl: int = 600, leeway: int = 10):
+        self.jwt_secret = jwt_secret
+        self.leeway = leeway
+        self._jwks_client = jwt.PyJWKClient(
+            f"{supabase_url.rstrip('/')}/auth/v1/.well-known/jwks.json",
+            cache_jwk_set=True,
+            lifespan=jwks_ttl,
+            timeout=5
+        )
+
+    def verify(self, token: str) -> Optional[Dict[str, Any]]:
+        algorithm = jwt.get_unverified_header(token).get("alg")
+
+        if algorithm == "HS256":
+            if not self.jwt_secret:
+                return None
+            key = self.jwt_secret
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            try:
+                key = self._jwks_client.get_signing_key_from_jwt(token).key
+            except jwt.PyJWKClientConnectionError:
+                return None
+        else:
+            raise jwt.InvalidAlgorithmError(f"Unsupported token algorithm: {algorithm}")
+
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=JWT_AUDIENCE,
+            leeway=self.leeway,
+            options={"require": ["exp", "sub"]}
+        )
+        return claims
+
+
+class UserProfileCache:
+    """
+    Thread-safe TTL cache of `public.users` rows keyed by auth_id.
+    """
+    def __init__(self, ttl: int = 300, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, auth_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._cache.get(auth_id)
+            if entry is not None:
+                profile, expiry = entry
+                if time.time() < expiry:
+                    self._hits += 1
+                    return profile
+                del self._cache[auth_id]
+            self._misses += 1
+            return None
+
+    def set(self, auth_id: str, profile: Dict[str, Any]):
+        with self._lock:
+            if len(self._cache) >= self.max_entries and auth_id not in self._cache:
+                # Drop the entry closest to expiry
+                oldest = min(self._cache, key=lambda k: self._cache[k][1])
+                del self._cache[oldest]
+            self._cache[auth_id] = (profile, time.time() + self.ttl)
+
+    def invalidate(self, auth_id: str):
+        with self._lock:
+            self._cache.pop(auth_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._hits = 0
+            self._misses = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 2) if total > 0 else 0.0,
+                "size": len(self._cache)
+            }
+
+
+# Global instances
+jwt_verifier = JWTVerifier(
+    settings.SUPABASE_URL,
+    jwt_secret=settings.SUPABASE_JWT_SECRET,
+    jwks_ttl=settings.AUTH_JWKS_TTL
+)
+user_profile_cache = UserProfileCache(ttl=settings.AUTH_PROFILE_CACHE_TTL)
+
+
+def invalidate_user_profile(auth_id: str):
+    """
+    Drops the cached profile so the next request re-reads `public.users`.
+    """
+    user_profile_cache.invalidate(auth_id)
@@ -0,0 +1,220 @@
+"""
+Local query classifier used as a fast path in front of the LLM classifier.
+
+The clinical graph's classifier_node used to make a structured-output LLM call for
+every query before retrieval could start. This module classifies most queries
+locally in well under a millisecond, so the LLM is only consulted when the local
+confidence is below LOCAL_CLASSIFIER_THRESHOLD.
+
+Two tiers are combined:
+    1. Keyword/regex rules (extended from the original no-LLM fallback heuristics).
+    2. A TF-IDF nearest-centroid model (a linear classifier over TF-IDF vectors)
+       trained at import time on a small set of labelled Czech clinical queries.
+
+Usage:
+    >>> from backend.app.core.classifier import local_classifier
+    >>> local_classifier.classify("Jaké je dávkování metforminu?")
+    LocalClassification(query_type='drug_info', confidence=0.9, method='rules')
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Literal, Tuple
+
+from pydantic import BaseModel, Field
+
+from backend.data_processing.utils.czech_text import normalize_czech_text
+
+QueryType = Literal["drug_info", "guidelines", "clinical", "urgent", "reimbursement"]
+
+# Confidence assigned when exactly one rule category matches
+RULE_CONFIDENCE = 0.9
+
+# Confidence when an urgent rule fires together with another category: below
+# LOCAL_CLASSIFIER_THRESHOLD, so the LLM decides (the label stays "urgent")
+MIXED_URGENT_CONFIDENCE = 0.6
+
+# Regex rules applied to normalized (lowercase, no diacritics) query text
+RULES: Dict[str, List[re.Pattern]] = {
+    # Acute phrasing only: bare disease stems ("infarkt", "cmp") also appear in
+    # prevention and guideline questions
+    "urgent": [
+        re.compile(r"\b(neodkladn|resuscitac|kpr\b|aim\b|anafylakt|sok\b|bezvedom|status epilepticus)"),
+        re.compile(r"\b(akutn[a-z]*|nahl[a-z]*|masivn[a-z]*)\s+(infarkt|cmp|mrtvic|krvac|dusnost|bolest|slabost|otrav)"),
+        re.compile(r"\b(zastav[a-z]*\s+(dechu|srdce|obehu)|podezreni na (cmp|infarkt|aim)|otrava|predavkovani)"),
+    ],
+    "reimbursement": [
+        re.compile(r"\b(uhrad|hrazen|vzp|pojist|doplat|cena|ceny|kolik stoji|preskripcni omezeni)"),
+    ],
+    "guidelines": [
+        re.compile(r"\b(guideline|doporuceni|doporuceny postup|protokol|standard|postup)"),
+        re.compile(r"\b(odborn[a-z]* spolecnost|cls jep|konsenzus)"),
+    ],
+    "drug_info": [
+        re.compile(r"\b(lek\b|leku\b|leky\b|lekem\b|sukl|davkovani|davka|davku|interakc|kontraindikac|nezadouc)"),
+        re.compile(r"\b(tablet|tbl\b|injekc|sirup|mast\b|\d+\s?mg\b|spc\b|pribalov)"),
+        re.compile(r"\b\d{7}\b"),
+    ],
+}
+
+# Labelled seed queries for the TF-IDF model
+TRAINING_QUERIES: List[Tuple[str, str]] = [
+    ("Jaké je dávkování metforminu u pacienta s CKD?", "drug_info"),
+    ("Maximální denní dávka paracetamolu u dospělých", "drug_info"),
+    ("Interakce warfarinu a amiodaronu", "drug_info"),
+    ("Kontraindikace ibuprofenu v těhotenství", "drug_info"),
+    ("Nežádoucí účinky atorvastatinu", "drug_info"),
+    ("Je Paralen dostupný v lékárnách?", "drug_info"),
+    ("Jaká je účinná látka přípravku Xarelto?", "drug_info"),
+    ("Lze podat amoxicilin při alergii na penicilin?", "drug_info"),
+    ("Jaké léky obsahují ramipril?", "drug_info"),
+    ("SÚKL kód přípravku Euthyrox", "drug_info"),
+    ("Jak dlouho užívat omeprazol?", "drug_info"),
+    ("Metformin dávkování", "drug_info"),
+    ("Léčivá látka bisoprolol síla a léková forma", "drug_info"),
+    ("Doporučené postupy pro léčbu hypertenze", "guidelines"),
+    ("Guidelines ESC pro srdeční selhání", "guidelines"),
+    ("Standard péče o diabetickou nohu", "guidelines"),
+    ("Protokol antibiotické profylaxe v chirurgii", "guidelines"),
+    ("Doporučení ČDS pro léčbu diabetu 2. typu", "guidelines"),
+    ("Klinická doporučení pro astma bronchiale", "guidelines"),
+    ("Jaký je doporučený postup u komunitní pneumonie?", "guidelines"),
+    ("Postup podle odborné společnosti při fibrilaci síní", "guidelines"),
+    ("Konsenzus k léčbě dyslipidemie", "guidelines"),
+    ("Cílové hodnoty LDL cholesterolu podle guidelines", "guidelines"),
+    ("Jaké jsou příčiny chronického kašle?", "clinical"),
+    ("Diferenciální diagnostika bolesti na hrudi", "clinical"),
+    ("Jak vyšetřit pacienta s podezřením na anémii?", "clinical"),
+    ("Příznaky hypotyreózy u starších pacientů", "clinical"),
+    ("Léčba chronické bolesti zad", "clinical"),
+    ("Co způsobuje zvýšené jaterní testy?", "clinical"),
+    ("Jaká je prognóza pacientů s CHOPN?", "clinical"),
+    ("Rizikové faktory osteoporózy", "clinical"),
+    ("Možnosti léčby migrény", "clinical"),
+    ("Studie o účinnosti SGLT2 inhibitorů", "clinical"),
+    ("Jak interpretovat zvýšený CRP?", "clinical"),
+    ("Terapie deprese u seniorů", "clinical"),
+    ("Pacient s akutní bolestí na hrudi a elevacemi ST", "urgent"),
+    ("Postup KPR u dospělého", "urgent"),
+    ("Anafylaktický šok po podání antibiotika", "urgent"),
+    ("Podezření na CMP, náhlá slabost končetin", "urgent"),
+    ("Akutní infarkt myokardu první pomoc", "urgent"),
+    ("Bezvědomí a zástava dechu", "urgent"),
+    ("Předávkování paracetamolem, co dělat?", "urgent"),
+    ("Masivní krvácení z GIT", "urgent"),
+    ("Status epilepticus léčba na urgentu", "urgent"),
+    ("Hradí VZP přípravek Ozempic?", "reimbursement"),
+    ("Jaká je úhrada pojišťovny za inzulin glargin?", "reimbursement"),
+    ("Kolik stojí Eliquis a jaký je doplatek pacienta?", "reimbursement"),
+    ("Preskripční omezení pro gliptiny", "reimbursement"),
+    ("Je lék hrazen ze zdravotního pojištění?", "reimbursement"),
+    ("Cena a úhrada přípravku Jardiance", "reimbursement"),
+    ("Podmínky úhrady biologické léčby psoriázy", "reimbursement"),
+    ("Maximální cena výrobce Prestarium", "reimbursement"),
+]
+
+
+class LocalClassification(BaseModel):
+    """
+    Result of the local (no-LLM) classifier.
+
+    Attributes:
+        query_type: Predicted category of the clinical query.
+        confidence: Confidence of the prediction (0.0 to 1.0).
+        method: Which tier produced the label ('rules' or 'model').
+    """
+
+    query_type: QueryType = Field(..., description="Predicted query category")
+    confidence: float = Field(..., ge=0.0, le=1.0, description="Prediction confidence")
+    method: Literal["rules", "model"] = Field(..., description="Tier that produced the label")
+
+
+class LocalQueryClassifier:
+    """
+    Rules + TF-IDF nearest-centroid classifier for Czech clinical queries.
+    """
+
+    def __init__(self, training_data: List[Tuple[str, str]] = TRAINING_QUERIES, temperature: float = 0.1):
+        self.temperature = temperature
+        self._idf: Dict[str, float] = {}
+        self._centroids: Dict[str, Dict[str, float]] = {}
+        self.fit(training_data)
+
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        """
+        Normalized word unigrams and bigrams.
+        """
+        words = re.findall(r"[a-z0-9]+", normalize_czech_text(text))
+        # Crude stemming: Czech inflection mostly changes word endings
+        stems = [w[:6] for w in words if len(w) > 1]
+        return stems + [f"{a}_{b}" for a, b in zip(stems, stems[1:])]
+
+    def _vectorize(self, text: str) -> Dict[str, float]:
+        counts = Counter(self._tokenize(text))
+        vector = {t: (1 + math.log(c)) * self._idf[t] for t, c in counts.items() if t in self._idf}
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        return {t: v / norm for t, v in vector.items()} if norm else {}
+
+    def fit(self, training_data: List[Tuple[str, str]]):
+        """
+        Computes IDF weights and one L2-normalized TF-IDF centroid per label.
+        """
+        doc_freq: Counter = Counter()
+        for text, _ in training_data:
+            doc_freq.update(set(self._tokenize(text)))
+        n_docs = len(training_data)
+        self._idf = {t: math.log((1 + n_docs) / (1 + df)) + 1 for t, df in doc_freq.items()}
+
+        sums: Dict[str, Counter] = {}
+        for text, label in training_data:
+            sums.setdefault(label, Counter()).update(self._vectorize(text))
+
+        self._centroids = {}
+        for label, vec in sums.items():
+            norm = math.sqrt(sum(v * v for v in vec.values()))
+            self._centroids[label] = {t: v / norm for t, v in vec.items()} if norm else {}
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        """
+        Softmax over cosine similarities between the query and each label centroid.
+        """
+        vector = self._vectorize(text)
+        sims = {
+            label: sum(w * centroid.get(t, 0.0) for t, w in vector.items())
+            for label, centroid in self._centroids.items()
+        }
+        exps = {label: math.exp(s / self.temperature) for label, s in sims.items()}
+        total = sum(exps.values())
+        return {label: e / total for label, e in exps.items()}
+
+    def rule_matches(self, text: str) -> List[str]:
+        """
+        Returns the categories whose regex rules match the query.
+        """
+        normalized = normalize_czech_text(text)
+        return [label for label, patterns in RULES.items() if any(p.search(normalized) for p in patterns)]
+
+    def classify(self, text: str) -> LocalClassification:
+        """
+        Classifies a query using rules first and the TF-IDF model to break ties.
+        """
+        hits = self.rule_matches(text)
+
+        # Safety first: an urgent rule always labels the query urgent, but next to
+        # another category the confidence is lowered so the LLM gets the final say
+        if "urgent" in hits:
+            confidence = RULE_CONFIDENCE if len(hits) == 1 else MIXED_URGENT_CONFIDENCE
+            return LocalClassification(query_type="urgent", confidence=confidence, method="rules")
+        if len(hits) == 1:
+            return LocalClassification(query_type=hits[0], confidence=RULE_CONFIDENCE, method="rules")
+
+        probs = self.predict_proba(text)
+        candidates = hits or list(probs)
+        label = max(candidates, key=lambda c: probs.get(c, 0.0))
+        return LocalClassification(query_type=label, confidence=round(probs.get(label, 0.0), 4), method="model")
+
+
+# Global instance (trained once at import)
+local_classifier = LocalQueryClassifier()
@@ -1,5 +1,10 @@
+from pathlib import Path
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# backend/data, the directory run_pipeline writes to (data_processing/config/settings.py)
+DATA_DIR = Path(__file__).resolve().parent.parent.parent / "data"
+
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Czech MedAI"
     API_V1_STR: str = "/api/v1"
@@ -13,6 +18,7 @@ class Settings(BaseSettings):
     # Supabase
     SUPABASE_URL: str
     SUPABASE_KEY: str
+    SUPABASE_JWT_SECRET: str | None = None  # Legacy HS256 secret; asymmetric keys are read from JWKS
     
     # AI / LLM
     ANTHROPIC_API_KEY: str
@@ -20,6 +26,43 @@ class Settings(BaseSettings):
     
     # External APIs
     PUBMED_EMAIL: str
+
+    # Clinical graph retrieval
+    RETRIEVAL_FAN_OUT: bool = True  # Run relevant retrievers concurrently
+    LOCAL_CLASSIFIER_THRESHOLD: float = 0.75  # Below this confidence the LLM classifier is used
+    CONTEXT_TOKEN_BUDGET: int = 6000  # Max (estimated) tokens of retrieved context in the synthesizer prompt
+    SEARCH_MODE: str = "vector"  # "vector", "hybrid" (vector + full-text, RRF) or "fts"
+    VECTOR_EF_SEARCH: int = 40  # hnsw.ef_search per query; higher = better recall, slower
+    VECTOR_SEARCH_PRECISION: str = "halfvec"  # "halfvec" or "binary" candidate index; "full" = exact scan (no index)
+    VECTOR_RESCORE_FACTOR: int = 4  # halfvec/binary: candidates re-scored per requested result
+    DRUG_VECTOR_BACKEND: str = "rpc"  # "rpc" (pgvector) or "local" (memory-mapped index exported by run_pipeline)
+    DRUG_VECTOR_INDEX_PATH: str = str(DATA_DIR / "drug_vector_index")
+    DRUG_VECTOR_NPROBE: int = 8  # local index: IVF lists scanned per query; higher = better recall, slower
+    DRUG_DATA_STAMP_PATH: str = str(DATA_DIR / "drugs_updated_at")  # Touched by run_pipeline after loading drugs
+    DRUG_INDEX_REFRESH_INTERVAL: int = 300  # seconds between checks for new drug data
+    DRUG_RESOLVER_ENABLED: bool = True  # Answer exact SÚKL codes / drug names / INNs without classification or search
+
+    # Authentication
+    AUTH_LOCAL_JWT_VERIFY: bool = True  # Verify access tokens locally instead of calling Supabase Auth
+    AUTH_JWKS_TTL: int = 600  # seconds
+    AUTH_PROFILE_CACHE_TTL: int = 300  # seconds
+
+    # Query embedding cache
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 2048
+    EMBEDDING_CACHE_TTL: int = 86400  # seconds
+    EMBEDDING_CACHE_PATH: str | None = None  # e.g. "backend/data/embedding_cache.db"
+    EMBEDDING_CACHE_DISK_MAX_ENTRIES: int = 10000  # disk tier rows (~30 KB each for 1536-d vectors)
+
+    # Cache warm-up from the queries log (app startup and the end of run_pipeline)
+    WARMUP_ENABLED: bool = True
+    WARMUP_TOP_QUERIES: int = 200  # most frequent (normalized) queries replayed
+    WARMUP_QUERY_SCAN_LIMIT: int = 5000  # most recent rows of the queries table mined
+    WARMUP_CONCURRENCY: int = 4  # warm-up requests in flight
+
+    # Guideline ingestion jobs
+    INGESTION_QUEUE_PATH: str | None = None  # Defaults to ingestion_jobs.db in the upload directory
+    INGESTION_HEARTBEAT_INTERVAL: float = 30.0  # seconds between heartbeats of a running job
+    INGESTION_HEARTBEAT_TIMEOUT: float = 120.0  # running jobs silent this long are requeued at startup
     
     model_config = SettingsConfigDict(
         env_file=(".env", "backend/.env"),
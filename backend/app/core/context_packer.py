@@ -0,0 +1,305 @@
+"""
+Token-budgeted packing of retrieved context for the synthesizer prompt.
+
+synthesizer_node used to concatenate every retrieved item (full PubMed abstracts,
+full guideline chunks, drug rows) into the prompt, so prompt size, LLM latency
+and cost grew with whatever the retrievers returned. This module packs the
+context into a fixed token budget:
+
+    1. Dedup: repeated items (same SÚKL code, paper or chunk) are dropped, and
+       the overlap that consecutive guideline chunks of one document share
+       (CHUNK_OVERLAP in the loader) is cut.
+    2. Budgets: the total budget is split between sources by SOURCE_BUDGET_SHARES
+       and within a source by rank; budget a source does not need goes to the others.
+    3. Trimming: items over their allotment keep their most query-relevant
+       sentences, in original order.
+    4. Citations are numbered [1]..[n] over the packed items, so the numbers in
+       the prompt and in the citation list always match.
+
+Tokens are estimated from character counts (CHARS_PER_TOKEN); the Anthropic
+tokenizer is not available locally and the estimate only has to bound the prompt.
+
+Usage:
+    >>> from backend.app.core.context_packer import pack_context
+    >>> packed = pack_context(state["retrieved_context"], query, max_tokens=6000)
+    >>> packed.text, packed.citations
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set
+
+from backend.app.schemas.drug import DrugContext
+from backend.data_processing.utils.czech_text import normalize_czech_text
+
+# Rough average for Czech/English clinical text with Claude/OpenAI tokenizers
+CHARS_PER_TOKEN = 3.5
+
+# Share of the token budget per source (re-normalized over the sources present)
+SOURCE_BUDGET_SHARES: Dict[str, float] = {
+    "guidelines": 0.45,
+    "pubmed": 0.30,
+    "sukl": 0.25,
+}
+# Within a source, the n-th ranked item weighs RANK_DECAY ** n
+RANK_DECAY = 0.8
+# An item whose allotment leaves less than this for its body is dropped
+MIN_BODY_TOKENS = 24
+# Overlap between two chunks of the same document is cut when at least this long
+MIN_OVERLAP_CHARS = 40
+# ...and searched for within this many trailing characters (loader overlap is 200)
+MAX_OVERLAP_CHARS = 400
+
+HEADER = "NALEZENÉ ZDROJE:\n\n"
+GAP = " … "
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD_SPLIT = re.compile(r"[^a-z0-9]+")
+# Query words that say nothing about relevance
+STOPWORDS = {
+    "jak", "jaka", "jake", "jaky", "jsou", "pro", "pri", "ktery", "ktera", "ktere", "mam",
+    "lze", "nebo", "the", "and", "with", "what", "how", "for",
+}
+# Stems compare word prefixes so inflected Czech forms match (metforminu ~ metformin)
+STEM_LENGTH = 5
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def _stems(text: str) -> Set[str]:
+    return {
+        word[:STEM_LENGTH] for word in _WORD_SPLIT.split(normalize_czech_text(text))
+        if len(word) >= 3 and word not in STOPWORDS
+    }
+
+
+@dataclass
+class ContextItem:
+    """
+    One retrieved source: `header` (title, link, page) is kept verbatim,
+    `body` (abstract, chunk, drug facts) is deduplicated and trimmed.
+    """
+    source: str
+    key: str
+    header: str
+    body: str
+    citation: str
+    document: Optional[str] = None
+    body_label: str = ""
+
+    def render(self, number: int) -> str:
+        text = f"[{number}] {self.header}"
+        if self.body:
+            text += f"\n{self.body_label}{self.body}"
+        return text
+
+    def tokens(self) -> int:
+        return estimate_tokens(self.render(0)) + 1
+
+
+@dataclass
+class PackedContext:
+    text: str
+    citations: List[str]
+    tokens: int
+    items: int
+    dropped: int
+    trimmed: int
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+
+def to_context_item(item: Dict[str, Any]) -> Optional[ContextItem]:
+    data, source = item["data"], item["source"]
+
+    if source == "sukl":
+        first, _, rest = DrugContext.model_validate(data).to_prompt().partition("\n")
+        return ContextItem(
+            source=source,
+            key=f"sukl:{data.get('sukl_code') or data.get('name')}",
+            header=f"SÚKL: {first}",
+            body=rest,
+            citation=f"SÚKL - {data.get('name')} (Kód: {data.get('sukl_code')})",
+        )
+    if source == "pubmed":
+        authors = data.get("authors")
+        return ContextItem(
+            source=source,
+            key=f"pubmed:{data.get('pmid') or data.get('url') or data.get('title')}",
+            header=f"PubMed: {data.get('title')}\nUrl: {data.get('url')}",
+            body=(data.get("abstract") or "").strip(),
+            citation=f"{authors[0] if authors else 'Unknown'} et al. {data.get('title')}. {data.get('url')}",
+            body_label="Abstract: ",
+        )
+    if source == "guidelines":
+        guideline_source = data.get("source", "Klinická doporučení")
+        page_num = data.get("page", "")
+        content = (data.get("content", data.get("text", "")) or "").strip()
+        # Format: 'Source: [filename], page [X]' as per spec
+        page_info = f", page {page_num}" if page_num else ""
+        return ContextItem(
+            source=source,
+            key=f"guidelines:{data.get('id') or (guideline_source, page_num, content[:100])}",
+            header=f"Source: {guideline_source}{page_info}",
+            body=content,
+            citation=f"Source: {guideline_source}{page_info}",
+            document=guideline_source,
+        )
+    return None
+
+
+def _overlap(left: str, right: str) -> int:
+    """
+    Length of the longest suffix of `left` that is a prefix of `right` (>= MIN_OVERLAP_CHARS).
+    """
+    tail = left[-MAX_OVERLAP_CHARS:]
+    probe = right[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return 0
+    position = tail.find(probe)
+    while position != -1:
+        if right.startswith(tail[position:]):
+            return len(tail) - position
+        position = tail.find(probe, position + 1)
+    return 0
+
+
+def deduplicate(items: List[ContextItem]) -> List[ContextItem]:
+    """
+    Drops repeated items and contained chunks, and cuts chunk overlaps.
+    """
+    kept: List[ContextItem] = []
+    seen: Set[str] = set()
+    for item in items:
+        if item.key in seen:
+            continue
+        seen.add(item.key)
+
+        if item.document is not None:
+            siblings = [k for k in kept if k.document == item.document and k.body]
+            if any(item.body in sibling.body for sibling in siblings):
+                continue
+            for sibling in siblings:
+                # Chunks arrive in relevance order, so the overlap can be on either side
+                cut = _overlap(sibling.body, item.body)
+                if cut:
+                    item.body = item.body[cut:].lstrip()
+                cut = _overlap(item.body, sibling.body)
+                if cut:
+                    item.body = item.body[:-cut].rstrip()
+            if not item.body:
+                continue
+        kept.append(item)
+    return kept
+
+
+def fair_shares(budget: int, demands: Dict[Any, int], weights: Dict[Any, float]) -> Dict[Any, int]:
+    """
+    Weighted max-min split of `budget`: keys needing less than their weighted
+    share get exactly their demand, the rest is re-split among the others.
+    """
+    shares: Dict[Any, int] = {}
+    active = {key for key, demand in demands.items() if demand > 0}
+    remaining = budget
+    while active:
+        total_weight = sum(weights[key] for key in active)
+        fair = {key: remaining * weights[key] / total_weight for key in active}
+        satisfied = {key for key in active if demands[key] <= fair[key]}
+        if not satisfied:
+            shares.update({key: int(fair[key]) for key in active})
+            break
+        for key in satisfied:
+            shares[key] = demands[key]
+            remaining -= demands[key]
+        active -= satisfied
+    return shares
+
+
+def trim_to_tokens(text: str, max_tokens: int, query_stems: Set[str]) -> str:
+    """
+    Keeps the sentences sharing most words with the query (ties: earlier first)
+    that fit into `max_tokens`, in their original order.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    sentences = [s.strip() for s in _SENTENCE_SPLIT.split(text) if s.strip()]
+    ranked = sorted(
+        range(len(sentences)),
+        key=lambda i: (-len(_stems(sentences[i]) & query_stems), i)
+    )
+
+    # One token is left for the ellipses marking omitted text
+    chosen, used = [], 1
+    for i in ranked:
+        cost = estimate_tokens(sentences[i]) + 1
+        if used + cost <= max_tokens:
+            chosen.append(i)
+            used += cost
+    if not chosen:
+        best = sentences[ranked[0]]
+        return best[:max(int(max_tokens * CHARS_PER_TOKEN) - 1, 0)].rstrip() + "…"
+
+    chosen.sort()
+    parts = [sentences[chosen[0]]]
+    for previous, current in zip(chosen, chosen[1:]):
+        parts.append((" " if current == previous + 1 else GAP) + sentences[current])
+    text = "".join(parts)
+    return ("… " + text if chosen[0] > 0 else text) + (" …" if chosen[-1] < len(sentences) - 1 else "")
+
+
+def pack_context(retrieved: List[Dict[str, Any]], query: str, max_tokens: int) -> PackedContext:
+    """
+    Formats `retrieved` (state["retrieved_context"]) into at most ~max_tokens of prompt context.
+    """
+    items = [item for item in map(to_context_item, retrieved) if item is not None]
+    unique = deduplicate(items)
+
+    by_source: Dict[str, List[ContextItem]] = {}
+    for item in unique:
+        by_source.setdefault(item.source, []).append(item)
+
+    budget = max(max_tokens - estimate_tokens(HEADER), 0)
+    source_budgets = fair_shares(
+        budget,
+        {source: sum(item.tokens() for item in group) for source, group in by_source.items()},
+        {source: SOURCE_BUDGET_SHARES.get(source, min(SOURCE_BUDGET_SHARES.values())) for source in by_source},
+    )
+
+    query_stems = _stems(query)
+    packed: List[ContextItem] = []
+    trimmed = 0
+    stats: Dict[str, Any] = {}
+    for source, group in by_source.items():
+        allotments = fair_shares(
+            source_budgets.get(source, 0),
+            {i: item.tokens() for i, item in enumerate(group)},
+            {i: RANK_DECAY ** i for i in range(len(group))},
+        )
+        used = 0
+        for i, item in enumerate(group):
+            allotment = allotments.get(i, 0)
+            if item.tokens() > allotment:
+                body_budget = allotment - (item.tokens() - estimate_tokens(item.body))
+                if body_budget < MIN_BODY_TOKENS:
+                    continue
+                item.body = trim_to_tokens(item.body, body_budget, query_stems)
+                trimmed += 1
+            packed.append(item)
+            used += item.tokens()
+        stats[source] = {"items": sum(1 for item in packed if item.source == source), "tokens": used}
+
+    # Items keep their retrieval order; numbering follows the packed order
+    order = {id(item): position for position, item in enumerate(unique)}
+    packed.sort(key=lambda item: order[id(item)])
+    text = HEADER + "".join(f"{item.render(number)}\n\n" for number, item in enumerate(packed, 1))
+    return PackedContext(
+        text=text,
+        citations=[f"[{number}] {item.citation}" for number, item in enumerate(packed, 1)],
+        tokens=estimate_tokens(text),
+        items=len(packed),
+        dropped=len(items) - len(packed),
+        trimmed=trimmed,
+        stats=stats,
+    )
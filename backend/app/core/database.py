@@ -1,8 +1,8 @@
-from supabase import create_client, Client
-from backend.app.core.config import settings
+from supabase import Client
+from backend.data_processing.utils.supabase_client import supabase_manager
 
 def get_supabase_client() -> Client:
     """
-    Creates and returns a Supabase client instance using settings from config.
+    Returns the process-wide pooled Supabase client.
     """
-    return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    return supabase_manager.get_client()
@@ -9,11 +9,15 @@ Key Features:
     - ClinicalState: Extended state with agentic workflow capabilities
     - Iteration Control: Maximum 5 iterations to prevent infinite loops
     - Checkpointing: MemorySaver for in-memory session state persistence
-    - Query Classification: LLM-based routing to appropriate retrieval nodes
+    - Exact-match Resolver: SÚKL codes, drug names and INNs skip classification and retrieval
+    - Query Classification: local rules/TF-IDF fast path, LLM only for low-confidence queries
+    - Fan-out Retrieval: relevant retrievers run concurrently with per-source deadlines
+    - Context Packing: deduplicated, per-source token budgets (CONTEXT_TOKEN_BUDGET)
 
 Workflow Flow:
-    START → check_iteration → (conditional: end→END, continue→classifier)
-    → (conditional routing) → retrieve_* → synthesizer → END
+    START → check_iteration → (conditional: end→END, continue→resolver)
+    → resolver → (conditional: resolved→synthesizer, unresolved→classifier)
+    → (conditional routing) → retrieve_* (one or several in parallel) → synthesizer → END
 
 Usage:
     >>> from backend.app.core.graph import app
@@ -21,16 +25,25 @@ Usage:
     >>> result = await app.ainvoke({"messages": [HumanMessage(content="...")]}, config=config)
 """
 
-from typing import Dict, Any, Literal
+import asyncio
+import time
+from typing import Awaitable, Dict, Any, List, Literal
 from langgraph.graph import StateGraph, START, END
 from langgraph.checkpoint.memory import MemorySaver
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
+from backend.app.core.classifier import local_classifier
+from backend.app.core.config import settings
+from backend.app.core.context_packer import pack_context
 from backend.app.core.llm import get_llm
-from backend.app.core.state import ClinicalState
+from backend.app.core.state import CONTEXT_RESET, ClinicalState
+from backend.app.services.drug_resolver import drug_resolver
 from backend.app.services.search_service import search_service
+from backend.services.logger import get_logger
 from pydantic import BaseModel, Field
 
+logger = get_logger(__name__)
+
 # --- STATE DEFINITION ---
 # ClinicalState is now imported from backend.app.core.state
 # It includes the original 5 fields plus 4 new agentic fields:
@@ -57,25 +70,111 @@ class QueryClassification(BaseModel):
     )
     reasoning: str = Field(..., description="Brief reasoning for the classification.")
 
+# --- FAN-OUT RETRIEVAL ---
+# Per-source deadlines in seconds. A retriever that misses its deadline contributes
+# no context, while results from the other sources are still synthesized.
+SOURCE_DEADLINES: Dict[str, float] = {
+    "retrieve_drugs": 5.0,
+    "retrieve_guidelines": 5.0,
+    "retrieve_general": 8.0,
+}
+
+# Retrieval nodes run concurrently for each query type when RETRIEVAL_FAN_OUT is enabled.
+# Their retrieved_context lists are merged by the merge_retrieved_context reducer on ClinicalState.
+FAN_OUT_ROUTES: Dict[str, List[str]] = {
+    "drug_info": ["retrieve_drugs", "retrieve_guidelines"],
+    "reimbursement": ["retrieve_drugs"],
+    "guidelines": ["retrieve_guidelines", "retrieve_general"],
+    "clinical": ["retrieve_guidelines", "retrieve_general", "retrieve_drugs"],
+    "urgent": ["retrieve_guidelines", "retrieve_general"],
+}
+
+
+async def _with_deadline(node_name: str, coro: Awaitable[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Awaits a retriever call within its per-source deadline.
+
+    Returns an empty list on timeout so that a slow source only drops its own
+    results instead of delaying or failing the whole request.
+    """
+    deadline = SOURCE_DEADLINES.get(node_name)
+    try:
+        return await asyncio.wait_for(coro, timeout=deadline)
+    except asyncio.TimeoutError:
+        logger.warning("Retrieval source timed out", node=node_name, deadline_seconds=deadline)
+        return []
+
 # --- NODES ---
 
+# Drugs passed to the synthesizer for a resolved name/INN (available registrations first)
+RESOLVER_MAX_DRUGS = 10
+
+
+async def resolver_node(state: ClinicalState):
+    """
+    Answers exact SÚKL codes, drug names and INNs from the in-memory resolver index.
+
+    A resolved query is a drug_info query whose SÚKL context is already known,
+    so it goes straight to the synthesizer; anything else continues to the classifier.
+    """
+    resolution = drug_resolver.resolve(state["messages"][-1].content, scope="graph")
+    if resolution is None:
+        return {"next_step": "classifier"}
+
+    logger.info("Query resolved without retrieval", kind=resolution.kind, drugs=len(resolution.drugs))
+    return {
+        "query_type": "drug_info",
+        "next_step": "synthesizer",
+        "retrieved_context": [
+            {"source": "sukl", "data": drug} for drug in resolution.drugs[:RESOLVER_MAX_DRUGS]
+        ],
+    }
+
+
+# Retrieval node for each query type
+NEXT_STEP_BY_QUERY_TYPE: Dict[str, str] = {
+    "drug_info": "retrieve_drugs",
+    # SÚKL data often contains reimbursement info
+    "reimbursement": "retrieve_drugs",
+    # Dedicated guidelines retrieval (vector similarity search)
+    "guidelines": "retrieve_guidelines",
+    # Urgent queries might skip complex RAG or use specific "emergency" RAG
+    "urgent": "retrieve_general",
+    "clinical": "retrieve_general",
+}
+
+
 async def classifier_node(state: ClinicalState):
     """
-    Classifies the user query using LLM (or heuristic fallback).
+    Classifies the user query.
+
+    The local classifier (regex rules + TF-IDF model) runs first; the structured-output
+    LLM call is only made when its confidence is below LOCAL_CLASSIFIER_THRESHOLD.
+    Without an LLM, low-confidence queries default to "clinical" (a mixed urgent
+    match stays "urgent").
     """
+    start = time.perf_counter()
     llm = get_llm()
     last_msg = state["messages"][-1].content
-    
-    if not llm:
+
+    local = local_classifier.classify(last_msg)
+    if local.confidence >= settings.LOCAL_CLASSIFIER_THRESHOLD:
+        q_type = local.query_type
+    elif not llm:
         # Fallback if no LLM configured/mock mode
-        lower_msg = last_msg.lower()
-        if "lék" in lower_msg or "sukl" in lower_msg:
-            return {"query_type": "drug_info", "next_step": "retrieve_drugs"}
-        if any(kw in lower_msg for kw in ["guideline", "doporučení", "protokol", "standard", "postup"]):
-            return {"query_type": "guidelines", "next_step": "retrieve_guidelines"}
-        return {"query_type": "clinical", "next_step": "retrieve_general"}
-
-    # Structured output classification
+        q_type = "urgent" if local.query_type == "urgent" else "clinical"
+    else:
+        q_type = await _classify_with_llm(llm, last_msg)
+
+    # Baseline for the latency the resolver saves on its hits
+    drug_resolver.metrics.observe_stage("classifier", (time.perf_counter() - start) * 1000)
+    return {"query_type": q_type, "next_step": NEXT_STEP_BY_QUERY_TYPE.get(q_type, "retrieve_general")}
+
+
+async def _classify_with_llm(llm, query: str) -> str:
+    """
+    Structured-output LLM classification (slow path).
+    """
     structured_llm = llm.with_structured_output(QueryClassification)
     
     classification_prompt = ChatPromptTemplate.from_messages([
@@ -91,36 +190,21 @@ async def classifier_node(state: ClinicalState):
     ])
     
     try:
-        result = await structured_llm.ainvoke(classification_prompt.format(query=last_msg))
-        q_type = result.query_type
+        result = await structured_llm.ainvoke(classification_prompt.format(query=query))
+        return result.query_type
     except Exception as e:
         # Fallback on error
-        print(f"Classification error: {e}")
-        q_type = "clinical"
-
-    # Map to next step
-    if q_type == "drug_info":
-        next_step = "retrieve_drugs"
-    elif q_type == "reimbursement":
-        # SÚKL data often contains reimbursement info
-        next_step = "retrieve_drugs" 
-    elif q_type == "guidelines":
-        # Route to dedicated guidelines retrieval (vector similarity search)
-        next_step = "retrieve_guidelines"
-    elif q_type == "urgent":
-        # Urgent queries might skip complex RAG or use specific "emergency" RAG
-        next_step = "retrieve_general"
-    else:
-        next_step = "retrieve_general"
-
-    return {"query_type": q_type, "next_step": next_step}
+        logger.warning("LLM classification failed", error_message=str(e))
+        return "clinical"
 
 async def retrieve_drugs_node(state: ClinicalState):
     """
     Retrieves drug information using SearchService (SÚKL).
     """
     query = state["messages"][-1].content
-    drugs = await search_service.search_drugs(query)
+    start = time.perf_counter()
+    drugs = await _with_deadline("retrieve_drugs", search_service.search_drugs(query))
+    drug_resolver.metrics.observe_stage("retrieve_drugs", (time.perf_counter() - start) * 1000)
     
     # Format context
     context_str = ""
@@ -139,7 +223,7 @@ async def retrieve_general_node(state: ClinicalState):
     """
     query = state["messages"][-1].content
     # Depending on query type, we might adjust queries (e.g. add "guidelines" content)
-    papers = await search_service.search_pubmed(query, max_results=3)
+    papers = await _with_deadline("retrieve_general", search_service.search_pubmed(query, max_results=3))
 
     raw_data = []
     for p in papers:
@@ -153,7 +237,7 @@ async def retrieve_guidelines_node(state: ClinicalState):
     Returns guideline chunks with source metadata for citations.
     """
     query = state["messages"][-1].content
-    guidelines = await search_service.search_guidelines(query, limit=5)
+    guidelines = await _with_deadline("retrieve_guidelines", search_service.search_guidelines(query, limit=5))
 
     raw_data = []
     for g in guidelines:
@@ -179,6 +263,7 @@ def check_iteration_limit(state: ClinicalState) -> Dict[str, Any]:
     Returns:
         A dict with updated state fields:
         - iteration_count: The incremented count.
+        - retrieved_context: Reset, so this turn only sees its own sources.
         - If limit exceeded: final_answer with error message, next_step set to "end".
 
     Raises:
@@ -195,11 +280,12 @@ def check_iteration_limit(state: ClinicalState) -> Dict[str, Any]:
         )
         return {
             "iteration_count": new_count,
+            "retrieved_context": [CONTEXT_RESET],
             "final_answer": error_message,
             "next_step": "end"
         }
 
-    return {"iteration_count": new_count}
+    return {"iteration_count": new_count, "retrieved_context": [CONTEXT_RESET]}
 
 
 async def synthesizer_node(state: ClinicalState):
@@ -213,29 +299,19 @@ async def synthesizer_node(state: ClinicalState):
     context = state.get("retrieved_context", [])
     query_type = state.get("query_type", "clinical")
     
-    # Construct Context String for LLM
-    context_text = "NALEZENÉ ZDROJE:\n\n"
-    citations_data = []
-    
-    for idx, item in enumerate(context, 1):
-        data = item["data"]
-        source = item["source"]
-        
-        if source == "sukl":
-            context_text += f"[{idx}] SÚKL: {data.get('name')}\n{data}\n\n"
-            citations_data.append(f"[{idx}] SÚKL - {data.get('name')} (Kód: {data.get('sukl_code')})")
-        elif source == "pubmed":
-            context_text += f"[{idx}] PubMed: {data.get('title')}\nAbstract: {data.get('abstract')}\nUrl: {data.get('url')}\n\n"
-            citations_data.append(f"[{idx}] {data.get('authors')[0] if data.get('authors') else 'Unknown'} et al. {data.get('title')}. {data.get('url')}")
-        elif source == "guidelines":
-            # Format guideline chunks with source and page info for citations
-            # Format: 'Source: [filename], page [X]' as per spec
-            guideline_source = data.get('source', 'Klinická doporučení')
-            page_num = data.get('page', '')
-            content = data.get('content', data.get('text', ''))
-            page_info = f", page {page_num}" if page_num else ""
-            context_text += f"[{idx}] Source: {guideline_source}{page_info}\n{content}\n\n"
-            citations_data.append(f"[{idx}] Source: {guideline_source}{page_info}")
+    # Construct Context String for LLM: deduplicated, trimmed to the token budget,
+    # citations numbered over the items that made it in
+    packed = pack_context(context, state["messages"][-1].content, settings.CONTEXT_TOKEN_BUDGET)
+    context_text = packed.text
+    citations_data = packed.citations
+    logger.info(
+        "Context packed",
+        items=packed.items,
+        dropped=packed.dropped,
+        trimmed=packed.trimmed,
+        tokens=packed.tokens,
+        sources=packed.stats
+    )
     
     # System Prompt (simplified version of the full spec for code brevity, 
     # but capturing the key 'Identity' and 'Principles')
@@ -273,6 +349,7 @@ workflow = StateGraph(ClinicalState)
 
 # Add all nodes including iteration control
 workflow.add_node("check_iteration", check_iteration_limit)
+workflow.add_node("resolver", resolver_node)
 workflow.add_node("classifier", classifier_node)
 workflow.add_node("retrieve_drugs", retrieve_drugs_node)
 workflow.add_node("retrieve_general", retrieve_general_node)
@@ -289,13 +366,13 @@ def route_iteration_check(state: ClinicalState) -> str:
 
     If the iteration limit has been exceeded (next_step == "end"),
     route directly to END to terminate the workflow.
-    Otherwise, continue with the classifier for normal processing.
+    Otherwise, continue with the resolver and classifier for normal processing.
 
     Args:
         state: The current ClinicalState after iteration check.
 
     Returns:
-        "end" to terminate or "continue" to proceed with classification.
+        "end" to terminate or "continue" to proceed with resolution/classification.
     """
     if state.get("next_step") == "end":
         return "end"
@@ -307,24 +384,55 @@ workflow.add_conditional_edges(
     route_iteration_check,
     {
         "end": END,
-        "continue": "classifier"
+        "continue": "resolver"
+    }
+)
+
+
+def route_resolution(state: ClinicalState) -> str:
+    """
+    Route resolved queries to the synthesizer and everything else to the classifier.
+
+    Args:
+        state: The current ClinicalState after the resolver node.
+
+    Returns:
+        "synthesizer" when resolver_node found the drug(s), otherwise "classifier".
+    """
+    if state.get("next_step") == "synthesizer":
+        return "synthesizer"
+    return "classifier"
+
+
+workflow.add_conditional_edges(
+    "resolver",
+    route_resolution,
+    {
+        "synthesizer": "synthesizer",
+        "classifier": "classifier"
     }
 )
 
 
-def route_query(state: ClinicalState) -> str:
+def route_query(state: ClinicalState) -> str | List[str]:
     """
-    Route the query to the appropriate retrieval node based on classification.
+    Route the query to the appropriate retrieval node(s) based on classification.
 
-    Uses the next_step field set by classifier_node to determine which
-    retrieval strategy to use (drugs, guidelines, or general literature).
+    With RETRIEVAL_FAN_OUT enabled, returns every retrieval node listed in
+    FAN_OUT_ROUTES for the query_type; LangGraph runs them in parallel and the
+    synthesizer starts once all of them have finished (or hit their deadline).
+    Otherwise uses the single next_step set by classifier_node.
 
     Args:
-        state: The current ClinicalState with next_step set by classifier.
+        state: The current ClinicalState with query_type and next_step set by classifier.
 
     Returns:
-        The name of the next retrieval node to execute.
+        The name of the next retrieval node, or a list of nodes to run concurrently.
     """
+    if settings.RETRIEVAL_FAN_OUT:
+        routes = FAN_OUT_ROUTES.get(state.get("query_type"))
+        if routes:
+            return routes
     return state["next_step"]
 
 
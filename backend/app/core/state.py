@@ -146,6 +146,25 @@ class PatientContext(BaseModel):
 
 # --- STATE DEFINITION ---
 
+# Written by check_iteration_limit at the start of every turn, so a checkpointed
+# thread does not carry the previous question's sources into the next answer
+CONTEXT_RESET: Dict[str, Any] = {"source": "__reset__"}
+
+
+def merge_retrieved_context(
+    current: Optional[List[Dict[str, Any]]], update: Optional[List[Dict[str, Any]]]
+) -> List[Dict[str, Any]]:
+    """
+    Reducer for retrieved_context.
+
+    Results of parallel retrieval branches (fan-out) are concatenated; an
+    update starting with CONTEXT_RESET replaces the list instead.
+    """
+    if update and update[0] == CONTEXT_RESET:
+        return list(update[1:])
+    return (current or []) + (update or [])
+
+
 class ClinicalState(TypedDict):
     """
     Extended state for clinical query processing with agentic workflow capabilities.
@@ -189,7 +208,9 @@ class ClinicalState(TypedDict):
     query_type: Optional[
         Literal["general", "drug_info", "guidelines", "clinical_trial", "reimbursement", "urgent"]
     ]
-    retrieved_context: List[Dict[str, Any]]
+    # Reducer lets parallel retrieval branches (fan-out) merge their results
+    # within a turn; each turn starts from an empty list (CONTEXT_RESET)
+    retrieved_context: Annotated[List[Dict[str, Any]], merge_retrieved_context]
     final_answer: Optional[str]
     next_step: Optional[str]
 
@@ -0,0 +1,124 @@
+from pydantic import BaseModel
+from typing import Any, ClassVar, Dict, List, Optional
+
+
+class DrugProjection(BaseModel):
+    """
+    Base for drug DTOs whose fields double as the PostgREST column projection.
+
+    Selecting `columns()` instead of "*" keeps the 1536-float `embedding`,
+    `search_text`, `fts` and `raw_data` columns out of the response.
+    """
+    # Fields filled by search RPCs rather than read from the drugs table
+    search_fields: ClassVar[tuple] = ()
+
+    model_config = {"extra": "ignore"}
+
+    @classmethod
+    def columns(cls) -> str:
+        return ",".join(name for name in cls.model_fields if name not in cls.search_fields)
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> List["DrugProjection"]:
+        return [cls.model_validate(row) for row in rows]
+
+
+class DrugListItem(DrugProjection):
+    """
+    Search result row (GET /drugs/search, search_drugs keyword fallback).
+    """
+    search_fields: ClassVar[tuple] = ("similarity", "rank", "rrf_score")
+
+    id: Optional[str] = None
+    sukl_code: str
+    name: str
+    active_substances: Optional[str] = None
+    atc_code: Optional[str] = None
+    atc_name: Optional[str] = None
+    strength: Optional[str] = None
+    form: Optional[str] = None
+    is_available: Optional[bool] = None
+    registration_status: Optional[str] = None
+    similarity: Optional[float] = None
+    rank: Optional[float] = None
+    rrf_score: Optional[float] = None
+
+
+class DrugDetail(DrugProjection):
+    """
+    Drug detail (GET /drugs/{sukl_code}): registration, SPC and reimbursement data.
+    """
+    id: str
+    sukl_code: str
+    name: str
+    active_substances: Optional[str] = None
+    atc_code: Optional[str] = None
+    atc_name: Optional[str] = None
+    strength: Optional[str] = None
+    form: Optional[str] = None
+    package: Optional[str] = None
+    route: Optional[str] = None
+    dispensing: Optional[str] = None
+    registration_status: Optional[str] = None
+    is_available: Optional[bool] = None
+    holder: Optional[str] = None
+    spc_indications: Optional[str] = None
+    spc_contraindications: Optional[str] = None
+    spc_dosage: Optional[str] = None
+    spc_interactions: Optional[str] = None
+    spc_side_effects: Optional[str] = None
+    spc_pregnancy: Optional[str] = None
+    spc_url: Optional[str] = None
+    spc_file: Optional[str] = None
+    pil_file: Optional[str] = None
+    is_reimbursed: Optional[bool] = None
+    reimbursement_group: Optional[str] = None
+    max_price: Optional[float] = None
+    patient_copay: Optional[float] = None
+    reimbursement_conditions: Optional[str] = None
+    updated_at: Optional[str] = None
+
+
+# Prompt labels for DrugContext fields, in output order
+CONTEXT_LABELS = {
+    "active_substances": "Účinná látka",
+    "strength": "Síla",
+    "form": "Léková forma",
+    "route": "Cesta podání",
+    "atc_code": "ATC",
+    "atc_name": "Skupina",
+    "dispensing": "Výdej",
+    "registration_status": "Registrace",
+    "holder": "Držitel",
+}
+
+
+class DrugContext(DrugProjection):
+    """
+    Drug facts passed to the LLM (SuklRetriever, synthesizer SÚKL sources).
+    """
+    sukl_code: Optional[str] = None
+    name: Optional[str] = None
+    active_substances: Optional[str] = None
+    strength: Optional[str] = None
+    form: Optional[str] = None
+    route: Optional[str] = None
+    atc_code: Optional[str] = None
+    atc_name: Optional[str] = None
+    dispensing: Optional[str] = None
+    registration_status: Optional[str] = None
+    holder: Optional[str] = None
+    is_available: Optional[bool] = None
+
+    def to_prompt(self) -> str:
+        """
+        Compact "Label: value" lines; empty fields are omitted.
+        """
+        lines = [f"{self.name} (SÚKL: {self.sukl_code})"]
+        for field, label in CONTEXT_LABELS.items():
+            value = getattr(self, field)
+            if value:
+                lines.append(f"{label}: {value}")
+        if self.is_available is not None:
+            lines.append(f"Dostupnost: {'Dostupný' if self.is_available else 'Nedostupný'}")
+        return "\n".join(lines)
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, List, Optional
+
+from backend.app.core.config import settings
+from backend.app.core.database import get_supabase_client
+from backend.data_processing.utils.czech_text import normalize_czech_text
+
+logger = logging.getLogger("drug_data")
+
+_TOKEN_SPLIT = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_drug_text(text: Optional[str]) -> str:
+    """
+    Lowercase, diacritics-free text with punctuation collapsed to single spaces.
+    """
+    return " ".join(token for token in _TOKEN_SPLIT.split(normalize_czech_text(text or "")) if token)
+
+
+def fetch_drug_rows(supabase, columns: str, page_size: int = 1000) -> Iterable[Dict[str, Any]]:
+    """
+    Pages through the drugs table, selecting only `columns`.
+    """
+    start = 0
+    while True:
+        response = (
+            supabase.table("drugs")
+            .select(columns)
+            .order("sukl_code")
+            .range(start, start + page_size - 1)
+            .execute()
+        )
+        rows = response.data or []
+        yield from rows
+        if len(rows) < page_size:
+            break
+        start += page_size
+
+
+class DrugDataIndexService(ABC):
+    """
+    Base for in-memory indexes built from the drugs table.
+
+    run_pipeline touches DRUG_DATA_STAMP_PATH after loading drugs;
+    `refresh_if_stale` (polled by the app lifespan) rebuilds when the stamp is
+    newer than the index. Queries keep using the previous index during a rebuild.
+
+    Subclasses set `name` and `columns` and implement `build_index(rows)`.
+    """
+    name = "drug index"
+    columns = "sukl_code,name"
+
+    def __init__(self, stamp_path: Optional[str] = None):
+        self.stamp_path = stamp_path
+        self.index: Any = None
+        self.built_at: Optional[float] = None
+        self._stamp_mtime: Optional[float] = None
+        self._refresh_lock = threading.Lock()
+
+    @abstractmethod
+    def build_index(self, rows: Iterable[Dict[str, Any]]) -> Any:
+        """
+        Builds the index from the drug rows. The result must support len().
+        """
+
+    def _read_stamp(self) -> Optional[float]:
+        if not self.stamp_path:
+            return None
+        try:
+            return os.stat(self.stamp_path).st_mtime
+        except OSError:
+            return None
+
+    def refresh(self, supabase=None) -> int:
+        """
+        Rebuilds the index from the drugs table. Returns the number of entries.
+        """
+        with self._refresh_lock:
+            stamp = self._read_stamp()
+            start = time.perf_counter()
+            index = self.build_index(fetch_drug_rows(supabase or get_supabase_client(), self.columns))
+            self.index = index
+            self.built_at = time.time()
+            self._stamp_mtime = stamp
+            logger.info(f"{self.name} built: {len(index)} entries in {time.perf_counter() - start:.1f} s")
+            return len(index)
+
+    def refresh_if_stale(self) -> bool:
+        """
+        Rebuilds when there is no index yet or the pipeline stamp changed.
+        """
+        if self.index is not None and self._read_stamp() == self._stamp_mtime:
+            return False
+        self.refresh()
+        return True
+
+
+async def run_drug_index_refresh_loop(services: List[DrugDataIndexService], interval: Optional[float] = None):
+    """
+    Builds the drug indexes at startup and rebuilds them after pipeline runs.
+    """
+    interval = interval or settings.DRUG_INDEX_REFRESH_INTERVAL
+    while True:
+        for service in services:
+            try:
+                await asyncio.to_thread(service.refresh_if_stale)
+            except Exception as e:
+                logger.error(f"{service.name} refresh failed: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,170 @@
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from backend.app.core.config import settings
+from backend.app.services.drug_data import DrugDataIndexService, normalize_drug_text
+
+RESOLVER_COLUMNS = (
+    "id,sukl_code,name,active_substances,atc_code,atc_name,strength,form,package,"
+    "route,dispensing,registration_status,is_available,holder"
+)
+SUKL_CODE_PATTERN = re.compile(r"^\d{7}$")
+_SUBSTANCE_SPLIT = re.compile(r"\s*[,;+/]\s*")
+
+# Work a resolved query skips, per caller: the graph skips classification and
+# SÚKL retrieval, search_drugs skips embedding + vector RPC (or full-text search)
+SKIPPED_STAGES: Dict[str, tuple] = {
+    "graph": ("classifier", "retrieve_drugs"),
+    "search_drugs": ("search_drugs",),
+}
+# Weight of the newest sample in the moving average of stage latencies
+LATENCY_SMOOTHING = 0.1
+
+
+@dataclass
+class Resolution:
+    """
+    A query that matched a SÚKL code, a registered drug name or an INN exactly.
+
+    Attributes:
+        kind: "code", "name" or "substance".
+        key: The normalized key that matched.
+        drugs: Matching drug rows, available registrations first.
+    """
+    kind: str
+    key: str
+    drugs: List[Dict[str, Any]]
+
+
+class DrugResolverIndex:
+    """
+    Hash index of SÚKL codes, normalized drug names and INNs -> drug rows.
+    """
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        self.by_code: Dict[str, Dict[str, Any]] = {}
+        self.by_name: Dict[str, List[Dict[str, Any]]] = {}
+        self.by_substance: Dict[str, List[Dict[str, Any]]] = {}
+
+        for row in rows:
+            if row.get("sukl_code"):
+                self.by_code[str(row["sukl_code"])] = row
+            name = normalize_drug_text(row.get("name"))
+            if name:
+                self.by_name.setdefault(name, []).append(row)
+            for substance in _SUBSTANCE_SPLIT.split(row.get("active_substances") or ""):
+                substance = normalize_drug_text(substance)
+                if substance:
+                    self.by_substance.setdefault(substance, []).append(row)
+
+        for index in (self.by_name, self.by_substance):
+            for drugs in index.values():
+                drugs.sort(key=lambda d: (
+                    not d.get("is_available"), normalize_drug_text(d.get("name")), d.get("sukl_code") or ""
+                ))
+
+    def __len__(self) -> int:
+        return len(self.by_code)
+
+    def resolve(self, query: str) -> Optional[Resolution]:
+        query = (query or "").strip()
+        if SUKL_CODE_PATTERN.match(query):
+            drug = self.by_code.get(query)
+            return Resolution("code", query, [drug]) if drug else None
+
+        key = normalize_drug_text(query)
+        if key in self.by_name:
+            return Resolution("name", key, self.by_name[key])
+        if key in self.by_substance:
+            return Resolution("substance", key, self.by_substance[key])
+        return None
+
+
+class ResolverMetrics:
+    """
+    Hit rate of the resolver and the latency its hits saved.
+
+    The saving of a hit is estimated from moving averages of the stages it
+    skipped (SKIPPED_STAGES), measured on queries that did not resolve.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stage_ms: Dict[str, float] = {}
+        self._scopes: Dict[str, Dict[str, Any]] = {}
+
+    def observe_stage(self, stage: str, elapsed_ms: float):
+        with self._lock:
+            previous = self._stage_ms.get(stage)
+            self._stage_ms[stage] = (
+                elapsed_ms if previous is None
+                else previous + LATENCY_SMOOTHING * (elapsed_ms - previous)
+            )
+
+    def record(self, scope: str, kind: Optional[str], elapsed_ms: float):
+        with self._lock:
+            stats = self._scopes.setdefault(scope, {
+                "lookups": 0, "hits": 0, "hits_by_kind": {}, "resolve_ms": 0.0, "saved_ms": 0.0
+            })
+            stats["lookups"] += 1
+            stats["resolve_ms"] += elapsed_ms
+            if kind is not None:
+                stats["hits"] += 1
+                stats["hits_by_kind"][kind] = stats["hits_by_kind"].get(kind, 0) + 1
+                skipped = sum(self._stage_ms.get(stage, 0.0) for stage in SKIPPED_STAGES.get(scope, ()))
+                stats["saved_ms"] += max(skipped - elapsed_ms, 0.0)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            scopes = {}
+            for scope, stats in self._scopes.items():
+                lookups = stats["lookups"]
+                scopes[scope] = {
+                    "lookups": lookups,
+                    "hits": stats["hits"],
+                    "hit_rate": round(stats["hits"] / lookups, 3) if lookups else 0.0,
+                    "hits_by_kind": dict(stats["hits_by_kind"]),
+                    "avg_resolve_ms": round(stats["resolve_ms"] / lookups, 3) if lookups else 0.0,
+                    "saved_ms_total": round(stats["saved_ms"], 1),
+                }
+            return {
+                "scopes": scopes,
+                "stage_avg_ms": {stage: round(ms, 1) for stage, ms in self._stage_ms.items()},
+            }
+
+
+class DrugResolver(DrugDataIndexService):
+    """
+    Exact-match short circuit in front of the clinical graph and search_drugs.
+
+    Queries that are a 7-digit SÚKL code, a registered drug name or an INN
+    (after case/diacritics normalization) are answered from an in-memory hash
+    index instead of classification and semantic search.
+    """
+    name = "Drug resolver index"
+    columns = RESOLVER_COLUMNS
+
+    def __init__(self, stamp_path: Optional[str] = None):
+        super().__init__(stamp_path)
+        self.metrics = ResolverMetrics()
+
+    def build_index(self, rows: Iterable[Dict[str, Any]]) -> DrugResolverIndex:
+        return DrugResolverIndex(rows)
+
+    def resolve(self, query: str, scope: str) -> Optional[Resolution]:
+        """
+        Resolves `query` exactly, or None (not a code/name/INN, disabled, or index not built).
+        """
+        index = self.index
+        if index is None or not settings.DRUG_RESOLVER_ENABLED:
+            return None
+        start = time.perf_counter()
+        resolution = index.resolve(query)
+        self.metrics.record(
+            scope, resolution.kind if resolution else None, (time.perf_counter() - start) * 1000
+        )
+        return resolution
+
+
+drug_resolver = DrugResolver(settings.DRUG_DATA_STAMP_PATH)
@@ -1,44 +1,325 @@
+import asyncio
 import json
 import logging
+import os
+import time
 from paper_search_mcp.academic_platforms.pubmed import PubMedSearcher
+from backend.app.core.config import settings
 from backend.app.core.database import get_supabase_client
-from typing import List, Dict, Any
+from backend.services.embedding_cache import EmbeddingCache
+from backend.services.drug_vector_index import get_drug_vector_index
+from backend.services.singleflight import flight_key, singleflight
+from backend.app.services.drug_resolver import drug_resolver
+from backend.app.schemas.drug import DrugListItem
+from backend.data_processing.generators.embedding_generator import (
+    DRUG_EMBEDDING_MODEL,
+    GUIDELINE_EMBEDDING_MODEL,
+    embedding_version,
+)
+from typing import List, Dict, Any, Optional
 
 logger = logging.getLogger("search_service")
 
+SEARCH_MODES = ("vector", "hybrid", "fts")
+# Reciprocal rank fusion constant; 60 is the value from the original RRF paper
+RRF_K = 60
+# Each ranking in hybrid mode fetches this many times `limit` candidates before fusion
+HYBRID_CANDIDATE_MULTIPLIER = 2
+# Metadata prefilters accepted by the drug / guideline RPCs (passed as filter_<name>)
+DRUG_FILTERS = ("is_available", "registration_status")
+GUIDELINE_FILTERS = ("organization", "metadata")
+# Vector index used for candidate search: halfvec or binary-quantized, with the
+# candidates re-scored against the full-precision vectors; "full" has no index
+# (exact scan)
+SEARCH_PRECISIONS = ("full", "halfvec", "binary")
+DEFAULT_SEARCH_PRECISION = "halfvec"
+
+
+def _filter_params(filters: Optional[Dict[str, Any]], allowed: tuple) -> Dict[str, Any]:
+    """
+    Maps prefilters to RPC parameters, e.g. {"is_available": True} -> {"filter_is_available": True}.
+    """
+    if not filters:
+        return {}
+    unknown = set(filters) - set(allowed)
+    if unknown:
+        raise ValueError(f"Unsupported search filters: {sorted(unknown)} (allowed: {list(allowed)})")
+    return {f"filter_{name}": value for name, value in filters.items() if value is not None}
+
+
+def reciprocal_rank_fusion(
+    result_lists: List[List[Dict[str, Any]]],
+    key: str = "id",
+    k: int = RRF_K,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Fuses several ranked result lists: score(d) = sum over lists of 1 / (k + rank(d)).
+
+    Fields of an item found in several lists are merged (e.g. `similarity` from
+    the vector ranking and `rank` from the full-text ranking); the fused score is
+    stored as `rrf_score`.
+    """
+    fused: Dict[Any, Dict[str, Any]] = {}
+    for results in result_lists:
+        for position, item in enumerate(results, start=1):
+            item_key = item.get(key)
+            merged = fused.setdefault(item_key, {"rrf_score": 0.0})
+            for field, value in item.items():
+                if merged.get(field) is None:
+                    merged[field] = value
+            merged["rrf_score"] += 1.0 / (k + position)
+
+    ranked = sorted(fused.values(), key=lambda item: item["rrf_score"], reverse=True)
+    return ranked[:limit] if limit is not None else ranked
+
+
+def _format_guideline(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Formats a guideline chunk row with citation metadata.
+    """
+    metadata = item.get("metadata") or {}
+    result = {
+        "id": item.get("id"),
+        "title": item.get("title"),
+        "content": item.get("content"),
+        "source": metadata.get("source", item.get("title")),
+        "page": metadata.get("page"),
+        "similarity": item.get("similarity"),
+        "source_type": "guidelines"
+    }
+    if "rrf_score" in item:
+        result["rrf_score"] = item["rrf_score"]
+    return result
+
 class SearchService:
     def __init__(self):
         self.pubmed = PubMedSearcher()
-        
-    async def search_drugs(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        self.embedding_cache = EmbeddingCache(
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+            ttl=settings.EMBEDDING_CACHE_TTL,
+            disk_path=settings.EMBEDDING_CACHE_PATH,
+            disk_max_entries=settings.EMBEDDING_CACHE_DISK_MAX_ENTRIES
+        )
+        self._emb_gens: Dict[str, Any] = {}
+
+    def _get_embedding_generator(self, model: str = DRUG_EMBEDDING_MODEL):
+        """
+        Lazily creates one EmbeddingGenerator per model, shared by all searches.
+        """
+        if model not in self._emb_gens:
+            from backend.data_processing.generators.embedding_generator import EmbeddingGenerator
+            self._emb_gens[model] = EmbeddingGenerator(model=model)
+        return self._emb_gens[model]
+
+    async def embed_query(self, query: str, model: str = DRUG_EMBEDDING_MODEL) -> Optional[List[float]]:
+        """
+        Returns the embedding for a query, served from the embedding cache when possible.
+
+        Queries must be embedded with the model of the table they search
+        (see DRUG_EMBEDDING_MODEL / GUIDELINE_EMBEDDING_MODEL).
+        """
+        emb_gen = self._get_embedding_generator(model)
+        cached = self.embedding_cache.get(query, emb_gen.model)
+        if cached is not None:
+            return cached
+
+        vecs = await emb_gen.generate_embeddings_async([query])
+        if vecs and vecs[0]:
+            self.embedding_cache.set(query, emb_gen.model, vecs[0])
+            return vecs[0]
+        return None
+
+    async def _rpc(self, supabase, name: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Runs a Supabase RPC in a worker thread so several can run concurrently.
+        """
+        response = await asyncio.to_thread(lambda: supabase.rpc(name, params).execute())
+        return response.data or []
+
+    async def _vector_rpc(
+        self,
+        supabase,
+        name: str,
+        query: str,
+        params: Dict[str, Any],
+        model: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Embeds the query and runs a pgvector RPC; returns [] without an OpenAI key.
+
+        Only rows stamped with the query's embedding version are compared. With
+        DRUG_VECTOR_BACKEND="local", search_drugs is served from the local index.
+        """
+        if not os.getenv("OPENAI_API_KEY"):
+            return []
+        query_embedding = await self.embed_query(query, model)
+        if not query_embedding:
+            return []
+        if name == "search_drugs" and settings.DRUG_VECTOR_BACKEND == "local":
+            results = await asyncio.to_thread(self._local_drug_search, query_embedding, params, model)
+            if results is not None:
+                return results
+        precision = settings.VECTOR_SEARCH_PRECISION
+        if precision not in SEARCH_PRECISIONS:
+            logger.warning(f"Unknown vector search precision '{precision}', using '{DEFAULT_SEARCH_PRECISION}'")
+            precision = DEFAULT_SEARCH_PRECISION
+        return await self._rpc(supabase, name, {
+            "query_embedding": query_embedding,
+            "query_embedding_version": embedding_version(model),
+            "search_precision": precision,
+            "rescore_factor": settings.VECTOR_RESCORE_FACTOR,
+            **params
+        })
+
+    def _local_drug_search(
+        self,
+        query_embedding: List[float],
+        params: Dict[str, Any],
+        model: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        search_drugs against the memory-mapped index exported by run_pipeline.
+
+        Returns None (use the RPC) when no index for the model's embedding version exists.
+        """
+        index = get_drug_vector_index(settings.DRUG_VECTOR_INDEX_PATH, embedding_version(model))
+        if index is None:
+            return None
+        filters = {
+            param.removeprefix("filter_"): value
+            for param, value in params.items() if param.startswith("filter_")
+        }
+        return index.search(
+            query_embedding,
+            k=params.get("match_count", 10),
+            match_threshold=params.get("match_threshold"),
+            filters=filters,
+            nprobe=settings.DRUG_VECTOR_NPROBE
+        )
+
+    async def _hybrid_search(
+        self,
+        supabase,
+        query: str,
+        limit: int,
+        vector_rpc: str,
+        vector_params: Dict[str, Any],
+        vector_model: str,
+        fts_rpc: str,
+        mode: str,
+        filter_params: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Runs the full-text RPC and (in hybrid mode) the vector RPC concurrently
+        and fuses the rankings with reciprocal rank fusion.
+        """
+        candidates = limit * HYBRID_CANDIDATE_MULTIPLIER
+        searches = {"fts": self._rpc(supabase, fts_rpc, {
+            "query_text": query, "match_count": candidates, **filter_params
+        })}
+        if mode == "hybrid":
+            searches["vector"] = self._vector_rpc(
+                supabase, vector_rpc, query, {**vector_params, "match_count": candidates, **filter_params},
+                vector_model
+            )
+
+        outcomes = await asyncio.gather(*searches.values(), return_exceptions=True)
+        rankings = []
+        for name, outcome in zip(searches, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning(f"{name} ranking failed for {fts_rpc} hybrid search: {outcome}")
+            elif outcome:
+                rankings.append(outcome)
+        return reciprocal_rank_fusion(rankings, limit=limit)
+
+    def _resolve_mode(self, mode: Optional[str]) -> str:
+        mode = mode or settings.SEARCH_MODE
+        if mode not in SEARCH_MODES:
+            logger.warning(f"Unknown search mode '{mode}', using 'vector'")
+            return "vector"
+        return mode
+
+    async def search_drugs(
+        self,
+        query: str,
+        limit: int = 20,
+        mode: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Search SÚKL data via Supabase (Semantic + Keyword fallback).
+
+        Queries that are exactly a SÚKL code, a drug name or an INN are answered
+        from the in-memory resolver index without embedding or database calls.
+
+        Args:
+            mode: "vector" (pgvector), "hybrid" (pgvector + full-text fused with RRF)
+                or "fts" (full-text only). Defaults to settings.SEARCH_MODE.
+            filters: Prefilters applied inside the index scan, e.g.
+                {"is_available": True, "registration_status": "R"}
+        """
+        filter_params = _filter_params(filters, DRUG_FILTERS)
+
+        # 0. exact SÚKL code / drug name / INN: answered from the resolver index
+        resolution = drug_resolver.resolve(query, scope="search_drugs")
+        if resolution is not None:
+            return [
+                drug for drug in resolution.drugs
+                if all(drug.get(name) == value for name, value in (filters or {}).items())
+            ][:limit]
+
+        start = time.perf_counter()
+        # Concurrent identical searches share one embedding + RPC round trip
+        results = await singleflight.do(
+            flight_key("search_drugs", query, limit, self._resolve_mode(mode), filter_params),
+            lambda: self._search_drugs_ranked(query, limit, mode, filter_params)
+        )
+        drug_resolver.metrics.observe_stage("search_drugs", (time.perf_counter() - start) * 1000)
+        return results
+
+    async def _search_drugs_ranked(
+        self,
+        query: str,
+        limit: int,
+        mode: Optional[str],
+        filter_params: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Semantic / hybrid / full-text drug search with the keyword fallback.
         """
         supabase = get_supabase_client()
-        
-        # 1. semantic search (if configured)
-        try:
-             import os
-             if os.getenv("OPENAI_API_KEY"):
-                 from backend.data_processing.generators.embedding_generator import EmbeddingGenerator
-                 emb_gen = EmbeddingGenerator()
-                 # Generate embedding for the query
-                 vecs = emb_gen.generate_embeddings([query])
-                 if vecs and vecs[0]:
-                     response = supabase.rpc("search_drugs", {
-                         "query_embedding": vecs[0],
-                         "match_threshold": 0.5,
-                         "match_count": limit
-                     }).execute()
-                     if response.data:
-                         return response.data
-        except Exception as e:
-             logger.warning(f"Semantic search failed (falling back to simple search): {e}")
+        mode = self._resolve_mode(mode)
+        vector_params = {"match_threshold": 0.5, "ef_search": settings.VECTOR_EF_SEARCH}
+
+        # 1. ranked search: semantic, or full-text (+ semantic) fused with RRF
+        if mode == "vector":
+            try:
+                results = await self._vector_rpc(supabase, "search_drugs", query, {
+                    **vector_params,
+                    "match_count": limit,
+                    **filter_params
+                }, DRUG_EMBEDDING_MODEL)
+                if results:
+                    return results
+            except Exception as e:
+                logger.warning(f"Semantic search failed (falling back to simple search): {e}")
+        else:
+            results = await self._hybrid_search(
+                supabase, query, limit,
+                vector_rpc="search_drugs", vector_params=vector_params, vector_model=DRUG_EMBEDDING_MODEL,
+                fts_rpc="search_drugs_fts", mode=mode, filter_params=filter_params
+            )
+            if results:
+                return results
 
         # 2. simple keyword search fallback
         try:
             # Note: Checking both name and active_substances
-            response = supabase.table("drugs").select("*").or_(f"name.ilike.%{query}%,active_substances.ilike.%{query}%").limit(limit).execute()
+            request = supabase.table("drugs").select(DrugListItem.columns()).or_(f"name.ilike.%{query}%,active_substances.ilike.%{query}%")
+            for param, value in filter_params.items():
+                request = request.eq(param.removeprefix("filter_"), value)
+            response = request.limit(limit).execute()
             return response.data
         except Exception as e:
             logger.error(f"SÚKL simple search error: {e}")
@@ -47,10 +328,18 @@ class SearchService:
     async def search_pubmed(self, query: str, max_results: int = 5) -> List[Dict[str, Any]]:
         """
         Search PubMed using paper-search-mcp logic.
+
+        Concurrent identical searches share one NCBI request.
         """
+        return await singleflight.do(
+            flight_key("search_pubmed", query, max_results),
+            lambda: self._search_pubmed(query, max_results)
+        )
+
+    async def _search_pubmed(self, query: str, max_results: int) -> List[Dict[str, Any]]:
         try:
-            # Calling synchronous library method
-            papers = self.pubmed.search(query, max_results)
+            # Synchronous library method, run off the event loop
+            papers = await asyncio.to_thread(self.pubmed.search, query, max_results)
             
             results = []
             for p in papers:
@@ -70,7 +359,14 @@ class SearchService:
             logger.error(f"PubMed search error: {e}")
             return []
             
-    async def search_guidelines(self, query: str, limit: int = 5, match_threshold: float = 0.7) -> List[Dict[str, Any]]:
+    async def search_guidelines(
+        self,
+        query: str,
+        limit: int = 5,
+        match_threshold: float = 0.7,
+        mode: Optional[str] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Search Guidelines via Supabase using vector similarity search.
 
@@ -78,70 +374,71 @@ class SearchService:
             query: Search query text
             limit: Maximum number of results to return (default: 5)
             match_threshold: Minimum similarity threshold (default: 0.7)
+            mode: "vector", "hybrid" (vector + full-text fused with RRF) or "fts"
+                (full-text only). Defaults to settings.SEARCH_MODE.
+            filters: Prefilters applied inside the index scan, e.g.
+                {"organization": "ČKS"} or {"metadata": {"source": "hypertenze.pdf"}}
 
         Returns:
             List of guideline chunks with metadata for citations
         """
-        import os
+        mode = self._resolve_mode(mode)
+        filter_params = _filter_params(filters, GUIDELINE_FILTERS)
+        # Concurrent identical searches share one embedding + RPC round trip
+        return await singleflight.do(
+            flight_key("search_guidelines", query, limit, match_threshold, mode, filter_params),
+            lambda: self._search_guidelines(query, limit, match_threshold, mode, filter_params)
+        )
+
+    async def _search_guidelines(
+        self,
+        query: str,
+        limit: int,
+        match_threshold: float,
+        mode: str,
+        filter_params: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
         supabase = get_supabase_client()
+        vector_params = {"match_threshold": match_threshold, "ef_search": settings.VECTOR_EF_SEARCH}
 
-        # 1. Vector similarity search (requires OpenAI API key)
-        try:
-            if os.getenv("OPENAI_API_KEY"):
-                from backend.data_processing.generators.embedding_generator import EmbeddingGenerator
-                emb_gen = EmbeddingGenerator()
-                # Generate embedding for the query
-                vecs = emb_gen.generate_embeddings([query])
-                if vecs and vecs[0]:
-                    response = supabase.rpc("match_guidelines", {
-                        "query_embedding": vecs[0],
-                        "match_threshold": match_threshold,
-                        "match_count": limit
-                    }).execute()
-
-                    if response.data:
-                        # Format results with citation metadata
-                        results = []
-                        for item in response.data:
-                            metadata = item.get("metadata", {})
-                            result = {
-                                "id": item.get("id"),
-                                "title": item.get("title"),
-                                "content": item.get("content"),
-                                "source": metadata.get("source", item.get("title")),
-                                "page": metadata.get("page"),
-                                "similarity": item.get("similarity"),
-                                "source_type": "guidelines"
-                            }
-                            results.append(result)
-                        return results
-        except Exception as e:
-            logger.warning(f"Guidelines semantic search failed: {e}", extra={
-                "step": "semantic_search",
-                "error": str(e)
-            })
+        # 1. Vector similarity search (requires OpenAI API key), optionally fused with full-text search
+        if mode == "vector":
+            try:
+                results = await self._vector_rpc(supabase, "match_guidelines", query, {
+                    **vector_params,
+                    "match_count": limit,
+                    **filter_params
+                }, GUIDELINE_EMBEDDING_MODEL)
+                if results:
+                    # Format results with citation metadata
+                    return [_format_guideline(item) for item in results]
+            except Exception as e:
+                logger.warning(f"Guidelines semantic search failed: {e}", extra={
+                    "step": "semantic_search",
+                    "error": str(e)
+                })
+        else:
+            results = await self._hybrid_search(
+                supabase, query, limit,
+                vector_rpc="match_guidelines", vector_params=vector_params, vector_model=GUIDELINE_EMBEDDING_MODEL,
+                fts_rpc="match_guidelines_fts", mode=mode, filter_params=filter_params
+            )
+            if results:
+                return [_format_guideline(item) for item in results]
 
         # 2. Keyword search fallback (if semantic search fails or no API key)
         try:
-            response = supabase.table("guidelines").select(
+            request = supabase.table("guidelines").select(
                 "id, title, content, metadata"
-            ).ilike("content", f"%{query}%").limit(limit).execute()
+            ).ilike("content", f"%{query}%")
+            if filter_params.get("filter_organization"):
+                request = request.eq("organization", filter_params["filter_organization"])
+            if filter_params.get("filter_metadata"):
+                request = request.contains("metadata", filter_params["filter_metadata"])
+            response = request.limit(limit).execute()
 
             if response.data:
-                results = []
-                for item in response.data:
-                    metadata = item.get("metadata", {})
-                    result = {
-                        "id": item.get("id"),
-                        "title": item.get("title"),
-                        "content": item.get("content"),
-                        "source": metadata.get("source", item.get("title")),
-                        "page": metadata.get("page"),
-                        "similarity": None,
-                        "source_type": "guidelines"
-                    }
-                    results.append(result)
-                return results
+                return [_format_guideline(item) for item in response.data]
         except Exception as e:
             logger.error(f"Guidelines keyword search error: {e}", extra={
                 "step": "keyword_search",
@@ -0,0 +1,219 @@
+import bisect
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.app.core.config import settings
+from backend.app.services.drug_data import DrugDataIndexService, normalize_drug_text
+
+SUGGEST_COLUMNS = "sukl_code,name,name_normalized,active_substances,is_available"
+SUKL_CODE_LENGTH = 7
+# Prefix matches examined per query; short prefixes ("p") stop after this many
+MAX_PREFIX_SCAN = 1000
+# Minimum share of the query's trigrams a term must contain for a fuzzy (typo-tolerant) match
+MIN_TRIGRAM_SIMILARITY = 0.5
+
+# Ranking: full-name prefix > SÚKL code > word-start prefix > substance > fuzzy
+SCORE_EXACT = 1.2
+SCORE_NAME_PREFIX = 1.0
+SCORE_CODE = 0.9
+SCORE_WORD_PREFIX = 0.8
+SCORE_SUBSTANCE_PREFIX = 0.7
+SCORE_FUZZY = 0.6
+
+_SUBSTANCE_SPLIT = re.compile(r"\s*[,;+/]\s*")
+
+
+def trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class DrugSuggestIndex:
+    """
+    In-memory autocomplete index over drug names, active substances and SÚKL codes.
+
+    Prefix lookups use a sorted array of normalized keys (every term and every
+    word start within it) searched with bisect - a flattened prefix trie that
+    stays compact for ~100k names. A trigram index (posting lists as NumPy
+    arrays) adds typo-tolerant matches when prefixes alone don't fill the limit.
+
+    Entries are distinct display strings: drugs sharing a name (different
+    strengths or packs) are suggested once, with the SÚKL code of an available
+    registration when there is one.
+    """
+    def __init__(self, drugs: Iterable[Dict[str, Any]]):
+        self.entries: List[Dict[str, Any]] = []
+        self._norms: List[str] = []
+        entry_ids: Dict[Tuple[str, str], int] = {}
+        codes: List[Tuple[str, int]] = []
+
+        def add_entry(kind: str, text: str, norm: str, drug: Dict[str, Any]) -> int:
+            key = (kind, norm)
+            entry_id = entry_ids.get(key)
+            if entry_id is None:
+                entry_id = entry_ids[key] = len(self.entries)
+                self.entries.append({
+                    "text": text,
+                    "type": kind,
+                    "sukl_code": drug.get("sukl_code") if kind == "drug" else None,
+                    "active_substances": drug.get("active_substances") if kind == "drug" else None,
+                    "is_available": bool(drug.get("is_available")) if kind == "drug" else True,
+                })
+                self._norms.append(norm)
+            elif kind == "drug" and drug.get("is_available") and not self.entries[entry_id]["is_available"]:
+                # Prefer an available registration as the representative SÚKL code
+                self.entries[entry_id].update(
+                    sukl_code=drug.get("sukl_code"), active_substances=drug.get("active_substances"), is_available=True
+                )
+            return entry_id
+
+        for drug in drugs:
+            name = (drug.get("name") or "").strip()
+            name_norm = normalize_drug_text(drug.get("name_normalized") or name)
+            if name_norm:
+                entry_id = add_entry("drug", name, name_norm, drug)
+                if drug.get("sukl_code"):
+                    codes.append((str(drug["sukl_code"]), entry_id))
+            for substance in _SUBSTANCE_SPLIT.split(drug.get("active_substances") or ""):
+                substance_norm = normalize_drug_text(substance)
+                if substance_norm:
+                    add_entry("substance", substance.strip(), substance_norm, drug)
+
+        # Prefix keys: the whole term (position 0) and each later word start
+        prefix_keys: List[Tuple[str, int, int]] = []
+        for entry_id, norm in enumerate(self._norms):
+            prefix_keys.append((norm, entry_id, 0))
+            for match in re.finditer(r" ", norm):
+                prefix_keys.append((norm[match.end():], entry_id, 1))
+        prefix_keys.sort()
+        self._keys = [key for key, _, _ in prefix_keys]
+        self._key_refs = [(entry_id, position) for _, entry_id, position in prefix_keys]
+
+        codes.sort()
+        self._codes = [code for code, _ in codes]
+        self._code_refs = [(code, entry_id) for code, entry_id in codes]
+
+        postings: Dict[str, List[int]] = {}
+        self._trigram_counts = np.zeros(len(self.entries), dtype=np.int32)
+        for entry_id, norm in enumerate(self._norms):
+            grams = trigrams(norm)
+            self._trigram_counts[entry_id] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(entry_id)
+        self._postings = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _prefix_matches(self, query: str, scores: Dict[int, float]):
+        start = bisect.bisect_left(self._keys, query)
+        for i in range(start, min(start + MAX_PREFIX_SCAN, len(self._keys))):
+            if not self._keys[i].startswith(query):
+                break
+            entry_id, position = self._key_refs[i]
+            entry = self.entries[entry_id]
+            if position == 0:
+                if self._keys[i] == query:
+                    score = SCORE_EXACT
+                else:
+                    score = SCORE_NAME_PREFIX if entry["type"] == "drug" else SCORE_SUBSTANCE_PREFIX
+            else:
+                score = SCORE_WORD_PREFIX if entry["type"] == "drug" else SCORE_SUBSTANCE_PREFIX * 0.9
+            if score > scores.get(entry_id, 0.0):
+                scores[entry_id] = score
+
+    def _code_matches(self, query: str, scores: Dict[int, float], code_hits: Dict[int, str]):
+        candidates = [query]
+        if len(query) < SUKL_CODE_LENGTH:
+            # "12345" also finds the zero-padded code 0012345
+            candidates.append(query.zfill(SUKL_CODE_LENGTH))
+        for prefix in candidates:
+            start = bisect.bisect_left(self._codes, prefix)
+            for i in range(start, min(start + MAX_PREFIX_SCAN, len(self._codes))):
+                if not self._codes[i].startswith(prefix):
+                    break
+                code, entry_id = self._code_refs[i]
+                if SCORE_CODE > scores.get(entry_id, 0.0):
+                    scores[entry_id] = SCORE_CODE
+                    code_hits[entry_id] = code
+
+    def _fuzzy_matches(self, query: str, scores: Dict[int, float], limit: int):
+        grams = trigrams(query)
+        lists = [self._postings[gram] for gram in grams if gram in self._postings]
+        if not lists:
+            return
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.entries))
+        candidates = np.nonzero(shared)[0]
+        # Share of the query's trigrams found in the term, so long names are not penalized
+        similarity = shared[candidates] / len(grams)
+        keep = similarity >= MIN_TRIGRAM_SIMILARITY
+        candidates, similarity = candidates[keep], similarity[keep]
+        if len(candidates) > limit * 4:
+            top = np.argpartition(-similarity, limit * 4 - 1)[:limit * 4]
+            candidates, similarity = candidates[top], similarity[top]
+        for entry_id, entry_similarity in zip(candidates.tolist(), similarity.tolist()):
+            score = SCORE_FUZZY * entry_similarity
+            if score > scores.get(entry_id, 0.0):
+                scores[entry_id] = score
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Ranked completions for `query` (case- and diacritics-insensitive).
+        """
+        norm = normalize_drug_text(query)
+        if not norm or limit <= 0:
+            return []
+
+        scores: Dict[int, float] = {}
+        code_hits: Dict[int, str] = {}
+        if norm.isdigit():
+            self._code_matches(norm, scores, code_hits)
+        self._prefix_matches(norm, scores)
+        if len(scores) < limit and len(norm) >= 3:
+            self._fuzzy_matches(norm, scores, limit)
+
+        ranked = sorted(
+            scores.items(),
+            key=lambda item: (
+                -item[1],
+                not self.entries[item[0]]["is_available"],
+                len(self._norms[item[0]]),
+                self._norms[item[0]]
+            )
+        )[:limit]
+
+        return [
+            {
+                "text": self.entries[entry_id]["text"],
+                "type": self.entries[entry_id]["type"],
+                "sukl_code": code_hits.get(entry_id, self.entries[entry_id]["sukl_code"]),
+                "active_substances": self.entries[entry_id]["active_substances"],
+                "score": round(score, 3)
+            }
+            for entry_id, score in ranked
+        ]
+
+
+class SuggestService(DrugDataIndexService):
+    """
+    Holds the current DrugSuggestIndex (rebuilt after pipeline runs).
+    """
+    name = "Drug suggest index"
+    columns = SUGGEST_COLUMNS
+
+    def build_index(self, rows: Iterable[Dict[str, Any]]) -> DrugSuggestIndex:
+        return DrugSuggestIndex(rows)
+
+    def suggest(self, query: str, limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """
+        Completions for `query`, or None while the index has not been built yet.
+        """
+        index = self.index
+        if index is None:
+            return None
+        return index.suggest(query, limit)
+
+
+suggest_service = SuggestService(settings.DRUG_DATA_STAMP_PATH)
@@ -0,0 +1,269 @@
+"""
+Cache warm-up from the historical query log.
+
+Every deploy used to start with empty caches and uncompiled graphs, so the
+first users paid for query embeddings, SÚKL/PubMed retrievals and graph
+compilation. The warm-up replays the most frequent queries of the `queries`
+table (grouped by their normalized text) with bounded concurrency:
+
+    embeddings  query embeddings for the drug and guideline models (batched)
+    sukl        SuklRetriever results ("sukl:" retriever cache keys)
+    pubmed      PubMedRetriever results ("pubmed:" keys), one search at a time,
+                paced by the retriever (NCBI allows ~3 requests/s without an
+                API key); only into a shared L2, by the worker that takes the
+                PubMed warm-up lock, so workers do not each hit NCBI
+
+and imports (compiling) agent_graph, epicrisis_graph and translator_graph.
+
+It runs in the app lifespan, and at the end of run_pipeline. The pipeline is a
+separate process, so there it only fills the tiers shared with the API (the
+L2 retriever cache, the on-disk embedding cache). It also refreshes the
+"sukl:" entries, because their results change when drugs are reloaded.
+"""
+
+import asyncio
+import importlib
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from backend.app.core.config import settings
+from backend.app.core.database import get_supabase_client
+from backend.data_processing.config.settings import settings as pipeline_settings
+from backend.data_processing.generators.embedding_generator import DRUG_EMBEDDING_MODEL, GUIDELINE_EMBEDDING_MODEL
+from backend.data_processing.utils.czech_text import normalize_czech_text
+
+logger = logging.getLogger("warmup")
+
+WARMUP_GRAPHS = ("backend.agent_graph", "backend.epicrisis_graph", "backend.translator_graph")
+WARMUP_EMBEDDING_MODELS = (DRUG_EMBEDDING_MODEL, GUIDELINE_EMBEDDING_MODEL)
+# Queries embedded per OpenAI request
+EMBEDDING_BATCH_SIZE = 64
+# PubMed searches in flight (each is two NCBI requests)
+PUBMED_CONCURRENCY = 1
+# Longer texts are pasted documents (epicrises, reports), not repeatable queries
+MAX_QUERY_CHARS = 300
+# Lock in the shared retriever cache; held for the PubMed result TTL, so the
+# warm-ups of the other workers (and restarts within the hour) skip PubMed
+PUBMED_WARMUP_LOCK_KEY = "warmup:pubmed"
+PUBMED_WARMUP_LOCK_TTL = 3600
+
+
+def top_queries(supabase, limit: int, scan_limit: int) -> List[str]:
+    """
+    Returns the `limit` most frequent queries among the latest `scan_limit` rows.
+
+    Queries are grouped by normalized text (case, diacritics, whitespace); each
+    group is represented by its most common spelling, since the retriever cache
+    keys use the text as typed.
+    """
+    response = (
+        supabase.table("queries")
+        .select("query_text")
+        .order("created_at", desc=True)
+        .limit(scan_limit)
+        .execute()
+    )
+    counts: Counter = Counter()
+    spellings: Dict[str, Counter] = {}
+    for row in response.data or []:
+        text = " ".join((row.get("query_text") or "").split())
+        if not text or len(text) > MAX_QUERY_CHARS:
+            continue
+        normalized = normalize_czech_text(text)
+        counts[normalized] += 1
+        spellings.setdefault(normalized, Counter())[text] += 1
+    return [spellings[normalized].most_common(1)[0][0] for normalized, _ in counts.most_common(limit)]
+
+
+def compile_graphs(modules: Iterable[str] = WARMUP_GRAPHS) -> Dict[str, bool]:
+    """
+    Imports the graph modules (each compiles its `app` at import). Returns success per module.
+    """
+    compiled = {}
+    for name in modules:
+        try:
+            importlib.import_module(name).app
+            compiled[name] = True
+        except Exception as e:
+            logger.warning(f"Graph {name} not compiled during warm-up: {e}")
+            compiled[name] = False
+    return compiled
+
+
+class CacheWarmer:
+    """
+    Runs warm-ups and keeps the outcome of the last one for /health/warmup.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running = False
+        self.last_run: Optional[Dict[str, Any]] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.last_run is not None
+
+    async def run(
+        self,
+        limit: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        graphs: bool = True,
+        shared_only: bool = False,
+        refresh_namespaces: Iterable[str] = (),
+        supabase=None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Warms the caches with the top queries (and compiles the graphs).
+
+        Args:
+            shared_only: Only warm caches other processes read (run_pipeline).
+            refresh_namespaces: Retriever cache namespaces ("sukl", "pubmed")
+                whose entries for the top queries are re-fetched even if cached.
+
+        Returns the run's statistics, or None if a warm-up is already running.
+        """
+        with self._lock:
+            if self._running:
+                return None
+            self._running = True
+        try:
+            stats = await self._run(
+                limit or settings.WARMUP_TOP_QUERIES,
+                concurrency or settings.WARMUP_CONCURRENCY,
+                graphs, shared_only, set(refresh_namespaces), supabase
+            )
+            self.last_run = stats
+            return stats
+        finally:
+            with self._lock:
+                self._running = False
+
+    async def _run(
+        self,
+        limit: int,
+        concurrency: int,
+        graphs: bool,
+        shared_only: bool,
+        refresh: set,
+        supabase
+    ) -> Dict[str, Any]:
+        start = time.perf_counter()
+        # Graph imports are CPU-bound and synchronous: compile them while the caches warm
+        graph_task = asyncio.create_task(asyncio.to_thread(compile_graphs)) if graphs else None
+
+        queries: List[str] = []
+        try:
+            queries = await asyncio.to_thread(
+                top_queries, supabase or get_supabase_client(), limit, settings.WARMUP_QUERY_SCAN_LIMIT
+            )
+        except Exception as e:
+            logger.warning(f"Query log not available for warm-up: {e}")
+
+        semaphore = asyncio.Semaphore(concurrency)
+        pubmed_semaphore = asyncio.Semaphore(min(PUBMED_CONCURRENCY, concurrency))
+        counts = {"embeddings": 0, "sukl": 0, "pubmed": 0, "failed": 0}
+
+        async def bounded(kind: str, coro_fn, sem: asyncio.Semaphore = semaphore):
+            async with sem:
+                try:
+                    warmed = await coro_fn()
+                except Exception as e:
+                    counts["failed"] += 1
+                    logger.warning(f"Warm-up of {kind} failed: {e}")
+                    return
+                counts[kind] += warmed
+
+        # In-process tiers die with the pipeline process; only shared/persistent ones are worth filling there
+        warm_embeddings = bool(settings.OPENAI_API_KEY) and (not shared_only or bool(settings.EMBEDDING_CACHE_PATH))
+        warm_retrievers = not shared_only or pipeline_settings.RETRIEVER_CACHE_BACKEND != "memory"
+        warm_pubmed = warm_retrievers and bool(queries) and await self._take_pubmed_lock()
+
+        jobs = []
+        if warm_embeddings:
+            for model in WARMUP_EMBEDDING_MODELS:
+                jobs += [
+                    bounded("embeddings", lambda batch=batch, model=model: self._warm_embeddings(batch, model))
+                    for batch in _batches(queries, EMBEDDING_BATCH_SIZE)
+                ]
+        if warm_retrievers:
+            jobs += [
+                bounded("sukl", lambda query=query: self._warm_sukl(query, "sukl" in refresh))
+                for query in queries
+            ]
+        if warm_pubmed:
+            jobs += [
+                bounded("pubmed", lambda query=query: self._warm_pubmed(query, "pubmed" in refresh), pubmed_semaphore)
+                for query in queries
+            ]
+        await asyncio.gather(*jobs)
+
+        stats = {
+            "queries": len(queries),
+            "warmed": {kind: counts[kind] for kind in ("embeddings", "sukl", "pubmed")},
+            "failed": counts["failed"],
+            "graphs": await graph_task if graph_task is not None else {},
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            "finished_at": time.time()
+        }
+        logger.info(f"Warm-up finished: {stats}")
+        return stats
+
+    async def _take_pubmed_lock(self) -> bool:
+        from backend.services.cache import TieredCache, cache
+
+        if not isinstance(cache, TieredCache):
+            logger.info("PubMed warm-up skipped: no shared retriever cache")
+            return False
+        if not await cache.acquire(PUBMED_WARMUP_LOCK_KEY, PUBMED_WARMUP_LOCK_TTL):
+            logger.info("PubMed warm-up skipped: warmed by another worker")
+            return False
+        return True
+
+    async def _warm_embeddings(self, queries: List[str], model: str) -> int:
+        from backend.app.services.search_service import search_service
+
+        embedding_cache = search_service.embedding_cache
+        missing = [query for query in queries if embedding_cache.get(query, model) is None]
+        if not missing:
+            return 0
+        vectors = await search_service._get_embedding_generator(model).generate_embeddings_async(missing)
+        warmed = 0
+        for query, vector in zip(missing, vectors):
+            if vector:
+                embedding_cache.set(query, model, vector)
+                warmed += 1
+        return warmed
+
+    async def _warm_sukl(self, query: str, refresh: bool) -> int:
+        from backend.pipeline.retrievers.sukl_retriever import SuklRetriever
+        from backend.services.cache import cache
+
+        key = SuklRetriever.cache_key(query)
+        if refresh:
+            await cache.adelete(key)
+        await SuklRetriever().search_drugs(query)
+        # Errors and empty results are not cached
+        return int(await cache.alookup(key) is not None)
+
+    async def _warm_pubmed(self, query: str, refresh: bool) -> int:
+        from backend.pipeline.retrievers.pubmed import PubMedRetriever
+        from backend.services.cache import cache
+
+        key = PubMedRetriever.cache_key(query)
+        if refresh:
+            await cache.adelete(key)
+        await PubMedRetriever().search(query)
+        return int(await cache.alookup(key) is not None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "running": self._running, "last_run": self.last_run}
+
+
+def _batches(items: List[str], size: int) -> List[List[str]]:
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+# Global instance
+cache_warmer = CacheWarmer()
@@ -9,9 +9,21 @@ class Settings(BaseSettings):
     # Supabase
     SUPABASE_URL: str
     SUPABASE_KEY: str  # Service role key preferred
+    SUPABASE_POOL_MAX_CONNECTIONS: int = 20
+    SUPABASE_POOL_MAX_KEEPALIVE: int = 10
+    SUPABASE_POOL_KEEPALIVE_EXPIRY: float = 30.0  # seconds
+    SUPABASE_TIMEOUT: float = 10.0  # seconds
 
     # OpenAI (for embeddings)
     OPENAI_API_KEY: str | None = None
+    # Embedding model per table; stored rows are stamped with the model and
+    # searches only compare vectors of the same version
+    DRUG_EMBEDDING_MODEL: str = "text-embedding-ada-002"
+    GUIDELINE_EMBEDDING_MODEL: str = "text-embedding-3-small"
+    # Async embedding client tuning (data_processing/generators/embedding_generator.py)
+    EMBEDDING_TIMEOUT: float = 10.0  # seconds
+    EMBEDDING_MAX_CONCURRENCY: int = 8  # in-flight requests per generator
+    EMBEDDING_MAX_CONNECTIONS: int = 20  # pooled connections per event loop
 
     # Anthropic (for Agents)
     ANTHROPIC_API_KEY: str
@@ -19,9 +31,31 @@ class Settings(BaseSettings):
     # Tools
     PUBMED_EMAIL: str | None = "admin@benjamin.cz"
 
+    # Retriever result cache (services/cache.py; "pubmed:" / "sukl:" keys)
+    RETRIEVER_CACHE_MAX_ENTRIES: int = 10_000
+    RETRIEVER_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RETRIEVER_CACHE_POLICY: str = "lru"  # "lru" or "lfu"
+    RETRIEVER_CACHE_SWEEP_INTERVAL: float = 60.0  # seconds between expiry sweeps; 0 disables the sweeper
+    # Shared L2 behind the in-process cache, for multiple uvicorn workers:
+    # "memory" (none), "redis" (any RESP server) or "sqlite" (one host; e.g. a file on /dev/shm)
+    RETRIEVER_CACHE_BACKEND: str = "memory"
+    RETRIEVER_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    # Stale-while-revalidate: seconds past the TTL an entry is still served (and
+    # refreshed in the background), per key namespace; namespaces not listed get 0
+    RETRIEVER_CACHE_STALE_GRACE: dict[str, float] = {"pubmed": 24 * 3600.0, "sukl": 6 * 3600.0}
+    # Failed background refreshes of a key are retried after 30 s, 60 s, ... up to the max
+    RETRIEVER_CACHE_REFRESH_BACKOFF: float = 30.0
+    RETRIEVER_CACHE_REFRESH_MAX_BACKOFF: float = 900.0
+
     # Paths
     BASE_DIR: Path = Path(__file__).resolve().parent.parent
     RAW_DATA_DIR: Path = BASE_DIR / "raw_data"
+    DRUG_MANIFEST_PATH: Path = BASE_DIR / "cache" / "drug_manifest.db"
+    RETRIEVER_CACHE_SQLITE_PATH: Path = BASE_DIR / "cache" / "retriever_cache.db"
+    # Read by the API when DRUG_VECTOR_BACKEND="local" (app setting DRUG_VECTOR_INDEX_PATH)
+    DRUG_VECTOR_INDEX_PATH: Path = BASE_DIR.parent / "data" / "drug_vector_index"
+    # Touched after each drug load; the API rebuilds its in-memory drug indexes (app setting DRUG_DATA_STAMP_PATH)
+    DRUG_DATA_STAMP_PATH: Path = BASE_DIR.parent / "data" / "drugs_updated_at"
 
     model_config = SettingsConfigDict(
         env_file="backend/.env",
@@ -1,21 +1,88 @@
 import openai
-from typing import List, Dict, Any
+import httpx
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 import os
 import asyncio
+import weakref
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from backend.data_processing.config.settings import settings
+
 logger = logging.getLogger(__name__)
 
+# Async client tuning (see Settings)
+EMBEDDING_TIMEOUT = settings.EMBEDDING_TIMEOUT  # seconds
+EMBEDDING_MAX_CONCURRENCY = settings.EMBEDDING_MAX_CONCURRENCY
+EMBEDDING_MAX_CONNECTIONS = settings.EMBEDDING_MAX_CONNECTIONS
+
+# Embedding model per table. Stored rows are stamped with embedding_version()
+# and searches only compare vectors of the same version.
+DRUG_EMBEDDING_MODEL = settings.DRUG_EMBEDDING_MODEL
+GUIDELINE_EMBEDDING_MODEL = settings.GUIDELINE_EMBEDDING_MODEL
+EMBEDDING_DIMENSIONS = 1536  # Fixed by the vector(1536) columns
+
+
+def embedding_version(model: str, dimensions: int = EMBEDDING_DIMENSIONS) -> str:
+    """
+    Version stamp stored with each embedding, e.g. "text-embedding-3-small:1536".
+    """
+    return f"{model}:{dimensions}"
+
+# One pool per event loop: an httpx.AsyncClient's connections belong to the
+# loop that opened them (the app, scripts and tests each run their own loops)
+_async_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """
+    Returns the httpx.AsyncClient used for OpenAI embedding calls on the running event loop.
+    Sharing one client per loop keeps TCP/TLS connections alive across requests.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_http_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(EMBEDDING_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=EMBEDDING_MAX_CONNECTIONS,
+                max_keepalive_connections=EMBEDDING_MAX_CONNECTIONS
+            )
+        )
+        _async_http_clients[loop] = client
+    return client
+
+
+async def aclose_async_http_client():
+    """
+    Closes the running loop's embedding connection pool (app shutdown).
+    """
+    client = _async_http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
 class EmbeddingGenerator:
     """
     Generates embeddings for drugs using OpenAI API.
     """
-    def __init__(self, model: str = "text-embedding-ada-002"):
+    def __init__(
+        self,
+        model: str = DRUG_EMBEDDING_MODEL,
+        max_concurrency: int = EMBEDDING_MAX_CONCURRENCY,
+        timeout: float = EMBEDDING_TIMEOUT
+    ):
         self.model = model
-        api_key = os.getenv("OPENAI_API_KEY")
-        if api_key:
-            self.client = openai.Client(api_key=api_key)
+        self.version = embedding_version(model)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._api_key = os.getenv("OPENAI_API_KEY")
+        # Per event loop: the AsyncOpenAI client and the concurrency semaphore
+        self._async_state: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        if self._api_key:
+            self.client = openai.Client(api_key=self._api_key, timeout=timeout)
         else:
             self.client = None
             logger.warning("OPENAI_API_KEY not found. Embeddings will fail if requested.")
@@ -64,9 +131,47 @@ class EmbeddingGenerator:
             
         return embeddings_list
 
+    def _get_async_state(self) -> Optional[Tuple[openai.AsyncOpenAI, asyncio.Semaphore]]:
+        """
+        Returns the AsyncOpenAI client (on the loop's shared pool) and semaphore for the running loop.
+        """
+        if not self._api_key:
+            return None
+        loop = asyncio.get_running_loop()
+        state = self._async_state.get(loop)
+        if state is None or state[0].is_closed():
+            client = openai.AsyncOpenAI(
+                api_key=self._api_key,
+                timeout=self.timeout,
+                http_client=get_async_http_client()
+            )
+            state = (client, asyncio.Semaphore(self.max_concurrency))
+            self._async_state[loop] = state
+        return state
+
     async def generate_embeddings_async(self, texts: List[str]) -> List[List[float]]:
         """
-        Async wrapper for embedding generation (using sync client in thread or async client if available).
-        For simplicity, using blocking call here as we batch heavily.
+        Generate embeddings without blocking the event loop.
+        Concurrent calls share one connection pool and are limited to
+        `max_concurrency` in-flight requests per generator (and event loop).
         """
-        return self.generate_embeddings(texts)
+        state = self._get_async_state()
+        if not state:
+            logger.warning("OpenAI client not initialized. Returning None for embeddings.")
+            return [None] * len(texts)
+
+        if not texts:
+            return []
+
+        client, semaphore = state
+        try:
+            async with semaphore:
+                response = await client.embeddings.create(
+                    input=texts,
+                    model=self.model
+                )
+            return [item.embedding for item in response.data]
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {e}")
+            # Return None for failed items to keep length consistent matching input
+            return [None] * len(texts)
@@ -11,11 +11,15 @@ class DrugLoader:
     def __init__(self):
         self.supabase = SupabaseSingleton.get_client()
 
-    def load_drugs(self, drugs: List[Dict[str, Any]], batch_size: int = 100):
+    def load_drugs(self, drugs: List[Dict[str, Any]], batch_size: int = 100) -> int:
         """
         Upserts drugs in batches.
+
+        Returns:
+            Number of drugs uploaded successfully.
         """
         total = len(drugs)
+        uploaded = 0
         logger.info(f"Starting upload of {total} drugs to Supabase...")
         
         for i in range(0, total, batch_size):
@@ -26,6 +30,7 @@ class DrugLoader:
                     batch, 
                     on_conflict="sukl_code"
                 ).execute()
+                uploaded += len(batch)
                 logger.info(f"Uploaded batch {i//batch_size + 1}/{(total//batch_size) + 1}")
             except Exception as e:
                 logger.error(f"Error uploading batch starting at index {i}: {e}")
@@ -33,3 +38,4 @@ class DrugLoader:
                 traceback.print_exc()
                 
         logger.info("Upload complete.")
+        return uploaded
@@ -1,7 +1,13 @@
 import os
 import glob
+import json
 import time
-from typing import List, Optional
+import hashlib
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from langchain_core.documents import Document
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_openai import OpenAIEmbeddings
@@ -9,6 +15,11 @@ from supabase import Client
 
 from backend.app.core.config import settings
 from backend.app.core.database import get_supabase_client
+from backend.data_processing.generators.embedding_generator import (
+    EMBEDDING_TIMEOUT,
+    GUIDELINE_EMBEDDING_MODEL,
+    embedding_version,
+)
 from backend.services.logger import get_logger
 
 logger = get_logger(__name__)
@@ -18,27 +29,102 @@ EMBEDDING_MAX_RETRIES = 3
 EMBEDDING_BASE_DELAY = 1.0  # seconds
 EMBEDDING_MAX_DELAY = 10.0  # seconds
 
+# Concurrency of the ingestion pipeline
+EMBEDDING_BATCH_SIZE = 50  # chunks per embeddings request
+EMBEDDING_CONCURRENCY = 4  # embeddings requests in flight across all files
+FILE_CONCURRENCY = 8  # files parsed/embedded/stored at once (bounds memory)
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+
+
+def load_and_split_pdf(file_path: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> List[Document]:
+    """
+    Loads a PDF and splits it into chunks.
+
+    Module-level so it can run in a worker process of a ProcessPoolExecutor.
+    """
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", " ", ""]
+    )
+    return splitter.split_documents(PyPDFLoader(file_path).load())
+
+
+def hash_file(file_path: str) -> str:
+    """
+    SHA-256 of the file contents, read in 1 MB blocks.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_chunk(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429 or "RateLimit" in type(error).__name__
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
 class GuidelinesLoader:
     """
     Handles loading, chunking, and embedding of Guideline PDFs.
     """
     
-    def __init__(self, pdf_dir: str = "backend/data/guidelines_pdfs"):
+    def __init__(
+        self,
+        pdf_dir: str = "backend/data/guidelines_pdfs",
+        parse_workers: Optional[int] = None,
+        embedding_concurrency: int = EMBEDDING_CONCURRENCY,
+        file_concurrency: int = FILE_CONCURRENCY
+    ):
+        """
+        Args:
+            pdf_dir: Directory scanned by ingest_pdfs.
+            parse_workers: Size of the process pool used for PDF parsing and
+                splitting. None parses in threads, which is enough for a few files
+                (e.g. a single admin upload); the CLI pipeline uses os.cpu_count().
+            embedding_concurrency: Embeddings requests in flight at once.
+            file_concurrency: Files in the pipeline at once.
+        """
         self.pdf_dir = pdf_dir
+        self.parse_workers = parse_workers
+        self.embedding_concurrency = embedding_concurrency
+        self.file_concurrency = file_concurrency
+        # Shared across concurrent batches: set when the API answers 429
+        self._rate_limited_until = 0.0
         self.supabase: Client = get_supabase_client()
+        self.embedding_version = embedding_version(GUIDELINE_EMBEDDING_MODEL)
         self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small", 
-            api_key=settings.OPENAI_API_KEY
+            model=GUIDELINE_EMBEDDING_MODEL,
+            api_key=settings.OPENAI_API_KEY,
+            request_timeout=EMBEDDING_TIMEOUT
         )
         self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
             separators=["\n\n", "\n", " ", ""]
         )
 
-    def _embed_with_retry(self, texts: List[str], batch_index: int, filename: str) -> List[List[float]]:
+    async def _embed_with_retry(self, texts: List[str], batch_index: int, filename: str) -> List[List[float]]:
         """
         Generate embeddings with exponential backoff retry logic.
+        Uses the async embeddings client so ingestion does not block the event loop.
+
+        A rate-limit response pauses every concurrent batch (not only this one)
+        until the backoff or Retry-After period has passed.
 
         Args:
             texts: List of text chunks to embed
@@ -55,7 +141,10 @@ class GuidelinesLoader:
 
         for attempt in range(1, EMBEDDING_MAX_RETRIES + 1):
             try:
-                vectors = self.embeddings.embed_documents(texts)
+                pause = self._rate_limited_until - time.monotonic()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                vectors = await self.embeddings.aembed_documents(texts)
                 if attempt > 1:
                     logger.info(
                         "Embedding generation succeeded after retry",
@@ -71,6 +160,9 @@ class GuidelinesLoader:
                 if attempt < EMBEDDING_MAX_RETRIES:
                     # Calculate delay with exponential backoff
                     delay = min(EMBEDDING_BASE_DELAY * (2 ** (attempt - 1)), EMBEDDING_MAX_DELAY)
+                    if _is_rate_limit_error(e):
+                        delay = max(delay, _retry_after(e) or 0.0)
+                        self._rate_limited_until = max(self._rate_limited_until, time.monotonic() + delay)
 
                     logger.warning(
                         "Embedding generation failed, retrying",
@@ -84,7 +176,7 @@ class GuidelinesLoader:
                         retry_delay_seconds=delay
                     )
 
-                    time.sleep(delay)
+                    await asyncio.sleep(delay)
                 else:
                     logger.error(
                         "Embedding generation failed after max retries",
@@ -99,9 +191,229 @@ class GuidelinesLoader:
         # Re-raise the last exception if all retries exhausted
         raise last_exception
 
-    async def ingest_pdfs(self):
+    async def _load_chunks(self, file_path: str, executor: Optional[Executor]) -> List[Document]:
         """
-        Scans the PDF directory, processes each file, and upserts chunks to Supabase.
+        Parses and splits one PDF off the event loop.
+        """
+        if executor is not None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, load_and_split_pdf, file_path)
+
+        def load_and_split():
+            docs = PyPDFLoader(file_path).load()
+            return self.text_splitter.split_documents(docs)
+
+        return await asyncio.to_thread(load_and_split)
+
+    async def _embed_batches(
+        self,
+        chunks: List[Document],
+        filename: str,
+        semaphore: asyncio.Semaphore
+    ) -> List[List[float]]:
+        """
+        Embeds all chunks of a file, dispatching batches concurrently.
+
+        The shared semaphore caps requests in flight across all files, so a large
+        file cannot starve the others and the API quota is respected.
+        """
+        async def embed_batch(batch_index: int, texts: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._embed_with_retry(texts, batch_index, filename)
+
+        batches = [
+            [c.page_content for c in chunks[i:i + EMBEDDING_BATCH_SIZE]]
+            for i in range(0, len(chunks), EMBEDDING_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(*(embed_batch(i, texts) for i, texts in enumerate(batches)))
+        return [vector for vectors in results for vector in vectors]
+
+    def _build_records(
+        self,
+        filename: str,
+        chunks: List[Document],
+        vectors: List[List[float]],
+        file_hash: str
+    ) -> List[Dict[str, Any]]:
+        records = []
+        for chunk, vector in zip(chunks, vectors):
+            records.append({
+                # Required fields by 008_guidelines.sql
+                "title": filename,
+                "organization": "Unknown",
+                "publication_year": "2024",  # TEXT type in schema
+                "is_czech": True,
+                # Chunk content for RAG retrieval
+                "content": chunk.page_content,
+                # Metadata JSONB for source attribution and citations; the hashes
+                # let re-ingestion skip unchanged files and reuse unchanged chunks,
+                # the chunk count detects a partially stored file
+                "metadata": {
+                    "source": filename,
+                    "page": chunk.metadata.get("page", 0),
+                    **chunk.metadata,
+                    "file_hash": file_hash,
+                    "chunk_hash": hash_chunk(chunk.page_content),
+                    "chunk_count": len(chunks)
+                },
+                "embedding": vector,
+                "embedding_version": self.embedding_version
+            })
+        return records
+
+    def _is_fully_stored(self, filename: str, file_hash: str) -> bool:
+        """
+        Whether every chunk of this exact file is stored with the current model.
+
+        The delete and the batched inserts in _store_records are not one
+        transaction, so a failed batch leaves some chunks carrying the new
+        file hash; comparing the row count with the chunk count recorded on
+        each row keeps such a file from being skipped.
+        """
+        res = self.supabase.table("guidelines").select(
+            "file_hash:metadata->>file_hash, embedding_version, chunk_count:metadata->>chunk_count"
+        ).eq("title", filename).execute()
+        rows = list(res.data or [])
+        return bool(rows) and all(
+            row.get("file_hash") == file_hash
+            and row.get("embedding_version") == self.embedding_version
+            and str(row.get("chunk_count")) == str(len(rows))
+            for row in rows
+        )
+
+    def _stored_vectors(self, filename: str) -> Dict[str, List[float]]:
+        """
+        Returns {chunk_hash: embedding} for the stored chunks of a file that were
+        embedded with the current model (other versions are not comparable).
+        """
+        res = self.supabase.table("guidelines").select(
+            "embedding, embedding_version, chunk_hash:metadata->>chunk_hash"
+        ).eq("title", filename).execute()
+
+        vectors = {}
+        for row in res.data or []:
+            embedding = row.get("embedding")
+            if not row.get("chunk_hash") or not embedding or row.get("embedding_version") != self.embedding_version:
+                continue
+            # pgvector columns are returned as text, e.g. "[0.1,0.2,...]"
+            vectors[row["chunk_hash"]] = json.loads(embedding) if isinstance(embedding, str) else embedding
+        return vectors
+
+    def _store_records(self, filename: str, records: List[Dict[str, Any]]):
+        # Replace existing chunks for this file to ensure idempotency. Match on
+        # title: metadata.source may hold the full path reported by PyPDFLoader.
+        self.supabase.table("guidelines").delete().eq("title", filename).execute()
+
+        # Insert new ones in batches
+        for i in range(0, len(records), EMBEDDING_BATCH_SIZE):
+            self.supabase.table("guidelines").insert(records[i:i + EMBEDDING_BATCH_SIZE]).execute()
+
+    async def _ingest_file(
+        self,
+        file_path: str,
+        executor: Optional[Executor],
+        embed_semaphore: asyncio.Semaphore,
+        force: bool = False,
+        raise_errors: bool = False
+    ) -> Dict[str, int]:
+        """
+        Hash -> parse -> embed changed chunks -> store for one PDF.
+
+        Errors are logged; they are re-raised only with `raise_errors`.
+
+        Returns:
+            Counts of chunks stored, embedded and reused, and whether the file was skipped.
+        """
+        filename = os.path.basename(file_path)
+        stats = {"stored": 0, "embedded": 0, "reused": 0, "skipped": 0}
+        logger.info(
+            "Processing PDF file",
+            filename=filename,
+            file_path=file_path,
+            step="ingest_pdfs"
+        )
+
+        try:
+            # 1. Skip byte-identical files that are already fully stored with the current model
+            file_hash = await asyncio.to_thread(hash_file, file_path)
+            if not force and await asyncio.to_thread(self._is_fully_stored, filename, file_hash):
+                logger.info(
+                    "PDF unchanged since last ingestion, skipping",
+                    filename=filename,
+                    file_hash=file_hash,
+                    step="ingest_pdfs"
+                )
+                stats["skipped"] = 1
+                return stats
+
+            # 2. Load PDF and split into chunks
+            chunks = await self._load_chunks(file_path, executor)
+            logger.info(
+                "Split PDF into chunks",
+                filename=filename,
+                chunk_count=len(chunks),
+                step="split_documents"
+            )
+
+            # 3. Generate Embeddings only for chunks whose text changed
+            stored_vectors = {} if force else await asyncio.to_thread(self._stored_vectors, filename)
+            hashes = [hash_chunk(c.page_content) for c in chunks]
+            to_embed = [c for c, h in zip(chunks, hashes) if h not in stored_vectors]
+            new_vectors = iter(await self._embed_batches(to_embed, filename, embed_semaphore))
+            vectors = [stored_vectors[h] if h in stored_vectors else next(new_vectors) for h in hashes]
+            records = self._build_records(filename, chunks, vectors, file_hash)
+
+            # 4. Store in Supabase (in a thread, overlapping other files' embedding)
+            await asyncio.to_thread(self._store_records, filename, records)
+
+            stats.update(stored=len(records), embedded=len(to_embed), reused=len(records) - len(to_embed))
+            logger.info(
+                "Successfully stored chunks in database",
+                filename=filename,
+                chunks_stored=len(records),
+                chunks_embedded=stats["embedded"],
+                chunks_reused=stats["reused"],
+                step="store_to_database"
+            )
+
+        except Exception as e:
+            logger.error(
+                "Failed to process PDF file",
+                error=e,
+                filename=filename,
+                step="ingest_pdfs",
+                file_path=file_path
+            )
+            if raise_errors:
+                raise
+        return stats
+
+    async def ingest_file(self, file_path: str, force: bool = False) -> Dict[str, int]:
+        """
+        Ingests a single PDF, e.g. one admin upload, without touching the rest
+        of the directory. Raises if the file cannot be processed.
+
+        Returns:
+            Counts of chunks stored, embedded and reused, and whether the file was skipped.
+        """
+        embed_semaphore = asyncio.Semaphore(self.embedding_concurrency)
+        return await self._ingest_file(file_path, None, embed_semaphore, force, raise_errors=True)
+
+    async def ingest_pdfs(self, force: bool = False) -> int:
+        """
+        Scans the PDF directory and ingests all files concurrently.
+
+        Files whose content hash matches the stored chunks are skipped, and for
+        changed files only chunks with new text are embedded. `force` re-embeds
+        everything.
+
+        Files flow through a pipeline: parsing/splitting runs in a process pool
+        (or threads), embedding batches from all files share a bounded number of
+        in-flight requests, and each file is written to Supabase as soon as its
+        embeddings are ready while other files are still being embedded.
+
+        Returns:
+            Total number of chunks stored.
         """
         pdf_files = glob.glob(os.path.join(self.pdf_dir, "*.pdf"))
         
@@ -111,7 +423,7 @@ class GuidelinesLoader:
                 pdf_dir=self.pdf_dir,
                 step="ingest_pdfs"
             )
-            return
+            return 0
 
         logger.info(
             "Found PDF files to process",
@@ -120,95 +432,28 @@ class GuidelinesLoader:
             step="ingest_pdfs"
         )
 
-        total_chunks = 0
-        
-        for file_path in pdf_files:
-            filename = os.path.basename(file_path)
-            logger.info(
-                "Processing PDF file",
-                filename=filename,
-                file_path=file_path,
-                step="ingest_pdfs"
-            )
-            
-            try:
-                # 1. Load PDF
-                loader = PyPDFLoader(file_path)
-                docs = loader.load()
-                
-                # 2. Split into chunks
-                chunks = self.text_splitter.split_documents(docs)
-                logger.info(
-                    "Split PDF into chunks",
-                    filename=filename,
-                    chunk_count=len(chunks),
-                    step="split_documents"
-                )
-                
-                # 3. Generate Embeddings & Prepare for DB
-                records = []
-                # We process in batches to avoid hitting API limits or huge payloads
-                batch_size = 50
-                
-                for i in range(0, len(chunks), batch_size):
-                    batch = chunks[i:i+batch_size]
-                    batch_texts = [c.page_content for c in batch]
-                    batch_index = i // batch_size
-
-                    # Generate embeddings with retry logic
-                    vectors = self._embed_with_retry(batch_texts, batch_index, filename)
-
-                    for j, chunk in enumerate(batch):
-                        records.append({
-                            # Required fields by 008_guidelines.sql
-                            "title": filename,
-                            "organization": "Unknown",
-                            "publication_year": "2024",  # TEXT type in schema
-                            "is_czech": True,
-                            # Chunk content for RAG retrieval
-                            "content": chunk.page_content,
-                            # Metadata JSONB for source attribution and citations
-                            "metadata": {
-                                "source": filename,
-                                "page": chunk.metadata.get("page", 0),
-                                **chunk.metadata
-                            },
-                            "embedding": vectors[j]
-                        })
-                
-                # 4. Upsert to Supabase
-                # Note: 'guidelines' table must exist with (id, content, metadata, embedding)
-                # We let Supabase generate IDs (if table is set up that way) or we ignore conflicts?
-                # Usually standard RAG doesn't have a unique key other than ID. 
-                # We will just insert them. To avoid duplicates on re-run, we might want to delete old ones for this file first.
-                
-                # Delete existing chunks for this file to ensure idempotency
-                self.supabase.table("guidelines").delete().filter("metadata->>source", "eq", filename).execute()
-                
-                # Insert new ones in batches
-                for i in range(0, len(records), batch_size):
-                    self.supabase.table("guidelines").insert(records[i:i+batch_size]).execute()
-                
-                logger.info(
-                    "Successfully stored chunks in database",
-                    filename=filename,
-                    chunks_stored=len(records),
-                    step="store_to_database"
-                )
-                total_chunks += len(records)
-                
-            except Exception as e:
-                logger.error(
-                    "Failed to process PDF file",
-                    error=e,
-                    filename=filename,
-                    step="ingest_pdfs",
-                    file_path=file_path
-                )
-                
+        embed_semaphore = asyncio.Semaphore(self.embedding_concurrency)
+        file_semaphore = asyncio.Semaphore(self.file_concurrency)
+        executor = ProcessPoolExecutor(max_workers=self.parse_workers) if self.parse_workers else None
+
+        async def ingest_bounded(file_path: str) -> Dict[str, int]:
+            async with file_semaphore:
+                return await self._ingest_file(file_path, executor, embed_semaphore, force)
+
+        try:
+            stored = await asyncio.gather(*(ingest_bounded(path) for path in pdf_files))
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        total_chunks = sum(s["stored"] for s in stored)
         logger.info(
             "Ingestion complete",
             total_chunks_stored=total_chunks,
+            chunks_embedded=sum(s["embedded"] for s in stored),
+            chunks_reused=sum(s["reused"] for s in stored),
+            files_skipped=sum(s["skipped"] for s in stored),
             pdf_count=len(pdf_files),
             step="ingest_pdfs"
         )
+        return total_chunks
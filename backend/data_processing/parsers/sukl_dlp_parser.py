@@ -1,60 +1,125 @@
 import pandas as pd
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional, Set
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Output field -> accepted source columns (export code, human-readable header)
+COLUMN_MAP = {
+    "sukl_code": ("KOD_SUKL", "Kód SÚKL"),
+    "name": ("NAZEV", "Název"),
+    "strength": ("SILA", "Síla"),
+    "form": ("FORMA", "Léková forma"),
+    "package": ("BALENI", "Velikost balení"),
+    "route": ("CESTA", "Cesta podání"),
+    "atc_code": ("ATC_WHO", "ATC"),
+    "active_substances": ("LL", "Léčivá látka"),
+    "dispensing": ("VYDEJ", "Výdej"),
+    "registration_status": ("REG", "Stav registrace"),
+    "holder": ("DRZ", "Držitel rozhodnutí"),
+}
+AVAILABILITY_COLUMNS = ("DODAVKY", "Dodávky")
+
+# Rows read and mapped per pandas chunk; larger chunks amortize per-chunk overhead
+READ_CHUNK_SIZE = 10000
+
+
 class SuklDlpParser:
     def __init__(self, file_path: str):
         self.file_path = file_path
 
-    def parse(self, limit: int = None) -> List[Dict]:
+    def _map_chunk(self, chunk: pd.DataFrame) -> List[Dict]:
         """
-        Parses the SÚKL DLP CSV file.
-        Expected columns (Czech): Kód SÚKL, Název, Doplněk, ...
+        Maps one raw CSV chunk to drug dicts with vectorized column operations.
+        """
+        out = pd.DataFrame(index=chunk.index)
+        for field, sources in COLUMN_MAP.items():
+            source = next((c for c in sources if c in chunk.columns), None)
+            out[field] = chunk[source] if source else ""
+
+        out = out[out["sukl_code"].notna()].copy()
+        out["sukl_code"] = out["sukl_code"].astype(str).str.zfill(7)
+        available = pd.Series(False, index=out.index)
+        for column in AVAILABILITY_COLUMNS:
+            if column in chunk.columns:
+                available |= chunk.loc[out.index, column].eq("A")
+        out["is_available"] = available
+
+        # Duplicate codes within one upsert batch are rejected by Postgres; keep the last
+        out = out.drop_duplicates(subset="sukl_code", keep="last")
+
+        # Sanitize NaNs: replace with None (which becomes JSON null)
+        out = out.astype(object).where(out.notna(), None)
+        return out.to_dict("records")
+
+    def iter_batches(
+        self,
+        batch_size: int = 1000,
+        limit: Optional[int] = None,
+        read_chunk_size: int = READ_CHUNK_SIZE
+    ) -> Iterator[List[Dict]]:
+        """
+        Streams the SÚKL DLP CSV file as batches of drug dicts.
+
+        At most `read_chunk_size` raw rows are held in memory at a time. Codes are
+        deduplicated within a chunk; a code repeated in a later chunk is yielded
+        again, which an upsert resolves to the last occurrence.
         """
-        logger.info(f"Parsing DLP file: {self.file_path}")
+        logger.info(f"Streaming DLP file: {self.file_path}")
+        rows_read = 0
         try:
             # Note: encoding is usually cp1250 or utf-8 for Czech data
-            df = pd.read_csv(self.file_path, encoding="cp1250", delimiter=";")
-            
-            # Rename columns to standardized English names if needed
-            # For now, keeping the manual mapping to ensure compatibility
-            
-            # Sanitize NaNs: replace with None (which becomes JSON null) or empty string
-            df = df.where(pd.notnull(df), None)
-            
-            items = []
-            count = 0
-            
-            for _, row in df.iterrows():
-                if limit and count >= limit:
-                    break
-                    
-                item = {
-                    "sukl_code": str(row.get("KOD_SUKL", row.get("Kód SÚKL", ""))).zfill(7),
-                    "name": row.get("NAZEV", row.get("Název", "")),
-                    "strength": row.get("SILA", row.get("Síla", "")),
-                    "form": row.get("FORMA", row.get("Léková forma", "")),
-                    "package": row.get("BALENI", row.get("Velikost balení", "")),
-                    "route": row.get("CESTA", row.get("Cesta podání", "")),
-                    "atc_code": row.get("ATC_WHO", row.get("ATC", "")),
-                    "active_substances": row.get("LL", row.get("Léčivá látka", "")),
-                    "dispensing": row.get("VYDEJ", row.get("Výdej", "")),
-                    "registration_status": row.get("REG", row.get("Stav registrace", "")),
-                    "holder": row.get("DRZ", row.get("Držitel rozhodnutí", "")),
-                    "is_available": row.get("DODAVKY") == "A" or row.get("Dodávky") == "A",
-                }
-                items.append(item)
-                count += 1
-            
-            # Deduplicate items by sukl_code, keeping the last one (or first?)
-            # Usually last update is better, but here it's likely just duplicate lines.
-            unique_items = {i['sukl_code']: i for i in items}.values()
-            items = list(unique_items)
-            
-            logger.info(f"Parsed {len(items)} unique drugs from DLP.")
-            return items
+            reader = pd.read_csv(
+                self.file_path,
+                encoding="cp1250",
+                delimiter=";",
+                dtype=str,
+                chunksize=max(batch_size, read_chunk_size)
+            )
+            with reader:
+                for chunk in reader:
+                    if limit is not None:
+                        if rows_read >= limit:
+                            break
+                        chunk = chunk.iloc[:limit - rows_read]
+                    rows_read += len(chunk)
+                    items = self._map_chunk(chunk)
+                    for i in range(0, len(items), batch_size):
+                        yield items[i:i + batch_size]
         except Exception as e:
             logger.error(f"Error parsing DLP file: {e}")
             raise
+        logger.info(f"Streamed {rows_read} rows from DLP.")
+
+    def read_codes(self, limit: Optional[int] = None) -> Set[str]:
+        """
+        Returns the SÚKL codes listed in the first `limit` rows, reading only the code column.
+        """
+        sources = COLUMN_MAP["sukl_code"]
+        codes = pd.read_csv(
+            self.file_path,
+            encoding="cp1250",
+            delimiter=";",
+            dtype=str,
+            usecols=lambda column: column in sources,
+            nrows=limit
+        )
+        if codes.columns.empty:
+            return set()
+        return set(codes.iloc[:, 0].dropna().str.zfill(7))
+
+    def parse(self, limit: int = None) -> List[Dict]:
+        """
+        Parses the SÚKL DLP CSV file.
+        Expected columns (Czech): Kód SÚKL, Název, Doplněk, ...
+
+        Loads all unique drugs into memory; prefer `iter_batches` for the full register.
+        """
+        unique_items: Dict[str, Dict] = {}
+        for batch in self.iter_batches(limit=limit):
+            for item in batch:
+                unique_items[item["sukl_code"]] = item
+
+        items = list(unique_items.values())
+        logger.info(f"Parsed {len(items)} unique drugs from DLP.")
+        return items
@@ -0,0 +1,84 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Fields that are derived from the row rather than part of its content
+NON_CONTENT_FIELDS = {"embedding", "content_hash"}
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def content_hash(item: Dict[str, Any]) -> str:
+    """
+    Stable hash of a drug row (parsed fields, atc_name and search_text).
+    """
+    content = {k: v for k, v in item.items() if k not in NON_CONTENT_FIELDS}
+    return hash_text(json.dumps(content, sort_keys=True, ensure_ascii=False, default=str))
+
+
+class DrugManifest:
+    """
+    Local SQLite record of what the drug pipeline last loaded.
+
+    For each SÚKL code it stores the content hash of the upserted row and the
+    hash of the search_text whose embedding is stored in Supabase (NULL if the
+    row was loaded without an embedding). Monthly refreshes compare against it
+    to upsert only changed rows and embed only changed search_text.
+
+    Entries are keyed by code alone, like the drugs table, so each code must be
+    loaded from one source per run (run_pipeline leaves codes listed in the
+    eRecept DLP out of the Monthly DLP run).
+    """
+    def __init__(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS drug_manifest ("
+            "sukl_code TEXT PRIMARY KEY, content_hash TEXT NOT NULL, embedded_text_hash TEXT)"
+        )
+        self._conn.commit()
+
+    def get_many(self, sukl_codes: List[str]) -> Dict[str, Tuple[str, Optional[str]]]:
+        """
+        Returns {sukl_code: (content_hash, embedded_text_hash)} for known codes.
+        """
+        if not sukl_codes:
+            return {}
+        placeholders = ",".join("?" * len(sukl_codes))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT sukl_code, content_hash, embedded_text_hash FROM drug_manifest "
+                f"WHERE sukl_code IN ({placeholders})",
+                sukl_codes
+            ).fetchall()
+        return {code: (c_hash, e_hash) for code, c_hash, e_hash in rows}
+
+    def update_many(self, entries: Iterable[Tuple[str, str, Optional[str]]]):
+        """
+        Records (sukl_code, content_hash, embedded_text_hash) after a successful upsert.
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO drug_manifest (sukl_code, content_hash, embedded_text_hash) VALUES (?, ?, ?)",
+                list(entries)
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM drug_manifest")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM drug_manifest").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
@@ -1,15 +1,147 @@
-from supabase import create_client, Client
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from supabase import Client, ClientOptions, create_client
+
 from backend.data_processing.config.settings import settings
 
+
+class SupabaseClientManager:
+    """
+    Process-wide Supabase clients backed by pooled keep-alive HTTP connections.
+
+    `create_client` builds a fresh httpx client (and a new TCP/TLS handshake) per
+    instance. The manager instead creates one client lazily on an explicitly
+    sized connection pool, so every API endpoint, retriever and loader reuses
+    the same warm connections. Pool sizes and the request timeout come from the
+    SUPABASE_POOL_* / SUPABASE_TIMEOUT settings.
+    """
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 10.0
+    ):
+        self.url = url
+        self.key = key
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.timeout = timeout
+        self._client: Optional[Client] = None
+        self._http_client: Optional[httpx.Client] = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._acquisitions = 0
+        self._requests = 0
+        self._errors = 0
+
+    def _on_request(self, request: httpx.Request):
+        with self._stats_lock:
+            self._requests += 1
+
+    def _on_response(self, response: httpx.Response):
+        if response.status_code >= 500:
+            with self._stats_lock:
+                self._errors += 1
+
+    def get_client(self) -> Client:
+        """
+        Returns the shared sync client, creating it on first use (thread-safe).
+        """
+        with self._stats_lock:
+            self._acquisitions += 1
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._http_client = httpx.Client(
+                        limits=self.limits,
+                        timeout=self.timeout,
+                        event_hooks={"request": [self._on_request], "response": [self._on_response]}
+                    )
+                    self._client = create_client(
+                        self.url,
+                        self.key,
+                        options=ClientOptions(
+                            httpx_client=self._http_client,
+                            auto_refresh_token=False,
+                            persist_session=False
+                        )
+                    )
+        return self._client
+
+    def health_check(self, table: str = "drugs") -> Dict[str, Any]:
+        """
+        Runs a minimal query through the pooled client and reports its latency.
+        """
+        start = time.perf_counter()
+        try:
+            self.get_client().table(table).select("id").limit(1).execute()
+            return {"status": "healthy", "latency_ms": round((time.perf_counter() - start) * 1000, 1)}
+        except Exception as e:
+            return {
+                "status": "unhealthy",
+                "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+                "error": str(e)
+            }
+
+    @staticmethod
+    def _pool_stats(http_client: Optional[Any]) -> Dict[str, int]:
+        # httpx does not expose pool state publicly; read it from the transport's
+        # httpcore pool when available.
+        pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for c in connections if getattr(c, "is_idle", lambda: False)())
+        return {"open": len(connections), "idle": idle, "active": len(connections) - idle}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns pool metrics.
+        """
+        with self._stats_lock:
+            return {
+                "acquisitions": self._acquisitions,
+                "requests": self._requests,
+                "server_errors": self._errors,
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections,
+                "sync_pool": self._pool_stats(self._http_client)
+            }
+
+    def close(self):
+        """
+        Closes the connection pool and drops the client.
+        """
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._client = None
+            self._http_client = None
+
+
+# Global instance shared by the API, retrievers and data loaders
+supabase_manager = SupabaseClientManager(
+    settings.SUPABASE_URL,
+    settings.SUPABASE_KEY,
+    max_connections=settings.SUPABASE_POOL_MAX_CONNECTIONS,
+    max_keepalive_connections=settings.SUPABASE_POOL_MAX_KEEPALIVE,
+    keepalive_expiry=settings.SUPABASE_POOL_KEEPALIVE_EXPIRY,
+    timeout=settings.SUPABASE_TIMEOUT
+)
+
+
 class SupabaseSingleton:
-    _instance = None
-    client: Client = None
+    """
+    Backwards-compatible accessor for the shared pooled client.
+    """
 
     @classmethod
     def get_client(cls) -> Client:
-        if cls.client is None:
-            cls.client = create_client(
-                settings.SUPABASE_URL, 
-                settings.SUPABASE_KEY
-            )
-        return cls.client
+        return supabase_manager.get_client()
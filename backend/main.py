@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
@@ -8,8 +9,19 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from contextlib import asynccontextmanager
 from backend.services.cache import cache
+from backend.services.revalidation import revalidator
+from backend.services.singleflight import singleflight
+from backend.app.services.search_service import search_service
+from backend.app.services.drug_data import run_drug_index_refresh_loop
+from backend.app.services.drug_resolver import drug_resolver
+from backend.app.services.suggest_service import suggest_service
+from backend.app.services.warmup import cache_warmer
+from backend.app.core.config import settings
+from backend.data_processing.utils.supabase_client import supabase_manager
+from backend.data_processing.generators.embedding_generator import aclose_async_http_client
 
 from backend.app.api.v1.api import api_router
+from backend.app.api.v1.endpoints.admin import run_ingestion_watchdog
 
 # Load environment variables
 load_dotenv()
@@ -24,10 +36,32 @@ limiter = Limiter(key_func=get_remote_address)
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Backend service starting up")
+    # Resume guideline ingestion jobs left by the previous shutdown or by stopped workers
+    ingestion_task = asyncio.create_task(run_ingestion_watchdog())
+    # Build the /drugs/suggest and resolver indexes in the background and rebuild them after pipeline runs
+    drug_index_task = asyncio.create_task(run_drug_index_refresh_loop([suggest_service, drug_resolver]))
+    # Replay the most frequent past queries into the caches and compile the lazily imported graphs
+    warmup_task = asyncio.create_task(cache_warmer.run()) if settings.WARMUP_ENABLED else None
     yield
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    ingestion_task.cancel()
+    drug_index_task.cancel()
+    cache.stop_sweeper()
     # Shutdown
     stats = cache.get_stats()
-    logger.info("Backend service shutting down", cache_stats=stats)
+    logger.info(
+        "Backend service shutting down",
+        cache_stats=stats,
+        embedding_cache_stats=search_service.embedding_cache.get_stats(),
+        resolver_stats=drug_resolver.metrics.get_stats(),
+        singleflight_stats=singleflight.get_stats(),
+        revalidation_stats=revalidator.get_stats(),
+        warmup_stats=cache_warmer.get_stats(),
+        supabase_pool_stats=supabase_manager.get_stats()
+    )
+    supabase_manager.close()
+    await aclose_async_http_client()
 
 app = FastAPI(
     title="Czech MedAI Backend",
@@ -59,3 +93,18 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/health/db")
+async def db_health_check():
+    # Status only: pool metrics are logged at shutdown, not exposed to unauthenticated callers
+    health = await asyncio.to_thread(supabase_manager.health_check)
+    return {"status": health["status"]}
+
+@app.get("/health/warmup")
+async def warmup_health_check():
+    # Readiness probes can wait for "ready" so the first requests after a deploy hit warm caches
+    return cache_warmer.get_stats()
+
+@app.get("/health/resolver")
+async def resolver_health_check():
+    return {"ready": drug_resolver.index is not None, **drug_resolver.metrics.get_stats()}
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from typing import AbstractSet, Any, Dict, Iterator, List, Optional
+
+from backend.data_processing.utils.drug_manifest import DrugManifest, content_hash, hash_text
+
+logger = logging.getLogger(__name__)
+
+# Parsed batches allowed to wait for embedding/upsert before the parser pauses
+MAX_PENDING_BATCHES = 4
+
+
+async def _produce(batches: Iterator[List[Dict[str, Any]]], queue: asyncio.Queue):
+    # Parsing is CPU/IO bound; pull each chunk in a worker thread so it overlaps
+    # with embedding and upserts of the previous batches.
+    try:
+        while True:
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                break
+            await queue.put(batch)
+    except Exception as e:
+        # Hand parser errors to the consumer instead of leaving it waiting
+        await queue.put(e)
+        return
+    await queue.put(None)
+
+
+async def run_drug_pipeline(
+    parser,
+    drug_loader,
+    emb_gen,
+    atc_map: Dict[str, str],
+    should_embed: bool,
+    label: str,
+    batch_size: int = 100,
+    limit: Optional[int] = None,
+    max_pending_batches: int = MAX_PENDING_BATCHES,
+    manifest: Optional[DrugManifest] = None,
+    skip_codes: AbstractSet[str] = frozenset()
+) -> int:
+    """
+    Streams a DLP file through parse -> enrich -> embed -> upsert.
+
+    At most `max_pending_batches` parsed batches are held in memory, so memory
+    use is bounded regardless of the size of the register.
+
+    With a `manifest`, rows whose content hash matches the last successful load
+    are skipped (unless they still lack an up-to-date embedding), and only rows
+    whose search_text changed are re-embedded.
+
+    Rows whose code is in `skip_codes` are dropped: a later source in the same
+    run loads them, and the manifest keeps one entry per code, which must
+    describe the row that ends up in the drugs table.
+
+    Returns:
+        Number of drugs loaded (rows the loader reported as uploaded).
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending_batches)
+    producer = asyncio.create_task(_produce(parser.iter_batches(batch_size=batch_size, limit=limit), queue))
+    loaded = 0
+    failed = 0
+    skipped = 0
+    embedded_count = 0
+
+    try:
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                break
+            if isinstance(batch, Exception):
+                raise batch
+            if skip_codes:
+                batch = [item for item in batch if item['sukl_code'] not in skip_codes]
+                if not batch:
+                    continue
+
+            # Enrich with ATC names and build the text used for search/embeddings
+            for item in batch:
+                item['atc_name'] = atc_map.get(item.get('atc_code'), "")
+                item['search_text'] = emb_gen.create_search_text(item, item['atc_name'])
+                item['content_hash'] = content_hash(item)
+
+            # Skip rows that are unchanged since the last load and whose
+            # stored embedding (if embedding is enabled) matches the search_text
+            known = manifest.get_many([item['sukl_code'] for item in batch]) if manifest is not None else {}
+            changed = []
+            to_embed = []
+            for item in batch:
+                last_content_hash, last_text_hash = known.get(item['sukl_code'], (None, None))
+                needs_embedding = (
+                    should_embed and bool(item.get('search_text'))
+                    and last_text_hash != hash_text(item['search_text'])
+                )
+                if needs_embedding:
+                    to_embed.append(item)
+                if needs_embedding or last_content_hash != item['content_hash']:
+                    changed.append(item)
+            skipped += len(batch) - len(changed)
+            if not changed:
+                continue
+
+            if to_embed:
+                try:
+                    embeddings = await emb_gen.generate_embeddings_async([item['search_text'] for item in to_embed])
+                    for item, embedding in zip(to_embed, embeddings):
+                        if embedding is not None:
+                            item['embedding'] = embedding
+                            item['embedding_version'] = emb_gen.version
+                except Exception as e:
+                    logger.error(f"Embedding failed for {label} batch at {loaded}: {e}")
+
+            # Rows without a fresh embedding are upserted separately so the
+            # stored embedding column is left untouched (PostgREST would null it)
+            with_embedding = [item for item in changed if 'embedding' in item]
+            without_embedding = [item for item in changed if 'embedding' not in item]
+            embedded_count += len(with_embedding)
+
+            for group, fresh in ((with_embedding, True), (without_embedding, False)):
+                if not group:
+                    continue
+                uploaded = await asyncio.to_thread(drug_loader.load_drugs, group)
+                loaded += uploaded
+                failed += len(group) - uploaded
+                if manifest is not None and uploaded == len(group):
+                    manifest.update_many(
+                        (
+                            item['sukl_code'],
+                            item['content_hash'],
+                            hash_text(item['search_text']) if fresh
+                            else known.get(item['sukl_code'], (None, None))[1]
+                        )
+                        for item in group
+                    )
+
+            logger.info(
+                f"Processed {len(changed)} drugs ({label}), {loaded} loaded, {failed} failed, {skipped} unchanged in total."
+            )
+    finally:
+        if not producer.done():
+            producer.cancel()
+        await asyncio.gather(producer, return_exceptions=True)
+
+    logger.info(
+        f"{label}: loaded {loaded}, failed {failed}, embedded {embedded_count}, skipped {skipped} unchanged drugs."
+    )
+    if failed:
+        logger.warning(f"{label}: {failed} drugs failed to upload and will be retried on the next run.")
+    return loaded
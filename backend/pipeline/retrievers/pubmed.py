@@ -1,12 +1,39 @@
 from typing import List, Dict, Any, Optional
 from backend.services.logger import get_logger
-from backend.services.cache import cache
+from backend.services.revalidation import revalidator
 from backend.data_processing.config.settings import settings
+import asyncio
+import threading
+import time
 import httpx
 import xml.etree.ElementTree as ET
 
 logger = get_logger(__name__)
 
+# NCBI allows 3 E-utility requests per second without an API key
+NCBI_MIN_INTERVAL = 0.34
+
+
+class RequestPacer:
+    """
+    Spaces out request starts by at least `interval` seconds across all callers in the process.
+    """
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    async def wait(self):
+        # Slots are reserved before sleeping, so concurrent callers go out in order
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+ncbi_pacer = RequestPacer(NCBI_MIN_INTERVAL)
+
 class PubMedRetriever:
     """
     Simple retriever for PubMed using E-utilities.
@@ -17,37 +44,40 @@ class PubMedRetriever:
     def __init__(self, email: str = None):
         self.email = email or settings.PUBMED_EMAIL or "benjamin-ai@example.com"  # NCBI requires an email
 
+    @staticmethod
+    def cache_key(query: str, max_results: int = 3) -> str:
+        return f"pubmed:{query}:{max_results}"
+
     async def search(self, query: str, max_results: int = 3) -> str:
         """
         Performs a search and returns a formatted string with results.
         This is the method the Agent will call.
         """
-        # Check cache
-        cache_key = f"pubmed:{query}:{max_results}"
-        cached_result = cache.get(cache_key)
-        if cached_result:
-            logger.info("PubMed search cache hit", query=query)
-            return cached_result
-
-        logger.info(f"Searching PubMed for: {query}")
+        # Cached for 1 hour, then served stale while a background task refreshes it.
+        # Concurrent identical searches share one NCBI round trip (rate limits).
         try:
-            ids = await self._get_ids(query, max_results)
-            if not ids:
-                logger.info("No PubMed results found", query=query)
-                return "No results found on PubMed."
-            
-            articles = await self._fetch_details(ids)
-            result = self._format_results(articles)
-            
-            # Save to cache (TTL 1 hour for PubMed calls)
-            cache.set(cache_key, result, ttl=3600)
-            
-            logger.info("PubMed search returned results", count=len(articles))
-            return result
+            result = await revalidator.fetch(
+                self.cache_key(query, max_results), lambda: self._search(query, max_results), ttl=3600
+            )
         except Exception as e:
             logger.error("Error connecting to PubMed", error=e)
             return f"Error connecting to PubMed: {str(e)}"
 
+        if result is None:
+            return "No results found on PubMed."
+        return result
+
+    async def _search(self, query: str, max_results: int) -> Optional[str]:
+        logger.info(f"Searching PubMed for: {query}")
+        ids = await self._get_ids(query, max_results)
+        if not ids:
+            logger.info("No PubMed results found", query=query)
+            return None
+
+        articles = await self._fetch_details(ids)
+        logger.info("PubMed search returned results", count=len(articles))
+        return self._format_results(articles)
+
     async def _get_ids(self, query: str, max_results: int) -> List[str]:
         params = {
             "db": "pubmed",
@@ -56,6 +86,7 @@ class PubMedRetriever:
             "retmax": max_results,
             "email": self.email
         }
+        await ncbi_pacer.wait()
         async with httpx.AsyncClient(timeout=10.0) as client:
             resp = await client.get(f"{self.BASE_URL}/esearch.fcgi", params=params)
             resp.raise_for_status()
@@ -72,6 +103,7 @@ class PubMedRetriever:
             "retmode": "xml",
             "email": self.email
         }
+        await ncbi_pacer.wait()
         async with httpx.AsyncClient(timeout=10.0) as client:
             resp = await client.get(f"{self.BASE_URL}/efetch.fcgi", params=params)
             resp.raise_for_status()
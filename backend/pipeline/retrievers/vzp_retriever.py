@@ -4,6 +4,9 @@ from backend.data_processing.utils.supabase_client import SupabaseSingleton
 
 logger = logging.getLogger(__name__)
 
+VZP_DRUG_COLUMNS = "sukl_code,name,active_substances,atc_code,strength,form"
+VZP_PRICING_COLUMNS = "sukl_code,max_price_manufacturer,reimbursement_amount,max_copayment"
+
 class VzpRetriever:
     """
     Retrieves drug information combined with pricing data for VZP Navigator.
@@ -21,7 +24,7 @@ class VzpRetriever:
             normalized_query = query.lower().strip()
             
             response = self.supabase.table("drugs") \
-                .select("*") \
+                .select(VZP_DRUG_COLUMNS) \
                 .ilike("name_normalized", f"%{normalized_query}%") \
                 .limit(10) \
                 .execute()
@@ -40,7 +43,7 @@ class VzpRetriever:
             if codes:
                 try:
                     pricing_response = self.supabase.table("drug_pricing") \
-                        .select("*") \
+                        .select(VZP_PRICING_COLUMNS) \
                         .in_("sukl_code", codes) \
                         .execute()
                     
@@ -72,9 +75,9 @@ class VzpRetriever:
                 formatted_results.append({
                     "id": code,
                     "name": drug["name"],
-                    "inn": drug["active_substance"] or "N/A",
-                    "atc": drug["atc_code"] or "N/A",
-                    "form": f"{drug.get('strength', '')} {drug.get('pharmaceutical_form', '')}".strip(),
+                    "inn": drug.get("active_substances") or "N/A",
+                    "atc": drug.get("atc_code") or "N/A",
+                    "form": f"{drug.get('strength') or ''} {drug.get('form') or ''}".strip(),
                     "coverage": coverage_status,
                     "pricing": {
                         "max_price": max_price,
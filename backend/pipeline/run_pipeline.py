@@ -1,6 +1,7 @@
 import argparse
 import asyncio
 import logging
+import os
 from pathlib import Path
 
 from backend.data_processing.config.settings import settings
@@ -8,6 +9,8 @@ from backend.data_processing.config.settings import settings
 # Imports from new structure
 from backend.data_processing.parsers.sukl_dlp_parser import SuklDlpParser
 from backend.data_processing.loaders.drug_loader import DrugLoader
+from backend.pipeline.drug_pipeline import run_drug_pipeline
+from backend.data_processing.utils.drug_manifest import DrugManifest
 
 from backend.data_processing.parsers.sukl_pricing_parser import SuklPricingParser
 from backend.data_processing.loaders.pricing_loader import PricingLoader
@@ -31,6 +34,9 @@ async def main():
     parser.add_argument("--documents", action="store_true", help="Generate SPC/PIL metadata")
     parser.add_argument("--guidelines", action="store_true", help="Run Guidelines Ingestion (PDFs)")
     parser.add_argument("--substances", action="store_true", help="Run Active Substances pipeline")
+    parser.add_argument("--full-refresh", action="store_true", help="Ignore content hashes and reload/re-embed every drug and guideline")
+    parser.add_argument("--no-vector-index", action="store_true", help="Skip exporting the local drug vector index after the drug pipeline")
+    parser.add_argument("--no-warmup", action="store_true", help="Skip re-warming the shared caches with the most frequent queries")
     parser.add_argument("--limit", type=int, default=None, help="Limit items processed")
     parser.add_argument("--all", action="store_true", help="Run full pipeline")
     
@@ -106,90 +112,65 @@ async def main():
             logger.warning(f"DLP Latky file {dlp_latky_path} not found. Active substances will not be mapped.")
 
         drug_loader = DrugLoader()
+
+        # Manifest of previously loaded rows: only changed drugs are upserted/embedded
+        manifest = DrugManifest(str(settings.DRUG_MANIFEST_PATH))
+        if args.full_refresh:
+            logger.info("Full refresh requested, clearing drug manifest.")
+            manifest.clear()
         
-        # Process Monthly DLP
+        # The eRecept DLP is loaded last and holds the latest state of the codes it
+        # lists; those are left out of the Monthly DLP run, so every code has one
+        # source and its manifest entry matches the row stored in Supabase
+        erecept_path = raw_data_path / "dlp_erecept.csv"
+        erecept_codes = set()
+        if erecept_path.exists():
+            erecept_codes = SuklDlpParser(str(erecept_path)).read_codes(limit=args.limit)
+
+        # Process Monthly DLP (streamed: parse, enrich, embed and upsert batch by batch)
         if dlp_path.exists():
             logger.info(f"Processing Monthly DLP: {dlp_path}")
             parser = SuklDlpParser(str(dlp_path))
-            items = parser.parse(limit=args.limit)
-            
-            # Enrich and load in batches
-            batch_size = 100
-            for i in range(0, len(items), batch_size):
-                batch = items[i:i + batch_size]
-                
-                # Enrich with ATC names and active substances
-                for item in batch:
-                    item['atc_name'] = atc_map.get(item.get('atc_code'), "")
-                    # active_substances from map? or raw? current parser gets generic list?
-                    # Auxiliary map returns list of dicts. We need mapping by CODE? 
-                    # Sukl parser has 'sukl_code'. Does latky have sukl_code?
-                    # dlp_latky has KOD_LATKY. Mapping KOD_SUKL -> KOD_LATKY is in dlp_slozeni.csv?
-                    # The user guide said "Auxiliary Data: Ingest dlp_atc.csv, dlp_latky.csv".
-                    # Direct mapping might be tricky without dlp_slozeni.
-                    # For now I will proceed with just ATC mapping and generating search text from existing item fields.
-                    
-                    item['search_text'] = emb_gen.create_search_text(item, item['atc_name'])
-
-                # Generate embeddings for the batch if enabled
-                if should_embed:
-                    texts_to_embed = [item['search_text'] for item in batch if item.get('search_text')]
-                    if texts_to_embed:
-                        try:
-                            embeddings = emb_gen.generate_embeddings(texts_to_embed)
-                            for j, item in enumerate(batch):
-                                if item.get('search_text'):
-                                    item['embedding'] = embeddings[j]
-                        except Exception as e:
-                            logger.error(f"Embedding failed for batch {i}: {e}")
-                    else:
-                        logger.warning(f"No search text to embed for batch starting at index {i}.")
-
-                # Load the batch
-                drug_loader.load_drugs(batch)
-                logger.info(f"Processed and loaded {min(batch_size, len(items) - i)} drugs (Monthly DLP).")
+            loaded = await run_drug_pipeline(
+                parser, drug_loader, emb_gen, atc_map, should_embed,
+                label="Monthly DLP", limit=args.limit, manifest=manifest, skip_codes=erecept_codes
+            )
+            logger.info(f"Loaded {loaded} drugs (Monthly DLP).")
         else:
              logger.warning(f"Monthly DLP file not found at {dlp_path}")
 
         # Process Current DLP (eRecept) - Upsert to get latest state
-        erecept_path = raw_data_path / "dlp_erecept.csv"
         if erecept_path.exists():
             logger.info(f"Processing Current DLP (eRecept): {erecept_path}")
             parser = SuklDlpParser(str(erecept_path))
-            items = parser.parse(limit=args.limit)
-
-            # Enrich and load in batches
-            batch_size = 100
-            for i in range(0, len(items), batch_size):
-                batch = items[i:i + batch_size]
-                
-                # Enrich with ATC names and active substances
-                for item in batch:
-                    item['atc_name'] = atc_map.get(item.get('atc_code'), "")
-                    # Same logic for active substances - simplified for now
-                    
-                    item['search_text'] = emb_gen.create_search_text(item, item['atc_name'])
-
-                # Generate embeddings for the batch if enabled
-                if should_embed:
-                    texts_to_embed = [item['search_text'] for item in batch if item.get('search_text')]
-                    if texts_to_embed:
-                        try:
-                            embeddings = emb_gen.generate_embeddings(texts_to_embed)
-                            for j, item in enumerate(batch):
-                                if item.get('search_text'):
-                                    item['embedding'] = embeddings[j]
-                        except Exception as e:
-                            logger.error(f"Embedding failed for eRecept batch {i}: {e}")
-                    else:
-                        logger.warning(f"No search text to embed for eRecept batch starting at index {i}.")
-
-                # Load the batch
-                drug_loader.load_drugs(batch)
-                logger.info(f"Processed and loaded {min(batch_size, len(items) - i)} drugs (eRecept DLP).")
+            loaded = await run_drug_pipeline(
+                parser, drug_loader, emb_gen, atc_map, should_embed,
+                label="eRecept DLP", limit=args.limit, manifest=manifest
+            )
+            logger.info(f"Loaded {loaded} drugs (eRecept DLP).")
         else:
              logger.info(f"Current DLP file not found at {erecept_path}")
 
+        # Tell running API servers to rebuild their in-memory drug indexes (/drugs/suggest)
+        settings.DRUG_DATA_STAMP_PATH.parent.mkdir(parents=True, exist_ok=True)
+        settings.DRUG_DATA_STAMP_PATH.touch()
+
+        # Local copy of the drug embeddings for DRUG_VECTOR_BACKEND="local" serving
+        if not args.no_vector_index:
+            logger.info("--- Exporting Drug Vector Index ---")
+            from backend.data_processing.utils.supabase_client import SupabaseSingleton
+            from backend.services.drug_vector_index import export_drug_vector_index
+            try:
+                indexed = await asyncio.to_thread(
+                    export_drug_vector_index,
+                    SupabaseSingleton.get_client(), str(settings.DRUG_VECTOR_INDEX_PATH), emb_gen.version
+                )
+                logger.info(f"Exported {indexed} drug embeddings to {settings.DRUG_VECTOR_INDEX_PATH}")
+            except ValueError as e:
+                logger.warning(f"Drug vector index not exported: {e}")
+            except Exception as e:
+                logger.error(f"Drug vector index export failed: {e}")
+
     if args.pricing:
         logger.info("--- Running Pricing Pipeline ---")
         
@@ -260,8 +241,19 @@ async def main():
     if args.guidelines:
         logger.info("--- Running Guidelines Pipeline ---")
         from backend.data_processing.loaders.guidelines_loader import GuidelinesLoader
-        loader = GuidelinesLoader()
-        await loader.ingest_pdfs()
+        # Parse PDFs in a process pool sized to the machine
+        loader = GuidelinesLoader(parse_workers=os.cpu_count())
+        await loader.ingest_pdfs(force=args.full_refresh)
+
+    # Re-warm the caches shared with the API (L2 retriever cache, on-disk embedding cache)
+    # for the most frequent queries; SÚKL results are re-fetched after a drug reload
+    if not args.no_warmup:
+        logger.info("--- Warming Caches ---")
+        try:
+            from backend.app.services.warmup import cache_warmer
+            await cache_warmer.run(graphs=False, shared_only=True, refresh_namespaces=("sukl",) if args.drugs else ())
+        except Exception as e:
+            logger.error(f"Cache warm-up failed: {e}")
 
 if __name__ == "__main__":
     asyncio.run(main())
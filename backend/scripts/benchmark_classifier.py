@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: local fast-path classifier vs. LLM classifier.
+
+Measures per-query latency of the local classifier (rules + TF-IDF) and, when
+ANTHROPIC_API_KEY is configured, of the structured-output LLM classifier on the
+same held-out queries. Reports:
+    - local p50/p95 latency and the share of queries answered locally
+      (confidence >= LOCAL_CLASSIFIER_THRESHOLD)
+    - LLM p50/p95 latency and the latency saved per locally answered query
+    - agreement rate between local labels and LLM labels (overall and on the
+      locally answered subset), or accuracy against the reference labels below
+      when no LLM is available
+
+Usage (from the project root):
+    python backend/scripts/benchmark_classifier.py
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+# Held-out queries (not part of TRAINING_QUERIES) with reference labels
+EVAL_QUERIES = [
+    ("Jaká je dávka amoxicilinu pro dítě 20 kg?", "drug_info"),
+    ("Interakce klopidogrelu s omeprazolem", "drug_info"),
+    ("Lze kombinovat ibuprofen a paracetamol?", "drug_info"),
+    ("Nežádoucí účinky metotrexátu", "drug_info"),
+    ("Je přípravek Concor stále registrován?", "drug_info"),
+    ("Doporučení ESC 2023 pro léčbu srdečního selhání", "guidelines"),
+    ("Standardní postup léčby sepse", "guidelines"),
+    ("Protokol screeningu karcinomu tlustého střeva", "guidelines"),
+    ("Co říkají guidelines o léčbě obezity?", "guidelines"),
+    ("Jaké jsou příznaky borreliózy?", "clinical"),
+    ("Diagnostika celiakie u dospělých", "clinical"),
+    ("Jak postupovat při zvýšeném TSH bez symptomů?", "clinical"),
+    ("Příčiny chronické únavy", "clinical"),
+    ("Nejnovější studie o léčbě Alzheimerovy choroby", "clinical"),
+    ("Pacient s náhlou dušností a bolestí na hrudi", "urgent"),
+    ("Anafylaxe u dítěte po bodnutí včelou", "urgent"),
+    ("Akutní krvácení do mozku", "urgent"),
+    ("Hradí pojišťovna léčbu semaglutidem?", "reimbursement"),
+    ("Jaký je doplatek za Xarelto?", "reimbursement"),
+    ("Podmínky úhrady inhalačních kortikosteroidů", "reimbursement"),
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def main():
+    from backend.app.core.classifier import local_classifier
+    from backend.app.core.config import settings
+
+    threshold = settings.LOCAL_CLASSIFIER_THRESHOLD
+
+    # Local tier
+    local_results = []
+    local_latencies = []
+    for query, _ in EVAL_QUERIES:
+        start = time.perf_counter()
+        result = local_classifier.classify(query)
+        local_latencies.append((time.perf_counter() - start) * 1000)
+        local_results.append(result)
+
+    answered_locally = [r.confidence >= threshold for r in local_results]
+
+    print("=" * 60)
+    print("Local classifier")
+    print("=" * 60)
+    print(f"Queries:            {len(EVAL_QUERIES)}")
+    print(f"Answered locally:   {sum(answered_locally)}/{len(EVAL_QUERIES)} (threshold {threshold})")
+    print(f"Latency p50 / p95:  {percentile(local_latencies, 50):.3f} ms / {percentile(local_latencies, 95):.3f} ms")
+
+    # LLM tier (optional)
+    from backend.app.core.llm import get_llm
+    llm = get_llm()
+    if not llm or os.getenv("ANTHROPIC_API_KEY", "").startswith("mock"):
+        correct = sum(r.query_type == label for r, (_, label) in zip(local_results, EVAL_QUERIES))
+        confident_correct = sum(
+            r.query_type == label
+            for r, (_, label), local in zip(local_results, EVAL_QUERIES, answered_locally) if local
+        )
+        print(f"Accuracy (all):     {correct / len(EVAL_QUERIES):.0%} vs. reference labels")
+        if any(answered_locally):
+            print(f"Accuracy (local):   {confident_correct / sum(answered_locally):.0%} on locally answered queries")
+        print("\nANTHROPIC_API_KEY not configured (or mock) - skipping LLM comparison.")
+        return
+
+    from backend.app.core.graph import _classify_with_llm
+
+    llm_labels = []
+    llm_latencies = []
+    for query, _ in EVAL_QUERIES:
+        start = time.perf_counter()
+        llm_labels.append(await _classify_with_llm(llm, query))
+        llm_latencies.append((time.perf_counter() - start) * 1000)
+
+    agree = [r.query_type == l for r, l in zip(local_results, llm_labels)]
+    agree_local = [a for a, local in zip(agree, answered_locally) if local]
+    llm_p50 = statistics.median(llm_latencies)
+
+    print("\n" + "=" * 60)
+    print("LLM classifier")
+    print("=" * 60)
+    print(f"Latency p50 / p95:  {llm_p50:.0f} ms / {percentile(llm_latencies, 95):.0f} ms")
+    print(f"Agreement (all):    {sum(agree) / len(agree):.0%}")
+    if agree_local:
+        print(f"Agreement (local):  {sum(agree_local) / len(agree_local):.0%} on locally answered queries")
+    saved = sum(answered_locally) * llm_p50
+    print(f"Latency saved:      ~{llm_p50:.0f} ms per locally answered query, "
+          f"~{saved / len(EVAL_QUERIES):.0f} ms per query on average")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark: streaming SÚKL DLP parser vs. the previous iterrows implementation.
+
+Each implementation runs in a fresh process so peak RSS is not shared. Reports
+rows/s and peak RSS (absolute and above the post-import baseline).
+
+If no CSV is given, a synthetic cp1250 file with the DLP column layout is
+generated (default 100 000 rows, roughly the size of the national register).
+
+Usage (from the project root):
+    python backend/scripts/benchmark_dlp_parser.py
+    python backend/scripts/benchmark_dlp_parser.py --csv backend/data_processing/raw_data/dlp_leciva.csv
+    python backend/scripts/benchmark_dlp_parser.py --rows 200000
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+COLUMNS = ["KOD_SUKL", "NAZEV", "SILA", "FORMA", "BALENI", "CESTA", "ATC_WHO", "LL", "VYDEJ", "REG", "DRZ", "DODAVKY", "DOPLNEK"]
+
+
+def generate_csv(path: str, rows: int):
+    rng = random.Random(42)
+    names = ["PARALEN", "IBALGIN", "XARELTO", "EUTHYROX", "CONCOR", "PRESTARIUM", "METFORMIN TEVA", "NUROFEN"]
+    forms = ["TBL NOB", "TBL FLM", "CPS DUR", "SIR", "INJ SOL"]
+    with open(path, "w", encoding="cp1250") as f:
+        f.write(";".join(COLUMNS) + "\n")
+        for i in range(rows):
+            f.write(";".join([
+                str(i + 1),
+                f"{rng.choice(names)} {i % 97}",
+                f"{rng.choice([5, 10, 20, 100, 500])}MG",
+                rng.choice(forms),
+                f"{rng.choice([10, 30, 100])}",
+                "POR",
+                f"N02BE{i % 10:02d}",
+                "PARACETAMOL" if i % 3 else "",
+                rng.choice(["R", "F", "L"]),
+                "R",
+                "Zentiva, k.s.",
+                rng.choice(["A", "N", ""]),
+                "Léčivý přípravek",
+            ]) + "\n")
+
+
+def legacy_parse(file_path: str):
+    """The previous SuklDlpParser.parse implementation (full DataFrame + iterrows)."""
+    import pandas as pd
+
+    df = pd.read_csv(file_path, encoding="cp1250", delimiter=";")
+    df = df.where(pd.notnull(df), None)
+    items = []
+    for _, row in df.iterrows():
+        items.append({
+            "sukl_code": str(row.get("KOD_SUKL", row.get("Kód SÚKL", ""))).zfill(7),
+            "name": row.get("NAZEV", row.get("Název", "")),
+            "strength": row.get("SILA", row.get("Síla", "")),
+            "form": row.get("FORMA", row.get("Léková forma", "")),
+            "package": row.get("BALENI", row.get("Velikost balení", "")),
+            "route": row.get("CESTA", row.get("Cesta podání", "")),
+            "atc_code": row.get("ATC_WHO", row.get("ATC", "")),
+            "active_substances": row.get("LL", row.get("Léčivá látka", "")),
+            "dispensing": row.get("VYDEJ", row.get("Výdej", "")),
+            "registration_status": row.get("REG", row.get("Stav registrace", "")),
+            "holder": row.get("DRZ", row.get("Držitel rozhodnutí", "")),
+            "is_available": row.get("DODAVKY") == "A" or row.get("Dodávky") == "A",
+        })
+    return len({i["sukl_code"]: i for i in items})
+
+
+def streaming_parse(file_path: str, batch_size: int):
+    """Consumes SuklDlpParser.iter_batches the way run_drug_pipeline does."""
+    from backend.data_processing.parsers.sukl_dlp_parser import SuklDlpParser
+
+    count = 0
+    for batch in SuklDlpParser(file_path).iter_batches(batch_size=batch_size):
+        count += len(batch)
+    return count
+
+
+def _run(name: str, file_path: str, batch_size: int, results):
+    import pandas  # noqa: F401 - exclude import cost from the measurement
+    if name == "streaming":
+        from backend.data_processing.parsers import sukl_dlp_parser  # noqa: F401
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    rows = legacy_parse(file_path) if name == "legacy" else streaming_parse(file_path, batch_size)
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((name, rows, elapsed, baseline_kb, peak_kb))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the SÚKL DLP parser")
+    arg_parser.add_argument("--csv", help="Path to a DLP CSV (default: generate a synthetic one)")
+    arg_parser.add_argument("--rows", type=int, default=100_000, help="Rows in the synthetic CSV")
+    arg_parser.add_argument("--batch-size", type=int, default=100, help="Streaming batch size")
+    args = arg_parser.parse_args()
+
+    tmp_dir = None
+    file_path = args.csv
+    if not file_path:
+        tmp_dir = tempfile.TemporaryDirectory()
+        file_path = os.path.join(tmp_dir.name, "dlp_leciva.csv")
+        generate_csv(file_path, args.rows)
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    print(f"File: {file_path} ({os.path.getsize(file_path) / 1024 / 1024:.1f} MB)")
+    print(f"{'Implementation':<16}{'Rows':>10}{'Time (s)':>11}{'Rows/s':>12}{'Peak RSS':>12}{'Above base':>13}")
+
+    for name in ("legacy", "streaming"):
+        proc = ctx.Process(target=_run, args=(name, file_path, args.batch_size, results))
+        proc.start()
+        _, rows, elapsed, baseline_kb, peak_kb = results.get()
+        proc.join()
+        print(
+            f"{name:<16}{rows:>10}{elapsed:>11.2f}{rows / elapsed:>12,.0f}"
+            f"{peak_kb / 1024:>9.0f} MB{(peak_kb - baseline_kb) / 1024:>10.0f} MB"
+        )
+
+    if tmp_dir:
+        tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
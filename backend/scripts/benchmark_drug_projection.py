@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark: select("*") drug rows vs. the column projections of the drug DTOs.
+
+For each use case (list = DrugListItem, detail = DrugDetail, LLM context =
+DrugContext) reports the JSON payload size and decode time of full rows vs.
+projected rows. For the LLM context it also compares prompt size: the whole
+row dict formatted into the prompt (the previous synthesizer behaviour) vs.
+DrugContext.to_prompt().
+
+By default uses synthetic rows shaped like the drugs table (1536-d embedding
+serialized as PostgREST returns it, search_text, fts). With --live, fetches the
+same drugs from Supabase (SUPABASE_URL / SUPABASE_KEY) with both selects and
+also reports request latency.
+
+Usage (from the project root):
+    python backend/scripts/benchmark_drug_projection.py
+    python backend/scripts/benchmark_drug_projection.py --rows 50 --repeat 200
+    python backend/scripts/benchmark_drug_projection.py --live --rows 20
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.app.schemas.drug import DrugContext, DrugDetail, DrugListItem
+
+USE_CASES = {"list": DrugListItem, "detail": DrugDetail, "context": DrugContext}
+# Rough prompt-token estimate for Czech text with the OpenAI tokenizers
+CHARS_PER_TOKEN = 3.5
+
+
+def synthetic_rows(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        name = f"PARALEN {500 + i}"
+        rows.append({
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "sukl_code": f"{i:07d}",
+            "name": name,
+            "name_normalized": name.lower(),
+            "active_substance": "PARACETAMOL",
+            "active_substances": "Paracetamol",
+            "atc_code": "N02BE01",
+            "atc_name": "Paracetamol",
+            "strength": "500MG",
+            "form": "TBL NOB",
+            "package": "24",
+            "route": "POR",
+            "dispensing": "F",
+            "registration_status": "R",
+            "is_available": True,
+            "holder": "Zentiva, k.s.",
+            "spc_indications": "Mírná až středně silná bolest, horečka.",
+            "spc_url": None,
+            "search_text": f"{name} Paracetamol N02BE01 500MG TBL NOB tableta analgetikum antipyretikum " * 3,
+            "embedding": "[" + ",".join(f"{rng.uniform(-0.05, 0.05):.8f}" for _ in range(1536)) + "]",
+            "embedding_version": "text-embedding-ada-002:1536",
+            "content_hash": "%064x" % rng.getrandbits(256),
+            "fts": "'500mg':3 'n02be01':5 'paracetamol':4 'paralen':1",
+            "raw_data": {"KOD_SUKL": f"{i:07d}", "NAZEV": name},
+            "updated_at": "2026-10-17T00:00:00+00:00",
+        })
+    return rows
+
+
+def decode_ms(payload: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        json.loads(payload)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def live_rows(columns: str, codes, repeat: int):
+    from backend.app.core.database import get_supabase_client
+    supabase = get_supabase_client()
+    timings, rows = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = supabase.table("drugs").select(columns).in_("sukl_code", codes).execute().data
+        timings.append((time.perf_counter() - start) * 1000)
+    return rows, statistics.median(timings)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark drug column projections")
+    arg_parser.add_argument("--rows", type=int, default=20, help="Rows per response (search page size)")
+    arg_parser.add_argument("--repeat", type=int, default=100)
+    arg_parser.add_argument("--live", action="store_true", help="Fetch rows from Supabase instead of synthetic data")
+    args = arg_parser.parse_args()
+
+    full_latency = {}
+    if args.live:
+        from backend.app.core.database import get_supabase_client
+        codes = [r["sukl_code"] for r in get_supabase_client().table("drugs")
+                 .select("sukl_code").limit(args.rows).execute().data]
+        full, full_latency["*"] = live_rows("*", codes, min(args.repeat, 20))
+    else:
+        full = synthetic_rows(args.rows)
+    full_payload = json.dumps(full, ensure_ascii=False)
+    full_decode = decode_ms(full_payload, args.repeat)
+
+    print(f"{len(full)} rows per response\n")
+    header = f"{'Case':<22}{'Bytes':>12}{'Decode ms':>12}"
+    if args.live:
+        header += f"{'Request ms':>12}"
+    print(header)
+    line = f"{'select(*)':<22}{len(full_payload.encode()):>12,}{full_decode:>12.3f}"
+    if args.live:
+        line += f"{full_latency['*']:>12.1f}"
+    print(line)
+
+    for use_case, dto in USE_CASES.items():
+        if args.live:
+            projected, latency = live_rows(dto.columns(), codes, min(args.repeat, 20))
+        else:
+            keep = dto.columns().split(",")
+            projected = [{column: row.get(column) for column in keep} for row in full]
+        payload = json.dumps(projected, ensure_ascii=False)
+        line = f"{use_case + ' projection':<22}{len(payload.encode()):>12,}{decode_ms(payload, args.repeat):>12.3f}"
+        if args.live:
+            line += f"{latency:>12.1f}"
+        print(line)
+
+    before = "\n\n".join(f"[{i}] SÚKL: {row.get('name')}\n{row}" for i, row in enumerate(full, 1))
+    after = "\n\n".join(f"[{i}] SÚKL: {DrugContext.model_validate(row).to_prompt()}" for i, row in enumerate(full, 1))
+    print(f"\n{'Synthesizer prompt':<22}{'Chars':>12}{'~Tokens':>12}")
+    for label, text in (("whole row dict", before), ("DrugContext", after)):
+        print(f"{label:<22}{len(text):>12,}{int(len(text) / CHARS_PER_TOKEN):>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: local memory-mapped drug vector index (IVF) vs. an exact NumPy scan.
+
+Builds an index from synthetic clustered 1536-d vectors (default 100 000 rows,
+roughly the size of the drug register) in a temporary directory, or loads an
+index exported by run_pipeline (--index-path). Reports p50/p95 per-query
+latency and recall@k against the exact scan for each nprobe value.
+
+Usage (from the project root):
+    python backend/scripts/benchmark_local_vector_index.py
+    python backend/scripts/benchmark_local_vector_index.py --rows 200000 --nprobe 4 8 16 32
+    python backend/scripts/benchmark_local_vector_index.py --index-path backend/data/drug_vector_index
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.services.drug_vector_index import DrugVectorIndex, build_drug_vector_index
+
+DIMENSIONS = 1536
+
+
+def synthetic_rows(rows: int, clusters: int = 500, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DIMENSIONS)).astype(np.float32)
+    for i in range(rows):
+        vector = centers[i % clusters] + 0.5 * rng.normal(size=DIMENSIONS).astype(np.float32)
+        yield {"id": str(i), "sukl_code": f"{i:07d}", "name": f"DRUG {i}", "is_available": i % 3 != 0,
+               "embedding": vector.tolist()}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def exact_search(matrix, query, k):
+    scores = matrix @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    return set(top[np.argsort(-scores[top])].tolist())
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark the local drug vector index")
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    arg_parser.add_argument("--index-path", help="Benchmark an exported index instead of synthetic data")
+    arg_parser.add_argument("--queries", type=int, default=200)
+    arg_parser.add_argument("--k", type=int, default=10)
+    arg_parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.index_path
+        if not path:
+            path = os.path.join(tmp, "index")
+            print(f"Building index over {args.rows:,} synthetic rows ...")
+            start = time.perf_counter()
+            build_drug_vector_index(synthetic_rows(args.rows), path, "synthetic:1536")
+            print(f"Built in {time.perf_counter() - start:.1f} s")
+
+        index = DrugVectorIndex(path)
+        print(f"{len(index):,} rows, {index.nlist} lists")
+        matrix = np.asarray(index.vectors)  # exact scan works on an in-memory copy
+
+        rng = np.random.default_rng(0)
+        positions = rng.choice(len(index), min(args.queries, len(index)), replace=False)
+        # Perturbed copies of stored vectors, so the true neighbours are not trivial
+        queries = [matrix[p] + 0.05 * rng.normal(size=matrix.shape[1]).astype(np.float32) for p in positions]
+        queries = [q / np.linalg.norm(q) for q in queries]
+
+        latencies, exact = [], []
+        for query in queries:
+            start = time.perf_counter()
+            exact.append(exact_search(matrix, query, args.k))
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        print(f"\n{'Case':<16}{'p50 ms':>10}{'p95 ms':>10}{'Recall@' + str(args.k):>12}")
+        print(f"{'exact scan':<16}{statistics.median(latencies):>10.3f}{percentile(latencies, 0.95):>10.3f}{1.0:>12.2f}")
+
+        for nprobe in args.nprobe:
+            latencies, recalls = [], []
+            for query, truth in zip(queries, exact):
+                start = time.perf_counter()
+                results = index.search(query, k=args.k, nprobe=nprobe)
+                latencies.append((time.perf_counter() - start) * 1000)
+                recalls.append(len({r["id"] for r in results} & {index.rows[i]["id"] for i in truth}) / args.k)
+            print(f"{'ivf nprobe=' + str(nprobe):<16}{statistics.median(latencies):>10.3f}"
+                  f"{percentile(latencies, 0.95):>10.3f}{statistics.mean(recalls):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Compare SearchService retrieval modes (vector, hybrid, fts) on latency and recall.
+
+Each query is run against the live Supabase project in every mode. Reports
+p50/p95 latency, recall@k and MRR per mode and target (drugs / guidelines).
+
+Queries are read from a JSONL file, one object per line:
+    {"query": "Paralen 500", "target": "drugs", "expected": ["0012345"]}
+    {"query": "léčba hypertenze", "target": "guidelines", "expected": ["hypertenze_2024.pdf"]}
+
+`expected` holds SÚKL codes for drugs and document titles for guidelines.
+Without --queries a small built-in set without expected results is used,
+which only measures latency.
+
+Requires SUPABASE_URL/SUPABASE_KEY, OPENAI_API_KEY for the vector ranking, and
+the 20261017_hybrid_search.sql migration for the full-text RPCs.
+
+Usage (from the project root):
+    python backend/scripts/compare_search_modes.py
+    python backend/scripts/compare_search_modes.py --queries eval_queries.jsonl --k 10 --repeat 3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.app.services.search_service import SEARCH_MODES, search_service  # noqa: E402
+
+DEFAULT_QUERIES = [
+    {"query": "Paralen 500", "target": "drugs", "expected": []},
+    {"query": "ibuprofen", "target": "drugs", "expected": []},
+    {"query": "Xarelto", "target": "drugs", "expected": []},
+    {"query": "lék na snížení cholesterolu", "target": "drugs", "expected": []},
+    {"query": "léčba arteriální hypertenze", "target": "guidelines", "expected": []},
+    {"query": "metformin dávkování u renální insuficience", "target": "guidelines", "expected": []},
+]
+
+
+def load_queries(path):
+    if not path:
+        return DEFAULT_QUERIES
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def result_key(item, target):
+    return item.get("sukl_code") if target == "drugs" else item.get("title")
+
+
+async def run_query(case, mode, k):
+    if case["target"] == "drugs":
+        return await search_service.search_drugs(case["query"], limit=k, mode=mode)
+    return await search_service.search_guidelines(case["query"], limit=k, mode=mode)
+
+
+def score(results, case):
+    keys = [result_key(item, case["target"]) for item in results]
+    expected = set(case.get("expected") or [])
+    if not expected:
+        return None, None
+    recall = len(expected & set(keys)) / len(expected)
+    reciprocal_rank = next((1.0 / i for i, key in enumerate(keys, start=1) if key in expected), 0.0)
+    return recall, reciprocal_rank
+
+
+async def main():
+    arg_parser = argparse.ArgumentParser(description="Compare vector, hybrid and full-text retrieval")
+    arg_parser.add_argument("--queries", help="JSONL file with query/target/expected")
+    arg_parser.add_argument("--k", type=int, default=10, help="Results per query")
+    arg_parser.add_argument("--repeat", type=int, default=3, help="Timed runs per query and mode")
+    arg_parser.add_argument("--modes", nargs="+", default=list(SEARCH_MODES), choices=SEARCH_MODES)
+    args = arg_parser.parse_args()
+
+    cases = load_queries(args.queries)
+
+    # Warm the embedding cache so every mode is timed on retrieval, not on OpenAI latency
+    if os.getenv("OPENAI_API_KEY"):
+        for case in cases:
+            await search_service.embed_query(case["query"])
+
+    print(f"{'Target':<12}{'Mode':<8}{'p50 ms':>9}{'p95 ms':>9}{'Recall@' + str(args.k):>11}{'MRR':>7}{'Scored':>8}")
+    for target in ("drugs", "guidelines"):
+        target_cases = [c for c in cases if c["target"] == target]
+        if not target_cases:
+            continue
+        for mode in args.modes:
+            latencies, recalls, ranks = [], [], []
+            for case in target_cases:
+                results = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    results = await run_query(case, mode, args.k)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                recall, reciprocal_rank = score(results, case)
+                if recall is not None:
+                    recalls.append(recall)
+                    ranks.append(reciprocal_rank)
+
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            recall_text = f"{statistics.mean(recalls):.2f}" if recalls else "-"
+            mrr_text = f"{statistics.mean(ranks):.2f}" if ranks else "-"
+            print(
+                f"{target:<12}{mode:<8}{statistics.median(latencies):>9.1f}{p95:>9.1f}"
+                f"{recall_text:>11}{mrr_text:>7}{len(recalls):>8}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
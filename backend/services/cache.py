@@ -1,61 +1,525 @@
+import asyncio
+import heapq
+import logging
+import sys
+import threading
 import time
-from typing import Any, Dict, Optional, Tuple
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 
-class SimpleCache:
+from backend.data_processing.config.settings import settings
+from backend.services.cache_backends import CacheBackend, RedisBackend, SQLiteBackend, decode_entry, encode_entry
+
+logger = logging.getLogger(__name__)
+
+CACHE_POLICIES = ("lru", "lfu")
+CACHE_BACKENDS = ("memory", "redis", "sqlite")
+# Bookkeeping per entry (tuple, dict slot, heap item), added to the key and value sizes
+ENTRY_OVERHEAD_BYTES = 200
+# Namespace of keys without a "<namespace>:" prefix
+DEFAULT_NAMESPACE = "default"
+
+
+def estimate_size(value: Any) -> int:
     """
-    A simple in-memory cache with TTL (Time To Live).
+    Approximate memory footprint of a cached value in bytes.
+
+    Strings count their UTF-8 length (formatted retriever results dominate the
+    cache), containers are summed recursively.
     """
-    def __init__(self):
-        self._cache: Dict[str, Tuple[Any, float]] = {}
-        self._hits = 0
-        self._misses = 0
+    if isinstance(value, str):
+        return len(value.encode("utf-8", "surrogatepass")) + 49
+    if isinstance(value, (bytes, bytearray)):
+        return len(value) + 33
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class _CacheEntry:
+    __slots__ = ("value", "fresh_until", "expiry", "size", "frequency", "namespace")
+
+    def __init__(self, value: Any, fresh_until: float, expiry: float, size: int, namespace: str):
+        self.value = value
+        self.fresh_until = fresh_until
+        self.expiry = expiry
+        self.size = size
+        self.frequency = 1
+        self.namespace = namespace
+
+
+class BoundedCache:
+    """
+    Thread-safe in-memory cache with TTL, bounded by entry count and bytes.
+
+    Eviction is LRU or LFU (`policy`; LFU ties go to the least recently used).
+    Expired entries are removed on access and by a background sweeper thread
+    (started on the first `set`) that pops them from an expiry heap, so a long
+    tail of unique queries does not keep memory after its TTL.
+
+    Keys are namespaced by their prefix ("pubmed:...", "sukl:...") and
+    `get_stats` reports hits, misses, evictions and bytes per namespace.
+
+    `stale_grace` keeps entries of a namespace for that many seconds past their
+    TTL: `get` treats them as missing, `lookup` returns them flagged as stale
+    (stale-while-revalidate, see services/revalidation.py).
+    """
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        policy: str = "lru",
+        sweep_interval: float = 60.0,
+        stale_grace: Optional[Dict[str, float]] = None
+    ):
+        if policy not in CACHE_POLICIES:
+            raise ValueError(f"Unknown cache policy: {policy} (expected one of {CACHE_POLICIES})")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.sweep_interval = sweep_interval
+        self.stale_grace = dict(stale_grace or {})
+
+        self._lock = threading.RLock()
+        # LRU order for "lru"; for "lfu" one LRU-ordered bucket per access frequency
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._frequencies: Dict[int, "OrderedDict[str, None]"] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._bytes = 0
+        self._namespaces: Dict[str, Dict[str, int]] = {}
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @staticmethod
+    def namespace_of(key: str) -> str:
+        namespace, separator, _ = key.partition(":")
+        return namespace if separator else DEFAULT_NAMESPACE
+
+    def grace_for(self, key: str) -> float:
+        """
+        Seconds an entry of this key's namespace stays servable as stale after its TTL.
+        """
+        return self.stale_grace.get(self.namespace_of(key), 0.0)
+
+    def _stats_for(self, namespace: str) -> Dict[str, int]:
+        stats = self._namespaces.get(namespace)
+        if stats is None:
+            stats = self._namespaces[namespace] = {
+                "hits": 0, "stale_hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expirations": 0,
+                "rejected": 0, "entries": 0, "bytes": 0
+            }
+        return stats
 
     def get(self, key: str) -> Optional[Any]:
         """
         Retrieve a value from the cache. Returns None if key not found or expired.
         """
-        if key in self._cache:
-            value, expiry = self._cache[key]
-            if time.time() < expiry:
-                self._hits += 1
-                return value
-            else:
-                try:
-                    del self._cache[key]
-                except KeyError:
-                    pass
-        
-        self._misses += 1
-        return None
+        entry = self._lookup(key, allow_stale=False)
+        return entry[0] if entry is not None else None
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """
+        Returns (value, is_stale), or None if the key is missing or past its grace period.
+        """
+        return self._lookup(key, allow_stale=True)
+
+    def _lookup(self, key: str, allow_stale: bool) -> Optional[Tuple[Any, bool]]:
+        namespace = self.namespace_of(key)
+        with self._lock:
+            stats = self._stats_for(namespace)
+            entry = self._entries.get(key)
+            if entry is not None:
+                now = time.time()
+                if now < entry.fresh_until:
+                    self._touch(key, entry)
+                    stats["hits"] += 1
+                    return entry.value, False
+                if now >= entry.expiry:
+                    self._remove(key, "expirations")
+                elif allow_stale:
+                    self._touch(key, entry)
+                    stats["stale_hits"] += 1
+                    return entry.value, True
+            stats["misses"] += 1
+            return None
 
     def set(self, key: str, value: Any, ttl: int = 300):
         """
         Set a value in the cache with a TTL (default 5 minutes).
+
+        The entry is kept for the namespace's grace period past the TTL.
+        Values larger than max_bytes on their own are not cached.
+        """
+        namespace = self.namespace_of(key)
+        size = estimate_size(key) + estimate_size(value) + ENTRY_OVERHEAD_BYTES
+        fresh_until = time.time() + ttl
+        expiry = fresh_until + self.stale_grace.get(namespace, 0.0)
+
+        with self._lock:
+            stats = self._stats_for(namespace)
+            frequency = 1
+            previous = self._entries.get(key)
+            if previous is not None:
+                # Overwriting keeps the key's access count (LFU)
+                frequency = previous.frequency
+                self._remove(key, None)
+            if size > self.max_bytes:
+                stats["rejected"] += 1
+                return
+
+            # Evict before inserting, so a new key is never its own victim under LFU
+            while self._entries and (
+                len(self._entries) >= self.max_entries or self._bytes + size > self.max_bytes
+            ):
+                self._remove(self._victim(), "evictions")
+
+            entry = _CacheEntry(value, fresh_until, expiry, size, namespace)
+            entry.frequency = frequency
+            self._entries[key] = entry
+            if self.policy == "lfu":
+                self._frequencies.setdefault(frequency, OrderedDict())[key] = None
+            heapq.heappush(self._expiry_heap, (expiry, key))
+            self._bytes += size
+            stats["sets"] += 1
+            stats["entries"] += 1
+            stats["bytes"] += size
+            self._compact_heap()
+
+        self._ensure_sweeper()
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key, None)
+
+    # Async variants, shared with TieredCache for callers on the event loop;
+    # everything here is in memory, so they run inline
+    async def alookup(self, key: str) -> Optional[Tuple[Any, bool]]:
+        return self.lookup(key)
+
+    async def aset(self, key: str, value: Any, ttl: int = 300):
+        self.set(key, value, ttl=ttl)
+
+    async def adelete(self, key: str):
+        self.delete(key)
+
+    def _touch(self, key: str, entry: _CacheEntry):
+        # Caller must hold self._lock
+        if self.policy == "lru":
+            self._entries.move_to_end(key)
+            return
+        bucket = self._frequencies[entry.frequency]
+        del bucket[key]
+        if not bucket:
+            del self._frequencies[entry.frequency]
+        entry.frequency += 1
+        self._frequencies.setdefault(entry.frequency, OrderedDict())[key] = None
+
+    def _victim(self) -> str:
+        # Caller must hold self._lock
+        if self.policy == "lru":
+            return next(iter(self._entries))
+        return next(iter(self._frequencies[min(self._frequencies)]))
+
+    def _remove(self, key: str, reason: Optional[str]):
+        # Caller must hold self._lock; the heap item is dropped lazily
+        entry = self._entries.pop(key)
+        if self.policy == "lfu":
+            bucket = self._frequencies[entry.frequency]
+            del bucket[key]
+            if not bucket:
+                del self._frequencies[entry.frequency]
+        self._bytes -= entry.size
+        stats = self._stats_for(entry.namespace)
+        stats["entries"] -= 1
+        stats["bytes"] -= entry.size
+        if reason:
+            stats[reason] += 1
+
+    def _compact_heap(self):
+        # Caller must hold self._lock. Overwritten/evicted keys leave stale heap items.
+        if len(self._expiry_heap) > 2 * len(self._entries) + 1024:
+            self._expiry_heap = [(entry.expiry, key) for key, entry in self._entries.items()]
+            heapq.heapify(self._expiry_heap)
+
+    def sweep(self) -> int:
+        """
+        Removes expired entries. Returns the number removed.
+        """
+        removed = 0
+        now = time.time()
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expiry, key = heapq.heappop(self._expiry_heap)
+                entry = self._entries.get(key)
+                if entry is not None and entry.expiry == expiry:
+                    self._remove(key, "expirations")
+                    removed += 1
+        return removed
+
+    def _ensure_sweeper(self):
+        if self._sweeper is not None or self.sweep_interval <= 0:
+            return
+        with self._lock:
+            if self._sweeper is None:
+                self._stop.clear()
+                self._sweeper = threading.Thread(target=self._sweep_loop, name="cache-sweeper", daemon=True)
+                self._sweeper.start()
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval):
+            self.sweep()
+
+    def stop_sweeper(self):
+        """
+        Stops the background sweeper (restarted by the next `set`).
         """
-        expiry = time.time() + ttl
-        self._cache[key] = (value, expiry)
+        sweeper = self._sweeper
+        if sweeper is None:
+            return
+        self._stop.set()
+        sweeper.join(timeout=self.sweep_interval + 1)
+        self._sweeper = None
 
     def clear(self):
         """
         Clear all cache entries.
         """
-        self._cache.clear()
-        self._hits = 0
-        self._misses = 0
+        with self._lock:
+            self._entries.clear()
+            self._frequencies.clear()
+            self._expiry_heap.clear()
+            self._bytes = 0
+            self._namespaces.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns cache statistics, overall and per key namespace.
+        """
+        with self._lock:
+            namespaces = {}
+            for namespace, stats in self._namespaces.items():
+                total = stats["hits"] + stats["stale_hits"] + stats["misses"]
+                namespaces[namespace] = {
+                    **stats,
+                    "hit_rate": round(stats["hits"] / total, 2) if total else 0.0
+                }
+            hits = sum(stats["hits"] for stats in self._namespaces.values())
+            stale_hits = sum(stats["stale_hits"] for stats in self._namespaces.values())
+            misses = sum(stats["misses"] for stats in self._namespaces.values())
+            total = hits + stale_hits + misses
+            return {
+                "hits": hits,
+                "stale_hits": stale_hits,
+                "misses": misses,
+                "total_requests": total,
+                "hit_rate": round(hits / total, 2) if total else 0.0,
+                "size": len(self._entries),
+                "bytes": self._bytes,
+                "evictions": sum(stats["evictions"] for stats in self._namespaces.values()),
+                "expirations": sum(stats["expirations"] for stats in self._namespaces.values()),
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "policy": self.policy,
+                "namespaces": namespaces
+            }
+
+
+class TieredCache:
+    """
+    In-process L1 (BoundedCache) in front of a shared L2 backend.
+
+    With several uvicorn workers each process keeps its own L1, while results
+    stored by any worker are found in L2. An L2 hit is copied into L1 for the
+    entry's remaining TTL. Values that are not JSON-serializable stay L1-only.
+
+    L2 failures never fail a request: the call counts as a miss and L2 is
+    skipped for `retry_after` seconds.
+
+    L2 keeps entries for the L1 namespace grace period past their TTL, so a
+    worker can serve (and refresh) a stale value written by another worker.
+
+    L2 backends do blocking I/O. Code running on the event loop must use the
+    async variants (`alookup`, `aset`, `adelete`), which run L2 calls in a
+    worker thread; the sync methods are for scripts and threads.
+    """
+    def __init__(self, l1: BoundedCache, l2: CacheBackend, retry_after: float = 5.0):
+        self.l1 = l1
+        self.l2 = l2
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._l2_stats = {"hits": 0, "stale_hits": 0, "misses": 0, "sets": 0, "errors": 0, "unserializable": 0}
+        self._l2_retry_at = 0.0
+
+    def _count(self, stat: str):
+        with self._lock:
+            self._l2_stats[stat] += 1
+
+    def _l2_call(self, method, *args) -> Any:
+        if time.time() < self._l2_retry_at:
+            return None
+        try:
+            return method(*args)
+        except Exception as e:
+            self._count("errors")
+            self._l2_retry_at = time.time() + self.retry_after
+            logger.warning(f"Shared cache ({self.l2.name}) unavailable, using in-process cache only: {e}")
+            return None
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Retrieve a value from L1, then L2. Returns None if not found or expired.
+        """
+        value = self.l1.get(key)
+        if value is not None:
+            return value
+        entry = self._l2_lookup(key, allow_stale=False)
+        return entry[0] if entry is not None else None
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """
+        Returns (value, is_stale), preferring a fresh L2 value over a stale L1 one.
+        """
+        local = self.l1.lookup(key)
+        if local is not None and not local[1]:
+            return local
+        return self._prefer(local, self._l2_lookup(key, allow_stale=True))
+
+    async def alookup(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """
+        `lookup` for the event loop: the L2 read runs in a worker thread.
+        """
+        local = self.l1.lookup(key)
+        if local is not None and not local[1]:
+            return local
+        return self._prefer(local, await asyncio.to_thread(self._l2_lookup, key, True))
+
+    @staticmethod
+    def _prefer(
+        local: Optional[Tuple[Any, bool]], remote: Optional[Tuple[Any, bool]]
+    ) -> Optional[Tuple[Any, bool]]:
+        if remote is not None and (local is None or not remote[1]):
+            return remote
+        return local
+
+    def _l2_lookup(self, key: str, allow_stale: bool) -> Optional[Tuple[Any, bool]]:
+        data = self._l2_call(self.l2.get, key)
+        entry = decode_entry(data) if data is not None else None
+        now = time.time()
+        grace = self.l1.grace_for(key) if allow_stale else 0.0
+        if entry is None or entry[1] + grace <= now:
+            self._count("misses")
+            return None
+        value, expires_at = entry
+        # Copied into L1 with the remaining TTL (negative for a stale value, still within grace)
+        self.l1.set(key, value, ttl=expires_at - now)
+        stale = expires_at <= now
+        self._count("stale_hits" if stale else "hits")
+        return value, stale
+
+    def set(self, key: str, value: Any, ttl: int = 300):
+        """
+        Set a value in both tiers with a TTL (default 5 minutes).
+        """
+        data = self._set_l1(key, value, ttl)
+        if data is not None:
+            self._set_l2(key, data, ttl)
+
+    async def aset(self, key: str, value: Any, ttl: int = 300):
+        """
+        `set` for the event loop: the value is in L1 at once, the L2 write runs in a worker thread.
+        """
+        data = self._set_l1(key, value, ttl)
+        if data is not None:
+            await asyncio.to_thread(self._set_l2, key, data, ttl)
+
+    def _set_l1(self, key: str, value: Any, ttl: float) -> Optional[bytes]:
+        # Returns the L2 payload, or None for values that stay L1-only
+        self.l1.set(key, value, ttl=ttl)
+        try:
+            return encode_entry(value, time.time() + ttl)
+        except (TypeError, ValueError):
+            self._count("unserializable")
+            return None
+
+    def _set_l2(self, key: str, data: bytes, ttl: float):
+        self._l2_call(self.l2.set, key, data, ttl + self.l1.grace_for(key))
+        self._count("sets")
+
+    def delete(self, key: str):
+        self.l1.delete(key)
+        self._l2_call(self.l2.delete, key)
+
+    async def adelete(self, key: str):
+        self.l1.delete(key)
+        await asyncio.to_thread(self._l2_call, self.l2.delete, key)
+
+    async def acquire(self, key: str, ttl: float) -> bool:
+        """
+        Takes a lock shared by all workers, held until it expires after `ttl` seconds.
+
+        Returns True for the one worker that got it; False when another worker
+        holds it or L2 is unavailable.
+        """
+        return bool(await asyncio.to_thread(self._l2_call, self.l2.add, key, b"1", ttl))
+
+    def sweep(self) -> int:
+        return self.l1.sweep()
+
+    def stop_sweeper(self):
+        self.l1.stop_sweeper()
+
+    def clear(self):
+        """
+        Clear all cache entries in both tiers.
+        """
+        self.l1.clear()
+        self._l2_call(self.l2.clear)
+        with self._lock:
+            self._l2_stats = dict.fromkeys(self._l2_stats, 0)
 
     def get_stats(self) -> Dict[str, Any]:
         """
-        Returns cache statistics.
+        Returns L1 statistics plus L2 hits/misses/errors.
         """
-        total = self._hits + self._misses
-        hit_rate = (self._hits / total) if total > 0 else 0.0
-        return {
-            "hits": self._hits,
-            "misses": self._misses,
-            "total_requests": total,
-            "hit_rate": round(hit_rate, 2),
-            "size": len(self._cache)
-        }
+        with self._lock:
+            l2 = dict(self._l2_stats)
+        total = l2["hits"] + l2["stale_hits"] + l2["misses"]
+        l2["hit_rate"] = round(l2["hits"] / total, 2) if total else 0.0
+        return {**self.l1.get_stats(), "l2": {"backend": self.l2.name, **l2}}
+
+
+def create_cache() -> Any:
+    """
+    Builds the retriever cache from settings: L1 only ("memory"), or L1 + a shared L2.
+
+    Runs at import, so a shared backend that cannot be set up (bad URL, redis
+    package missing) is logged and the cache stays in-process instead of
+    stopping the app.
+    """
+    l1 = BoundedCache(
+        max_entries=settings.RETRIEVER_CACHE_MAX_ENTRIES,
+        max_bytes=settings.RETRIEVER_CACHE_MAX_BYTES,
+        policy=settings.RETRIEVER_CACHE_POLICY,
+        sweep_interval=settings.RETRIEVER_CACHE_SWEEP_INTERVAL,
+        stale_grace=settings.RETRIEVER_CACHE_STALE_GRACE
+    )
+    backend = settings.RETRIEVER_CACHE_BACKEND
+    if backend not in CACHE_BACKENDS:
+        logger.error(
+            f"Unknown cache backend: {backend} (expected one of {CACHE_BACKENDS}), using in-process cache only"
+        )
+        return l1
+    try:
+        if backend == "redis":
+            return TieredCache(l1, RedisBackend(settings.RETRIEVER_CACHE_REDIS_URL))
+        if backend == "sqlite":
+            return TieredCache(l1, SQLiteBackend(str(settings.RETRIEVER_CACHE_SQLITE_PATH)))
+    except Exception as e:
+        logger.error(f"Shared cache ({backend}) could not be set up, using in-process cache only: {e}")
+    return l1
 
 # Global instance
-cache = SimpleCache()
+cache = create_cache()
@@ -0,0 +1,195 @@
+"""
+Shared (L2) backends for the retriever cache.
+
+Both backends store opaque bytes produced by `encode_entry`; TieredCache in
+services/cache.py keeps its in-process L1 in front of them. Values are JSON
+envelopes with the absolute expiry, so a worker that reads an entry written by
+another worker caches it in L1 only for the remaining TTL.
+
+    RedisBackend   Redis or a compatible server (KeyDB, Dragonfly, Valkey)
+                   through redis-py; TLS with rediss:// URLs.
+    SQLiteBackend  A SQLite file in WAL mode shared by the workers of one host;
+                   place it on /dev/shm to keep it in shared memory.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+SERIALIZATION_VERSION = 1
+# SQLiteBackend deletes expired rows once per this many writes
+PURGE_EVERY = 500
+
+
+def encode_entry(value: Any, expires_at: float) -> bytes:
+    """
+    Serializes a cache value (anything JSON-serializable) with its absolute expiry.
+    """
+    return json.dumps(
+        {"version": SERIALIZATION_VERSION, "expires_at": expires_at, "value": value},
+        ensure_ascii=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+def decode_entry(data: bytes) -> Optional[Tuple[Any, float]]:
+    """
+    Returns (value, expires_at), or None for entries in an unknown format.
+    """
+    try:
+        envelope = json.loads(data)
+    except (UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(envelope, dict) or envelope.get("version") != SERIALIZATION_VERSION:
+        return None
+    return envelope["value"], envelope["expires_at"]
+
+
+class CacheBackend(ABC):
+    """
+    Interface of shared cache backends (bytes in, bytes out).
+
+    Methods are blocking; TieredCache runs them in a worker thread when it is
+    used from the event loop.
+    """
+    name = "backend"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, data: bytes, ttl: float):
+        ...
+
+    @abstractmethod
+    def add(self, key: str, data: bytes, ttl: float) -> bool:
+        """
+        Stores `data` only if `key` has no live entry. Returns True if it was stored.
+        """
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    def clear(self):
+        ...
+
+    def close(self):
+        pass
+
+
+class RedisBackend(CacheBackend):
+    """
+    Redis (or KeyDB, Dragonfly, Valkey) through redis-py.
+
+    Any URL redis-py accepts works: redis://, rediss:// (TLS, as used by most
+    managed Redis services) and unix://. The client's connection pool is
+    thread-safe and reconnects on its own after connection errors. Keys are
+    prefixed with `key_prefix` so `clear` only removes this cache's entries.
+    """
+    name = "redis"
+
+    def __init__(self, url: str = "redis://localhost:6379/0", key_prefix: str = "benjamin:cache:", timeout: float = 0.5):
+        import redis
+
+        self.key_prefix = key_prefix
+        # RESP2: plain GET/SET/DEL/SCAN need nothing from RESP3, and older compatible servers lack HELLO
+        self._client = redis.Redis.from_url(
+            url, socket_timeout=timeout, socket_connect_timeout=timeout, protocol=2
+        )
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._client.get(self.key_prefix + key)
+
+    def set(self, key: str, data: bytes, ttl: float):
+        self._client.set(self.key_prefix + key, data, px=max(int(ttl * 1000), 1))
+
+    def add(self, key: str, data: bytes, ttl: float) -> bool:
+        return bool(self._client.set(self.key_prefix + key, data, px=max(int(ttl * 1000), 1), nx=True))
+
+    def delete(self, key: str):
+        self._client.delete(self.key_prefix + key)
+
+    def clear(self):
+        batch = []
+        for key in self._client.scan_iter(match=self.key_prefix + "*", count=1000):
+            batch.append(key)
+            if len(batch) >= 1000:
+                self._client.delete(*batch)
+                batch = []
+        if batch:
+            self._client.delete(*batch)
+
+    def close(self):
+        self._client.close()
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    Cache table in a SQLite database shared by the processes of one host.
+
+    WAL mode lets readers proceed while a worker writes. Expired rows are
+    ignored on read and purged every PURGE_EVERY writes.
+    """
+    name = "sqlite"
+
+    def __init__(self, path: str, timeout: float = 1.0):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_entries_expiry ON cache_entries(expires_at)")
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, data: bytes, ttl: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, data, time.time() + ttl)
+            )
+            self._writes += 1
+            if self._writes % PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+
+    def add(self, key: str, data: bytes, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            # An expired row counts as absent
+            cursor = self._conn.execute(
+                "INSERT INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at "
+                "WHERE cache_entries.expires_at <= ?",
+                (key, data, now + ttl, now)
+            )
+            return cursor.rowcount == 1
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,370 @@
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT = 1
+# Row fields returned by search (same columns as the search_drugs RPC)
+RESULT_FIELDS = ("id", "sukl_code", "name", "active_substances", "atc_name")
+# Row fields usable as prefilters (same names as search_service.DRUG_FILTERS)
+FILTER_FIELDS = ("is_available", "registration_status")
+EXPORT_COLUMNS = ",".join(RESULT_FIELDS + FILTER_FIELDS + ("embedding",))
+# Below this many rows one list is scanned exhaustively
+MIN_ROWS_FOR_IVF = 2000
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+ASSIGN_CHUNK_ROWS = 8192
+# Initial row capacity of the build buffer; it grows by half when full
+INITIAL_BUILD_ROWS = 4096
+# How often a loaded index checks whether a newer export replaced it
+RELOAD_CHECK_INTERVAL = 30.0  # seconds
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _normalize_in_place(matrix: np.ndarray):
+    for start in range(0, len(matrix), ASSIGN_CHUNK_ROWS):
+        chunk = matrix[start:start + ASSIGN_CHUNK_ROWS]
+        norms = np.linalg.norm(chunk, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        chunk /= norms
+
+
+def _kmeans(matrix: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means on a sample of the (normalized) rows; returns the centroids.
+    """
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(matrix), nlist * KMEANS_SAMPLE_PER_LIST)
+    sample = matrix[np.sort(rng.choice(len(matrix), sample_size, replace=False))]
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for list_no in range(nlist):
+            members = sample[assignment == list_no]
+            if len(members):
+                centroids[list_no] = members.mean(axis=0)
+            else:
+                # Re-seed empty lists so every list is used
+                centroids[list_no] = sample[rng.integers(len(sample))]
+        centroids = _normalize(centroids)
+    return centroids.astype(np.float32)
+
+
+def _assign(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignment = np.empty(len(matrix), dtype=np.int64)
+    for start in range(0, len(matrix), ASSIGN_CHUNK_ROWS):
+        chunk = matrix[start:start + ASSIGN_CHUNK_ROWS]
+        assignment[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignment
+
+
+def _parse_embedding(value: Any) -> Optional[np.ndarray]:
+    # PostgREST returns pgvector columns as "[0.1,0.2,...]"; parsed straight to
+    # float32 without a list of Python floats
+    if value is None or len(value) == 0:
+        return None
+    if isinstance(value, str):
+        return np.fromstring(value.strip().strip("[]"), dtype=np.float32, sep=",")
+    return np.asarray(value, dtype=np.float32)
+
+
+def build_drug_vector_index(
+    rows: Iterable[Dict[str, Any]],
+    path: str,
+    embedding_version: str,
+    nlist: Optional[int] = None
+) -> int:
+    """
+    Writes an IVF index of drug embeddings to the directory `path`.
+
+    Layout (all arrays are .npy files, memory-mapped read-only when loaded):
+        vectors.npy       float32 (n, dims), L2-normalized, grouped by list
+        centroids.npy     float32 (nlist, dims)
+        list_offsets.npy  int64 (nlist + 1,); list i is vectors[offsets[i]:offsets[i + 1]]
+        rows.json         RESULT_FIELDS + FILTER_FIELDS per row, same order as vectors
+        meta.json         format, embedding_version, count, dimensions, nlist
+
+    The directory is built next to `path` and swapped in afterwards, so a
+    running server never sees a half-written index.
+
+    Rows are parsed one by one into a growable float32 buffer (no per-element
+    Python floats), normalized in place and written list by list into the
+    memory-mapped vectors.npy, so peak memory stays around one copy of the
+    float32 matrix.
+
+    Returns:
+        Number of indexed rows.
+    """
+    metadata: List[Dict[str, Any]] = []
+    buffer: Optional[np.ndarray] = None
+    count = 0
+    for row in rows:
+        embedding = _parse_embedding(row.get("embedding"))
+        if embedding is None:
+            continue
+        if buffer is None:
+            buffer = np.empty((INITIAL_BUILD_ROWS, len(embedding)), dtype=np.float32)
+        elif len(embedding) != buffer.shape[1]:
+            raise ValueError(f"Drug {row.get('sukl_code')} has {len(embedding)} dimensions, expected {buffer.shape[1]}")
+        if count == len(buffer):
+            grown = np.empty((len(buffer) + len(buffer) // 2, buffer.shape[1]), dtype=np.float32)
+            grown[:count] = buffer
+            buffer = grown
+        buffer[count] = embedding
+        count += 1
+        metadata.append({field: row.get(field) for field in RESULT_FIELDS + FILTER_FIELDS})
+
+    if buffer is None:
+        raise ValueError("No drug embeddings to index")
+
+    matrix = buffer[:count]
+    _normalize_in_place(matrix)
+    if nlist is None:
+        nlist = 1 if len(matrix) < MIN_ROWS_FOR_IVF else int(math.sqrt(len(matrix)))
+    nlist = max(1, min(nlist, len(matrix)))
+
+    if nlist == 1:
+        centroids = _normalize(matrix.mean(axis=0, keepdims=True)).astype(np.float32)
+        assignment = np.zeros(len(matrix), dtype=np.int64)
+    else:
+        centroids = _kmeans(matrix, nlist)
+        assignment = _assign(matrix, centroids)
+
+    # Store each list contiguously so a probe is one sequential read of the mmap
+    order = np.argsort(assignment, kind="stable")
+    offsets = np.zeros(nlist + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(assignment, minlength=nlist))
+
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+    os.makedirs(tmp_path)
+    try:
+        vectors = np.lib.format.open_memmap(
+            os.path.join(tmp_path, "vectors.npy"), mode="w+", dtype=np.float32, shape=matrix.shape
+        )
+        for start in range(0, len(order), ASSIGN_CHUNK_ROWS):
+            vectors[start:start + ASSIGN_CHUNK_ROWS] = matrix[order[start:start + ASSIGN_CHUNK_ROWS]]
+        vectors.flush()
+        del vectors
+        np.save(os.path.join(tmp_path, "centroids.npy"), centroids)
+        np.save(os.path.join(tmp_path, "list_offsets.npy"), offsets)
+        with open(os.path.join(tmp_path, "rows.json"), "w", encoding="utf-8") as f:
+            json.dump([metadata[i] for i in order], f, ensure_ascii=False)
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "format": INDEX_FORMAT,
+                "embedding_version": embedding_version,
+                "count": int(len(matrix)),
+                "dimensions": int(matrix.shape[1]),
+                "nlist": int(nlist),
+                "created_at": time.time()
+            }, f)
+
+        old_path = f"{path}.old-{uuid.uuid4().hex}"
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        # Workers that still map the old files keep reading them until they reload
+        shutil.rmtree(old_path, ignore_errors=True)
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+
+    logger.info(f"Drug vector index written to {path}: {len(matrix)} rows, {nlist} lists")
+    return int(len(matrix))
+
+
+def fetch_drug_embeddings(supabase, embedding_version: str, page_size: int = 1000) -> Iterable[Dict[str, Any]]:
+    """
+    Pages through drugs embedded with `embedding_version`.
+    """
+    start = 0
+    while True:
+        response = (
+            supabase.table("drugs")
+            .select(EXPORT_COLUMNS)
+            .eq("embedding_version", embedding_version)
+            .not_.is_("embedding", "null")
+            .order("id")
+            .range(start, start + page_size - 1)
+            .execute()
+        )
+        rows = response.data or []
+        yield from rows
+        if len(rows) < page_size:
+            break
+        start += page_size
+
+
+def export_drug_vector_index(supabase, path: str, embedding_version: str, nlist: Optional[int] = None) -> int:
+    """
+    Rebuilds the local index at `path` from the embeddings stored in Supabase.
+    """
+    return build_drug_vector_index(fetch_drug_embeddings(supabase, embedding_version), path, embedding_version, nlist)
+
+
+class DrugVectorIndex:
+    """
+    Read-only IVF index of drug embeddings exported by run_pipeline.
+
+    The vector arrays are memory-mapped, so every worker process on the host
+    shares one copy through the OS page cache. A query scores the `nprobe`
+    lists whose centroids are closest to it with one matrix-vector product per
+    list and picks the top-k with argpartition.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported drug vector index format: {self.meta.get('format')}")
+        self.embedding_version = self.meta["embedding_version"]
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.centroids = np.load(os.path.join(path, "centroids.npy"))
+        self.offsets = np.load(os.path.join(path, "list_offsets.npy"))
+        with open(os.path.join(path, "rows.json"), encoding="utf-8") as f:
+            self.rows: List[Dict[str, Any]] = json.load(f)
+        self._masks: Dict[Tuple[str, Any], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    def _filter_mask(self, filters: Dict[str, Any]) -> Optional[np.ndarray]:
+        mask = None
+        for name, value in filters.items():
+            if name not in FILTER_FIELDS:
+                raise ValueError(f"Unsupported drug index filter: {name}")
+            key = (name, value)
+            if key not in self._masks:
+                self._masks[key] = np.fromiter((row.get(name) == value for row in self.rows), bool, len(self.rows))
+            mask = self._masks[key] if mask is None else mask & self._masks[key]
+        return mask
+
+    def search(
+        self,
+        query_embedding: List[float],
+        k: int = 10,
+        match_threshold: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None,
+        nprobe: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns up to k rows (RESULT_FIELDS + similarity) by cosine similarity.
+
+        With filters, more lists are probed until k matching rows are found
+        (like an iterative index scan), so selective filters still fill k.
+        """
+        if k <= 0:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        mask = self._filter_mask(filters) if filters else None
+        list_order = np.argsort(-(self.centroids @ query))
+
+        ids: List[np.ndarray] = []
+        scores: List[np.ndarray] = []
+        found = 0
+        probed = 0
+        target = min(max(nprobe, 1), self.nlist)
+        while True:
+            for list_no in list_order[probed:target]:
+                start, end = int(self.offsets[list_no]), int(self.offsets[list_no + 1])
+                if start == end:
+                    continue
+                row_ids = np.arange(start, end)
+                list_scores = self.vectors[start:end] @ query
+                if mask is not None:
+                    keep = mask[start:end]
+                    row_ids, list_scores = row_ids[keep], list_scores[keep]
+                ids.append(row_ids)
+                scores.append(list_scores)
+                found += len(row_ids)
+            probed = target
+            if found >= k or probed >= self.nlist:
+                break
+            target = min(probed * 2, self.nlist)
+
+        if not found:
+            return []
+        row_ids = np.concatenate(ids)
+        row_scores = np.concatenate(scores)
+        if len(row_scores) > k:
+            top = np.argpartition(-row_scores, k - 1)[:k]
+            row_ids, row_scores = row_ids[top], row_scores[top]
+        ranked = np.argsort(-row_scores)
+
+        results = []
+        for position in ranked:
+            similarity = float(row_scores[position])
+            if match_threshold is not None and similarity <= match_threshold:
+                break
+            row = self.rows[row_ids[position]]
+            results.append({**{field: row.get(field) for field in RESULT_FIELDS}, "similarity": similarity})
+        return results
+
+
+_indexes: Dict[str, Dict[str, Any]] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_drug_vector_index(path: str, embedding_version: Optional[str] = None) -> Optional[DrugVectorIndex]:
+    """
+    Returns the index at `path`, loading it on first use and reloading it when
+    run_pipeline exported a newer one. None if there is no usable index (not
+    exported yet, or built from a different embedding model).
+    """
+    now = time.monotonic()
+    reloaded = False
+    with _indexes_lock:
+        entry = _indexes.setdefault(path, {"index": None, "mtime": None, "checked_at": None})
+        if entry["checked_at"] is None or now - entry["checked_at"] >= RELOAD_CHECK_INTERVAL:
+            entry["checked_at"] = now
+            try:
+                mtime = os.stat(os.path.join(path, "meta.json")).st_mtime
+            except OSError:
+                mtime = None
+            if mtime is None:
+                entry.update(index=None, mtime=None)
+            elif mtime != entry["mtime"]:
+                try:
+                    index = DrugVectorIndex(path)
+                    logger.info(f"Loaded drug vector index {path}: {len(index)} rows, {index.nlist} lists")
+                except Exception as e:
+                    logger.error(f"Failed to load drug vector index {path}: {e}")
+                    index = None
+                entry.update(index=index, mtime=mtime)
+                reloaded = True
+        index = entry["index"]
+
+    if index is not None and embedding_version and index.embedding_version != embedding_version:
+        if reloaded:
+            logger.warning(
+                f"Drug vector index {path} was built with {index.embedding_version}, "
+                f"queries use {embedding_version}; ignoring it"
+            )
+        return None
+    return index
+
+
+def clear_drug_vector_indexes():
+    """Drops loaded indexes (tests, or forcing a reload)."""
+    with _indexes_lock:
+        _indexes.clear()
@@ -0,0 +1,175 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.data_processing.utils.czech_text import normalize_czech_text
+
+# The disk tier is pruned (expired rows, then rows beyond disk_max_entries) at
+# open and once per this many writes
+DISK_PURGE_EVERY = 500
+
+
+class EmbeddingCache:
+    """
+    LRU cache for query embeddings with TTL and an optional on-disk (SQLite) tier.
+
+    Keys are built from the embedding model name and the query text normalized
+    with `normalize_czech_text`, so "Metformin  dávkování" and "metformin davkovani"
+    share one entry. The in-memory tier is bounded by `max_entries`; the disk tier
+    survives restarts, is consulted on a memory miss and keeps at most about
+    `disk_max_entries` rows (the ones closest to expiry are dropped first).
+    """
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl: int = 86400,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 10000
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_path = disk_path
+        self.disk_max_entries = disk_max_entries
+        self._cache: "OrderedDict[str, Tuple[List[float], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._disk_writes = 0
+        self._disk_evictions = 0
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if disk_path:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(disk_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "key TEXT PRIMARY KEY, embedding TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_query_embeddings_expiry ON query_embeddings (expires_at)"
+            )
+            with self._lock:
+                self._prune_disk()
+
+    @staticmethod
+    def make_key(text: str, model: str) -> str:
+        """
+        Builds the cache key from the model name and normalized query text.
+        """
+        normalized = " ".join(normalize_czech_text(text).split())
+        return f"{model}:{normalized}"
+
+    def get(self, text: str, model: str) -> Optional[List[float]]:
+        """
+        Returns the cached embedding, or None if missing or expired.
+        """
+        key = self.make_key(text, model)
+        now = time.time()
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                embedding, expiry = entry
+                if now < expiry:
+                    self._cache.move_to_end(key)
+                    self._hits += 1
+                    return embedding
+                del self._cache[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT embedding, expires_at FROM query_embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if now < row[1]:
+                        embedding = json.loads(row[0])
+                        self._store(key, embedding, row[1])
+                        self._disk_hits += 1
+                        return embedding
+                    self._conn.execute("DELETE FROM query_embeddings WHERE key = ?", (key,))
+                    self._conn.commit()
+
+            self._misses += 1
+            return None
+
+    def set(self, text: str, model: str, embedding: List[float]):
+        """
+        Stores an embedding in memory (and on disk, if configured).
+        """
+        if not embedding:
+            return
+        key = self.make_key(text, model)
+        expiry = time.time() + self.ttl
+
+        with self._lock:
+            self._store(key, embedding, expiry)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO query_embeddings (key, embedding, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(embedding), expiry)
+                )
+                self._disk_writes += 1
+                if self._disk_writes % DISK_PURGE_EVERY == 0:
+                    self._prune_disk()
+                else:
+                    self._conn.commit()
+
+    def _prune_disk(self):
+        # Caller must hold self._lock
+        self._conn.execute("DELETE FROM query_embeddings WHERE expires_at <= ?", (time.time(),))
+        cursor = self._conn.execute(
+            "DELETE FROM query_embeddings WHERE key IN ("
+            "SELECT key FROM query_embeddings ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.disk_max_entries,)
+        )
+        self._disk_evictions += max(cursor.rowcount, 0)
+        self._conn.commit()
+
+    def _store(self, key: str, embedding: List[float], expiry: float):
+        # Caller must hold self._lock
+        self._cache[key] = (embedding, expiry)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self):
+        """
+        Clear all cache entries (memory and disk) and reset counters.
+        """
+        with self._lock:
+            self._cache.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM query_embeddings")
+                self._conn.commit()
+            self._hits = 0
+            self._disk_hits = 0
+            self._misses = 0
+            self._evictions = 0
+            self._disk_evictions = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns cache statistics.
+        """
+        with self._lock:
+            hits = self._hits + self._disk_hits
+            total = hits + self._misses
+            hit_rate = (hits / total) if total > 0 else 0.0
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "disk_evictions": self._disk_evictions,
+                "total_requests": total,
+                "hit_rate": round(hit_rate, 2),
+                "size": len(self._cache),
+                "max_entries": self.max_entries
+            }
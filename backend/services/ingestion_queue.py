@@ -0,0 +1,190 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+JOB_COLUMNS = (
+    "id", "file_path", "filename", "file_hash", "status", "attempts",
+    "chunks_stored", "chunks_embedded", "chunks_reused", "skipped",
+    "error", "created_at", "started_at", "finished_at", "owner", "heartbeat_at"
+)
+# Columns added after the first release, created on open for older databases
+ADDED_COLUMNS = {"owner": "TEXT", "heartbeat_at": "REAL"}
+
+
+class IngestionJobQueue:
+    """
+    Durable single-document ingestion jobs stored in SQLite.
+
+    Each admin upload enqueues one job for that file. A job for a file that is
+    already queued (or running on the same content) is coalesced into the
+    existing job instead of creating a new one.
+
+    Several processes (API workers) share the database. A claimed job records
+    its owner (host:pid of the claiming queue) and the owner refreshes
+    `heartbeat_at` while it ingests; `requeue_interrupted` puts back only
+    running jobs whose heartbeat is stale, i.e. whose owner stopped.
+
+    Statuses: queued -> running -> completed | failed
+    """
+    def __init__(self, path: str, owner: Optional[str] = None):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ingestion_jobs ("
+            "id TEXT PRIMARY KEY, file_path TEXT NOT NULL, filename TEXT NOT NULL, file_hash TEXT, "
+            "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "chunks_stored INTEGER, chunks_embedded INTEGER, chunks_reused INTEGER, skipped INTEGER, "
+            "error TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+            "owner TEXT, heartbeat_at REAL)"
+        )
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(ingestion_jobs)")}
+        for column, column_type in ADDED_COLUMNS.items():
+            if column not in existing:
+                self._conn.execute(f"ALTER TABLE ingestion_jobs ADD COLUMN {column} {column_type}")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_status ON ingestion_jobs (status, created_at)"
+        )
+
+    def _row_to_job(self, row: Optional[tuple]) -> Optional[Dict[str, Any]]:
+        return dict(zip(JOB_COLUMNS, row)) if row else None
+
+    def _select(self, where: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
+        row = self._conn.execute(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM ingestion_jobs WHERE {where}", params
+        ).fetchone()
+        return self._row_to_job(row)
+
+    def enqueue(self, file_path: str, filename: str, file_hash: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Queues ingestion of one file.
+
+        Returns:
+            (job, coalesced) - coalesced is True when an existing job was reused.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A queued job will read the file when it runs, so it covers any new content
+                existing = self._select(
+                    "file_path = ? AND status = 'queued' ORDER BY created_at LIMIT 1", (file_path,)
+                )
+                if existing is None and file_hash is not None:
+                    # A running job only covers the upload if the content is identical
+                    existing = self._select(
+                        "file_path = ? AND status = 'running' AND file_hash = ? LIMIT 1", (file_path, file_hash)
+                    )
+                if existing is not None:
+                    if existing["status"] == "queued" and file_hash is not None:
+                        self._conn.execute(
+                            "UPDATE ingestion_jobs SET file_hash = ? WHERE id = ?", (file_hash, existing["id"])
+                        )
+                        existing["file_hash"] = file_hash
+                    self._conn.execute("COMMIT")
+                    return existing, True
+
+                job_id = uuid.uuid4().hex
+                self._conn.execute(
+                    "INSERT INTO ingestion_jobs (id, file_path, filename, file_hash, status, created_at) "
+                    "VALUES (?, ?, ?, ?, 'queued', ?)",
+                    (job_id, file_path, filename, file_hash, time.time())
+                )
+                job = self._select("id = ?", (job_id,))
+                self._conn.execute("COMMIT")
+                return job, False
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """
+        Atomically marks the oldest queued job as running (owned by this queue) and returns it.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                job = self._select("status = 'queued' ORDER BY created_at LIMIT 1")
+                if job is not None:
+                    now = time.time()
+                    self._conn.execute(
+                        "UPDATE ingestion_jobs SET status = 'running', attempts = attempts + 1, "
+                        "started_at = ?, error = NULL, owner = ?, heartbeat_at = ? WHERE id = ?",
+                        (now, self.owner, now, job["id"])
+                    )
+                    job.update(
+                        status="running", attempts=job["attempts"] + 1, started_at=now, error=None,
+                        owner=self.owner, heartbeat_at=now
+                    )
+                self._conn.execute("COMMIT")
+                return job
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def heartbeat(self, job_id: str) -> bool:
+        """
+        Marks a job this queue is running as alive. Returns False if the job was taken over.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE ingestion_jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running' AND owner = ?",
+                (time.time(), job_id, self.owner)
+            )
+            return cursor.rowcount == 1
+
+    def mark_completed(self, job_id: str, stats: Dict[str, int]):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE ingestion_jobs SET status = 'completed', chunks_stored = ?, chunks_embedded = ?, "
+                "chunks_reused = ?, skipped = ?, finished_at = ? WHERE id = ?",
+                (
+                    stats.get("stored", 0), stats.get("embedded", 0), stats.get("reused", 0),
+                    stats.get("skipped", 0), time.time(), job_id
+                )
+            )
+
+    def mark_failed(self, job_id: str, error: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE ingestion_jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+                (error, time.time(), job_id)
+            )
+
+    def requeue_interrupted(self, stale_after: float) -> int:
+        """
+        Puts running jobs without a heartbeat in the last `stale_after` seconds back in the queue.
+
+        Jobs other live processes are ingesting keep beating and are left alone.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE ingestion_jobs SET status = 'queued', owner = NULL, heartbeat_at = NULL "
+                "WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)",
+                (time.time() - stale_after,)
+            )
+            return cursor.rowcount
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._select("id = ?", (job_id,))
+
+    def list_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM ingestion_jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM ingestion_jobs WHERE status IN ('queued', 'running')"
+            ).fetchone()[0]
@@ -0,0 +1,130 @@
+"""
+Stale-while-revalidate reads for the retriever cache.
+
+Without it, the first request after an entry's TTL pays the full upstream
+latency (NCBI round trips, Supabase queries). Entries now stay in the cache for
+a per-namespace grace period (RETRIEVER_CACHE_STALE_GRACE) past their TTL:
+
+    fresh  (age < TTL)            served from the cache
+    stale  (TTL <= age < +grace)  served immediately; one background task
+                                  refreshes the entry
+    gone   (age >= TTL + grace)   fetched in the request, like a plain miss
+
+Misses and refreshes of the same key go through singleflight, so a request
+that misses while a refresh is running waits for that refresh instead of
+starting another one. A failed refresh leaves the stale value in place and
+the key is not refreshed again for RETRIEVER_CACHE_REFRESH_BACKOFF seconds,
+doubling per consecutive failure up to RETRIEVER_CACHE_REFRESH_MAX_BACKOFF.
+
+Usage:
+    >>> from backend.services.revalidation import revalidator
+    >>> result = await revalidator.fetch("pubmed:metformin:3", lambda: search(...), ttl=3600)
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from backend.data_processing.config.settings import settings
+from backend.services.cache import cache
+from backend.services.singleflight import SingleFlight, singleflight
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Failure records beyond this many are pruned once their backoff has passed
+MAX_TRACKED_FAILURES = 10_000
+
+
+class Revalidator:
+    """
+    Serves cached values, stale ones included, and refreshes stale keys in the background.
+
+    `fetch` functions return the value to cache, or None for results that must
+    not be cached (nothing found); exceptions mean the upstream call failed.
+    """
+    def __init__(self, cache: Any, flights: SingleFlight, backoff: float = 30.0, max_backoff: float = 900.0):
+        self.cache = cache
+        self.flights = flights
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        # Running refresh tasks (strong references, so they are not garbage collected)
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        # key -> (consecutive failures, time before which the key is not refreshed)
+        self._failures: Dict[str, Tuple[int, float]] = {}
+        self._stats = {"stale_served": 0, "refreshes": 0, "refresh_failures": 0, "backoff_skips": 0}
+
+    async def fetch(self, key: str, fetch: Callable[[], Awaitable[Optional[T]]], ttl: float) -> Optional[T]:
+        """
+        Returns the cached value for `key` (refreshing it if stale), or the result of `fetch()`.
+        """
+        entry = await self.cache.alookup(key)
+        if entry is not None:
+            value, stale = entry
+            if stale:
+                self._stats["stale_served"] += 1
+                self._schedule_refresh(key, fetch, ttl)
+            return value
+        return await self.flights.do(key, lambda: self._load(key, fetch, ttl))
+
+    async def _load(self, key: str, fetch: Callable[[], Awaitable[Optional[T]]], ttl: float) -> Optional[T]:
+        value = await fetch()
+        self._failures.pop(key, None)
+        if value is not None:
+            await self.cache.aset(key, value, ttl=ttl)
+        return value
+
+    def _schedule_refresh(self, key: str, fetch: Callable[[], Awaitable[Optional[T]]], ttl: float):
+        if key in self._refreshing:
+            return
+        failure = self._failures.get(key)
+        if failure is not None and time.time() < failure[1]:
+            self._stats["backoff_skips"] += 1
+            return
+        task = asyncio.get_running_loop().create_task(self._refresh(key, fetch, ttl))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda done: self._refreshing.pop(key, None))
+
+    async def _refresh(self, key: str, fetch: Callable[[], Awaitable[Optional[T]]], ttl: float):
+        try:
+            value = await self.flights.do(key, lambda: self._load(key, fetch, ttl))
+        except Exception as e:
+            failures = self._failures.get(key, (0, 0.0))[0] + 1
+            delay = min(self.backoff * 2 ** (failures - 1), self.max_backoff)
+            self._failures[key] = (failures, time.time() + delay)
+            self._stats["refresh_failures"] += 1
+            self._prune_failures()
+            logger.warning(f"Background refresh of {key} failed ({failures}x), next attempt in {delay:.0f}s: {e}")
+            return
+
+        self._stats["refreshes"] += 1
+        if value is None:
+            # Upstream no longer returns anything for this key; stop serving the old result
+            await self.cache.adelete(key)
+
+    def _prune_failures(self):
+        if len(self._failures) <= MAX_TRACKED_FAILURES:
+            return
+        now = time.time()
+        self._failures = {key: failure for key, failure in self._failures.items() if failure[1] > now}
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns stale serves, background refreshes and failures.
+        """
+        now = time.time()
+        return {
+            **self._stats,
+            "refreshing": len(self._refreshing),
+            "backing_off": sum(1 for _, retry_at in self._failures.values() if retry_at > now)
+        }
+
+# Global instance used by the retrievers
+revalidator = Revalidator(
+    cache,
+    singleflight,
+    backoff=settings.RETRIEVER_CACHE_REFRESH_BACKOFF,
+    max_backoff=settings.RETRIEVER_CACHE_REFRESH_MAX_BACKOFF
+)
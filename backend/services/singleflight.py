@@ -0,0 +1,81 @@
+import asyncio
+import json
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+def flight_key(namespace: str, *args: Any, **kwargs: Any) -> str:
+    """
+    Builds a coalescing key like the cache keys, e.g. "search_drugs:[...]".
+    """
+    return f"{namespace}:" + json.dumps([args, kwargs], sort_keys=True, ensure_ascii=False, default=str)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical async calls into one in-flight execution.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task and get its result (or exception).
+    Results are shared objects - callers must not mutate them.
+
+    Waiters are shielded: a caller that times out or is cancelled (e.g. a
+    retrieval deadline in the graph) stops waiting without cancelling the
+    shared task, which still completes for the others.
+    """
+    def __init__(self):
+        # In-flight tasks per event loop (tests and worker threads may run several loops)
+        self._calls: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Task]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._lock = threading.Lock()
+        self._executions = 0
+        self._coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Returns the result of `fn()`, shared with concurrent calls for the same key.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            calls = self._calls.setdefault(loop, {})
+            task = calls.get(key)
+            if task is None:
+                task = loop.create_task(fn())
+                calls[key] = task
+                task.add_done_callback(lambda done: self._finish(calls, key, done))
+                self._executions += 1
+            else:
+                self._coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, calls: Dict[str, asyncio.Task], key: str, task: asyncio.Task):
+        with self._lock:
+            if calls.get(key) is task:
+                del calls[key]
+        # Mark the exception as retrieved when every waiter has given up
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return sum(len(calls) for calls in self._calls.values())
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns executions, coalesced calls and the share of calls saved.
+        """
+        with self._lock:
+            total = self._executions + self._coalesced
+            return {
+                "executions": self._executions,
+                "coalesced": self._coalesced,
+                "coalesced_rate": round(self._coalesced / total, 2) if total else 0.0,
+                "in_flight": sum(len(calls) for calls in self._calls.values())
+            }
+
+# Global instance shared by the retrievers and SearchService
+singleflight = SingleFlight()
@@ -0,0 +1,78 @@
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+import aiofiles
+from fastapi import UploadFile
+
+# Bytes read from the upload and written to disk per step
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    """Raised as soon as an upload exceeds its size limit."""
+    def __init__(self, size_bytes: int, max_size_bytes: int):
+        self.size_bytes = size_bytes
+        self.max_size_bytes = max_size_bytes
+        super().__init__(f"Upload of at least {size_bytes} bytes exceeds the limit of {max_size_bytes} bytes")
+
+
+@dataclass
+class StoredUpload:
+    path: str
+    size_bytes: int
+    sha256: str
+
+
+def unique_temp_path(directory: str, filename: Optional[str] = None) -> str:
+    """
+    Returns a collision-free path in `directory`, keeping the file extension
+    (some consumers detect the format from it).
+    """
+    suffix = os.path.splitext(filename or "")[1]
+    return os.path.join(directory, f"{uuid.uuid4().hex}{suffix}")
+
+
+async def save_upload(
+    upload: UploadFile,
+    dest_path: str,
+    max_size_bytes: int,
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> StoredUpload:
+    """
+    Streams an upload to `dest_path` chunk by chunk, hashing it on the fly.
+
+    Only one chunk is held in memory. The data is written to a unique temporary
+    file next to `dest_path` and moved into place when complete, so concurrent
+    uploads of the same name never interleave and readers never see a partial
+    file. Raises UploadTooLargeError as soon as the limit is crossed (or
+    immediately when the declared size is already too large).
+    """
+    if upload.size is not None and upload.size > max_size_bytes:
+        raise UploadTooLargeError(upload.size, max_size_bytes)
+
+    directory = os.path.dirname(dest_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        async with aiofiles.open(temp_path, "wb") as out_file:
+            while chunk := await upload.read(chunk_size):
+                size += len(chunk)
+                if size > max_size_bytes:
+                    raise UploadTooLargeError(size, max_size_bytes)
+                digest.update(chunk)
+                await out_file.write(chunk)
+        os.replace(temp_path, dest_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    return StoredUpload(path=dest_path, size_bytes=size, sha256=digest.hexdigest())
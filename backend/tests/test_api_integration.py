@@ -15,6 +15,14 @@ def test_health_check():
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
 
+def test_db_health_check_hides_pool_details():
+    """Ověří, že /health/db bez autentizace vrací jen stav, ne interní metriky poolu."""
+    with patch("backend.main.supabase_manager.health_check",
+               return_value={"status": "unhealthy", "latency_ms": 3.2, "error": "connection refused"}):
+        response = client.get("/health/db")
+    assert response.status_code == 200
+    assert response.json() == {"status": "unhealthy"}
+
 def test_query_endpoint_structure(mock_graph_app, mock_supabase):
     """Ověří strukturu s mockovaným uživatelem."""
     app.dependency_overrides[get_current_user] = lambda: {"id": "test_user"}
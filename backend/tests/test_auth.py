@@ -0,0 +1,150 @@
+"""
+Tests for local JWT verification and the user profile cache (app/core/auth.py)
+as used by get_current_user.
+"""
+import time
+import jwt
+import pytest
+from fastapi import HTTPException
+from unittest.mock import MagicMock, patch
+
+from backend.app.core.auth import JWTVerifier, UserProfileCache
+
+SECRET = "test-jwt-secret-with-at-least-32-bytes"
+
+
+def make_token(secret=SECRET, exp_offset=3600, sub="auth-123", **claims):
+    payload = {"sub": sub, "aud": "authenticated", "exp": int(time.time()) + exp_offset, "email": "lekar@example.cz"}
+    payload.update(claims)
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+@pytest.fixture
+def verifier():
+    return JWTVerifier("http://localhost:54321", jwt_secret=SECRET)
+
+
+@pytest.fixture
+def mock_supabase():
+    client = MagicMock()
+    client.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [
+        {"id": "user-1", "auth_id": "auth-123", "email": "lekar@example.cz"}
+    ]
+    return client
+
+
+class TestJWTVerifier:
+    """Tests for JWTVerifier."""
+
+    def test_valid_hs256_token(self, verifier):
+        claims = verifier.verify(make_token())
+
+        assert claims["sub"] == "auth-123"
+        assert claims["email"] == "lekar@example.cz"
+
+    def test_expired_token_is_rejected(self, verifier):
+        with pytest.raises(jwt.ExpiredSignatureError):
+            verifier.verify(make_token(exp_offset=-3600))
+
+    def test_wrong_signature_is_rejected(self, verifier):
+        with pytest.raises(jwt.InvalidSignatureError):
+            verifier.verify(make_token(secret="another-secret-with-at-least-32-bytes"))
+
+    def test_hs256_without_secret_defers_to_remote(self):
+        verifier = JWTVerifier("http://localhost:54321", jwt_secret=None)
+
+        assert verifier.verify(make_token()) is None
+
+
+class TestUserProfileCache:
+    """Tests for UserProfileCache TTL and invalidation."""
+
+    def test_ttl_expiry(self):
+        cache = UserProfileCache(ttl=10)
+        with patch("backend.app.core.auth.time.time", return_value=1000.0):
+            cache.set("auth-1", {"id": "u1"})
+        with patch("backend.app.core.auth.time.time", return_value=1005.0):
+            assert cache.get("auth-1") == {"id": "u1"}
+        with patch("backend.app.core.auth.time.time", return_value=1011.0):
+            assert cache.get("auth-1") is None
+
+    def test_invalidate(self):
+        cache = UserProfileCache()
+        cache.set("auth-1", {"id": "u1"})
+        cache.invalidate("auth-1")
+
+        assert cache.get("auth-1") is None
+
+
+class TestGetCurrentUser:
+    """Tests for get_current_user using local verification and the profile cache."""
+
+    @pytest.mark.asyncio
+    async def test_second_request_makes_no_network_calls(self, verifier, mock_supabase):
+        from backend.app.api.v1.deps import get_current_user
+
+        with patch("backend.app.api.v1.deps.jwt_verifier", verifier), \
+             patch("backend.app.api.v1.deps.user_profile_cache", UserProfileCache()), \
+             patch("backend.app.api.v1.deps.get_supabase_client", return_value=mock_supabase):
+            first = await get_current_user(make_token())
+            second = await get_current_user(make_token())
+
+        assert first == second
+        mock_supabase.auth.get_user.assert_not_called()
+        assert mock_supabase.table.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_invalid_token_returns_401_without_remote_call(self, verifier, mock_supabase):
+        from backend.app.api.v1.deps import get_current_user
+
+        with patch("backend.app.api.v1.deps.jwt_verifier", verifier), \
+             patch("backend.app.api.v1.deps.get_supabase_client", return_value=mock_supabase):
+            with pytest.raises(HTTPException) as exc:
+                await get_current_user(make_token(exp_offset=-3600))
+
+        assert exc.value.status_code == 401
+        mock_supabase.auth.get_user.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_supabase_auth(self, mock_supabase):
+        from backend.app.api.v1.deps import get_current_user
+
+        mock_supabase.auth.get_user.return_value.user = MagicMock(id="auth-123")
+        verifier = JWTVerifier("http://localhost:54321", jwt_secret=None)
+
+        with patch("backend.app.api.v1.deps.jwt_verifier", verifier), \
+             patch("backend.app.api.v1.deps.user_profile_cache", UserProfileCache()), \
+             patch("backend.app.api.v1.deps.get_supabase_client", return_value=mock_supabase):
+            user = await get_current_user(make_token())
+
+        assert user["auth_id"] == "auth-123"
+        mock_supabase.auth.get_user.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_jwks_fetch_does_not_block_the_event_loop(self, verifier, mock_supabase):
+        import asyncio
+        from backend.app.api.v1.deps import get_current_user
+
+        real_verify = verifier.verify
+
+        def slow_verify(token):
+            time.sleep(0.2)  # JWKS refresh
+            return real_verify(token)
+
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        with patch.object(verifier, "verify", side_effect=slow_verify), \
+             patch("backend.app.api.v1.deps.jwt_verifier", verifier), \
+             patch("backend.app.api.v1.deps.user_profile_cache", UserProfileCache()), \
+             patch("backend.app.api.v1.deps.get_supabase_client", return_value=mock_supabase):
+            await get_current_user(make_token())
+        task.cancel()
+
+        assert ticks >= 5
@@ -0,0 +1,146 @@
+"""
+Tests for the bounded retriever cache (services/cache.py).
+"""
+import threading
+import time
+
+import pytest
+
+from backend.services.cache import BoundedCache, estimate_size
+
+
+class TestBoundedCache:
+    """Tests for TTL, size bounds, eviction policies and namespace stats."""
+
+    def test_get_set_and_ttl(self):
+        cache = BoundedCache(sweep_interval=0)
+        cache.set("pubmed:metformin:3", "results", ttl=60)
+        cache.set("sukl:paralen", "drugs", ttl=-1)
+
+        assert cache.get("pubmed:metformin:3") == "results"
+        assert cache.get("sukl:paralen") is None
+        assert cache.get_stats()["expirations"] == 1
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = BoundedCache(max_entries=2, sweep_interval=0)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_lfu_evicts_least_frequently_used(self):
+        cache = BoundedCache(max_entries=2, policy="lfu", sweep_interval=0)
+        cache.set("hot", 1)
+        cache.set("cold", 2)
+        for _ in range(3):
+            cache.get("hot")
+        cache.get("cold")
+        cache.set("new", 3)
+        # The newest key is never its own victim
+        cache.set("newer", 4)
+
+        assert cache.get("hot") == 1
+        assert cache.get("cold") is None and cache.get("new") is None
+        assert cache.get("newer") == 4
+
+    def test_byte_bound_evicts_and_rejects_oversized_values(self):
+        cache = BoundedCache(max_bytes=10_000, sweep_interval=0)
+        for i in range(10):
+            cache.set(f"pubmed:q{i}", "x" * 2000)
+
+        stats = cache.get_stats()
+        assert stats["bytes"] <= 10_000
+        assert stats["size"] < 10 and cache.get("pubmed:q9") is not None
+
+        cache.set("pubmed:huge", "x" * 20_000)
+        assert cache.get("pubmed:huge") is None
+        assert cache.get_stats()["namespaces"]["pubmed"]["rejected"] == 1
+
+    def test_overwrite_replaces_size_accounting(self):
+        cache = BoundedCache(sweep_interval=0)
+        cache.set("sukl:a", "x" * 1000)
+        cache.set("sukl:a", "short")
+
+        stats = cache.get_stats()
+        assert stats["size"] == 1
+        assert stats["bytes"] == stats["namespaces"]["sukl"]["bytes"] < 1000
+
+    def test_sweep_removes_expired_entries_without_access(self):
+        cache = BoundedCache(sweep_interval=0)
+        for i in range(100):
+            cache.set(f"pubmed:q{i}", "result", ttl=-1)
+        cache.set("pubmed:fresh", "result", ttl=60)
+
+        assert cache.sweep() == 100
+        stats = cache.get_stats()
+        assert stats["size"] == 1 and stats["namespaces"]["pubmed"]["expirations"] == 100
+
+    def test_background_sweeper(self):
+        cache = BoundedCache(sweep_interval=0.01)
+        cache.set("pubmed:q", "result", ttl=0.01)
+        try:
+            deadline = time.time() + 2
+            while cache.get_stats()["size"] and time.time() < deadline:
+                time.sleep(0.01)
+            assert cache.get_stats()["size"] == 0
+        finally:
+            cache.stop_sweeper()
+
+    def test_stats_per_namespace(self):
+        cache = BoundedCache(sweep_interval=0)
+        cache.set("pubmed:q:3", "r")
+        cache.get("pubmed:q:3")
+        cache.get("sukl:missing")
+        cache.get("no-namespace")
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 2 and stats["hit_rate"] == 0.33
+        assert stats["namespaces"]["pubmed"]["hit_rate"] == 1.0
+        assert stats["namespaces"]["sukl"]["misses"] == 1
+        assert stats["namespaces"]["default"]["misses"] == 1
+
+    def test_concurrent_access_keeps_bounds(self):
+        cache = BoundedCache(max_entries=50, policy="lfu", sweep_interval=0)
+
+        def worker(n):
+            for i in range(500):
+                cache.set(f"sukl:{n}:{i % 80}", i)
+                cache.get(f"sukl:{n}:{(i * 7) % 80}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = cache.get_stats()
+        assert stats["size"] == 50
+        assert stats["bytes"] == sum(ns["bytes"] for ns in stats["namespaces"].values())
+
+    def test_stale_grace_per_namespace(self):
+        cache = BoundedCache(sweep_interval=0, stale_grace={"pubmed": 60})
+        cache.set("pubmed:metformin:3", "results", ttl=-1)
+        cache.set("sukl:paralen", "drugs", ttl=-1)
+
+        assert cache.get("pubmed:metformin:3") is None
+        assert cache.lookup("pubmed:metformin:3") == ("results", True)
+        assert cache.lookup("sukl:paralen") is None
+        cache.set("pubmed:metformin:3", "refreshed", ttl=60)
+        assert cache.lookup("pubmed:metformin:3") == ("refreshed", False)
+
+        stats = cache.get_stats()
+        assert stats["stale_hits"] == 1 and stats["namespaces"]["pubmed"]["stale_hits"] == 1
+        assert stats["size"] == 1
+
+    def test_invalid_policy(self):
+        with pytest.raises(ValueError):
+            BoundedCache(policy="fifo")
+
+
+def test_estimate_size_counts_utf8_and_containers():
+    assert estimate_size("č" * 100) > estimate_size("c" * 100)
+    assert estimate_size({"abstract": "x" * 1000}) > 1000
@@ -0,0 +1,295 @@
+"""
+Tests for the shared (L2) cache backends and the two-tier retriever cache.
+"""
+import asyncio
+import socket
+import socketserver
+import threading
+import time
+
+import pytest
+
+import redis
+
+from backend.services.cache import BoundedCache, TieredCache, create_cache
+from backend.services.cache_backends import (
+    CacheBackend,
+    RedisBackend,
+    SQLiteBackend,
+    decode_entry,
+    encode_entry,
+)
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    """Speaks enough RESP2 for redis-py: PING, AUTH, SELECT, GET, SET [PX] [NX], DEL, SCAN (CLIENT is rejected)."""
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        assert line.startswith(b"*")
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def bulk(self, value):
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def handle(self):
+        server = self.server
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+            command = args[0].upper()
+            server.commands.append(command.decode())
+            now = time.time()
+            if command in (b"PING", b"AUTH", b"SELECT"):
+                if command == b"AUTH" and args[-1] != b"secret":
+                    self.wfile.write(b"-WRONGPASS invalid password\r\n")
+                else:
+                    self.wfile.write(b"+OK\r\n" if command != b"PING" else b"+PONG\r\n")
+            elif command == b"GET":
+                value, expiry = server.data.get(args[1], (None, None))
+                if expiry is not None and expiry <= now:
+                    value = None
+                self.wfile.write(self.bulk(value))
+            elif command == b"SET":
+                expiry = now + int(args[4]) / 1000 if len(args) > 4 and args[3].upper() == b"PX" else None
+                current = server.data.get(args[1])
+                if b"NX" in args[3:] and current is not None and (current[1] is None or current[1] > now):
+                    self.wfile.write(b"$-1\r\n")
+                    continue
+                server.data[args[1]] = (args[2], expiry)
+                self.wfile.write(b"+OK\r\n")
+            elif command == b"DEL":
+                removed = sum(1 for key in args[1:] if server.data.pop(key, None) is not None)
+                self.wfile.write(b":%d\r\n" % removed)
+            elif command == b"SCAN":
+                prefix = args[3].rstrip(b"*")
+                keys = [key for key in server.data if key.startswith(prefix)]
+                self.wfile.write(b"*2\r\n$1\r\n0\r\n*%d\r\n%s" % (len(keys), b"".join(self.bulk(k) for k in keys)))
+            else:
+                self.wfile.write(b"-ERR unknown command\r\n")
+
+
+@pytest.fixture
+def fake_redis():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), FakeRedisHandler)
+    server.daemon_threads = True
+    server.data, server.commands = {}, []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def redis_url(server, credentials=""):
+    return f"redis://{credentials}127.0.0.1:{server.server_address[1]}/2"
+
+
+def test_serialization_round_trip():
+    data = encode_entry("PubMed Search Results:\n\n1. Metformin – účinnost", 1234.5)
+
+    assert decode_entry(data) == ("PubMed Search Results:\n\n1. Metformin – účinnost", 1234.5)
+    assert decode_entry(b"not json") is None
+    assert decode_entry(b'{"version": 99, "value": 1, "expires_at": 0}') is None
+
+
+class TestRedisBackend:
+    def test_get_set_delete_clear(self, fake_redis):
+        backend = RedisBackend(redis_url(fake_redis), key_prefix="test:")
+        backend.set("pubmed:q:3", b"result", ttl=60)
+        fake_redis.data[b"other:key"] = (b"kept", None)
+
+        assert backend.get("pubmed:q:3") == b"result"
+        assert backend.get("missing") is None
+        backend.delete("pubmed:q:3")
+        assert backend.get("pubmed:q:3") is None
+
+        backend.set("sukl:a", b"1", ttl=60)
+        backend.clear()
+        assert list(fake_redis.data) == [b"other:key"]
+        assert "SELECT" in fake_redis.commands
+
+    def test_add_only_stores_absent_keys(self, fake_redis):
+        worker_a, worker_b = RedisBackend(redis_url(fake_redis)), RedisBackend(redis_url(fake_redis))
+
+        assert worker_a.add("warmup:pubmed", b"1", ttl=60)
+        assert not worker_b.add("warmup:pubmed", b"1", ttl=60)
+
+    def test_ttl_is_passed_to_server(self, fake_redis):
+        backend = RedisBackend(redis_url(fake_redis))
+        backend.set("sukl:a", b"1", ttl=0.05)
+
+        assert backend.get("sukl:a") == b"1"
+        time.sleep(0.1)
+        assert backend.get("sukl:a") is None
+
+    def test_auth_and_error_replies(self, fake_redis):
+        assert RedisBackend(redis_url(fake_redis, ":secret@")).get("x") is None
+        with pytest.raises(redis.exceptions.RedisError):
+            RedisBackend(redis_url(fake_redis, ":wrong@")).get("x")
+
+    def test_reconnects_after_connection_loss(self, fake_redis):
+        backend = RedisBackend(redis_url(fake_redis))
+        backend.set("a", b"1", ttl=60)
+        for connection in backend._client.connection_pool._available_connections:
+            connection._sock.shutdown(socket.SHUT_RDWR)
+
+        # redis-py reconnects and retries the command
+        assert backend.get("a") == b"1"
+
+    def test_tls_urls_are_accepted(self):
+        backend = RedisBackend("rediss://:secret@redis.example.com:6380/0")
+
+        assert backend._client.connection_pool.connection_class is redis.connection.SSLConnection
+
+
+def test_backends_must_implement_the_interface():
+    class Incomplete(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+class TestSQLiteBackend:
+    def test_shared_between_connections(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        writer, reader = SQLiteBackend(path), SQLiteBackend(path)
+        writer.set("sukl:paralen", b"drugs", ttl=60)
+        writer.set("sukl:old", b"drugs", ttl=-1)
+
+        assert reader.get("sukl:paralen") == b"drugs"
+        assert reader.get("sukl:old") is None
+        reader.clear()
+        assert writer.get("sukl:paralen") is None
+
+    def test_add_only_stores_absent_keys(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        worker_a, worker_b = SQLiteBackend(path), SQLiteBackend(path)
+        worker_a.set("warmup:old", b"1", ttl=-1)
+
+        assert worker_a.add("warmup:pubmed", b"1", ttl=60)
+        assert not worker_b.add("warmup:pubmed", b"2", ttl=60)
+        assert worker_b.get("warmup:pubmed") == b"1"
+        # An expired entry does not hold the key
+        assert worker_b.add("warmup:old", b"2", ttl=60)
+
+
+class TestTieredCache:
+    def make(self, backend):
+        return TieredCache(BoundedCache(sweep_interval=0), backend)
+
+    def test_workers_share_l2(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        worker_a, worker_b = self.make(SQLiteBackend(path)), self.make(SQLiteBackend(path))
+
+        worker_a.set("pubmed:metformin:3", "PubMed Search Results: ...", ttl=3600)
+
+        assert worker_b.get("pubmed:metformin:3") == "PubMed Search Results: ..."
+        # Second read is served from worker B's L1
+        assert worker_b.get("pubmed:metformin:3") == "PubMed Search Results: ..."
+        stats = worker_b.get_stats()
+        assert stats["l2"]["hits"] == 1 and stats["hits"] == 1
+
+    def test_l1_copy_keeps_remaining_ttl(self, fake_redis):
+        writer, reader = self.make(RedisBackend(redis_url(fake_redis))), self.make(RedisBackend(redis_url(fake_redis)))
+        writer.set("sukl:paralen", "drugs", ttl=0.2)
+        time.sleep(0.1)
+
+        assert reader.get("sukl:paralen") == "drugs"
+        time.sleep(0.15)
+        assert reader.get("sukl:paralen") is None
+
+    def test_stale_entries_are_shared_within_grace(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        make = lambda: TieredCache(BoundedCache(sweep_interval=0, stale_grace={"sukl": 60}), SQLiteBackend(path))
+        writer, reader = make(), make()
+        writer.set("sukl:paralen", "drugs", ttl=0.05)
+        time.sleep(0.1)
+
+        assert reader.get("sukl:paralen") is None
+        assert reader.lookup("sukl:paralen") == ("drugs", True)
+        # A fresh value written by another worker wins over the stale L1 copy
+        writer.set("sukl:paralen", "refreshed", ttl=60)
+        assert reader.lookup("sukl:paralen") == ("refreshed", False)
+        assert reader.get_stats()["l2"]["stale_hits"] == 1
+
+    def test_unavailable_l2_falls_back_to_l1(self):
+        cache = self.make(RedisBackend("redis://127.0.0.1:1/0", timeout=0.1))
+        cache.set("sukl:paralen", "drugs", ttl=60)
+
+        assert cache.get("sukl:paralen") == "drugs"
+        assert cache.get("sukl:missing") is None
+        stats = cache.get_stats()["l2"]
+        assert stats["errors"] == 1 and stats["backend"] == "redis"
+
+    def test_unserializable_values_stay_in_l1(self, tmp_path):
+        cache = self.make(SQLiteBackend(str(tmp_path / "cache.db")))
+        value = object()
+        cache.set("pubmed:x", value)
+
+        assert cache.get("pubmed:x") is value
+        assert cache.get_stats()["l2"]["unserializable"] == 1
+
+    async def test_async_l2_calls_do_not_block_the_event_loop(self, tmp_path):
+        class SlowBackend(SQLiteBackend):
+            def get(self, key):
+                time.sleep(0.2)
+                return super().get(key)
+
+        cache = self.make(SlowBackend(str(tmp_path / "cache.db")))
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        try:
+            assert await cache.alookup("sukl:missing") is None
+        finally:
+            task.cancel()
+        assert ticks >= 5
+
+    async def test_async_set_and_delete_reach_l2(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        writer, reader = self.make(SQLiteBackend(path)), self.make(SQLiteBackend(path))
+
+        await writer.aset("sukl:paralen", "drugs", ttl=60)
+        assert await reader.alookup("sukl:paralen") == ("drugs", False)
+        await writer.adelete("sukl:paralen")
+        assert SQLiteBackend(path).get("sukl:paralen") is None
+
+
+    async def test_acquire_is_granted_to_one_worker(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        worker_a, worker_b = self.make(SQLiteBackend(path)), self.make(SQLiteBackend(path))
+
+        assert await worker_a.acquire("warmup:pubmed", ttl=60)
+        assert not await worker_b.acquire("warmup:pubmed", ttl=60)
+        assert not await self.make(RedisBackend("redis://127.0.0.1:1/0", timeout=0.1)).acquire("warmup:pubmed", 60)
+
+
+class TestCreateCache:
+    def test_unusable_backend_falls_back_to_l1(self, monkeypatch):
+        from backend.data_processing.config.settings import settings
+
+        monkeypatch.setattr(settings, "RETRIEVER_CACHE_BACKEND", "redis")
+        monkeypatch.setattr(settings, "RETRIEVER_CACHE_REDIS_URL", "memcached://localhost:11211")
+        assert isinstance(create_cache(), BoundedCache)
+
+    def test_unknown_backend_falls_back_to_l1(self, monkeypatch):
+        from backend.data_processing.config.settings import settings
+
+        monkeypatch.setattr(settings, "RETRIEVER_CACHE_BACKEND", "memcached")
+        assert isinstance(create_cache(), BoundedCache)
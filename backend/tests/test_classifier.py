@@ -0,0 +1,112 @@
+"""
+Tests for the local fast-path query classifier (app/core/classifier.py) and its
+use in classifier_node.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from langchain_core.messages import HumanMessage
+
+from backend.app.core.classifier import LocalQueryClassifier, RULE_CONFIDENCE, TRAINING_QUERIES
+from backend.app.core.config import settings
+
+
+@pytest.fixture
+def classifier():
+    return LocalQueryClassifier()
+
+
+class TestLocalQueryClassifier:
+    """Tests for rule and TF-IDF tiers of LocalQueryClassifier."""
+
+    @pytest.mark.parametrize("query,expected", [
+        ("Jaké je dávkování metforminu?", "drug_info"),
+        ("SÚKL kód 0012345", "drug_info"),
+        ("Jaký je doporučený postup pro léčbu hypertenze?", "guidelines"),
+        ("Hradí VZP přípravek Ozempic?", "reimbursement"),
+        ("Pacient v bezvědomí", "urgent"),
+    ])
+    def test_rules_classify_with_high_confidence(self, classifier, query, expected):
+        result = classifier.classify(query)
+
+        assert result.query_type == expected
+        assert result.method == "rules"
+        assert result.confidence == RULE_CONFIDENCE
+
+    def test_urgent_rule_wins_over_other_categories(self, classifier):
+        """Emergency wording takes precedence over guideline keywords, but the LLM gets the final say."""
+        result = classifier.classify("Postup KPR u dospělého")
+
+        assert result.query_type == "urgent"
+        assert result.confidence < settings.LOCAL_CLASSIFIER_THRESHOLD
+
+    @pytest.mark.parametrize("query", [
+        "Prevence infarktu myokardu podle guidelines ESC",
+        "Rizikové faktory krvácení při antikoagulaci",
+    ])
+    def test_disease_names_without_acute_phrasing_are_not_urgent(self, classifier, query):
+        assert "urgent" not in classifier.rule_matches(query)
+        assert classifier.classify(query).query_type != "urgent"
+
+    def test_model_handles_queries_without_rule_hits(self, classifier):
+        result = classifier.classify("Příznaky hypotyreózy u starších pacientů")
+
+        assert result.method == "model"
+        assert result.query_type == "clinical"
+
+    def test_model_probabilities_sum_to_one(self, classifier):
+        probs = classifier.predict_proba("Možnosti léčby migrény")
+
+        assert set(probs) == {label for _, label in TRAINING_QUERIES}
+        assert sum(probs.values()) == pytest.approx(1.0)
+
+    def test_unknown_vocabulary_has_low_confidence(self, classifier):
+        result = classifier.classify("xyzzy qwerty")
+
+        assert result.confidence < 0.5
+
+
+class TestClassifierNodeFastPath:
+    """Tests for classifier_node skipping the LLM on confident local predictions."""
+
+    @pytest.mark.asyncio
+    async def test_confident_local_prediction_skips_llm(self):
+        mock_llm = MagicMock()
+
+        with patch("backend.app.core.graph.get_llm", return_value=mock_llm):
+            from backend.app.core.graph import classifier_node
+            result = await classifier_node({"messages": [HumanMessage(content="Interakce warfarinu a aspirinu")]})
+
+        assert result == {"query_type": "drug_info", "next_step": "retrieve_drugs"}
+        mock_llm.with_structured_output.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_low_confidence_consults_llm(self):
+        mock_classification = MagicMock()
+        mock_classification.query_type = "reimbursement"
+        mock_structured_llm = MagicMock()
+        mock_structured_llm.ainvoke = AsyncMock(return_value=mock_classification)
+        mock_llm = MagicMock()
+        mock_llm.with_structured_output = MagicMock(return_value=mock_structured_llm)
+
+        with patch("backend.app.core.graph.get_llm", return_value=mock_llm):
+            from backend.app.core.graph import classifier_node
+            result = await classifier_node({"messages": [HumanMessage(content="xyzzy qwerty")]})
+
+        assert result == {"query_type": "reimbursement", "next_step": "retrieve_drugs"}
+        mock_structured_llm.ainvoke.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_low_confidence_without_llm_defaults_to_clinical(self):
+        with patch("backend.app.core.graph.get_llm", return_value=None):
+            from backend.app.core.graph import classifier_node
+            result = await classifier_node({"messages": [HumanMessage(content="xyzzy qwerty")]})
+
+        assert result == {"query_type": "clinical", "next_step": "retrieve_general"}
+
+    @pytest.mark.asyncio
+    async def test_mixed_urgent_without_llm_stays_urgent(self):
+        with patch("backend.app.core.graph.get_llm", return_value=None):
+            from backend.app.core.graph import classifier_node
+            result = await classifier_node({"messages": [HumanMessage(content="Postup KPR u dospělého")]})
+
+        assert result == {"query_type": "urgent", "next_step": "retrieve_general"}
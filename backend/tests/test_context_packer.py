@@ -0,0 +1,132 @@
+"""
+Tests for the token-budgeted synthesizer context packer.
+"""
+import pytest
+
+from backend.app.core.context_packer import (
+    CHARS_PER_TOKEN,
+    deduplicate,
+    estimate_tokens,
+    fair_shares,
+    pack_context,
+    to_context_item,
+    trim_to_tokens,
+)
+from backend.app.core.context_packer import _stems
+
+
+def guideline(chunk_id, content, source="dm2.pdf", page=3):
+    return {"source": "guidelines", "data": {"id": chunk_id, "source": source, "page": page, "content": content}}
+
+
+def paper(pmid, abstract):
+    return {"source": "pubmed", "data": {
+        "pmid": pmid, "title": f"Paper {pmid}", "abstract": abstract,
+        "url": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/", "authors": ["Novák J"],
+    }}
+
+
+def drug(code, name):
+    return {"source": "sukl", "data": {"sukl_code": code, "name": name, "active_substances": "Metformin"}}
+
+
+FILLER = " ".join(f"Věta číslo {i} popisuje obecná doporučení bez vztahu k dotazu." for i in range(60))
+
+
+class TestDeduplicate:
+    def test_repeated_items_are_dropped(self):
+        items = [to_context_item(i) for i in (drug("0001", "A"), drug("0001", "A"), paper("1", "x"), paper("1", "x"))]
+
+        assert [item.key for item in deduplicate(items)] == ["sukl:0001", "pubmed:1"]
+
+    def test_chunk_overlap_is_cut_on_both_sides(self):
+        text = "".join(f"Odstavec {i} o léčbě diabetu metforminem a dietou. " for i in range(30))
+        first, second = text[:1000], text[800:1800]
+        # Relevance order: the later chunk first
+        items = [to_context_item(guideline("b", second)), to_context_item(guideline("a", first))]
+
+        kept = deduplicate(items)
+
+        assert kept[0].body == second.strip()
+        assert kept[1].body == first[:800].rstrip()
+
+    def test_overlap_only_within_same_document(self):
+        text = "".join(f"Odstavec {i} o léčbě diabetu metforminem a dietou. " for i in range(30))
+        items = [to_context_item(guideline("a", text[:1000], source="a.pdf")),
+                 to_context_item(guideline("b", text[800:1800], source="b.pdf"))]
+
+        assert [item.body for item in deduplicate(items)] == [text[:1000].strip(), text[800:1800].strip()]
+
+    def test_contained_chunk_is_dropped(self):
+        items = [to_context_item(guideline("a", FILLER)), to_context_item(guideline("b", FILLER[100:400]))]
+
+        assert len(deduplicate(items)) == 1
+
+
+class TestBudgets:
+    def test_fair_shares_redistributes_unused_budget(self):
+        shares = fair_shares(1000, {"sukl": 100, "pubmed": 2000, "guidelines": 2000},
+                             {"sukl": 0.25, "pubmed": 0.30, "guidelines": 0.45})
+
+        assert shares["sukl"] == 100
+        assert shares["pubmed"] + shares["guidelines"] <= 900
+        assert shares["guidelines"] > shares["pubmed"]
+
+    def test_trim_keeps_relevant_sentences_in_order(self):
+        text = FILLER + " Metformin je lékem první volby u diabetu 2. typu. " + FILLER
+
+        trimmed = trim_to_tokens(text, 60, _stems("Kdy je metformin lékem první volby?"))
+
+        assert "Metformin je lékem první volby u diabetu 2. typu." in trimmed
+        assert estimate_tokens(trimmed) <= 60
+        # Omitted sentences are marked, the kept ones stay in document order
+        assert trimmed.startswith("Věta číslo 0") and " … Metformin" in trimmed
+        assert trimmed.endswith(" …")
+
+    def test_short_text_is_untouched(self):
+        assert trim_to_tokens("Krátký text.", 100, set()) == "Krátký text."
+
+
+class TestPackContext:
+    def test_prompt_stays_within_budget(self):
+        retrieved = (
+            [guideline(f"g{i}", FILLER, source=f"doc{i}.pdf") for i in range(8)]
+            + [paper(str(i), FILLER) for i in range(5)]
+            + [drug(f"{i:07d}", f"Lék {i}") for i in range(10)]
+        )
+
+        packed = pack_context(retrieved, "metformin dávkování", max_tokens=2000)
+
+        assert packed.tokens <= 2000
+        assert estimate_tokens(packed.text) == packed.tokens
+        assert packed.items + packed.dropped == len(retrieved)
+        assert {"guidelines", "pubmed", "sukl"} <= set(packed.stats)
+
+    def test_citation_numbers_match_prompt(self):
+        retrieved = [drug("0001", "Metformin Teva"), paper("1", FILLER), drug("0001", "Metformin Teva"),
+                     guideline("g", "Metformin je lékem první volby.")]
+
+        packed = pack_context(retrieved, "metformin", max_tokens=6000)
+
+        assert packed.citations == [
+            "[1] SÚKL - Metformin Teva (Kód: 0001)",
+            "[2] Novák J et al. Paper 1. https://pubmed.ncbi.nlm.nih.gov/1/",
+            "[3] Source: dm2.pdf, page 3",
+        ]
+        for number in (1, 2, 3):
+            assert f"[{number}] " in packed.text
+        assert "[4]" not in packed.text
+
+    def test_small_context_is_kept_verbatim(self):
+        packed = pack_context([guideline("g", "Metformin je lékem první volby.")], "metformin", max_tokens=6000)
+
+        assert packed.text == "NALEZENÉ ZDROJE:\n\n[1] Source: dm2.pdf, page 3\nMetformin je lékem první volby.\n\n"
+        assert packed.trimmed == 0 and packed.dropped == 0
+
+    @pytest.mark.parametrize("budget", [200, 800, 3000])
+    def test_budget_is_respected_with_one_source(self, budget):
+        packed = pack_context([paper(str(i), FILLER) for i in range(6)], "léčba", max_tokens=budget)
+
+        assert packed.tokens <= budget
+        assert packed.items >= 1
+        assert len(packed.text) <= budget * CHARS_PER_TOKEN
@@ -0,0 +1,170 @@
+"""
+Tests for the streaming drug pipeline (pipeline/drug_pipeline.py).
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from backend.pipeline.drug_pipeline import run_drug_pipeline
+
+
+def make_parser(batches):
+    parser = MagicMock()
+    parser.iter_batches.side_effect = lambda batch_size, limit: iter(batches)
+    return parser
+
+
+@pytest.fixture
+def emb_gen():
+    gen = MagicMock()
+    gen.version = "text-embedding-ada-002:1536"
+    gen.create_search_text.side_effect = lambda item, atc_name: f"{item['name']} {atc_name}".strip()
+    gen.generate_embeddings_async = AsyncMock(side_effect=lambda texts: [[0.1] * 3 for _ in texts])
+    return gen
+
+
+@pytest.mark.asyncio
+async def test_batches_are_enriched_embedded_and_loaded(emb_gen):
+    batches = [
+        [{"sukl_code": "0000001", "name": "PARALEN", "atc_code": "N02BE01"}],
+        [{"sukl_code": "0000002", "name": "IBALGIN", "atc_code": "M01AE01"}],
+    ]
+    loader = MagicMock()
+    loader.load_drugs.side_effect = lambda drugs: len(drugs)
+
+    loaded = await run_drug_pipeline(
+        make_parser(batches), loader, emb_gen, {"N02BE01": "Paracetamol"}, should_embed=True, label="test"
+    )
+
+    assert loaded == 2
+    assert loader.load_drugs.call_count == 2
+    first = loader.load_drugs.call_args_list[0].args[0][0]
+    assert first["atc_name"] == "Paracetamol"
+    assert first["search_text"] == "PARALEN Paracetamol"
+    assert first["embedding"] == [0.1] * 3
+    assert first["embedding_version"] == "text-embedding-ada-002:1536"
+
+
+@pytest.mark.asyncio
+async def test_without_embeddings_skips_openai(emb_gen):
+    loader = MagicMock()
+
+    await run_drug_pipeline(
+        make_parser([[{"sukl_code": "0000001", "name": "PARALEN"}]]), loader, emb_gen, {}, should_embed=False, label="test"
+    )
+
+    emb_gen.generate_embeddings_async.assert_not_awaited()
+    assert "embedding" not in loader.load_drugs.call_args.args[0][0]
+
+
+@pytest.mark.asyncio
+async def test_parser_error_is_raised(emb_gen):
+    def failing_batches():
+        yield [{"sukl_code": "0000001", "name": "PARALEN"}]
+        raise ValueError("bad row")
+
+    parser = MagicMock()
+    parser.iter_batches.return_value = failing_batches()
+    loader = MagicMock()
+
+    with pytest.raises(ValueError, match="bad row"):
+        await run_drug_pipeline(parser, loader, emb_gen, {}, should_embed=False, label="test")
+    loader.load_drugs.assert_called_once()
+
+
+class TestIncrementalRefresh:
+    """Tests for manifest-based skipping of unchanged drugs."""
+
+    @pytest.fixture
+    def manifest(self, tmp_path):
+        from backend.data_processing.utils.drug_manifest import DrugManifest
+        return DrugManifest(str(tmp_path / "manifest.db"))
+
+    @pytest.fixture
+    def loader(self):
+        loader = MagicMock()
+        loader.load_drugs.side_effect = lambda drugs: len(drugs)
+        return loader
+
+    @staticmethod
+    def rows():
+        return [
+            {"sukl_code": "0000001", "name": "PARALEN", "atc_code": "N02BE01"},
+            {"sukl_code": "0000002", "name": "IBALGIN", "atc_code": "M01AE01"},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_unchanged_rows_are_skipped(self, emb_gen, loader, manifest):
+        await run_drug_pipeline(make_parser([self.rows()]), loader, emb_gen, {}, True, "test", manifest=manifest)
+        loader.reset_mock()
+        emb_gen.generate_embeddings_async.reset_mock()
+
+        loaded = await run_drug_pipeline(make_parser([self.rows()]), loader, emb_gen, {}, True, "test", manifest=manifest)
+
+        assert loaded == 0
+        loader.load_drugs.assert_not_called()
+        emb_gen.generate_embeddings_async.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_only_changed_search_text_is_embedded(self, emb_gen, loader, manifest):
+        await run_drug_pipeline(make_parser([self.rows()]), loader, emb_gen, {}, True, "test", manifest=manifest)
+        loader.reset_mock()
+        emb_gen.generate_embeddings_async.reset_mock()
+
+        rows = self.rows()
+        rows[1]["name"] = "IBALGIN 400"  # changes search_text
+        await run_drug_pipeline(make_parser([rows]), loader, emb_gen, {}, True, "test", manifest=manifest)
+
+        emb_gen.generate_embeddings_async.assert_awaited_once_with(["IBALGIN 400"])
+        (uploaded,), = [c.args for c in loader.load_drugs.call_args_list]
+        assert [d["sukl_code"] for d in uploaded] == ["0000002"]
+
+    @pytest.mark.asyncio
+    async def test_non_search_field_change_is_upserted_without_embedding(self, emb_gen, loader, manifest):
+        await run_drug_pipeline(make_parser([self.rows()]), loader, emb_gen, {}, True, "test", manifest=manifest)
+        loader.reset_mock()
+        emb_gen.generate_embeddings_async.reset_mock()
+
+        rows = self.rows()
+        rows[0]["is_available"] = False  # not part of search_text
+        await run_drug_pipeline(make_parser([rows]), loader, emb_gen, {}, True, "test", manifest=manifest)
+
+        emb_gen.generate_embeddings_async.assert_not_awaited()
+        uploaded = loader.load_drugs.call_args.args[0]
+        assert [d["sukl_code"] for d in uploaded] == ["0000001"]
+        assert "embedding" not in uploaded[0]
+
+    @pytest.mark.asyncio
+    async def test_rows_loaded_without_embeddings_are_embedded_later(self, emb_gen, loader, manifest):
+        await run_drug_pipeline(make_parser([self.rows()]), loader, emb_gen, {}, False, "test", manifest=manifest)
+
+        await run_drug_pipeline(make_parser([self.rows()]), loader, emb_gen, {}, True, "test", manifest=manifest)
+
+        emb_gen.generate_embeddings_async.assert_awaited_once_with(["PARALEN", "IBALGIN"])
+
+    @pytest.mark.asyncio
+    async def test_failed_upsert_is_retried(self, emb_gen, manifest):
+        failing_loader = MagicMock()
+        failing_loader.load_drugs.return_value = 0
+        loaded = await run_drug_pipeline(
+            make_parser([self.rows()]), failing_loader, emb_gen, {}, False, "test", manifest=manifest
+        )
+
+        assert loaded == 0
+        assert len(manifest) == 0
+
+    @pytest.mark.asyncio
+    async def test_codes_of_a_later_source_are_skipped(self, emb_gen, loader, manifest):
+        """Monthly and eRecept rows of one code must not overwrite each other's manifest entry."""
+        erecept = [{"sukl_code": "0000002", "name": "IBALGIN 400", "atc_code": "M01AE01"}]
+
+        for _ in range(2):
+            loader.reset_mock()
+            await run_drug_pipeline(
+                make_parser([self.rows()]), loader, emb_gen, {}, False, "monthly",
+                manifest=manifest, skip_codes={"0000002"}
+            )
+            await run_drug_pipeline(make_parser([erecept]), loader, emb_gen, {}, False, "erecept", manifest=manifest)
+
+        # Second run: nothing changed in either source, nothing is reloaded
+        loader.load_drugs.assert_not_called()
+        assert len(manifest) == 2
@@ -0,0 +1,189 @@
+"""
+Tests for the exact-match drug resolver (SÚKL code / drug name / INN short circuit).
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend.app.services.drug_resolver import DrugResolver, DrugResolverIndex, ResolverMetrics
+
+DRUGS = [
+    {"id": "1", "sukl_code": "0000001", "name": "Warfarin Orion 5 mg", "active_substances": "Warfarin",
+     "is_available": True, "registration_status": "R"},
+    {"id": "2", "sukl_code": "0000002", "name": "Paralen 500", "active_substances": "Paracetamol",
+     "is_available": False, "registration_status": "R"},
+    {"id": "3", "sukl_code": "0000003", "name": "PARALEN 500", "active_substances": "Paracetamol",
+     "is_available": True, "registration_status": "R"},
+    {"id": "4", "sukl_code": "0000004", "name": "Panadol Extra", "active_substances": "Paracetamol, Kofein",
+     "is_available": True, "registration_status": "B"},
+    {"id": "5", "sukl_code": "0000005", "name": "Železo Fe", "active_substances": "Železnatý síran",
+     "is_available": True, "registration_status": "R"},
+]
+
+
+def make_resolver():
+    resolver = DrugResolver()
+    resolver.index = resolver.build_index(DRUGS)
+    return resolver
+
+
+class TestDrugResolverIndex:
+    def test_resolves_sukl_code(self):
+        resolution = DrugResolverIndex(DRUGS).resolve(" 0000004 ")
+
+        assert resolution.kind == "code"
+        assert [d["id"] for d in resolution.drugs] == ["4"]
+
+    def test_unknown_code_does_not_resolve(self):
+        assert DrugResolverIndex(DRUGS).resolve("9999999") is None
+
+    def test_resolves_name_case_and_diacritics_insensitive(self):
+        index = DrugResolverIndex(DRUGS)
+
+        resolution = index.resolve("paralen 500")
+        assert resolution.kind == "name"
+        # Available registrations first
+        assert [d["id"] for d in resolution.drugs] == ["3", "2"]
+        assert index.resolve("ZELEZO fe").drugs[0]["id"] == "5"
+
+    def test_resolves_each_substance_of_combinations(self):
+        resolution = DrugResolverIndex(DRUGS).resolve("Paracetamol")
+
+        assert resolution.kind == "substance"
+        assert [d["id"] for d in resolution.drugs] == ["4", "3", "2"]
+        assert DrugResolverIndex(DRUGS).resolve("kofein").drugs[0]["id"] == "4"
+
+    def test_partial_or_free_text_queries_do_not_resolve(self):
+        index = DrugResolverIndex(DRUGS)
+
+        assert index.resolve("paralen") is None
+        assert index.resolve("Jaké je dávkování Paralenu?") is None
+        assert index.resolve("") is None
+
+
+class TestResolverMetrics:
+    def test_hit_rate_and_saved_latency(self):
+        metrics = ResolverMetrics()
+        metrics.observe_stage("classifier", 40.0)
+        metrics.observe_stage("retrieve_drugs", 200.0)
+
+        metrics.record("graph", "name", 0.5)
+        metrics.record("graph", None, 0.5)
+        stats = metrics.get_stats()
+
+        graph = stats["scopes"]["graph"]
+        assert graph["lookups"] == 2 and graph["hits"] == 1
+        assert graph["hit_rate"] == 0.5
+        assert graph["hits_by_kind"] == {"name": 1}
+        assert graph["saved_ms_total"] == pytest.approx(239.5)
+        assert stats["stage_avg_ms"] == {"classifier": 40.0, "retrieve_drugs": 200.0}
+
+    def test_stage_baseline_is_a_moving_average(self):
+        metrics = ResolverMetrics()
+        metrics.observe_stage("search_drugs", 100.0)
+        metrics.observe_stage("search_drugs", 200.0)
+
+        assert 100.0 < metrics.get_stats()["stage_avg_ms"]["search_drugs"] < 200.0
+
+
+class TestDrugResolver:
+    def test_not_resolving_before_index_is_built_or_when_disabled(self):
+        resolver = DrugResolver()
+        assert resolver.resolve("Paracetamol", scope="graph") is None
+
+        resolver = make_resolver()
+        with patch("backend.app.services.drug_resolver.settings.DRUG_RESOLVER_ENABLED", False):
+            assert resolver.resolve("Paracetamol", scope="graph") is None
+        assert resolver.resolve("Paracetamol", scope="graph").kind == "substance"
+
+    def test_refresh_selects_resolver_columns(self):
+        supabase = MagicMock()
+        query = supabase.table.return_value.select.return_value.order.return_value
+        query.range.return_value.execute.return_value = MagicMock(data=DRUGS)
+
+        resolver = DrugResolver()
+        assert resolver.refresh(supabase) == len(DRUGS)
+        assert "*" not in supabase.table.return_value.select.call_args.args[0]
+        assert resolver.resolve("0000001", scope="graph").drugs[0]["name"] == "Warfarin Orion 5 mg"
+
+
+class TestGraphShortCircuit:
+    async def test_resolved_query_skips_classifier_and_retrieval(self):
+        from langchain_core.messages import HumanMessage
+        from app.core.graph import app as graph_app
+
+        mock_search_service = MagicMock()
+        mock_search_service.search_drugs = AsyncMock(return_value=[])
+        mock_search_service.search_guidelines = AsyncMock(return_value=[])
+
+        with patch("app.core.graph.drug_resolver", make_resolver()), \
+             patch("app.core.graph.search_service", mock_search_service), \
+             patch("app.core.graph.local_classifier") as mock_classifier, \
+             patch("app.core.graph.get_llm", return_value=None):
+            result = await graph_app.ainvoke(
+                {"messages": [HumanMessage(content="Paralen 500")]},
+                config={"configurable": {"thread_id": "test-resolver-hit"}}
+            )
+
+        mock_classifier.classify.assert_not_called()
+        mock_search_service.search_drugs.assert_not_called()
+        mock_search_service.search_guidelines.assert_not_called()
+        assert result["query_type"] == "drug_info"
+        assert [item["data"]["id"] for item in result["retrieved_context"]] == ["3", "2"]
+
+    def test_route_resolution(self):
+        from app.core.graph import route_resolution
+
+        assert route_resolution({"next_step": "synthesizer"}) == "synthesizer"
+        assert route_resolution({"next_step": "classifier"}) == "classifier"
+        assert route_resolution({}) == "classifier"
+
+    async def test_unresolved_query_goes_to_classifier(self):
+        from app.core.graph import resolver_node
+        from langchain_core.messages import HumanMessage
+
+        with patch("app.core.graph.drug_resolver", make_resolver()):
+            update = await resolver_node({"messages": [HumanMessage(content="Jak léčit bolest hlavy?")]})
+
+        assert update == {"next_step": "classifier"}
+
+
+class TestSearchDrugsShortCircuit:
+    def make_service(self):
+        from backend.app.services.search_service import SearchService
+        with patch("backend.app.services.search_service.PubMedSearcher"):
+            return SearchService()
+
+    @pytest.mark.asyncio
+    async def test_exact_match_skips_embedding_and_rpc(self):
+        service = self.make_service()
+        service.embed_query = AsyncMock()
+        supabase = MagicMock()
+
+        with patch("backend.app.services.search_service.drug_resolver", make_resolver()), \
+             patch("backend.app.services.search_service.get_supabase_client", return_value=supabase):
+            results = await service.search_drugs("paracetamol", limit=2, filters={"is_available": True})
+
+        assert [d["id"] for d in results] == ["4", "3"]
+        service.embed_query.assert_not_called()
+        supabase.rpc.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_miss_runs_ranked_search_and_records_baseline(self):
+        service = self.make_service()
+        service.embed_query = AsyncMock(return_value=[0.1] * 1536)
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.return_value.data = [{"id": "9", "similarity": 0.8}]
+        resolver = make_resolver()
+
+        with patch("backend.app.services.search_service.drug_resolver", resolver), \
+             patch("backend.app.services.search_service.get_supabase_client", return_value=supabase), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+            results = await service.search_drugs("lék na bolest hlavy", mode="vector")
+
+        assert results == [{"id": "9", "similarity": 0.8}]
+        stats = resolver.metrics.get_stats()
+        assert stats["scopes"]["search_drugs"] == {
+            "lookups": 1, "hits": 0, "hit_rate": 0.0, "hits_by_kind": {},
+            "avg_resolve_ms": stats["scopes"]["search_drugs"]["avg_resolve_ms"], "saved_ms_total": 0.0,
+        }
+        assert "search_drugs" in stats["stage_avg_ms"]
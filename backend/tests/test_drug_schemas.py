@@ -0,0 +1,102 @@
+"""
+Tests for the drug DTOs and their column projections.
+"""
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend.app.schemas.drug import DrugContext, DrugDetail, DrugListItem
+
+HEAVY_COLUMNS = {"embedding", "search_text", "fts", "raw_data", "name_normalized", "content_hash"}
+
+ROW = {
+    "id": "7c9e6679-7425-40de-944b-e07fc1f90ae7",
+    "sukl_code": "0123456",
+    "name": "PARALEN 500",
+    "active_substances": "Paracetamol",
+    "atc_code": "N02BE01",
+    "strength": "500MG",
+    "form": "TBL NOB",
+    "is_available": True,
+    "holder": "Zentiva, k.s.",
+    "search_text": "PARALEN 500 Paracetamol ...",
+    "embedding": "[" + ",".join(["0.01"] * 1536) + "]",
+}
+
+
+@pytest.mark.parametrize("dto", [DrugListItem, DrugDetail, DrugContext])
+def test_projections_skip_heavy_columns(dto):
+    columns = dto.columns().split(",")
+
+    assert "*" not in columns
+    assert not HEAVY_COLUMNS & set(columns)
+    assert {"sukl_code", "name"} <= set(columns)
+
+
+def test_list_projection_skips_search_scores():
+    assert not {"similarity", "rank", "rrf_score"} & set(DrugListItem.columns().split(","))
+    assert DrugListItem.model_validate({**ROW, "similarity": 0.91}).similarity == 0.91
+
+
+def test_context_prompt_is_compact():
+    prompt = DrugContext.model_validate(ROW).to_prompt()
+
+    assert prompt.splitlines()[0] == "PARALEN 500 (SÚKL: 0123456)"
+    assert "Účinná látka: Paracetamol" in prompt
+    assert "Dostupnost: Dostupný" in prompt
+    assert "0.01" not in prompt and "search_text" not in prompt
+
+
+async def test_synthesizer_formats_drugs_with_context_dto():
+    from langchain_core.messages import HumanMessage
+    from app.core.graph import synthesizer_node
+
+    llm = MagicMock()
+    llm.ainvoke = AsyncMock(return_value=MagicMock(content="Odpověď [1]"))
+
+    with patch("app.core.graph.get_llm", return_value=llm):
+        await synthesizer_node({
+            "messages": [HumanMessage(content="Paralen")],
+            "retrieved_context": [{"source": "sukl", "data": ROW}],
+        })
+
+    prompt = llm.ainvoke.call_args.args[0][-1].content
+    assert "[1] SÚKL: PARALEN 500 (SÚKL: 0123456)" in prompt
+    assert "embedding" not in prompt and "0.01" not in prompt
+
+
+class TestDrugEndpoints:
+    @pytest.fixture
+    def client(self):
+        from backend.main import app
+        from backend.app.api.v1.deps import get_current_user
+        app.dependency_overrides[get_current_user] = lambda: {"id": "test_user"}
+        yield TestClient(app)
+        app.dependency_overrides = {}
+
+    def test_detail_selects_projection(self, client):
+        supabase = MagicMock()
+        supabase.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [ROW]
+
+        with patch("app.core.database.get_supabase_client", return_value=supabase):
+            response = client.get("/api/v1/drugs/0123456")
+
+        assert response.status_code == 200
+        supabase.table.return_value.select.assert_called_once_with(DrugDetail.columns())
+        body = response.json()
+        assert body["name"] == "PARALEN 500"
+        assert "embedding" not in body and "search_text" not in body
+        # Unset optional fields are left out of the payload
+        assert "spc_dosage" not in body
+
+    def test_search_returns_list_items(self, client):
+        with patch("backend.app.api.v1.endpoints.drugs.search_service") as search:
+            search.search_drugs = AsyncMock(return_value=[{**ROW, "similarity": 0.88}])
+            response = client.get("/api/v1/drugs/search", params={"q": "paralen"})
+
+        assert response.status_code == 200
+        assert response.json() == [{
+            "id": ROW["id"], "sukl_code": "0123456", "name": "PARALEN 500",
+            "active_substances": "Paracetamol", "atc_code": "N02BE01", "strength": "500MG",
+            "form": "TBL NOB", "is_available": True, "similarity": 0.88,
+        }]
@@ -0,0 +1,236 @@
+"""
+Tests for the memory-mapped local drug vector index.
+"""
+import json
+import os
+import numpy as np
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend.services import drug_vector_index
+from backend.services.drug_vector_index import (
+    DrugVectorIndex,
+    build_drug_vector_index,
+    clear_drug_vector_indexes,
+    fetch_drug_embeddings,
+    get_drug_vector_index,
+)
+
+VERSION = "text-embedding-ada-002:1536"
+DIMS = 32
+
+
+def make_rows(count, seed=0, clusters=8):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DIMS))
+    rows = []
+    for i in range(count):
+        vector = centers[i % clusters] + 0.3 * rng.normal(size=DIMS)
+        rows.append({
+            "id": f"id-{i}",
+            "sukl_code": f"{i:07d}",
+            "name": f"DRUG {i}",
+            "active_substances": None,
+            "atc_name": "",
+            "is_available": i % 3 != 0,
+            "registration_status": "R",
+            # PostgREST returns vectors as strings
+            "embedding": json.dumps(vector.tolist()),
+        })
+    return rows
+
+
+def exact_top_k(rows, query, k, keep=lambda row: True):
+    matrix = np.array([json.loads(row["embedding"]) for row in rows])
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    scores = matrix @ (query / np.linalg.norm(query))
+    ranked = [i for i in np.argsort(-scores) if keep(rows[i])]
+    return [rows[i]["id"] for i in ranked[:k]]
+
+
+@pytest.fixture(autouse=True)
+def reset_loaded_indexes():
+    clear_drug_vector_indexes()
+    yield
+    clear_drug_vector_indexes()
+
+
+class TestBuildAndSearch:
+    def test_round_trip_is_memory_mapped(self, tmp_path):
+        rows = make_rows(100)
+        path = str(tmp_path / "index")
+
+        assert build_drug_vector_index(rows, path, VERSION) == 100
+
+        index = DrugVectorIndex(path)
+        assert isinstance(index.vectors, np.memmap)
+        assert not index.vectors.flags.writeable
+        assert len(index) == 100 and index.embedding_version == VERSION
+
+    def test_full_probe_matches_exact_search(self, tmp_path):
+        rows = make_rows(3000)
+        path = str(tmp_path / "index")
+        build_drug_vector_index(rows, path, VERSION, nlist=16)
+        index = DrugVectorIndex(path)
+        query = np.array(json.loads(rows[7]["embedding"]))
+
+        results = index.search(query, k=10, nprobe=index.nlist)
+
+        assert [r["id"] for r in results] == exact_top_k(rows, query, 10)
+        assert results[0]["id"] == "id-7"
+        assert results[0]["similarity"] == pytest.approx(1.0, abs=1e-5)
+        assert set(results[0]) == {"id", "sukl_code", "name", "active_substances", "atc_name", "similarity"}
+
+    def test_few_probes_keep_recall(self, tmp_path):
+        rows = make_rows(3000)
+        path = str(tmp_path / "index")
+        build_drug_vector_index(rows, path, VERSION, nlist=16)
+        index = DrugVectorIndex(path)
+
+        recalls = []
+        for i in range(0, 200, 10):
+            query = np.array(json.loads(rows[i]["embedding"]))
+            found = {r["id"] for r in index.search(query, k=10, nprobe=4)}
+            recalls.append(len(found & set(exact_top_k(rows, query, 10))) / 10)
+        assert np.mean(recalls) >= 0.9
+
+    def test_threshold_and_filters(self, tmp_path):
+        rows = make_rows(300)
+        path = str(tmp_path / "index")
+        build_drug_vector_index(rows, path, VERSION, nlist=8)
+        index = DrugVectorIndex(path)
+        query = np.array(json.loads(rows[1]["embedding"]))
+
+        # A selective filter probes more lists until k rows match
+        results = index.search(query, k=20, filters={"is_available": False}, nprobe=1)
+        assert len(results) == 20
+        assert all(int(r["sukl_code"]) % 3 == 0 for r in results)
+
+        exact = index.search(query, k=20, filters={"is_available": False}, nprobe=index.nlist)
+        assert [r["id"] for r in exact] == exact_top_k(rows, query, 20, keep=lambda row: not row["is_available"])
+
+        above = index.search(query, k=50, match_threshold=0.9)
+        assert above and all(r["similarity"] > 0.9 for r in above)
+
+        with pytest.raises(ValueError):
+            index.search(query, filters={"organization": "ČKS"})
+
+    def test_rows_without_embedding_are_skipped(self, tmp_path):
+        rows = make_rows(10) + [{"id": "no-vector", "embedding": None}]
+        assert build_drug_vector_index(rows, str(tmp_path / "index"), VERSION) == 10
+
+        with pytest.raises(ValueError):
+            build_drug_vector_index([{"id": "x", "embedding": None}], str(tmp_path / "empty"), VERSION)
+
+    def test_buffer_grows_and_list_embeddings_are_accepted(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(drug_vector_index, "INITIAL_BUILD_ROWS", 4)
+        rows = make_rows(50)
+        for row in rows[::2]:
+            row["embedding"] = json.loads(row["embedding"])
+        path = str(tmp_path / "index")
+
+        assert build_drug_vector_index(rows, path, VERSION) == 50
+        index = DrugVectorIndex(path)
+        assert index.vectors.dtype == np.float32
+        assert np.allclose(np.linalg.norm(index.vectors, axis=1), 1.0, atol=1e-5)
+        query = np.array(json.loads(make_rows(50)[7]["embedding"]))
+        assert [r["id"] for r in index.search(query, 1)] == ["id-7"]
+
+    def test_mismatched_dimensions_are_rejected(self, tmp_path):
+        rows = make_rows(3)
+        rows[2]["embedding"] = json.dumps([0.1] * (DIMS + 1))
+        with pytest.raises(ValueError):
+            build_drug_vector_index(rows, str(tmp_path / "index"), VERSION)
+
+
+class TestLoading:
+    def test_reloads_after_new_export(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(drug_vector_index, "RELOAD_CHECK_INTERVAL", 0)
+        path = str(tmp_path / "index")
+
+        assert get_drug_vector_index(path, VERSION) is None
+
+        build_drug_vector_index(make_rows(10), path, VERSION)
+        first = get_drug_vector_index(path, VERSION)
+        assert len(first) == 10
+        assert get_drug_vector_index(path, VERSION) is first
+
+        build_drug_vector_index(make_rows(20), path, VERSION)
+        # Ensure a different mtime even on coarse-grained filesystems
+        meta = tmp_path / "index" / "meta.json"
+        os.utime(meta, (meta.stat().st_atime, meta.stat().st_mtime + 5))
+        assert len(get_drug_vector_index(path, VERSION)) == 20
+        # The old mapping stays readable after the swap
+        assert first.vectors.shape == (10, DIMS)
+        assert float(np.asarray(first.vectors[0]) @ np.asarray(first.vectors[0])) == pytest.approx(1.0, abs=1e-5)
+
+    def test_other_embedding_version_is_ignored(self, tmp_path):
+        path = str(tmp_path / "index")
+        build_drug_vector_index(make_rows(10), path, VERSION)
+
+        assert get_drug_vector_index(path, "text-embedding-3-small:1536") is None
+        assert get_drug_vector_index(path) is not None
+
+
+def test_fetch_drug_embeddings_pages():
+    supabase = MagicMock()
+    query = supabase.table.return_value.select.return_value.eq.return_value.not_.is_.return_value.order.return_value
+    pages = [[{"id": i} for i in range(2)], [{"id": 2}]]
+    query.range.return_value.execute.side_effect = [MagicMock(data=page) for page in pages]
+
+    rows = list(fetch_drug_embeddings(supabase, VERSION, page_size=2))
+
+    assert [row["id"] for row in rows] == [0, 1, 2]
+    assert [c.args for c in query.range.call_args_list] == [(0, 1), (2, 3)]
+    supabase.table.return_value.select.return_value.eq.assert_called_with("embedding_version", VERSION)
+
+
+class TestSearchServiceLocalBackend:
+    def make_service(self):
+        from backend.app.services.search_service import SearchService
+        with patch("backend.app.services.search_service.PubMedSearcher"):
+            service = SearchService()
+        return service
+
+    @pytest.mark.asyncio
+    async def test_search_drugs_uses_local_index(self, tmp_path):
+        rows = make_rows(200)
+        path = str(tmp_path / "index")
+        build_drug_vector_index(rows, path, VERSION)
+        service = self.make_service()
+        service.embed_query = AsyncMock(return_value=json.loads(rows[4]["embedding"]))
+        supabase = MagicMock()
+
+        with patch("backend.app.services.search_service.get_supabase_client", return_value=supabase), \
+             patch("backend.app.services.search_service.settings.DRUG_VECTOR_BACKEND", "local"), \
+             patch("backend.app.services.search_service.settings.DRUG_VECTOR_INDEX_PATH", path), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+            results = await service.search_drugs("Paralen", limit=5, mode="vector", filters={"is_available": True})
+
+        assert len(results) == 5
+        assert results[0]["id"] == "id-4"
+        supabase.rpc.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_rpc_without_index(self, tmp_path):
+        service = self.make_service()
+        service.embed_query = AsyncMock(return_value=[0.1] * 1536)
+        supabase = MagicMock()
+        supabase.rpc.return_value.execute.return_value.data = [{"id": "1", "similarity": 0.9}]
+
+        with patch("backend.app.services.search_service.get_supabase_client", return_value=supabase), \
+             patch("backend.app.services.search_service.settings.DRUG_VECTOR_BACKEND", "local"), \
+             patch("backend.app.services.search_service.settings.DRUG_VECTOR_INDEX_PATH", str(tmp_path / "missing")), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+            results = await service.search_drugs("Paralen", mode="vector")
+
+        assert results == [{"id": "1", "similarity": 0.9}]
+        assert supabase.rpc.call_args.args[0] == "search_drugs"
+
+
+def test_app_and_pipeline_use_the_same_index_path():
+    """The default must not depend on the working directory the API is started from."""
+    from backend.app.core.config import Settings
+    from backend.data_processing.config.settings import settings as pipeline_settings
+
+    assert Settings.model_fields["DRUG_VECTOR_INDEX_PATH"].default == str(pipeline_settings.DRUG_VECTOR_INDEX_PATH)
@@ -0,0 +1,113 @@
+"""
+Tests for the query-embedding cache (services/embedding_cache.py) and its use
+in SearchService.
+"""
+import itertools
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend.services.embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache:
+    """Tests for EmbeddingCache key normalization, LRU and TTL behaviour."""
+
+    def test_key_is_normalized(self):
+        """Diacritics, case and whitespace do not create separate entries."""
+        cache = EmbeddingCache()
+        cache.set("Metformin  dávkování", "text-embedding-ada-002", [0.1, 0.2])
+
+        assert cache.get("metformin davkovani", "text-embedding-ada-002") == [0.1, 0.2]
+        assert cache.get_stats()["hits"] == 1
+
+    def test_key_includes_model(self):
+        """Embeddings from a different model are never returned."""
+        cache = EmbeddingCache()
+        cache.set("paralen", "text-embedding-ada-002", [0.1])
+
+        assert cache.get("paralen", "text-embedding-3-small") is None
+        assert cache.get_stats()["misses"] == 1
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted when the cache is full."""
+        cache = EmbeddingCache(max_entries=2)
+        cache.set("a", "m", [1.0])
+        cache.set("b", "m", [2.0])
+        cache.get("a", "m")  # "a" becomes most recently used
+        cache.set("c", "m", [3.0])
+
+        assert cache.get("b", "m") is None
+        assert cache.get("a", "m") == [1.0]
+        assert cache.get("c", "m") == [3.0]
+        assert cache.get_stats()["evictions"] == 1
+
+    def test_ttl_expiry(self):
+        """Expired entries are treated as misses."""
+        cache = EmbeddingCache(ttl=10)
+        with patch("backend.services.embedding_cache.time.time", return_value=1000.0):
+            cache.set("ibalgin", "m", [0.5])
+        with patch("backend.services.embedding_cache.time.time", return_value=1011.0):
+            assert cache.get("ibalgin", "m") is None
+        assert cache.get_stats()["size"] == 0
+
+    def test_disk_tier_survives_new_instance(self, tmp_path):
+        """Entries written to the disk tier are visible to a fresh cache."""
+        db_path = str(tmp_path / "emb.db")
+        EmbeddingCache(disk_path=db_path).set("warfarin", "m", [0.3, 0.4])
+
+        cache = EmbeddingCache(disk_path=db_path)
+        assert cache.get("warfarin", "m") == [0.3, 0.4]
+        stats = cache.get_stats()
+        assert stats["disk_hits"] == 1
+        assert stats["size"] == 1
+
+    def test_disk_tier_is_bounded(self, tmp_path):
+        """Expired rows and rows beyond disk_max_entries are pruned, oldest first."""
+        db_path = str(tmp_path / "emb.db")
+        clock = itertools.count(1000)
+        cache = EmbeddingCache(disk_path=db_path, disk_max_entries=3, ttl=10)
+
+        def disk_keys(cache):
+            return {row[0] for row in cache._conn.execute("SELECT key FROM query_embeddings")}
+
+        with patch("backend.services.embedding_cache.DISK_PURGE_EVERY", 3), \
+             patch("backend.services.embedding_cache.time.time", side_effect=lambda: next(clock)):
+            cache.set("old", "m", [0.0])
+            for _ in range(10):
+                next(clock)  # "old" expires
+            cache.set("query 0", "m", [0.0])
+            cache.set("query 1", "m", [1.0])  # 3rd write: the expired row is purged
+            assert disk_keys(cache) == {"m:query 0", "m:query 1"}
+
+            for i in range(2, 5):
+                cache.set(f"query {i}", "m", [float(i)])  # 6th write: pruned to the 3 newest
+            assert disk_keys(cache) == {"m:query 2", "m:query 3", "m:query 4"}
+            assert cache.get_stats()["disk_evictions"] == 2
+
+            # Opening the cache prunes too
+            reopened = EmbeddingCache(disk_path=db_path, disk_max_entries=1)
+            assert disk_keys(reopened) == {"m:query 4"}
+
+
+class TestSearchServiceEmbeddingCache:
+    """Tests for SearchService.embed_query cache integration."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_query_skips_embedding_call(self):
+        """A repeated query is served from the cache without calling OpenAI."""
+        from backend.app.services.search_service import SearchService
+
+        mock_emb_gen = MagicMock()
+        mock_emb_gen.model = "text-embedding-ada-002"
+        mock_emb_gen.generate_embeddings_async = AsyncMock(return_value=[[0.1] * 1536])
+
+        with patch("backend.app.services.search_service.PubMedSearcher"):
+            service = SearchService()
+        service._emb_gens[mock_emb_gen.model] = mock_emb_gen
+
+        first = await service.embed_query("metformin dávkování")
+        second = await service.embed_query("Metformin davkovani")
+
+        assert first == second == [0.1] * 1536
+        mock_emb_gen.generate_embeddings_async.assert_awaited_once_with(["metformin dávkování"])
+        assert service.embedding_cache.get_stats()["hits"] == 1
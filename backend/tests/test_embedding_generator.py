@@ -0,0 +1,94 @@
+"""
+Tests for the async embedding path of EmbeddingGenerator (data_processing/generators/embedding_generator.py).
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from backend.data_processing.generators import embedding_generator
+from backend.data_processing.generators.embedding_generator import EmbeddingGenerator, get_async_http_client
+
+
+class FakeEmbeddings:
+    """Stands in for AsyncOpenAI().embeddings: one vector per input, tracking requests in flight."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, input, model):
+        self.requests.append(list(input))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.fail:
+                raise RuntimeError("503 Service Unavailable")
+            return SimpleNamespace(data=[SimpleNamespace(embedding=[float(len(text))]) for text in input])
+        finally:
+            self.in_flight -= 1
+
+
+@pytest.fixture
+def embeddings():
+    return FakeEmbeddings()
+
+
+@pytest.fixture
+def generator(embeddings, monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+
+    class FakeAsyncOpenAI:
+        def __init__(self, api_key, timeout, http_client):
+            self.http_client = http_client
+            self.embeddings = embeddings
+
+        def is_closed(self):
+            return self.http_client.is_closed
+
+    with patch.object(embedding_generator.openai, "AsyncOpenAI", FakeAsyncOpenAI):
+        yield EmbeddingGenerator(model="test-model", max_concurrency=2)
+
+
+async def test_batch_is_embedded_in_one_request_in_order(generator, embeddings):
+    vectors = await generator.generate_embeddings_async(["a", "bb", "ccc"])
+
+    assert vectors == [[1.0], [2.0], [3.0]]
+    assert embeddings.requests == [["a", "bb", "ccc"]]
+
+
+async def test_concurrent_calls_are_capped_by_the_semaphore(generator, embeddings):
+    results = await asyncio.gather(*[generator.generate_embeddings_async([f"text {i}"]) for i in range(6)])
+
+    assert len(embeddings.requests) == 6 and all(vectors == [[6.0]] for vectors in results)
+    assert embeddings.max_in_flight == 2
+
+
+async def test_failures_and_empty_input(generator, embeddings):
+    assert await generator.generate_embeddings_async([]) == []
+    embeddings.fail = True
+    assert await generator.generate_embeddings_async(["a", "b"]) == [None, None]
+
+
+async def test_without_api_key_returns_none(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+    assert await EmbeddingGenerator().generate_embeddings_async(["a"]) == [None]
+
+
+def test_each_event_loop_gets_its_own_client(generator, embeddings):
+    """The app, scripts and tests run separate loops; a pool from a closed loop must not be reused."""
+    async def embed_and_get_client():
+        await generator.generate_embeddings_async(["a"])
+        return get_async_http_client(), generator._get_async_state()
+
+    first_pool, first_state = asyncio.run(embed_and_get_client())
+    second_pool, second_state = asyncio.run(embed_and_get_client())
+
+    assert first_pool is not second_pool
+    assert first_state[0] is not second_state[0] and first_state[1] is not second_state[1]
+    assert len(embeddings.requests) == 2
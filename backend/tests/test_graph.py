@@ -153,6 +153,7 @@ class TestCheckpointerIntegration:
 
         expected_nodes = [
             "check_iteration",
+            "resolver",
             "classifier",
             "retrieve_drugs",
             "retrieve_general",
@@ -263,3 +264,86 @@ class TestStateCheckpointerCompatibility:
 
         assert parsed["next_step"] == "end"
         assert "final_answer" in parsed
+
+
+class TestFanOutRetrieval:
+    """Tests for parallel fan-out retrieval routing and per-source deadlines."""
+
+    def test_route_query_fans_out_by_query_type(self):
+        """Test that clinical queries are routed to several retrievers at once."""
+        from app.core.graph import route_query, FAN_OUT_ROUTES
+
+        state = {"query_type": "clinical", "next_step": "retrieve_general"}
+        assert route_query(state) == FAN_OUT_ROUTES["clinical"]
+
+    def test_route_query_single_source_when_fan_out_disabled(self):
+        """Test that disabling fan-out falls back to the classifier's next_step."""
+        from unittest.mock import patch
+        from app.core.graph import route_query
+
+        state = {"query_type": "clinical", "next_step": "retrieve_general"}
+        with patch("app.core.graph.settings.RETRIEVAL_FAN_OUT", False):
+            assert route_query(state) == "retrieve_general"
+
+    def test_route_query_unknown_type_uses_next_step(self):
+        """Test that query types without a fan-out route use next_step."""
+        from app.core.graph import route_query
+
+        state = {"query_type": None, "next_step": "retrieve_drugs"}
+        assert route_query(state) == "retrieve_drugs"
+
+    async def test_parallel_retrieval_returns_partial_results_on_timeout(self):
+        """Test that a slow source is dropped while the others are merged."""
+        import asyncio
+        from unittest.mock import AsyncMock, MagicMock, patch
+        from langchain_core.messages import HumanMessage
+        from app.core.graph import app as graph_app
+
+        async def slow_pubmed(*args, **kwargs):
+            await asyncio.sleep(1.0)
+            return [{"title": "Too late"}]
+
+        mock_search_service = MagicMock()
+        mock_search_service.search_drugs = AsyncMock(return_value=[{"name": "PARALEN", "sukl_code": "0001"}])
+        mock_search_service.search_guidelines = AsyncMock(return_value=[{"source": "g.pdf", "content": "..."}])
+        mock_search_service.search_pubmed = AsyncMock(side_effect=slow_pubmed)
+
+        deadlines = {"retrieve_drugs": 0.5, "retrieve_guidelines": 0.5, "retrieve_general": 0.05}
+
+        with patch("app.core.graph.search_service", mock_search_service), \
+             patch("app.core.graph.get_llm", return_value=None), \
+             patch.dict("app.core.graph.SOURCE_DEADLINES", deadlines):
+            result = await graph_app.ainvoke(
+                {"messages": [HumanMessage(content="Jak léčit bolest hlavy?")]},
+                config={"configurable": {"thread_id": "test-fan-out"}}
+            )
+
+        sources = sorted(item["source"] for item in result["retrieved_context"])
+        assert sources == ["guidelines", "sukl"]
+
+    async def test_retrieved_context_is_reset_between_turns(self):
+        """Test that a second turn on the same thread only sees its own sources."""
+        from unittest.mock import AsyncMock, MagicMock, patch
+        from langchain_core.messages import HumanMessage
+        from app.core.graph import app as graph_app
+
+        async def search_drugs(query, *args, **kwargs):
+            return [{"name": query, "sukl_code": query}]
+
+        mock_search_service = MagicMock()
+        mock_search_service.search_drugs = AsyncMock(side_effect=search_drugs)
+        mock_resolver = MagicMock()
+        mock_resolver.resolve.return_value = None
+        mock_classifier = MagicMock()
+        mock_classifier.classify.return_value = MagicMock(query_type="reimbursement", confidence=1.0)
+        config = {"configurable": {"thread_id": "test-context-reset"}}
+
+        with patch("app.core.graph.search_service", mock_search_service), \
+             patch("app.core.graph.drug_resolver", mock_resolver), \
+             patch("app.core.graph.local_classifier", mock_classifier), \
+             patch("app.core.graph.get_llm", return_value=None):
+            first = await graph_app.ainvoke({"messages": [HumanMessage(content="ibuprofen")]}, config=config)
+            second = await graph_app.ainvoke({"messages": [HumanMessage(content="metformin")]}, config=config)
+
+        assert [item["data"]["name"] for item in first["retrieved_context"]] == ["ibuprofen"]
+        assert [item["data"]["name"] for item in second["retrieved_context"]] == ["metformin"]
@@ -42,8 +42,11 @@ class TestGuidelinePipelineE2E:
         assert os.path.exists(saved_file)
 
     @pytest.mark.asyncio
-    async def test_guidelines_loader_processes_pdf_and_stores_chunks(self):
+    async def test_guidelines_loader_processes_pdf_and_stores_chunks(self, tmp_path):
         """Test that GuidelinesLoader correctly processes PDF and stores chunks."""
+        # The loader hashes the file before parsing, so it must exist on disk
+        pdf_path = tmp_path / "test.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4 test")
         # Mock dependencies
         mock_supabase = MagicMock()
         mock_table = MagicMock()
@@ -59,7 +62,7 @@ class TestGuidelinePipelineE2E:
 
         # Mock embeddings
         mock_embeddings = MagicMock()
-        mock_embeddings.embed_documents.return_value = [[0.1] * 1536]  # Single embedding vector
+        mock_embeddings.aembed_documents = AsyncMock(return_value=[[0.1] * 1536])  # Single embedding vector
 
         # Mock PDF loading
         mock_doc = MagicMock()
@@ -81,7 +84,7 @@ class TestGuidelinePipelineE2E:
              patch("backend.data_processing.loaders.guidelines_loader.OpenAIEmbeddings", return_value=mock_embeddings), \
              patch("backend.data_processing.loaders.guidelines_loader.PyPDFLoader", return_value=mock_loader), \
              patch("backend.data_processing.loaders.guidelines_loader.RecursiveCharacterTextSplitter", return_value=mock_splitter), \
-             patch("glob.glob", return_value=["/test/dir/test.pdf"]), \
+             patch("glob.glob", return_value=[str(pdf_path)]), \
              patch("os.path.basename", return_value="test.pdf"):
 
             from backend.data_processing.loaders.guidelines_loader import GuidelinesLoader
@@ -191,10 +194,8 @@ Citace:
         mock_llm.ainvoke = AsyncMock(return_value=mock_llm_response)
         mock_llm.with_structured_output = MagicMock(return_value=mock_llm)
 
-        # Mock the structured output for classifier
-        mock_classification = MagicMock()
-        mock_classification.query_type = "guidelines"
-        mock_llm.ainvoke = AsyncMock(side_effect=[mock_classification, mock_llm_response])
+        # Guideline keywords are classified locally (no LLM call), so the only
+        # LLM call is the synthesizer's; mock_llm.ainvoke already returns it
 
         with patch("backend.app.core.graph.search_service", mock_search_service), \
              patch("backend.app.core.graph.get_llm", return_value=mock_llm):
@@ -259,8 +260,10 @@ class TestMultiFormatPDFSupport:
     """Test support for different PDF formats."""
 
     @pytest.mark.asyncio
-    async def test_handles_multi_page_pdf(self):
+    async def test_handles_multi_page_pdf(self, tmp_path):
         """Test processing of multi-page PDF documents."""
+        pdf_path = tmp_path / "multi_page.pdf"
+        pdf_path.write_bytes(b"%PDF-1.4 multi page")
         mock_supabase = MagicMock()
         mock_table = MagicMock()
         mock_supabase.table.return_value = mock_table
@@ -274,7 +277,7 @@ class TestMultiFormatPDFSupport:
         mock_insert.execute.return_value = MagicMock()
 
         mock_embeddings = MagicMock()
-        mock_embeddings.embed_documents.return_value = [[0.1] * 1536, [0.2] * 1536, [0.3] * 1536]
+        mock_embeddings.aembed_documents = AsyncMock(return_value=[[0.1] * 1536, [0.2] * 1536, [0.3] * 1536])
 
         # Multi-page document
         docs = [
@@ -294,7 +297,7 @@ class TestMultiFormatPDFSupport:
              patch("backend.data_processing.loaders.guidelines_loader.OpenAIEmbeddings", return_value=mock_embeddings), \
              patch("backend.data_processing.loaders.guidelines_loader.PyPDFLoader", return_value=mock_loader), \
              patch("backend.data_processing.loaders.guidelines_loader.RecursiveCharacterTextSplitter", return_value=mock_splitter), \
-             patch("glob.glob", return_value=["/test/multi_page.pdf"]), \
+             patch("glob.glob", return_value=[str(pdf_path)]), \
              patch("os.path.basename", return_value="multi_page.pdf"):
 
             from backend.data_processing.loaders.guidelines_loader import GuidelinesLoader
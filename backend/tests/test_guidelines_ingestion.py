@@ -0,0 +1,285 @@
+"""
+Tests for the concurrent guideline ingestion pipeline in GuidelinesLoader.
+"""
+import asyncio
+import json
+import os
+import shutil
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "guidelines")
+PDF_NAMES = [
+    "standard_text_guideline.pdf",
+    "dosage_table_guideline.pdf",
+    "journal_multicolumn_guideline.pdf",
+]
+
+
+@pytest.fixture
+def pdf_dir(tmp_path):
+    for name in PDF_NAMES:
+        shutil.copy(os.path.join(FIXTURES_DIR, name), tmp_path / name)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def mock_supabase():
+    client = MagicMock()
+    client.inserted = []
+
+    def capture_insert(records):
+        client.inserted.extend(records)
+        return MagicMock()
+
+    client.table.return_value.insert.side_effect = capture_insert
+    return client
+
+
+def make_loader(pdf_dir, mock_supabase, embeddings, **kwargs):
+    with patch("backend.data_processing.loaders.guidelines_loader.get_supabase_client", return_value=mock_supabase), \
+         patch("backend.data_processing.loaders.guidelines_loader.OpenAIEmbeddings", return_value=embeddings):
+        from backend.data_processing.loaders.guidelines_loader import GuidelinesLoader
+        return GuidelinesLoader(pdf_dir=pdf_dir, **kwargs)
+
+
+class TestConcurrentIngestion:
+    """Tests for process-pool parsing, bounded embedding concurrency and rate limits."""
+
+    @pytest.mark.asyncio
+    async def test_process_pool_parsing(self, pdf_dir, mock_supabase):
+        embeddings = MagicMock()
+        embeddings.aembed_documents = AsyncMock(side_effect=lambda texts: [[0.1] * 1536 for _ in texts])
+        loader = make_loader(pdf_dir, mock_supabase, embeddings, parse_workers=2)
+
+        total = await loader.ingest_pdfs()
+
+        assert total == len(mock_supabase.inserted) > 0
+        assert {r["title"] for r in mock_supabase.inserted} == set(PDF_NAMES)
+
+    @pytest.mark.asyncio
+    async def test_embedding_requests_are_bounded_across_files(self, pdf_dir, mock_supabase):
+        in_flight = 0
+        peak = 0
+
+        async def slow_embed(texts):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return [[0.1] * 1536 for _ in texts]
+
+        embeddings = MagicMock()
+        embeddings.aembed_documents = AsyncMock(side_effect=slow_embed)
+        loader = make_loader(pdf_dir, mock_supabase, embeddings, embedding_concurrency=2)
+
+        with patch("backend.data_processing.loaders.guidelines_loader.EMBEDDING_BATCH_SIZE", 1):
+            await loader.ingest_pdfs()
+
+        assert peak == 2
+        assert embeddings.aembed_documents.await_count == len(mock_supabase.inserted)
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_pauses_all_batches(self, pdf_dir, mock_supabase):
+        rate_limit = Exception("Too many requests")
+        rate_limit.status_code = 429
+        rate_limit.response = MagicMock(headers={"retry-after": "3"})
+
+        embeddings = MagicMock()
+        embeddings.aembed_documents = AsyncMock(
+            side_effect=[rate_limit] + [[[0.1] * 1536] * 50] * 20
+        )
+        loader = make_loader(pdf_dir, mock_supabase, embeddings, embedding_concurrency=1)
+
+        clock = [100.0]
+        sleeps = []
+
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+            clock[0] += seconds
+
+        with patch("backend.data_processing.loaders.guidelines_loader.asyncio.sleep", new=fake_sleep), \
+             patch("backend.data_processing.loaders.guidelines_loader.time.monotonic", side_effect=lambda: clock[0]):
+            # Two batches start together; the first hits the rate limit
+            await asyncio.gather(
+                loader._embed_with_retry(["text"], batch_index=0, filename="a.pdf"),
+                loader._embed_with_retry(["text"], batch_index=1, filename="b.pdf"),
+            )
+
+        # Retry-After (3 s) overrides the 1 s backoff and is shared by both batches
+        assert sleeps[0] == 3.0
+        assert loader._rate_limited_until == 103.0
+        assert embeddings.aembed_documents.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_file_does_not_stop_others(self, pdf_dir, mock_supabase):
+        embeddings = MagicMock()
+        embeddings.aembed_documents = AsyncMock(side_effect=lambda texts: [[0.1] * 1536 for _ in texts])
+        loader = make_loader(pdf_dir, mock_supabase, embeddings)
+        load_chunks = loader._load_chunks
+
+        async def failing_load(file_path, executor):
+            if file_path.endswith("dosage_table_guideline.pdf"):
+                raise ValueError("Cannot read PDF")
+            return await load_chunks(file_path, executor)
+
+        with patch.object(loader, "_load_chunks", side_effect=failing_load):
+            await loader.ingest_pdfs()
+
+        titles = {r["title"] for r in mock_supabase.inserted}
+        assert titles == {"standard_text_guideline.pdf", "journal_multicolumn_guideline.pdf"}
+
+
+class TestContentAddressedSkip:
+    """Tests for skipping unchanged PDFs and reusing unchanged chunk embeddings."""
+
+    @staticmethod
+    def stored_rows(supabase, records, file_hash=None):
+        """Makes the mocked select() return the given records as stored rows."""
+        def select(columns):
+            if columns.startswith("file_hash"):
+                # ->> returns JSON values as text
+                data = [
+                    {
+                        "file_hash": file_hash or r["metadata"]["file_hash"],
+                        "embedding_version": r["embedding_version"],
+                        "chunk_count": str(r["metadata"]["chunk_count"])
+                    }
+                    for r in records
+                ]
+            else:
+                data = [
+                    {
+                        "chunk_hash": r["metadata"]["chunk_hash"],
+                        "embedding": json.dumps(r["embedding"]),
+                        "embedding_version": r["embedding_version"]
+                    }
+                    for r in records
+                ]
+            query = MagicMock()
+            query.eq.return_value.execute.return_value.data = data
+            return query
+
+        supabase.table.return_value.select.side_effect = select
+
+    @pytest.fixture
+    def single_pdf_dir(self, tmp_path):
+        shutil.copy(os.path.join(FIXTURES_DIR, PDF_NAMES[0]), tmp_path / PDF_NAMES[0])
+        return str(tmp_path)
+
+    @pytest.fixture
+    def embeddings(self):
+        embeddings = MagicMock()
+        embeddings.aembed_documents = AsyncMock(side_effect=lambda texts: [[0.1] * 1536 for _ in texts])
+        return embeddings
+
+    @pytest.mark.asyncio
+    async def test_records_carry_file_and_chunk_hashes(self, single_pdf_dir, mock_supabase, embeddings):
+        from backend.data_processing.loaders.guidelines_loader import hash_chunk, hash_file
+
+        loader = make_loader(single_pdf_dir, mock_supabase, embeddings)
+        await loader.ingest_pdfs()
+
+        expected_file_hash = hash_file(os.path.join(single_pdf_dir, PDF_NAMES[0]))
+        for record in mock_supabase.inserted:
+            assert record["metadata"]["file_hash"] == expected_file_hash
+            assert record["metadata"]["chunk_hash"] == hash_chunk(record["content"])
+
+    @pytest.mark.asyncio
+    async def test_unchanged_file_is_skipped(self, single_pdf_dir, mock_supabase, embeddings):
+        loader = make_loader(single_pdf_dir, mock_supabase, embeddings)
+        await loader.ingest_pdfs()
+        first_run = list(mock_supabase.inserted)
+        self.stored_rows(mock_supabase, first_run)
+        embeddings.aembed_documents.reset_mock()
+        mock_supabase.table.return_value.insert.reset_mock()
+        mock_supabase.table.return_value.delete.reset_mock()
+
+        total = await loader.ingest_pdfs()
+
+        assert total == 0
+        embeddings.aembed_documents.assert_not_awaited()
+        mock_supabase.table.return_value.insert.assert_not_called()
+        mock_supabase.table.return_value.delete.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_partially_stored_file_is_reingested(self, single_pdf_dir, mock_supabase, embeddings):
+        """A failed insert batch leaves rows with the new file hash; they must not count as stored."""
+        loader = make_loader(single_pdf_dir, mock_supabase, embeddings)
+        capture_insert = mock_supabase.table.return_value.insert.side_effect
+        inserts = []
+
+        def insert_failing_second_batch(records):
+            inserts.append(records)
+            if len(inserts) == 2:
+                raise RuntimeError("insert failed")
+            return capture_insert(records)
+
+        mock_supabase.table.return_value.insert.side_effect = insert_failing_second_batch
+        with patch("backend.data_processing.loaders.guidelines_loader.EMBEDDING_BATCH_SIZE", 1):
+            assert await loader.ingest_pdfs() == 0
+        partial = list(mock_supabase.inserted)
+        assert len(partial) == 1 and partial[0]["metadata"]["chunk_count"] > 1
+
+        self.stored_rows(mock_supabase, partial)
+        mock_supabase.table.return_value.insert.side_effect = capture_insert
+        mock_supabase.inserted.clear()
+        embeddings.aembed_documents.reset_mock()
+
+        total = await loader.ingest_pdfs()
+
+        assert total == partial[0]["metadata"]["chunk_count"] == len(mock_supabase.inserted)
+        # The chunk that made it in keeps its embedding
+        embedded = [t for c in embeddings.aembed_documents.await_args_list for t in c.args[0]]
+        assert len(embedded) == total - 1 and partial[0]["content"] not in embedded
+
+    @pytest.mark.asyncio
+    async def test_changed_file_embeds_only_new_chunks(self, single_pdf_dir, mock_supabase, embeddings):
+        loader = make_loader(single_pdf_dir, mock_supabase, embeddings)
+        await loader.ingest_pdfs()
+        first_run = list(mock_supabase.inserted)
+        assert len(first_run) > 1
+
+        # Same chunks except the first one, stored from an older version of the file
+        stored = [dict(r, embedding=[0.2] * 1536) for r in first_run[1:]]
+        self.stored_rows(mock_supabase, stored, file_hash="old-file-hash")
+        embeddings.aembed_documents.reset_mock()
+        mock_supabase.inserted.clear()
+
+        await loader.ingest_pdfs()
+
+        embeddings.aembed_documents.assert_awaited_once_with([first_run[0]["content"]])
+        vectors = [r["embedding"] for r in mock_supabase.inserted]
+        assert vectors[0] == [0.1] * 1536
+        assert all(v == [0.2] * 1536 for v in vectors[1:])
+
+    @pytest.mark.asyncio
+    async def test_force_reembeds_unchanged_file(self, single_pdf_dir, mock_supabase, embeddings):
+        loader = make_loader(single_pdf_dir, mock_supabase, embeddings)
+        await loader.ingest_pdfs()
+        self.stored_rows(mock_supabase, list(mock_supabase.inserted))
+        embeddings.aembed_documents.reset_mock()
+
+        total = await loader.ingest_pdfs(force=True)
+
+        assert total > 0
+        embeddings.aembed_documents.assert_awaited()
+
+    @pytest.mark.asyncio
+    async def test_embedding_model_change_reembeds(self, single_pdf_dir, mock_supabase, embeddings):
+        loader = make_loader(single_pdf_dir, mock_supabase, embeddings)
+        await loader.ingest_pdfs()
+        first_run = list(mock_supabase.inserted)
+        assert all(r["embedding_version"] == loader.embedding_version for r in first_run)
+
+        # Same file and chunks, but stored with another model's vectors
+        self.stored_rows(mock_supabase, [dict(r, embedding_version="text-embedding-ada-002:1536") for r in first_run])
+        embeddings.aembed_documents.reset_mock()
+        mock_supabase.inserted.clear()
+
+        total = await loader.ingest_pdfs()
+
+        assert total == len(first_run)
+        embedded = [t for c in embeddings.aembed_documents.await_args_list for t in c.args[0]]
+        assert len(embedded) == len(first_run)
@@ -0,0 +1,249 @@
+"""
+Tests for hybrid (full-text + vector) retrieval with reciprocal rank fusion.
+"""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend.app.services.search_service import RRF_K, SearchService, reciprocal_rank_fusion
+
+
+def make_service():
+    with patch("backend.app.services.search_service.PubMedSearcher"):
+        service = SearchService()
+    service.embed_query = AsyncMock(return_value=[0.1] * 1536)
+    return service
+
+
+def make_supabase(rpc_results, delay=0.0):
+    """Mocked client whose rpc(name) returns rpc_results[name] (or raises it)."""
+    supabase = MagicMock()
+    calls = []
+
+    def rpc(name, params):
+        calls.append((name, params))
+        query = MagicMock()
+
+        def execute():
+            import time
+            time.sleep(delay)
+            result = rpc_results[name]
+            if isinstance(result, Exception):
+                raise result
+            return MagicMock(data=result)
+
+        query.execute.side_effect = execute
+        return query
+
+    supabase.rpc.side_effect = rpc
+    supabase.calls = calls
+    return supabase
+
+
+class TestReciprocalRankFusion:
+    def test_items_in_both_rankings_win(self):
+        vector = [{"id": "a", "similarity": 0.9}, {"id": "b", "similarity": 0.8}]
+        fts = [{"id": "b", "rank": 0.5}, {"id": "c", "rank": 0.4}]
+
+        fused = reciprocal_rank_fusion([vector, fts])
+
+        assert [item["id"] for item in fused] == ["b", "a", "c"]
+        assert fused[0]["rrf_score"] == pytest.approx(1 / (RRF_K + 2) + 1 / (RRF_K + 1))
+        # Fields from both rankings are merged
+        assert fused[0]["similarity"] == 0.8 and fused[0]["rank"] == 0.5
+        assert fused[2].get("similarity") is None
+
+    def test_limit(self):
+        fused = reciprocal_rank_fusion([[{"id": i} for i in range(10)]], limit=3)
+        assert [item["id"] for item in fused] == [0, 1, 2]
+
+
+class TestHybridSearchDrugs:
+    @pytest.mark.asyncio
+    async def test_hybrid_fuses_vector_and_fulltext(self):
+        service = make_service()
+        supabase = make_supabase({
+            "search_drugs": [{"id": "1", "sukl_code": "0000001", "similarity": 0.82},
+                             {"id": "2", "sukl_code": "0000002", "similarity": 0.8}],
+            "search_drugs_fts": [{"id": "2", "sukl_code": "0000002", "rank": 0.9}],
+        })
+
+        with patch("backend.app.services.search_service.get_supabase_client", return_value=supabase), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+            results = await service.search_drugs("Paralen", limit=5, mode="hybrid")
+
+        assert [r["sukl_code"] for r in results] == ["0000002", "0000001"]
+        params = dict(supabase.calls)
+        assert params["search_drugs_fts"] == {"query_text": "Paralen", "match_count": 10}
+        assert params["search_drugs"]["match_count"] == 10
+
+    @pytest.mark.asyncio
+    async def test_rankings_run_concurrently(self):
+        service = make_service()
+        supabase = make_supabase({
+            "search_drugs": [{"id": "1"}],
+            "search_drugs_fts": [{"id": "2"}],
+        }, delay=0.2)
+
+        with patch("backend.app.services.search_service.get_supabase_client", return_value=supabase), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+            start = asyncio.get_running_loop().time()
+            await service.search_drugs("Paralen", mode="hybrid")
+            elapsed = asyncio.get_running_loop().time() - start
+
+        assert elapsed < 0.35
+
+    @pytest.mark.asyncio
+    async def test_failed_ranking_is_skipped(self):
+        service = make_service()
+        supabase = make_supabase({
+            "search_drugs": RuntimeError("pgvector down"),
+            "search_drugs_fts": [{"id": "2", "sukl_code": "0000002", "rank": 0.9}],
+        })
+
+        with patch("backend.app.services.search_service.get_supabase_client", return_value=supabase), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+            results = await service.search_drugs("Paralen", mode="hybrid")
+
+        assert [r["sukl_code"] for r in results] == ["0000002"]
+
+    @pytest.mark.asyncio
+    async def test_fts_mode_does_not_embed(self):
+        service = make_service()
+        supabase = make_supabase({"search_drugs_fts": [{"id": "2", "sukl_code": "0000002", "rank": 0.9}]})
+
+        with patch("backend.app.services.search_service.get_supabase_client", return_value=supabase), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+            results = await service.search_drugs("0000002", mode="fts")
+
+        assert results[0]["sukl_code"] == "0000002"
+        service.embed_query.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_empty_hybrid_falls_back_to_ilike(self):
+        service = make_service()
+        supabase = make_supabase({"search_drugs": [], "search_drugs_fts": []})
+        supabase.table.return_value.select.return_value.or_.return_value.limit.return_value \
+            .execute.return_value.data = [{"name": "PARALEN"}]
+
+        with patch("backend.app.services.search_service.get_supabase_client", return_value=supabase), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+            results = await service.search_drugs("paral", mode="hybrid")
+
+        assert results == [{"name": "PARALEN"}]
+
+
+class TestHybridSearchGuidelines:
+    @pytest.mark.asyncio
+    async def test_hybrid_guidelines_keep_citation_format(self):
+        service = make_service()
+        supabase = make_supabase({
+            "match_guidelines": [{"id": "g1", "title": "Hypertenze", "content": "A",
+                                  "metadata": {"source": "ht.pdf", "page": 3}, "similarity": 0.8}],
+            "match_guidelines_fts": [{"id": "g2", "title": "Diabetes", "content": "B",
+                                      "metadata": {"page": 7}, "rank": 0.4},
+                                     {"id": "g1", "title": "Hypertenze", "content": "A",
+                                      "metadata": {"source": "ht.pdf", "page": 3}, "rank": 0.3}],
+        })
+
+        with patch("backend.app.services.search_service.get_supabase_client", return_value=supabase), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+            results = await service.search_guidelines("hypertenze", limit=5, mode="hybrid")
+
+        assert [r["id"] for r in results] == ["g1", "g2"]
+        assert results[0]["source"] == "ht.pdf" and results[0]["page"] == 3
+        assert results[0]["similarity"] == 0.8
+        assert results[1]["source"] == "Diabetes" and results[1]["similarity"] is None
+        assert all(r["source_type"] == "guidelines" and "rrf_score" in r for r in results)
+
+
+class TestSearchFilters:
+    @pytest.mark.asyncio
+    async def test_filters_and_ef_search_are_passed_to_vector_rpc(self):
+        service = make_service()
+        supabase = make_supabase({"search_drugs": [{"id": "1", "sukl_code": "0000001", "similarity": 0.9}]})
+
+        with patch("backend.app.services.search_service.get_supabase_client", return_value=supabase), \
+             patch("backend.app.services.search_service.settings.VECTOR_EF_SEARCH", 80), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+            await service.search_drugs("Paralen", limit=5, mode="vector", filters={"is_available": True})
+
+        params = dict(supabase.calls)["search_drugs"]
+        assert params["ef_search"] == 80
+        assert params["filter_is_available"] is True
+        assert params["match_count"] == 5
+
+    @pytest.mark.asyncio
+    async def test_hybrid_passes_filters_to_both_rankings(self):
+        service = make_service()
+        supabase = make_supabase({"match_guidelines": [], "match_guidelines_fts": []})
+        supabase.table.return_value.select.return_value.ilike.return_value.eq.return_value.limit.return_value \
+            .execute.return_value.data = []
+
+        with patch("backend.app.services.search_service.get_supabase_client", return_value=supabase), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+            await service.search_guidelines("hypertenze", mode="hybrid", filters={"organization": "ČKS"})
+
+        params = dict(supabase.calls)
+        assert params["match_guidelines"]["filter_organization"] == "ČKS"
+        assert params["match_guidelines_fts"]["filter_organization"] == "ČKS"
+        supabase.table.return_value.select.return_value.ilike.return_value.eq.assert_called_once_with(
+            "organization", "ČKS"
+        )
+
+    @pytest.mark.asyncio
+    async def test_unknown_filter_is_rejected(self):
+        service = make_service()
+
+        with patch("backend.app.services.search_service.get_supabase_client", return_value=MagicMock()):
+            with pytest.raises(ValueError):
+                await service.search_drugs("Paralen", filters={"organization": "ČKS"})
+
+
+class TestEmbeddingVersions:
+    @pytest.mark.asyncio
+    async def test_each_table_is_queried_with_its_own_model(self):
+        service = make_service()
+        supabase = make_supabase({"search_drugs": [], "match_guidelines": []})
+        supabase.table.return_value.select.return_value.or_.return_value.limit.return_value \
+            .execute.return_value.data = []
+        supabase.table.return_value.select.return_value.ilike.return_value.limit.return_value \
+            .execute.return_value.data = []
+
+        with patch("backend.app.services.search_service.get_supabase_client", return_value=supabase), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+            await service.search_drugs("Paralen", mode="vector")
+            await service.search_guidelines("hypertenze", mode="vector")
+
+        models = [call.args[1] for call in service.embed_query.call_args_list]
+        assert models == ["text-embedding-ada-002", "text-embedding-3-small"]
+        params = dict(supabase.calls)
+        assert params["search_drugs"]["query_embedding_version"] == "text-embedding-ada-002:1536"
+        assert params["match_guidelines"]["query_embedding_version"] == "text-embedding-3-small:1536"
+
+    @pytest.mark.asyncio
+    async def test_precision_and_rescore_factor_are_passed(self):
+        service = make_service()
+        supabase = make_supabase({"search_drugs": [{"id": "1", "sukl_code": "0000001", "similarity": 0.9}]})
+
+        with patch("backend.app.services.search_service.get_supabase_client", return_value=supabase), \
+             patch("backend.app.services.search_service.settings.VECTOR_SEARCH_PRECISION", "binary"), \
+             patch("backend.app.services.search_service.settings.VECTOR_RESCORE_FACTOR", 8), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+            await service.search_drugs("Paralen", mode="vector")
+
+        params = dict(supabase.calls)["search_drugs"]
+        assert params["search_precision"] == "binary"
+        assert params["rescore_factor"] == 8
+
+    @pytest.mark.asyncio
+    async def test_unknown_precision_falls_back_to_halfvec(self):
+        service = make_service()
+        supabase = make_supabase({"search_drugs": [{"id": "1", "sukl_code": "0000001", "similarity": 0.9}]})
+
+        with patch("backend.app.services.search_service.get_supabase_client", return_value=supabase), \
+             patch("backend.app.services.search_service.settings.VECTOR_SEARCH_PRECISION", "int8"), \
+             patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
+            await service.search_drugs("Paralen", mode="vector")
+
+        assert dict(supabase.calls)["search_drugs"]["search_precision"] == "halfvec"
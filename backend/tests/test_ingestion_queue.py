@@ -0,0 +1,169 @@
+"""
+Tests for the durable guideline ingestion job queue and its admin endpoints.
+"""
+import io
+import os
+import time
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend.main import app
+from backend.services.ingestion_queue import IngestionJobQueue
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return IngestionJobQueue(str(tmp_path / "jobs.db"))
+
+
+class TestIngestionJobQueue:
+    def test_enqueue_creates_queued_job(self, queue):
+        job, coalesced = queue.enqueue("/pdfs/a.pdf", "a.pdf", "hash-a")
+
+        assert not coalesced
+        assert job["status"] == "queued"
+        assert queue.get(job["id"])["filename"] == "a.pdf"
+
+    def test_duplicate_queued_upload_is_coalesced(self, queue):
+        first, _ = queue.enqueue("/pdfs/a.pdf", "a.pdf", "hash-1")
+        second, coalesced = queue.enqueue("/pdfs/a.pdf", "a.pdf", "hash-2")
+
+        assert coalesced
+        assert second["id"] == first["id"]
+        assert second["file_hash"] == "hash-2"
+        assert len(queue.list_jobs()) == 1
+
+    def test_running_job_coalesces_only_identical_content(self, queue):
+        job, _ = queue.enqueue("/pdfs/a.pdf", "a.pdf", "hash-1")
+        queue.claim_next()
+
+        same, coalesced_same = queue.enqueue("/pdfs/a.pdf", "a.pdf", "hash-1")
+        changed, coalesced_changed = queue.enqueue("/pdfs/a.pdf", "a.pdf", "hash-2")
+
+        assert coalesced_same and same["id"] == job["id"]
+        assert not coalesced_changed and changed["id"] != job["id"]
+
+    def test_claim_complete_and_fail(self, queue):
+        a, _ = queue.enqueue("/pdfs/a.pdf", "a.pdf")
+        b, _ = queue.enqueue("/pdfs/b.pdf", "b.pdf")
+
+        claimed = queue.claim_next()
+        assert claimed["id"] == a["id"] and claimed["attempts"] == 1
+        queue.mark_completed(a["id"], {"stored": 5, "embedded": 3, "reused": 2, "skipped": 0})
+
+        assert queue.claim_next()["id"] == b["id"]
+        queue.mark_failed(b["id"], "ValueError: broken PDF")
+        assert queue.claim_next() is None
+
+        done = queue.get(a["id"])
+        assert done["status"] == "completed"
+        assert (done["chunks_stored"], done["chunks_embedded"], done["chunks_reused"]) == (5, 3, 2)
+        assert queue.get(b["id"])["status"] == "failed"
+        assert queue.get(b["id"])["error"] == "ValueError: broken PDF"
+
+    def test_interrupted_jobs_survive_restart(self, tmp_path):
+        path = str(tmp_path / "jobs.db")
+        job, _ = IngestionJobQueue(path).enqueue("/pdfs/a.pdf", "a.pdf")
+        IngestionJobQueue(path).claim_next()
+
+        reopened = IngestionJobQueue(path)
+        assert reopened.requeue_interrupted(stale_after=60) == 0  # heartbeat is recent
+        with patch("backend.services.ingestion_queue.time.time", return_value=time.time() + 61):
+            assert reopened.requeue_interrupted(stale_after=60) == 1
+        requeued = reopened.claim_next()
+        assert requeued["id"] == job["id"] and requeued["owner"] == reopened.owner
+
+    def test_jobs_of_live_workers_are_not_requeued(self, tmp_path):
+        path = str(tmp_path / "jobs.db")
+        worker_a, worker_b = IngestionJobQueue(path), IngestionJobQueue(path)
+        worker_a.enqueue("/pdfs/a.pdf", "a.pdf")
+        job = worker_a.claim_next()
+
+        with patch("backend.services.ingestion_queue.time.time", return_value=time.time() + 61):
+            assert worker_a.heartbeat(job["id"])
+            # Worker B starts while A is still ingesting
+            assert worker_b.requeue_interrupted(stale_after=60) == 0
+        assert worker_b.get(job["id"])["status"] == "running"
+        assert not worker_b.heartbeat(job["id"])
+
+    def test_old_databases_gain_owner_columns(self, tmp_path):
+        import sqlite3
+
+        path = str(tmp_path / "jobs.db")
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE ingestion_jobs (id TEXT PRIMARY KEY, file_path TEXT NOT NULL, filename TEXT NOT NULL, "
+            "file_hash TEXT, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, chunks_stored INTEGER, "
+            "chunks_embedded INTEGER, chunks_reused INTEGER, skipped INTEGER, error TEXT, created_at REAL NOT NULL, "
+            "started_at REAL, finished_at REAL)"
+        )
+        conn.execute(
+            "INSERT INTO ingestion_jobs (id, file_path, filename, status, created_at) "
+            "VALUES ('old', '/pdfs/a.pdf', 'a.pdf', 'running', 0)"
+        )
+        conn.commit()
+        conn.close()
+
+        queue = IngestionJobQueue(path)
+        assert queue.requeue_interrupted(stale_after=60) == 1
+        assert queue.claim_next()["owner"] == queue.owner
+
+
+class TestIngestionEndpoints:
+    @pytest.fixture
+    def upload_dir(self, tmp_path):
+        upload_dir = str(tmp_path / "guidelines_pdfs")
+        os.makedirs(upload_dir)
+        with patch("backend.app.api.v1.endpoints.admin.UPLOAD_DIR", upload_dir):
+            yield upload_dir
+
+    def upload(self, name="guide.pdf", content=b"%PDF-1.4 test"):
+        files = {"file": (name, io.BytesIO(content), "application/pdf")}
+        return client.post("/api/v1/admin/upload/guideline", files=files)
+
+    def test_upload_returns_job_and_status_endpoint(self, upload_dir):
+        with patch("backend.app.api.v1.endpoints.admin.run_ingestion_task"):
+            data = self.upload().json()
+            duplicate = self.upload().json()
+
+        assert data["job_status"] == "queued"
+        assert not data["coalesced"]
+        assert duplicate["job_id"] == data["job_id"] and duplicate["coalesced"]
+
+        status = client.get(f"/api/v1/admin/jobs/{data['job_id']}")
+        assert status.status_code == 200
+        assert status.json()["filename"] == "guide.pdf"
+        assert len(client.get("/api/v1/admin/jobs").json()["jobs"]) == 1
+
+    def test_unknown_job_returns_404(self, upload_dir):
+        response = client.get("/api/v1/admin/jobs/missing")
+
+        assert response.status_code == 404
+        assert response.json()["detail"]["error_code"] == "JOB_NOT_FOUND"
+
+    @pytest.mark.asyncio
+    async def test_ingestion_task_processes_only_queued_documents(self, upload_dir):
+        from backend.app.api.v1.endpoints.admin import get_ingestion_queue, run_ingestion_task
+
+        queue = get_ingestion_queue()
+        ok, _ = queue.enqueue(os.path.join(upload_dir, "ok.pdf"), "ok.pdf")
+        bad, _ = queue.enqueue(os.path.join(upload_dir, "bad.pdf"), "bad.pdf")
+
+        async def ingest_file(file_path):
+            if file_path.endswith("bad.pdf"):
+                raise ValueError("Cannot read PDF")
+            return {"stored": 4, "embedded": 4, "reused": 0, "skipped": 0}
+
+        loader = MagicMock()
+        loader.ingest_file = AsyncMock(side_effect=ingest_file)
+        with patch("backend.app.api.v1.endpoints.admin.GuidelinesLoader", return_value=loader):
+            await run_ingestion_task()
+
+        assert [c.args[0] for c in loader.ingest_file.await_args_list] == [ok["file_path"], bad["file_path"]]
+        loader.ingest_pdfs.assert_not_called()
+        assert queue.get(ok["id"])["status"] == "completed"
+        assert queue.get(ok["id"])["chunks_stored"] == 4
+        assert queue.get(bad["id"])["status"] == "failed"
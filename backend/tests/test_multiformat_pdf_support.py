@@ -218,7 +218,7 @@ class TestMultiFormatLoaderProcessing:
         mock_embeddings = MagicMock()
         def mock_embed_documents(texts):
             return [[0.1] * 1536 for _ in texts]
-        mock_embeddings.embed_documents.side_effect = mock_embed_documents
+        mock_embeddings.aembed_documents = AsyncMock(side_effect=mock_embed_documents)
 
         with patch("backend.data_processing.loaders.guidelines_loader.get_supabase_client", return_value=mock_supabase), \
              patch("backend.data_processing.loaders.guidelines_loader.OpenAIEmbeddings", return_value=mock_embeddings):
@@ -282,7 +282,7 @@ class TestMultiFormatLoaderProcessing:
         mock_table.insert.side_effect = capture_insert
 
         mock_embeddings = MagicMock()
-        mock_embeddings.embed_documents.side_effect = lambda texts: [[0.1] * 1536 for _ in texts]
+        mock_embeddings.aembed_documents = AsyncMock(side_effect=lambda texts: [[0.1] * 1536 for _ in texts])
 
         with patch("backend.data_processing.loaders.guidelines_loader.get_supabase_client", return_value=mock_supabase), \
              patch("backend.data_processing.loaders.guidelines_loader.OpenAIEmbeddings", return_value=mock_embeddings):
@@ -543,7 +543,7 @@ class TestEndToEndMultiFormat:
 
         # Mock embeddings
         mock_embeddings = MagicMock()
-        mock_embeddings.embed_documents.side_effect = lambda texts: [[0.1] * 1536 for _ in texts]
+        mock_embeddings.aembed_documents = AsyncMock(side_effect=lambda texts: [[0.1] * 1536 for _ in texts])
 
         # Step 1: Process all PDFs
         with patch("backend.data_processing.loaders.guidelines_loader.get_supabase_client", return_value=mock_supabase), \
@@ -53,3 +53,60 @@ def test_extract_text_from_pdf_error(parser, mock_pdfplumber_module):
     
     # Verify
     assert text == ""
+
+
+from backend.data_processing.parsers.sukl_dlp_parser import SuklDlpParser
+
+DLP_CSV = (
+    "KOD_SUKL;NAZEV;SILA;FORMA;ATC_WHO;LL;DODAVKY\n"
+    "12345;PARALEN 500;500MG;TBL NOB;N02BE01;PARACETAMOL;A\n"
+    "0012346;IBALGIN 400;400MG;TBL FLM;M01AE01;;N\n"
+    "12345;PARALEN 500;500MG;TBL NOB;N02BE01;PARACETAMOL;N\n"
+    ";BEZ KODU;;;;;A\n"
+    "0099999;XARELTO 20;20MG;TBL FLM;B01AF01;RIVAROXABAN;A\n"
+)
+
+
+@pytest.fixture
+def dlp_file(tmp_path):
+    path = tmp_path / "dlp_leciva.csv"
+    path.write_bytes(DLP_CSV.encode("cp1250"))
+    return str(path)
+
+
+def test_dlp_iter_batches_maps_columns(dlp_file):
+    batches = list(SuklDlpParser(dlp_file).iter_batches(batch_size=2))
+
+    assert [len(b) for b in batches] == [2, 1]
+    items = [item for batch in batches for item in batch]
+    assert [i["sukl_code"] for i in items] == ["0012346", "0012345", "0099999"]
+    paralen = items[1]
+    assert paralen["name"] == "PARALEN 500"
+    assert paralen["is_available"] is False  # last duplicate wins
+    assert items[0]["active_substances"] is None
+    assert items[0]["route"] == ""  # column missing from the file
+
+
+def test_dlp_iter_batches_limit(dlp_file):
+    items = [i for b in SuklDlpParser(dlp_file).iter_batches(batch_size=10, limit=2) for i in b]
+
+    assert [i["sukl_code"] for i in items] == ["0012345", "0012346"]
+
+
+def test_dlp_iter_batches_small_read_chunks(dlp_file):
+    """Duplicates split across read chunks are both yielded; upsert keeps the last."""
+    items = [i for b in SuklDlpParser(dlp_file).iter_batches(batch_size=1, read_chunk_size=1) for i in b]
+
+    assert [i["sukl_code"] for i in items] == ["0012345", "0012346", "0012345", "0099999"]
+
+
+def test_dlp_parse_returns_unique_drugs(dlp_file):
+    items = SuklDlpParser(dlp_file).parse()
+
+    assert len(items) == 3
+    assert {i["sukl_code"] for i in items} == {"0012345", "0012346", "0099999"}
+
+
+def test_dlp_read_codes(dlp_file):
+    assert SuklDlpParser(dlp_file).read_codes() == {"0012345", "0012346", "0099999"}
+    assert SuklDlpParser(dlp_file).read_codes(limit=2) == {"0012345", "0012346"}
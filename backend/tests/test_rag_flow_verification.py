@@ -201,9 +201,8 @@ class TestCompleteRAGFlowWithCitations:
         mock_llm.ainvoke = AsyncMock(return_value=mock_llm_response)
         mock_llm.with_structured_output = MagicMock(return_value=mock_llm)
 
-        mock_classification = MagicMock()
-        mock_classification.query_type = "guidelines"
-        mock_llm.ainvoke = AsyncMock(side_effect=[mock_classification, mock_llm_response])
+        # Guideline keywords are classified locally (no LLM call), so the only
+        # LLM call is the synthesizer's; mock_llm.ainvoke already returns it
 
         # Capture any exceptions during flow
         errors = []
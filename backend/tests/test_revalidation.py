@@ -0,0 +1,129 @@
+"""
+Tests for stale-while-revalidate reads (services/revalidation.py).
+"""
+import asyncio
+
+import pytest
+
+from backend.services.cache import BoundedCache
+from backend.services.revalidation import Revalidator
+from backend.services.singleflight import SingleFlight
+
+KEY = "pubmed:metformin:3"
+
+
+class Upstream:
+    """Fake upstream that counts calls and can fail or return nothing."""
+
+    def __init__(self, value="fresh", delay=0.0):
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+        self.error = None
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.value
+
+
+@pytest.fixture
+def cache():
+    return BoundedCache(sweep_interval=0, stale_grace={"pubmed": 3600})
+
+
+@pytest.fixture
+def revalidator(cache):
+    return Revalidator(cache, SingleFlight(), backoff=30.0, max_backoff=120.0)
+
+
+async def settle(revalidator):
+    while revalidator._refreshing:
+        await asyncio.sleep(0)
+
+
+async def test_miss_fetches_and_caches(revalidator, cache):
+    upstream = Upstream()
+
+    assert await revalidator.fetch(KEY, upstream, ttl=60) == "fresh"
+    assert await revalidator.fetch(KEY, upstream, ttl=60) == "fresh"
+    assert upstream.calls == 1
+    assert cache.lookup(KEY) == ("fresh", False)
+
+
+async def test_stale_value_is_served_and_refreshed_in_background(revalidator, cache):
+    cache.set(KEY, "stale", ttl=-1)
+    upstream = Upstream(delay=0.05)
+
+    results = await asyncio.gather(*[revalidator.fetch(KEY, upstream, ttl=60) for _ in range(5)])
+
+    assert results == ["stale"] * 5
+    await settle(revalidator)
+    assert upstream.calls == 1
+    assert cache.lookup(KEY) == ("fresh", False)
+    assert revalidator.get_stats()["stale_served"] == 5
+    assert revalidator.get_stats()["refreshes"] == 1
+
+
+async def test_failed_refresh_keeps_stale_value_and_backs_off(revalidator, cache, monkeypatch):
+    cache.set(KEY, "stale", ttl=-1)
+    upstream = Upstream()
+    upstream.error = RuntimeError("NCBI unavailable")
+
+    assert await revalidator.fetch(KEY, upstream, ttl=60) == "stale"
+    await settle(revalidator)
+    assert await revalidator.fetch(KEY, upstream, ttl=60) == "stale"
+    await settle(revalidator)
+    assert upstream.calls == 1
+    stats = revalidator.get_stats()
+    assert stats["refresh_failures"] == 1 and stats["backoff_skips"] == 1 and stats["backing_off"] == 1
+
+    # After the backoff the key is retried; the next failure doubles the delay
+    failures, retry_at = revalidator._failures[KEY]
+    monkeypatch.setattr("backend.services.revalidation.time.time", lambda: retry_at + 1)
+    await revalidator.fetch(KEY, upstream, ttl=60)
+    await settle(revalidator)
+    assert upstream.calls == 2
+    assert revalidator._failures[KEY] == (2, retry_at + 1 + 60.0)
+
+    upstream.error = None
+    monkeypatch.setattr("backend.services.revalidation.time.time", lambda: retry_at + 1000)
+    await revalidator.fetch(KEY, upstream, ttl=60)
+    await settle(revalidator)
+    assert KEY not in revalidator._failures
+
+
+async def test_refresh_without_results_drops_stale_value(revalidator, cache):
+    cache.set(KEY, "stale", ttl=-1)
+
+    assert await revalidator.fetch(KEY, Upstream(value=None), ttl=60) == "stale"
+    await settle(revalidator)
+    assert cache.lookup(KEY) is None
+
+
+async def test_miss_propagates_errors_and_caches_nothing(revalidator, cache):
+    upstream = Upstream()
+    upstream.error = RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        await revalidator.fetch(KEY, upstream, ttl=60)
+    assert cache.lookup(KEY) is None
+
+
+async def test_pubmed_retriever_serves_stale_results(monkeypatch):
+    from unittest.mock import AsyncMock, patch
+    from backend.pipeline.retrievers.pubmed import PubMedRetriever
+    from backend.services import revalidation
+
+    cache = BoundedCache(sweep_interval=0, stale_grace={"pubmed": 60})
+    cache.set("pubmed:aspirin:3", "cached abstracts", ttl=-1)
+    monkeypatch.setattr(revalidation.revalidator, "cache", cache)
+
+    retriever = PubMedRetriever(email="test@example.com")
+    with patch.object(retriever, "_get_ids", AsyncMock(side_effect=RuntimeError("timeout"))):
+        assert await retriever.search("aspirin") == "cached abstracts"
+        await settle(revalidation.revalidator)
+        assert (await retriever.search("ibuprofen")).startswith("Error connecting to PubMed")
+    revalidation.revalidator._failures.clear()
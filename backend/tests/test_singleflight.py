@@ -0,0 +1,125 @@
+"""
+Tests for singleflight coalescing of identical concurrent retrievals.
+"""
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.services.singleflight import SingleFlight, flight_key
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return ["result"]
+
+    results = await asyncio.gather(*[flight.do("pubmed:q:3", fetch) for _ in range(20)])
+
+    assert calls == 1
+    assert all(result == ["result"] for result in results)
+    assert flight.get_stats() == {"executions": 1, "coalesced": 19, "coalesced_rate": 0.95, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_different_keys_and_sequential_calls_run_separately():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key
+
+    assert await asyncio.gather(flight.do("a", lambda: fetch("a")), flight.do("b", lambda: fetch("b"))) == ["a", "b"]
+    assert await flight.do("a", lambda: fetch("a")) == "a"
+    assert calls == ["a", "b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_exception_reaches_every_waiter():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("NCBI 429")
+
+    results = await asyncio.gather(*[flight.do("k", fail) for _ in range(3)], return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_shared_call():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.1)
+        return "done"
+
+    impatient = asyncio.ensure_future(asyncio.wait_for(flight.do("k", slow), timeout=0.01))
+    patient = asyncio.ensure_future(flight.do("k", slow))
+
+    with pytest.raises(asyncio.TimeoutError):
+        await impatient
+    assert await patient == "done"
+
+
+def test_flight_key_is_stable():
+    assert flight_key("search_drugs", "paralen", 10, filters={"b": 1, "a": 2}) == \
+        flight_key("search_drugs", "paralen", 10, filters={"a": 2, "b": 1})
+    assert flight_key("search_drugs", "paralen", 10) != flight_key("search_drugs", "paralen", 20)
+
+
+@pytest.mark.asyncio
+async def test_pubmed_retriever_coalesces_ncbi_calls():
+    from backend.pipeline.retrievers.pubmed import PubMedRetriever
+    from backend.services.cache import cache
+
+    calls = 0
+
+    async def get_ids(query, max_results):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return ["1"]
+
+    retriever = PubMedRetriever(email="test@example.com")
+    cache.delete("pubmed:singleflight test:3")
+    with patch.object(retriever, "_get_ids", side_effect=get_ids), \
+         patch.object(retriever, "_fetch_details", return_value=[
+             {"title": "T", "abstract": "A", "pmid": "1", "url": "u"}
+         ]):
+        results = await asyncio.gather(*[retriever.search("singleflight test") for _ in range(10)])
+
+    assert calls == 1
+    assert len(set(results)) == 1 and "PubMed Search Results" in results[0]
+    cache.delete("pubmed:singleflight test:3")
+
+
+@pytest.mark.asyncio
+async def test_search_service_pubmed_runs_once_for_concurrent_calls():
+    import time
+    from backend.app.services.search_service import SearchService
+
+    with patch("backend.app.services.search_service.PubMedSearcher"):
+        service = SearchService()
+
+    def blocking_search(query, max_results):
+        time.sleep(0.05)
+        return []
+
+    service.pubmed = MagicMock()
+    service.pubmed.search.side_effect = blocking_search
+
+    results = await asyncio.gather(*[service.search_pubmed("metformin", 3) for _ in range(5)])
+
+    assert results == [[]] * 5
+    service.pubmed.search.assert_called_once_with("metformin", 3)
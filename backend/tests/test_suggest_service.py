@@ -0,0 +1,167 @@
+"""
+Tests for the in-memory /drugs/suggest autocomplete index.
+"""
+import os
+import time
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock, patch
+
+from backend.app.services.drug_data import DrugDataIndexService, fetch_drug_rows, normalize_drug_text
+from backend.app.services.suggest_service import SUGGEST_COLUMNS, DrugSuggestIndex, SuggestService
+
+DRUGS = [
+    {"sukl_code": "0000001", "name": "Warfarin Orion", "active_substances": "Warfarin", "is_available": True},
+    {"sukl_code": "0000002", "name": "Paralen 500", "active_substances": "Paracetamol", "is_available": True},
+    {"sukl_code": "0000003", "name": "PARALEN 500", "active_substances": "Paracetamol", "is_available": False},
+    {"sukl_code": "0000004", "name": "Panadol Extra", "active_substances": "Paracetamol, Kofein", "is_available": True},
+    {"sukl_code": "0012345", "name": "Ibalgin 400", "active_substances": "Ibuprofen", "is_available": True},
+    {"sukl_code": "0000005", "name": "Železo Fe", "active_substances": "Železnatý síran", "is_available": False},
+    {"sukl_code": "0000006", "name": "Aspirin Protect", "active_substances": "Kyselina acetylsalicylová", "is_available": True},
+]
+
+
+@pytest.fixture
+def index():
+    return DrugSuggestIndex(DRUGS)
+
+
+class TestDrugSuggestIndex:
+    def test_normalization(self):
+        assert normalize_drug_text("  Železo-Fe  ") == "zelezo fe"
+
+    def test_prefix_completion_is_case_and_diacritics_insensitive(self, index):
+        assert [r["text"] for r in index.suggest("zelez")] == ["Železo Fe", "Železnatý síran"]
+        assert index.suggest("ŽELEZO")[0]["text"] == "Železo Fe"
+
+    def test_same_name_is_suggested_once_with_available_code(self, index):
+        results = [r for r in index.suggest("paralen") if r["type"] == "drug"]
+
+        assert len(results) == 1
+        assert results[0]["sukl_code"] == "0000002"
+
+    def test_ranking(self, index):
+        results = index.suggest("para")
+        # Name prefix beats substance prefix
+        assert [r["text"] for r in results][:2] == ["Paralen 500", "Paracetamol"]
+        assert results[1]["type"] == "substance"
+
+        # Word-start matches inside a name
+        assert index.suggest("extra")[0]["text"] == "Panadol Extra"
+        assert index.suggest("kofein")[0]["type"] == "substance"
+
+    def test_sukl_code_lookup(self, index):
+        assert index.suggest("0012345")[0]["text"] == "Ibalgin 400"
+        # Leading zeros are optional
+        result = index.suggest("12345")[0]
+        assert result["text"] == "Ibalgin 400" and result["sukl_code"] == "0012345"
+
+    def test_typos_fall_back_to_trigrams(self, index):
+        results = index.suggest("ibalgni")
+        assert results and results[0]["text"] == "Ibalgin 400"
+        assert results[0]["score"] < 0.7
+
+    def test_limit_and_empty_query(self, index):
+        assert len(index.suggest("p", limit=2)) == 2
+        assert index.suggest("  ") == []
+        assert index.suggest("xyzxyz") == []
+
+    def test_latency(self):
+        drugs = [
+            {"sukl_code": f"{i:07d}", "name": f"{prefix}{i % 5000} {i % 7} mg",
+             "active_substances": f"latka{i % 800}", "is_available": i % 4 != 0}
+            for i, prefix in ((i, ("PARALEN", "IBALGIN", "XARELTO", "METFORMIN", "NUROFEN")[i % 5]) for i in range(50_000))
+        ]
+        index = DrugSuggestIndex(drugs)
+
+        for query in ("p", "par", "paralen 12", "metfromin", "0001234"):
+            start = time.perf_counter()
+            index.suggest(query)
+            assert (time.perf_counter() - start) * 1000 < 50, query
+
+
+def test_fetch_drug_rows_pages():
+    supabase = MagicMock()
+    query = supabase.table.return_value.select.return_value.order.return_value
+    query.range.return_value.execute.side_effect = [
+        MagicMock(data=[{"sukl_code": "1"}, {"sukl_code": "2"}]), MagicMock(data=[])
+    ]
+
+    assert len(list(fetch_drug_rows(supabase, SUGGEST_COLUMNS, page_size=2))) == 2
+    assert [c.args for c in query.range.call_args_list] == [(0, 1), (2, 3)]
+    supabase.table.return_value.select.assert_called_with(SUGGEST_COLUMNS)
+
+
+def test_app_and_pipeline_use_the_same_stamp_path():
+    """The default must not depend on the working directory the API is started from."""
+    from backend.app.core.config import Settings
+    from backend.data_processing.config.settings import settings as pipeline_settings
+
+    assert Settings.model_fields["DRUG_DATA_STAMP_PATH"].default == str(pipeline_settings.DRUG_DATA_STAMP_PATH)
+
+
+def test_index_services_must_implement_build_index():
+    with pytest.raises(TypeError):
+        DrugDataIndexService()
+
+
+class TestSuggestService:
+    def make_supabase(self, rows):
+        supabase = MagicMock()
+        supabase.table.return_value.select.return_value.order.return_value.range.return_value \
+            .execute.return_value.data = rows
+        return supabase
+
+    def test_not_ready_until_built(self):
+        service = SuggestService()
+        assert service.suggest("para") is None
+
+        with patch("backend.app.services.drug_data.get_supabase_client", return_value=self.make_supabase(DRUGS)):
+            assert service.refresh_if_stale() is True
+        assert service.suggest("para")
+
+    def test_rebuilds_when_pipeline_stamp_changes(self, tmp_path):
+        stamp = tmp_path / "drugs_updated_at"
+        service = SuggestService(str(stamp))
+        supabase = self.make_supabase(DRUGS)
+
+        with patch("backend.app.services.drug_data.get_supabase_client", return_value=supabase):
+            assert service.refresh_if_stale() is True
+            assert service.refresh_if_stale() is False
+
+            supabase.table.return_value.select.return_value.order.return_value.range.return_value \
+                .execute.return_value.data = DRUGS + [{"sukl_code": "0000099", "name": "Novalgin"}]
+            stamp.touch()
+            os.utime(stamp, (time.time() + 5, time.time() + 5))
+            assert service.refresh_if_stale() is True
+            assert service.refresh_if_stale() is False
+
+        assert service.suggest("noval")[0]["text"] == "Novalgin"
+
+
+class TestSuggestEndpoint:
+    @pytest.fixture
+    def client(self):
+        from backend.main import app
+        from backend.app.api.v1.deps import get_current_user
+        app.dependency_overrides[get_current_user] = lambda: {"id": "test_user"}
+        yield TestClient(app)
+        app.dependency_overrides = {}
+
+    def test_suggest(self, client):
+        service = SuggestService()
+        service.index = DrugSuggestIndex(DRUGS)
+
+        with patch("backend.app.api.v1.endpoints.drugs.suggest_service", service), \
+             patch("backend.app.api.v1.endpoints.drugs.search_service") as search:
+            response = client.get("/api/v1/drugs/suggest", params={"q": "ibal", "limit": 5})
+
+        assert response.status_code == 200
+        assert response.json()[0]["text"] == "Ibalgin 400"
+        search.search_drugs.assert_not_called()
+
+    def test_not_ready(self, client):
+        with patch("backend.app.api.v1.endpoints.drugs.suggest_service", SuggestService()):
+            response = client.get("/api/v1/drugs/suggest", params={"q": "ibal"})
+
+        assert response.status_code == 503
@@ -17,9 +17,9 @@ async def test_search_drugs_found(mock_supabase):
         {
             "name": "PARALEN",
             "sukl_code": "0123456",
-            "active_substance": "paracetamol",
+            "active_substances": "paracetamol",
             "strength": "500MG",
-            "pharmaceutical_form": "TBL NOB"
+            "form": "TBL NOB"
         }
     ]
     
@@ -38,6 +38,9 @@ async def test_search_drugs_found(mock_supabase):
     assert "SÚKL: 0123456" in result
     # Check URL generation
     assert "https://www.sukl.cz/modules/medication/detail.php?code=0123456" in result
+    assert "Active Substance: paracetamol" in result
+    assert "Form: TBL NOB" in result
+    assert "*" not in mock_supabase.table.return_value.select.call_args.args[0]
 
 @pytest.mark.asyncio
 async def test_search_drugs_not_found(mock_supabase):
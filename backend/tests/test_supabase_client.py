@@ -0,0 +1,71 @@
+"""
+Tests for the pooled Supabase client manager (data_processing/utils/supabase_client.py).
+"""
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+
+from backend.data_processing.utils.supabase_client import SupabaseClientManager, SupabaseSingleton
+
+
+@pytest.fixture
+def manager():
+    return SupabaseClientManager("http://localhost:54321", "test-key", max_connections=5, max_keepalive_connections=2)
+
+
+class TestSupabaseClientManager:
+    """Tests for client sharing, health checks and pool metrics."""
+
+    def test_client_is_created_once_across_threads(self, manager):
+        with patch("backend.data_processing.utils.supabase_client.create_client") as mock_create:
+            mock_create.return_value = MagicMock()
+            threads = [threading.Thread(target=manager.get_client) for _ in range(10)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        mock_create.assert_called_once()
+        options = mock_create.call_args.kwargs["options"]
+        assert options.httpx_client is manager._http_client
+        assert manager._http_client._transport._pool._max_connections == 5
+        assert manager.get_stats()["acquisitions"] == 10
+
+    def test_health_check_healthy(self, manager):
+        manager._client = MagicMock()
+
+        health = manager.health_check()
+
+        assert health["status"] == "healthy"
+        assert health["latency_ms"] >= 0
+        manager._client.table.assert_called_once_with("drugs")
+
+    def test_health_check_unhealthy(self, manager):
+        manager._client = MagicMock()
+        manager._client.table.side_effect = Exception("connection refused")
+
+        health = manager.health_check()
+
+        assert health["status"] == "unhealthy"
+        assert "connection refused" in health["error"]
+
+    def test_stats_count_requests_and_server_errors(self, manager):
+        manager._on_request(MagicMock())
+        manager._on_request(MagicMock())
+        manager._on_response(MagicMock(status_code=200))
+        manager._on_response(MagicMock(status_code=503))
+
+        stats = manager.get_stats()
+        assert stats["requests"] == 2
+        assert stats["server_errors"] == 1
+        assert stats["sync_pool"] == {"open": 0, "idle": 0, "active": 0}
+
+    def test_singleton_delegates_to_shared_manager(self):
+        with patch("backend.data_processing.utils.supabase_client.supabase_manager") as mock_manager:
+            assert SupabaseSingleton.get_client() is mock_manager.get_client.return_value
+
+    def test_app_database_uses_shared_manager(self):
+        from backend.app.core.database import get_supabase_client
+
+        with patch("backend.app.core.database.supabase_manager") as mock_manager:
+            assert get_supabase_client() is mock_manager.get_client.return_value
@@ -0,0 +1,122 @@
+"""
+Tests for streaming uploads to disk (guideline PDFs and audio transcription).
+"""
+import asyncio
+import hashlib
+import io
+import os
+import pytest
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend.main import app
+from backend.services.uploads import UploadTooLargeError, save_upload, unique_temp_path
+
+client = TestClient(app)
+
+
+def make_upload(content: bytes, filename: str = "file.pdf", size=None) -> UploadFile:
+    return UploadFile(file=io.BytesIO(content), filename=filename, size=size)
+
+
+class TestSaveUpload:
+    @pytest.mark.asyncio
+    async def test_writes_in_chunks_and_hashes(self, tmp_path):
+        content = os.urandom(10_000)
+        upload = make_upload(content)
+        reads = []
+        original_read = upload.read
+
+        async def tracking_read(size=-1):
+            reads.append(size)
+            return await original_read(size)
+
+        upload.read = tracking_read
+        dest = str(tmp_path / "out.pdf")
+
+        stored = await save_upload(upload, dest, max_size_bytes=20_000, chunk_size=1024)
+
+        assert open(dest, "rb").read() == content
+        assert stored.size_bytes == len(content)
+        assert stored.sha256 == hashlib.sha256(content).hexdigest()
+        assert set(reads) == {1024}
+
+    @pytest.mark.asyncio
+    async def test_aborts_early_and_leaves_no_file(self, tmp_path):
+        upload = make_upload(b"x" * 10_000)
+        dest = str(tmp_path / "out.pdf")
+
+        with pytest.raises(UploadTooLargeError) as exc_info:
+            await save_upload(upload, dest, max_size_bytes=2_000, chunk_size=1024)
+
+        # Stopped at the first chunk over the limit instead of reading everything
+        assert exc_info.value.size_bytes == 2048
+        assert os.listdir(tmp_path) == []
+
+    @pytest.mark.asyncio
+    async def test_declared_size_rejected_without_reading(self, tmp_path):
+        upload = make_upload(b"x" * 10, size=5_000)
+        upload.read = AsyncMock()
+
+        with pytest.raises(UploadTooLargeError):
+            await save_upload(upload, str(tmp_path / "out.pdf"), max_size_bytes=1_000)
+
+        upload.read.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_same_name_uploads_do_not_interleave(self, tmp_path):
+        dest = str(tmp_path / "same.pdf")
+        contents = [bytes([i]) * 50_000 for i in range(1, 5)]
+
+        await asyncio.gather(*(
+            save_upload(make_upload(c), dest, max_size_bytes=100_000, chunk_size=1000) for c in contents
+        ))
+
+        assert open(dest, "rb").read() in contents
+        assert os.listdir(tmp_path) == ["same.pdf"]
+
+    def test_unique_temp_path_keeps_extension(self, tmp_path):
+        first = unique_temp_path(str(tmp_path), "recording.webm")
+        second = unique_temp_path(str(tmp_path), "recording.webm")
+
+        assert first != second
+        assert first.endswith(".webm") and second.endswith(".webm")
+
+
+class TestTranscribeUpload:
+    def test_transcribe_uses_unique_temp_file_and_cleans_up(self, tmp_path):
+        seen_paths = []
+
+        async def transcribe(path):
+            seen_paths.append(path)
+            assert open(path, "rb").read() == b"audio-bytes"
+            return "Pacient udává bolest hlavy."
+
+        service = MagicMock()
+        service.transcribe_audio = AsyncMock(side_effect=transcribe)
+        files = {"file": ("note.webm", io.BytesIO(b"audio-bytes"), "audio/webm")}
+
+        with patch("backend.app.api.v1.endpoints.ai.TEMP_UPLOAD_DIR", str(tmp_path)), \
+             patch("backend.services.transcription.TranscriptionService", return_value=service):
+            first = client.post("/api/v1/ai/transcribe", files=files)
+            files = {"file": ("note.webm", io.BytesIO(b"audio-bytes"), "audio/webm")}
+            second = client.post("/api/v1/ai/transcribe", files=files)
+
+        assert first.status_code == second.status_code == 200
+        assert first.json()["transcript"] == "Pacient udává bolest hlavy."
+        assert seen_paths[0] != seen_paths[1]
+        assert all(p.name != "note.webm" and p.suffix == ".webm" for p in seen_paths)
+        assert os.listdir(tmp_path) == []
+
+    def test_transcribe_rejects_oversized_audio(self, tmp_path):
+        files = {"file": ("note.webm", io.BytesIO(b"x" * 2048), "audio/webm")}
+
+        with patch("backend.app.api.v1.endpoints.ai.TEMP_UPLOAD_DIR", str(tmp_path)), \
+             patch("backend.app.api.v1.endpoints.ai.MAX_AUDIO_FILE_SIZE", 1024), \
+             patch("backend.services.transcription.TranscriptionService") as service_cls:
+            response = client.post("/api/v1/ai/transcribe", files=files)
+
+        assert response.status_code == 413
+        service_cls.assert_not_called()
+        assert os.listdir(tmp_path) == []
@@ -0,0 +1,151 @@
+"""
+Regression tests for the index-driven search_drugs / match_guidelines RPCs.
+
+The static tests check the migration SQL. The EXPLAIN tests run against a real
+Postgres with pgvector and are skipped unless VECTOR_RPC_TEST_DATABASE_URL
+points at a disposable database (they create and drop their own schema and need
+superuser rights to LOAD auto_explain).
+"""
+import json
+import os
+import re
+import pytest
+
+from backend.scripts.benchmark_vector_rpcs import MIGRATION_PATHS, create_sandbox
+
+DATABASE_URL = os.getenv("VECTOR_RPC_TEST_DATABASE_URL")
+SCHEMA = "vector_rpc_test"
+
+
+def function_body(name: str) -> str:
+    """Body of the latest definition of `name` across the vector migrations."""
+    body = None
+    for path in MIGRATION_PATHS:
+        with open(path, encoding="utf-8") as f:
+            sql = f.read()
+        match = re.search(rf"CREATE OR REPLACE FUNCTION {name}\(.*?\$\$(.*?)\$\$", sql, re.S)
+        if match:
+            body = match.group(1)
+    assert body, f"{name} not found in migrations"
+    return body
+
+
+def top_k_queries(body: str):
+    """The index-ordered candidate query of every branch: WHERE ... ORDER BY ... LIMIT."""
+    return re.findall(r"WHERE([^;]*?)ORDER BY([^;]*?)LIMIT (\w+)", body)
+
+
+class TestMigrationSql:
+    @pytest.mark.parametrize("name", ["search_drugs", "match_guidelines"])
+    def test_threshold_is_applied_after_top_k(self, name):
+        body = function_body(name)
+        candidate_queries = [q for q in top_k_queries(body) if "embedding_version" in q[0]]
+
+        assert len(candidate_queries) == len(["full", "halfvec", "binary"])
+        for where_clause, _, _ in candidate_queries:
+            assert "match_threshold" not in where_clause
+            # Distances are only computed by the ORDER BY the index serves
+            assert "<=>" not in where_clause and "<~>" not in where_clause
+        # ... and the threshold only filters the (re-scored) candidates
+        assert len(re.findall(r"WHERE 1 - \w\.distance > match_threshold", body)) == 3
+        assert body.count("match_threshold") == 3
+
+    @pytest.mark.parametrize("name", ["search_drugs", "match_guidelines"])
+    def test_reduced_precision_candidates_are_rescored(self, name):
+        body = function_body(name)
+        limits = [limit for _, _, limit in top_k_queries(body)]
+
+        assert limits.count("candidate_count") == 2
+        assert "binary_quantize(query_embedding)" in body
+        assert "query_embedding::halfvec(1536)" in body
+        assert body.count("c.embedding <=> query_embedding AS distance") == 2
+
+    @pytest.mark.parametrize("name", ["search_drugs", "match_guidelines"])
+    def test_sets_ef_search(self, name):
+        assert "f_set_hnsw_search" in function_body(name)
+
+    def test_full_precision_hnsw_indexes_are_replaced(self):
+        with open(MIGRATION_PATHS[-1], encoding="utf-8") as f:
+            sql = f.read()
+
+        for index in ("drugs_embedding_idx", "idx_drugs_embedding", "idx_guidelines_embedding"):
+            assert f"DROP INDEX IF EXISTS {index};" in sql
+        assert sql.count("search_precision text DEFAULT 'halfvec'") == 2
+
+
+def collect_plans(notices):
+    plans = []
+    for message in notices:
+        if "plan:" in message:
+            plans.append(json.loads(message.split("plan:", 1)[1]))
+    return plans
+
+
+def walk(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from walk(child)
+
+
+@pytest.mark.skipif(not DATABASE_URL, reason="VECTOR_RPC_TEST_DATABASE_URL not set")
+class TestExplainPlans:
+    @pytest.fixture(scope="class")
+    def conn(self):
+        psycopg = pytest.importorskip("psycopg")
+        with psycopg.connect(DATABASE_URL) as conn:
+            create_sandbox(conn, SCHEMA, rows=10_000)
+            notices = []
+            conn.add_notice_handler(lambda diag: notices.append(diag.message_primary))
+            conn.notices = notices
+            with conn.cursor() as cur:
+                try:
+                    cur.execute("LOAD 'auto_explain'")
+                except Exception as e:
+                    pytest.skip(f"auto_explain not available: {e}")
+                cur.execute("SET auto_explain.log_min_duration = 0")
+                cur.execute("SET auto_explain.log_nested_statements = on")
+                cur.execute("SET auto_explain.log_format = 'json'")
+                cur.execute("SET auto_explain.log_level = 'notice'")
+            conn.commit()
+            yield conn
+            with conn.cursor() as cur:
+                cur.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+            conn.commit()
+
+    def nested_scans(self, conn, sql, table):
+        conn.notices.clear()
+        with conn.cursor() as cur:
+            cur.execute("SELECT embedding::text FROM drugs LIMIT 1")
+            query_vector = cur.fetchone()[0]
+            cur.execute(sql, {"q": query_vector})
+            cur.fetchall()
+        conn.rollback()
+        scans = []
+        for plan in collect_plans(conn.notices):
+            for node in walk(plan["Plan"]):
+                if node.get("Relation Name") == table:
+                    scans.append((node["Node Type"], node.get("Index Name")))
+        return scans
+
+    @pytest.mark.parametrize("sql", [
+        "SELECT * FROM search_drugs(%(q)s::vector, 0.5, 10)",
+        "SELECT * FROM search_drugs(%(q)s::vector, 0.5, 10, 100, true, 'R')",
+        "SELECT * FROM search_drugs(%(q)s::vector, 0.5, 10, 40, NULL, NULL, NULL, 'halfvec')",
+        "SELECT * FROM search_drugs(%(q)s::vector, 0.5, 10, 40, true, NULL, NULL, 'binary', 8)",
+    ])
+    def test_search_drugs_uses_hnsw_index(self, conn, sql):
+        scans = self.nested_scans(conn, sql, "drugs")
+
+        assert scans, "no plan captured for the drugs scan"
+        assert all(node_type == "Index Scan" for node_type, _ in scans), scans
+
+    @pytest.mark.parametrize("sql", [
+        "SELECT * FROM match_guidelines(%(q)s::vector, 0.5, 5)",
+        "SELECT * FROM match_guidelines(%(q)s::vector, 0.5, 5, 40, 'ČKS', NULL)",
+        "SELECT * FROM match_guidelines(%(q)s::vector, 0.5, 5, 40, NULL, NULL, NULL, 'binary')",
+    ])
+    def test_match_guidelines_uses_hnsw_index(self, conn, sql):
+        scans = self.nested_scans(conn, sql, "guidelines")
+
+        assert scans, "no plan captured for the guidelines scan"
+        assert all(node_type == "Index Scan" for node_type, _ in scans), scans
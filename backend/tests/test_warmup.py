@@ -0,0 +1,156 @@
+"""
+Tests for the cache warm-up from the query log (app/services/warmup.py).
+"""
+import asyncio
+import sys
+import time
+import types
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.app.services.warmup import CacheWarmer, compile_graphs, top_queries
+from backend.pipeline.retrievers.pubmed import PubMedRetriever, RequestPacer
+from backend.pipeline.retrievers.sukl_retriever import SuklRetriever
+from backend.services.cache import BoundedCache, TieredCache, cache
+from backend.services.cache_backends import SQLiteBackend
+
+
+def query_log(*texts):
+    supabase = MagicMock()
+    supabase.table.return_value.select.return_value.order.return_value.limit.return_value \
+        .execute.return_value.data = [{"query_text": text} for text in texts]
+    return supabase
+
+
+def test_top_queries_groups_normalized_text():
+    supabase = query_log(
+        "Metformin dávkování", "metformin  davkovani", "Metformin dávkování",
+        "paralen", "", None, "x" * 1000, "ibalgin", "Paralen",
+    )
+
+    assert top_queries(supabase, limit=2, scan_limit=100) == ["Metformin dávkování", "paralen"]
+    supabase.table.return_value.select.return_value.order.return_value.limit.assert_called_once_with(100)
+
+
+def test_compile_graphs_reports_failures(monkeypatch):
+    monkeypatch.setitem(sys.modules, "fake_graph", types.SimpleNamespace(app=object()))
+
+    assert compile_graphs(("fake_graph", "backend.missing_graph")) == {
+        "fake_graph": True, "backend.missing_graph": False
+    }
+
+
+class TestCacheWarmer:
+    @pytest.fixture
+    def retrievers(self):
+        calls = {"sukl": [], "pubmed": [], "in_flight": 0, "max_in_flight": 0}
+
+        async def track(kind, key, query):
+            calls[kind].append(query)
+            calls["in_flight"] += 1
+            calls["max_in_flight"] = max(calls["max_in_flight"], calls["in_flight"])
+            await asyncio.sleep(0.01)
+            calls["in_flight"] -= 1
+            cache.set(key, f"{kind} results", ttl=60)
+
+        async def search_drugs(self, query):
+            await track("sukl", SuklRetriever.cache_key(query), query)
+
+        async def search(self, query, max_results=3):
+            await track("pubmed", PubMedRetriever.cache_key(query, max_results), query)
+
+        with patch("backend.pipeline.retrievers.sukl_retriever.SupabaseSingleton"), \
+             patch.object(SuklRetriever, "search_drugs", search_drugs), \
+             patch.object(PubMedRetriever, "search", search):
+            yield calls
+        for query in ("paralen", "ibalgin", "metformin"):
+            cache.delete(SuklRetriever.cache_key(query))
+            cache.delete(PubMedRetriever.cache_key(query))
+
+    async def test_run_warms_retriever_caches_with_bounded_concurrency(self, retrievers):
+        warmer = CacheWarmer()
+        supabase = query_log("paralen", "paralen", "ibalgin", "metformin")
+
+        with patch("backend.app.services.warmup.settings.OPENAI_API_KEY", None), \
+             patch.object(CacheWarmer, "_take_pubmed_lock", return_value=True):
+            stats = await warmer.run(limit=3, concurrency=2, graphs=False, supabase=supabase)
+
+        assert stats["queries"] == 3
+        assert stats["warmed"] == {"embeddings": 0, "sukl": 3, "pubmed": 3}
+        assert retrievers["sukl"][0] == "paralen"
+        # Two general slots plus the single PubMed slot
+        assert retrievers["max_in_flight"] <= 3
+        assert cache.get(SuklRetriever.cache_key("metformin")) == "sukl results"
+        assert warmer.get_stats()["ready"] is True
+
+    async def test_pubmed_is_not_warmed_without_shared_cache(self, retrievers):
+        with patch("backend.app.services.warmup.settings.OPENAI_API_KEY", None):
+            stats = await CacheWarmer().run(graphs=False, supabase=query_log("paralen"))
+
+        assert stats["warmed"] == {"embeddings": 0, "sukl": 1, "pubmed": 0}
+        assert retrievers["pubmed"] == []
+
+    async def test_one_worker_warms_pubmed(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        worker_a = TieredCache(BoundedCache(sweep_interval=0), SQLiteBackend(path))
+        worker_b = TieredCache(BoundedCache(sweep_interval=0), SQLiteBackend(path))
+
+        with patch("backend.services.cache.cache", worker_a):
+            assert await CacheWarmer()._take_pubmed_lock()
+        with patch("backend.services.cache.cache", worker_b):
+            assert not await CacheWarmer()._take_pubmed_lock()
+
+    async def test_refresh_refetches_cached_entries(self, retrievers):
+        cache.set(SuklRetriever.cache_key("paralen"), "old drug data", ttl=60)
+
+        with patch("backend.app.services.warmup.settings.OPENAI_API_KEY", None):
+            await CacheWarmer().run(
+                graphs=False, refresh_namespaces=("sukl",), supabase=query_log("paralen")
+            )
+
+        assert cache.get(SuklRetriever.cache_key("paralen")) == "sukl results"
+
+    async def test_shared_only_skips_in_process_caches(self, retrievers):
+        with patch("backend.app.services.warmup.settings.OPENAI_API_KEY", "sk-test"), \
+             patch("backend.app.services.warmup.settings.EMBEDDING_CACHE_PATH", None), \
+             patch("backend.app.services.warmup.pipeline_settings.RETRIEVER_CACHE_BACKEND", "memory"):
+            stats = await CacheWarmer().run(graphs=False, shared_only=True, supabase=query_log("paralen"))
+
+        assert stats["warmed"] == {"embeddings": 0, "sukl": 0, "pubmed": 0}
+        assert retrievers["sukl"] == [] and retrievers["pubmed"] == []
+
+    async def test_embeddings_are_batched_and_cached(self, retrievers):
+        from backend.app.services.search_service import search_service
+
+        generator = MagicMock(model="test-model")
+
+        async def embed(texts):
+            return [[0.1, 0.2] for _ in texts]
+
+        generator.generate_embeddings_async.side_effect = embed
+        with patch("backend.app.services.warmup.settings.OPENAI_API_KEY", "sk-test"), \
+             patch("backend.app.services.warmup.WARMUP_EMBEDDING_MODELS", ("test-model",)), \
+             patch.object(search_service, "_get_embedding_generator", return_value=generator):
+            stats = await CacheWarmer().run(graphs=False, supabase=query_log("paralen", "ibalgin"))
+
+        assert stats["warmed"]["embeddings"] == 2
+        generator.generate_embeddings_async.assert_called_once_with(["paralen", "ibalgin"])
+        assert search_service.embedding_cache.get("paralen", "test-model") == [0.1, 0.2]
+
+    async def test_query_log_failure_still_finishes(self):
+        supabase = MagicMock()
+        supabase.table.side_effect = RuntimeError("relation queries does not exist")
+
+        stats = await CacheWarmer().run(graphs=False, supabase=supabase)
+
+        assert stats["queries"] == 0 and stats["failed"] == 0
+
+
+async def test_ncbi_requests_are_paced():
+    pacer = RequestPacer(0.05)
+    start = time.monotonic()
+
+    await asyncio.gather(*[pacer.wait() for _ in range(4)])
+
+    assert time.monotonic() - start >= 0.15
@@ -0,0 +1,3 @@
+-- Content hash of the loaded drug row (parsed DLP fields + search_text).
+-- Lets the drug pipeline skip unchanged rows and re-embed only changed search_text.
+ALTER TABLE drugs ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
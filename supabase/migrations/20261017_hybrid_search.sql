@@ -0,0 +1,111 @@
+-- Migration: 20261017_hybrid_search.sql
+-- Description: Accent-insensitive full-text search over drugs and guidelines.
+-- Used together with the pgvector RPCs (search_drugs, match_guidelines) for
+-- hybrid retrieval; the two rankings are fused in SearchService with
+-- reciprocal rank fusion.
+--
+-- Postgres ships no Czech stemmer, so the 'simple' configuration is combined
+-- with unaccent: "léčivý" and "lecivy" produce the same lexeme, and SÚKL codes
+-- and brand names are kept verbatim.
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() is only STABLE; generated columns and indexes need an IMMUTABLE wrapper.
+-- The wrapper schema-qualifies the function and dictionary (it must not depend on
+-- search_path), using whichever schema the extension was created in: Supabase
+-- enables extensions in "extensions", plain Postgres in "public".
+DO $$
+DECLARE
+    ext_schema text;
+BEGIN
+    SELECT n.nspname INTO ext_schema
+    FROM pg_extension e JOIN pg_namespace n ON n.oid = e.extnamespace
+    WHERE e.extname = 'unaccent';
+
+    EXECUTE format(
+        $fn$
+        CREATE OR REPLACE FUNCTION f_unaccent(text)
+        RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $body$
+            SELECT %I.unaccent(%L::regdictionary, $1)
+        $body$
+        $fn$,
+        ext_schema,
+        quote_ident(ext_schema) || '.unaccent'
+    );
+END
+$$;
+
+-- Drugs: name is weighted above active substances; the SÚKL code is searchable as a token
+ALTER TABLE drugs ADD COLUMN IF NOT EXISTS fts tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', f_unaccent(COALESCE(name, '') || ' ' || COALESCE(sukl_code, ''))), 'A') ||
+    setweight(to_tsvector('simple', f_unaccent(COALESCE(active_substances, ''))), 'B')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_drugs_fts_unaccent ON drugs USING gin (fts);
+
+-- Guidelines: chunk text, with the document title as a weaker signal
+ALTER TABLE guidelines ADD COLUMN IF NOT EXISTS fts tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', f_unaccent(COALESCE(content, ''))), 'A') ||
+    setweight(to_tsvector('simple', f_unaccent(COALESCE(title, ''))), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_guidelines_fts ON guidelines USING gin (fts);
+
+-- Query terms are OR-ed (websearch syntax would AND them) so natural-language
+-- questions still match; ts_rank_cd ranks rows matching more terms higher.
+-- The query is built from the lexemes of the text, so operators typed by the
+-- user (quotes, "-" negation) are read as plain words instead of being
+-- rewritten into a different query. Each lexeme is quoted for tsquery input;
+-- text without lexemes yields NULL and matches nothing.
+CREATE OR REPLACE FUNCTION f_fts_query(query_text text)
+RETURNS tsquery
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$
+    SELECT string_agg(
+        '''' || replace(replace(lexeme, '\', '\\'), '''', '''''') || '''',
+        ' | '
+    )::tsquery
+    FROM unnest(tsvector_to_array(to_tsvector('simple', f_unaccent(query_text)))) AS lexeme
+$$;
+
+-- Full-text drug search, ranked with ts_rank_cd
+CREATE OR REPLACE FUNCTION search_drugs_fts(
+    query_text text,
+    match_count int DEFAULT 20
+) RETURNS TABLE (
+    id UUID,
+    sukl_code VARCHAR,
+    name VARCHAR,
+    active_substances TEXT,
+    atc_name VARCHAR,
+    rank real
+) LANGUAGE sql STABLE AS $$
+    SELECT d.id, d.sukl_code::varchar, d.name::varchar,
+        d.active_substances, d.atc_name::varchar,
+        ts_rank_cd(d.fts, q) AS rank
+    FROM drugs d, f_fts_query(query_text) q
+    WHERE d.fts @@ q
+    ORDER BY rank DESC
+    LIMIT match_count;
+$$;
+
+-- Full-text guideline chunk search, ranked with ts_rank_cd
+CREATE OR REPLACE FUNCTION match_guidelines_fts(
+    query_text text,
+    match_count int DEFAULT 5
+) RETURNS TABLE (
+    id uuid,
+    title text,
+    content text,
+    metadata jsonb,
+    rank real
+) LANGUAGE sql STABLE AS $$
+    SELECT g.id, g.title, g.content, g.metadata,
+        ts_rank_cd(g.fts, q) AS rank
+    FROM guidelines g, f_fts_query(query_text) q
+    WHERE g.fts @@ q
+    ORDER BY rank DESC
+    LIMIT match_count;
+$$;
@@ -0,0 +1,168 @@
+-- Migration: 20261017_index_friendly_vector_rpcs.sql
+-- Description: Index-driven top-k for search_drugs and match_guidelines.
+--
+-- The previous versions filtered with
+--     WHERE 1 - (embedding <=> q) > match_threshold
+-- before ORDER BY ... LIMIT. The HNSW index can only serve
+-- ORDER BY embedding <=> q LIMIT k, so that predicate forced a distance
+-- computation for every row. The new versions take the top-k from the index
+-- first and apply the similarity threshold to those candidates.
+--
+-- Both functions also take:
+--   ef_search  - hnsw.ef_search for this call (candidate list size; recall vs. latency)
+--   filter_*   - optional metadata prefilters (NULL = no filter). With a filter,
+--                pgvector >= 0.8 iterative index scans are enabled so selective
+--                filters still return up to match_count rows.
+--
+-- Existing callers passing (query_embedding, match_threshold, match_count) keep working.
+
+DROP FUNCTION IF EXISTS search_drugs(vector, double precision, integer);
+DROP FUNCTION IF EXISTS match_guidelines(vector, double precision, integer);
+
+-- Transaction-local HNSW settings; iterative_scan is skipped on pgvector < 0.8
+CREATE OR REPLACE FUNCTION f_set_hnsw_search(ef_search int, iterative boolean)
+RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM set_config('hnsw.ef_search', ef_search::text, true);
+    IF iterative THEN
+        BEGIN
+            PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+        EXCEPTION WHEN OTHERS THEN
+            NULL;
+        END;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION search_drugs(
+    query_embedding vector(1536),
+    match_threshold float DEFAULT 0.7,
+    match_count int DEFAULT 10,
+    ef_search int DEFAULT 40,
+    filter_is_available boolean DEFAULT NULL,
+    filter_registration_status text DEFAULT NULL
+) RETURNS TABLE (
+    id UUID,
+    sukl_code VARCHAR,
+    name VARCHAR,
+    active_substances TEXT,
+    atc_name VARCHAR,
+    similarity float
+) LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM f_set_hnsw_search(
+        GREATEST(ef_search, match_count),
+        filter_is_available IS NOT NULL OR filter_registration_status IS NOT NULL
+    );
+
+    RETURN QUERY
+    WITH candidates AS MATERIALIZED (
+        SELECT d.id, d.sukl_code, d.name, d.active_substances, d.atc_name,
+            d.embedding <=> query_embedding AS distance
+        FROM drugs d
+        WHERE (filter_is_available IS NULL OR d.is_available = filter_is_available)
+          AND (filter_registration_status IS NULL OR d.registration_status = filter_registration_status)
+        ORDER BY d.embedding <=> query_embedding
+        LIMIT match_count
+    )
+    SELECT c.id, c.sukl_code::varchar, c.name::varchar, c.active_substances, c.atc_name::varchar,
+        1 - c.distance AS similarity
+    FROM candidates c
+    WHERE 1 - c.distance > match_threshold
+    ORDER BY c.distance;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_guidelines(
+    query_embedding vector(1536),
+    match_threshold float,
+    match_count int,
+    ef_search int DEFAULT 40,
+    filter_organization text DEFAULT NULL,
+    filter_metadata jsonb DEFAULT NULL
+)
+RETURNS TABLE (
+    id uuid,
+    title text,
+    content text,
+    metadata jsonb,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    PERFORM f_set_hnsw_search(
+        GREATEST(ef_search, match_count),
+        filter_organization IS NOT NULL OR filter_metadata IS NOT NULL
+    );
+
+    RETURN QUERY
+    WITH candidates AS MATERIALIZED (
+        SELECT g.id, g.title, g.content, g.metadata,
+            g.embedding <=> query_embedding AS distance
+        FROM guidelines g
+        WHERE (filter_organization IS NULL OR g.organization = filter_organization)
+          AND (filter_metadata IS NULL OR g.metadata @> filter_metadata)
+        ORDER BY g.embedding <=> query_embedding
+        LIMIT match_count
+    )
+    SELECT c.id, c.title, c.content, c.metadata, 1 - c.distance AS similarity
+    FROM candidates c
+    WHERE 1 - c.distance > match_threshold
+    ORDER BY c.distance;
+END;
+$$;
+
+-- Same prefilters for the full-text rankings used by hybrid search
+DROP FUNCTION IF EXISTS search_drugs_fts(text, integer);
+DROP FUNCTION IF EXISTS match_guidelines_fts(text, integer);
+
+CREATE OR REPLACE FUNCTION search_drugs_fts(
+    query_text text,
+    match_count int DEFAULT 20,
+    filter_is_available boolean DEFAULT NULL,
+    filter_registration_status text DEFAULT NULL
+) RETURNS TABLE (
+    id UUID,
+    sukl_code VARCHAR,
+    name VARCHAR,
+    active_substances TEXT,
+    atc_name VARCHAR,
+    rank real
+) LANGUAGE sql STABLE AS $$
+    SELECT d.id, d.sukl_code::varchar, d.name::varchar,
+        d.active_substances, d.atc_name::varchar,
+        ts_rank_cd(d.fts, q) AS rank
+    FROM drugs d, f_fts_query(query_text) q
+    WHERE d.fts @@ q
+      AND (filter_is_available IS NULL OR d.is_available = filter_is_available)
+      AND (filter_registration_status IS NULL OR d.registration_status = filter_registration_status)
+    ORDER BY rank DESC
+    LIMIT match_count;
+$$;
+
+CREATE OR REPLACE FUNCTION match_guidelines_fts(
+    query_text text,
+    match_count int DEFAULT 5,
+    filter_organization text DEFAULT NULL,
+    filter_metadata jsonb DEFAULT NULL
+) RETURNS TABLE (
+    id uuid,
+    title text,
+    content text,
+    metadata jsonb,
+    rank real
+) LANGUAGE sql STABLE AS $$
+    SELECT g.id, g.title, g.content, g.metadata,
+        ts_rank_cd(g.fts, q) AS rank
+    FROM guidelines g, f_fts_query(query_text) q
+    WHERE g.fts @@ q
+      AND (filter_organization IS NULL OR g.organization = filter_organization)
+      AND (filter_metadata IS NULL OR g.metadata @> filter_metadata)
+    ORDER BY rank DESC
+    LIMIT match_count;
+$$;
+
+-- Prefilter columns used together with the HNSW scans
+CREATE INDEX IF NOT EXISTS idx_guidelines_organization ON guidelines (organization);
@@ -0,0 +1,233 @@
+-- Migration: 20261017_quantized_embeddings.sql
+-- Description: Embedding version stamps; halfvec/binary vector indexes replace
+--              the full-precision HNSW indexes.
+--
+-- 1. embedding_version ("<model>:<dimensions>") is stored with every vector.
+--    Drugs are embedded with text-embedding-ada-002 and guidelines with
+--    text-embedding-3-small; the RPCs only compare rows whose version matches
+--    the query's, so vectors from different models are never mixed.
+--
+-- 2. Two expression indexes per table replace the full-precision HNSW index:
+--      halfvec  - (embedding::halfvec(1536))             ~2x less index memory
+--      binary   - (binary_quantize(embedding)::bit(1536)) ~32x less index memory
+--    The full-precision HNSW indexes (drugs_embedding_idx and idx_drugs_embedding,
+--    which duplicated each other, and idx_guidelines_embedding) are dropped, so
+--    vector index memory falls to about half (halfvec) plus 1/32 (binary). The
+--    table keeps the full vector(1536): candidates found through the halfvec or
+--    binary index are re-scored with exact cosine distance.
+--
+-- search_precision ('halfvec' | 'binary' | 'full') selects the index per call,
+-- 'halfvec' by default; 'full' is now an exact scan with no index, kept for
+-- recall checks (backend/scripts/benchmark_vector_rpcs.py reports recall@k
+-- per precision). rescore_factor is how many candidates per requested row are
+-- re-scored.
+
+ALTER TABLE drugs ADD COLUMN IF NOT EXISTS embedding_version TEXT;
+ALTER TABLE guidelines ADD COLUMN IF NOT EXISTS embedding_version TEXT;
+
+-- Existing vectors were produced by the models the loaders have always used
+UPDATE drugs SET embedding_version = 'text-embedding-ada-002:1536'
+WHERE embedding IS NOT NULL AND embedding_version IS NULL;
+UPDATE guidelines SET embedding_version = 'text-embedding-3-small:1536'
+WHERE embedding IS NOT NULL AND embedding_version IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_drugs_embedding_halfvec ON drugs
+    USING hnsw ((embedding::halfvec(1536)) halfvec_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+CREATE INDEX IF NOT EXISTS idx_drugs_embedding_bit ON drugs
+    USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops)
+    WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS idx_guidelines_embedding_halfvec ON guidelines
+    USING hnsw ((embedding::halfvec(1536)) halfvec_cosine_ops);
+CREATE INDEX IF NOT EXISTS idx_guidelines_embedding_bit ON guidelines
+    USING hnsw ((binary_quantize(embedding)::bit(1536)) bit_hamming_ops);
+
+-- The reduced-precision indexes serve every search now
+DROP INDEX IF EXISTS drugs_embedding_idx;
+DROP INDEX IF EXISTS idx_drugs_embedding;
+DROP INDEX IF EXISTS idx_guidelines_embedding;
+
+DROP FUNCTION IF EXISTS search_drugs(vector, double precision, integer, integer, boolean, text);
+DROP FUNCTION IF EXISTS match_guidelines(vector, double precision, integer, integer, text, jsonb);
+
+CREATE OR REPLACE FUNCTION search_drugs(
+    query_embedding vector(1536),
+    match_threshold float DEFAULT 0.7,
+    match_count int DEFAULT 10,
+    ef_search int DEFAULT 40,
+    filter_is_available boolean DEFAULT NULL,
+    filter_registration_status text DEFAULT NULL,
+    query_embedding_version text DEFAULT NULL,
+    search_precision text DEFAULT 'halfvec',
+    rescore_factor int DEFAULT 4
+) RETURNS TABLE (
+    id UUID,
+    sukl_code VARCHAR,
+    name VARCHAR,
+    active_substances TEXT,
+    atc_name VARCHAR,
+    similarity float
+) LANGUAGE plpgsql AS $$
+DECLARE
+    candidate_count int := CASE WHEN search_precision = 'full' THEN match_count
+                                ELSE match_count * GREATEST(rescore_factor, 1) END;
+BEGIN
+    PERFORM f_set_hnsw_search(
+        GREATEST(ef_search, candidate_count),
+        filter_is_available IS NOT NULL OR filter_registration_status IS NOT NULL
+            OR query_embedding_version IS NOT NULL
+    );
+
+    IF search_precision = 'binary' THEN
+        RETURN QUERY
+        WITH candidates AS MATERIALIZED (
+            SELECT d.id, d.sukl_code, d.name, d.active_substances, d.atc_name, d.embedding
+            FROM drugs d
+            WHERE (filter_is_available IS NULL OR d.is_available = filter_is_available)
+              AND (filter_registration_status IS NULL OR d.registration_status = filter_registration_status)
+              AND (query_embedding_version IS NULL OR d.embedding_version = query_embedding_version)
+            ORDER BY binary_quantize(d.embedding)::bit(1536) <~> binary_quantize(query_embedding)
+            LIMIT candidate_count
+        ), rescored AS (
+            SELECT c.*, c.embedding <=> query_embedding AS distance
+            FROM candidates c
+            ORDER BY distance
+            LIMIT match_count
+        )
+        SELECT r.id, r.sukl_code::varchar, r.name::varchar, r.active_substances, r.atc_name::varchar,
+            1 - r.distance AS similarity
+        FROM rescored r
+        WHERE 1 - r.distance > match_threshold
+        ORDER BY r.distance;
+    ELSIF search_precision = 'halfvec' THEN
+        RETURN QUERY
+        WITH candidates AS MATERIALIZED (
+            SELECT d.id, d.sukl_code, d.name, d.active_substances, d.atc_name, d.embedding
+            FROM drugs d
+            WHERE (filter_is_available IS NULL OR d.is_available = filter_is_available)
+              AND (filter_registration_status IS NULL OR d.registration_status = filter_registration_status)
+              AND (query_embedding_version IS NULL OR d.embedding_version = query_embedding_version)
+            ORDER BY d.embedding::halfvec(1536) <=> query_embedding::halfvec(1536)
+            LIMIT candidate_count
+        ), rescored AS (
+            SELECT c.*, c.embedding <=> query_embedding AS distance
+            FROM candidates c
+            ORDER BY distance
+            LIMIT match_count
+        )
+        SELECT r.id, r.sukl_code::varchar, r.name::varchar, r.active_substances, r.atc_name::varchar,
+            1 - r.distance AS similarity
+        FROM rescored r
+        WHERE 1 - r.distance > match_threshold
+        ORDER BY r.distance;
+    ELSE
+        RETURN QUERY
+        WITH candidates AS MATERIALIZED (
+            SELECT d.id, d.sukl_code, d.name, d.active_substances, d.atc_name,
+                d.embedding <=> query_embedding AS distance
+            FROM drugs d
+            WHERE (filter_is_available IS NULL OR d.is_available = filter_is_available)
+              AND (filter_registration_status IS NULL OR d.registration_status = filter_registration_status)
+              AND (query_embedding_version IS NULL OR d.embedding_version = query_embedding_version)
+            ORDER BY d.embedding <=> query_embedding
+            LIMIT match_count
+        )
+        SELECT c.id, c.sukl_code::varchar, c.name::varchar, c.active_substances, c.atc_name::varchar,
+            1 - c.distance AS similarity
+        FROM candidates c
+        WHERE 1 - c.distance > match_threshold
+        ORDER BY c.distance;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION match_guidelines(
+    query_embedding vector(1536),
+    match_threshold float,
+    match_count int,
+    ef_search int DEFAULT 40,
+    filter_organization text DEFAULT NULL,
+    filter_metadata jsonb DEFAULT NULL,
+    query_embedding_version text DEFAULT NULL,
+    search_precision text DEFAULT 'halfvec',
+    rescore_factor int DEFAULT 4
+)
+RETURNS TABLE (
+    id uuid,
+    title text,
+    content text,
+    metadata jsonb,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    candidate_count int := CASE WHEN search_precision = 'full' THEN match_count
+                                ELSE match_count * GREATEST(rescore_factor, 1) END;
+BEGIN
+    PERFORM f_set_hnsw_search(
+        GREATEST(ef_search, candidate_count),
+        filter_organization IS NOT NULL OR filter_metadata IS NOT NULL
+            OR query_embedding_version IS NOT NULL
+    );
+
+    IF search_precision = 'binary' THEN
+        RETURN QUERY
+        WITH candidates AS MATERIALIZED (
+            SELECT g.id, g.title, g.content, g.metadata, g.embedding
+            FROM guidelines g
+            WHERE (filter_organization IS NULL OR g.organization = filter_organization)
+              AND (filter_metadata IS NULL OR g.metadata @> filter_metadata)
+              AND (query_embedding_version IS NULL OR g.embedding_version = query_embedding_version)
+            ORDER BY binary_quantize(g.embedding)::bit(1536) <~> binary_quantize(query_embedding)
+            LIMIT candidate_count
+        ), rescored AS (
+            SELECT c.*, c.embedding <=> query_embedding AS distance
+            FROM candidates c
+            ORDER BY distance
+            LIMIT match_count
+        )
+        SELECT r.id, r.title, r.content, r.metadata, 1 - r.distance AS similarity
+        FROM rescored r
+        WHERE 1 - r.distance > match_threshold
+        ORDER BY r.distance;
+    ELSIF search_precision = 'halfvec' THEN
+        RETURN QUERY
+        WITH candidates AS MATERIALIZED (
+            SELECT g.id, g.title, g.content, g.metadata, g.embedding
+            FROM guidelines g
+            WHERE (filter_organization IS NULL OR g.organization = filter_organization)
+              AND (filter_metadata IS NULL OR g.metadata @> filter_metadata)
+              AND (query_embedding_version IS NULL OR g.embedding_version = query_embedding_version)
+            ORDER BY g.embedding::halfvec(1536) <=> query_embedding::halfvec(1536)
+            LIMIT candidate_count
+        ), rescored AS (
+            SELECT c.*, c.embedding <=> query_embedding AS distance
+            FROM candidates c
+            ORDER BY distance
+            LIMIT match_count
+        )
+        SELECT r.id, r.title, r.content, r.metadata, 1 - r.distance AS similarity
+        FROM rescored r
+        WHERE 1 - r.distance > match_threshold
+        ORDER BY r.distance;
+    ELSE
+        RETURN QUERY
+        WITH candidates AS MATERIALIZED (
+            SELECT g.id, g.title, g.content, g.metadata,
+                g.embedding <=> query_embedding AS distance
+            FROM guidelines g
+            WHERE (filter_organization IS NULL OR g.organization = filter_organization)
+              AND (filter_metadata IS NULL OR g.metadata @> filter_metadata)
+              AND (query_embedding_version IS NULL OR g.embedding_version = query_embedding_version)
+            ORDER BY g.embedding <=> query_embedding
+            LIMIT match_count
+        )
+        SELECT c.id, c.title, c.content, c.metadata, 1 - c.distance AS similarity
+        FROM candidates c
+        WHERE 1 - c.distance > match_threshold
+        ORDER BY c.distance;
+    END IF;
+END;
+$$;